@@ -0,0 +1,4 @@
+"""
+End-to-end pipeline benchmarks: synthetic media (`fixtures`), fake Google
+backends (`fakes`) and the runner (`run`).
+"""
@@ -0,0 +1,186 @@
+"""
+Deterministic fake Google Vision / Speech backends for benchmarks.
+
+Every answer is derived from a hash of the request content (plus `seed`),
+so the same fixture produces the same intervals on every run. Requests
+sleep for `latency` seconds (+/- `jitter`, also hash-derived) to stand in
+for the network round-trip, and a `failure_rate` fraction raise
+`ServiceUnavailable` like a throttled API would.
+
+    with FakeBackends(FakeConfig(latency=0.08, failure_rate=0.01)) as fakes:
+        run_file_job(cfg, "in.mp4", "out.mp4")
+    fakes.stats()   # {"calls": {"vision.safe_search": 120, ...}, "failures": {...}}
+
+Installed through `vision.client.set_vision_client` and
+`audio.speech_to_text.set_speech_client_factory`, so everything above the
+client (governor, tracing, metrics, transcript cache) runs as in production.
+"""
+from __future__ import annotations
+
+import datetime
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Dict, List
+
+from google.api_core import exceptions as api_exceptions
+
+from src.aegisai.audio.speech_to_text import set_speech_client_factory
+from src.aegisai.vision.client import set_vision_client
+
+FILLER_WORDS = ("the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "hello", "world")
+PROFANE_WORD = "damn"
+WORDS_PER_SECOND = 2.0
+
+VERY_UNLIKELY = 1
+LIKELY = 4
+
+
+@dataclass(frozen=True)
+class FakeConfig:
+    latency: float = 0.05        # seconds per request
+    jitter: float = 0.5          # +/- fraction of latency
+    failure_rate: float = 0.0    # fraction of requests that raise
+    flag_rate: float = 0.05      # fraction of frames rated LIKELY adult / violent
+    profanity_rate: float = 0.2  # fraction of non-silent STT chunks with a bad word
+    seed: int = 0
+
+
+class FakeBackends:
+    """Installs the fakes for a `with` block and counts requests per API."""
+
+    def __init__(self, config: FakeConfig = FakeConfig()) -> None:
+        self.config = config
+        self._lock = threading.Lock()
+        self._calls: Dict[str, int] = {}
+        self._failures: Dict[str, int] = {}
+        self._simulated = 0.0
+
+    def install(self) -> "FakeBackends":
+        set_vision_client(FakeVisionClient(self))
+        set_speech_client_factory(lambda: FakeSpeechClient(self))
+        return self
+
+    def uninstall(self) -> None:
+        set_vision_client(None)
+        set_speech_client_factory(None)
+
+    def __enter__(self) -> "FakeBackends":
+        return self.install()
+
+    def __exit__(self, *exc) -> None:
+        self.uninstall()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": dict(self._calls),
+                "failures": dict(self._failures),
+                "api_calls": sum(self._calls.values()),
+                "simulated_latency_seconds": round(self._simulated, 3),
+            }
+
+    # ----- shared request handling -----
+
+    def unit(self, content: bytes, salt: str) -> float:
+        """Deterministic value in [0, 1) for (content, salt)."""
+        h = hashlib.blake2b(content, digest_size=8, key=f"{self.config.seed}:{salt}".encode())
+        return int.from_bytes(h.digest(), "big") / 2.0 ** 64
+
+    def request(self, api: str, content: bytes) -> None:
+        """Sleep for the simulated round-trip, count it, maybe fail."""
+        cfg = self.config
+        delay = max(0.0, cfg.latency * (1.0 + cfg.jitter * (2.0 * self.unit(content, api + ":latency") - 1.0)))
+        fail = self.unit(content, api + ":fail") < cfg.failure_rate
+        with self._lock:
+            self._calls[api] = self._calls.get(api, 0) + 1
+            self._simulated += delay
+            if fail:
+                self._failures[api] = self._failures.get(api, 0) + 1
+        time.sleep(delay)
+        if fail:
+            raise api_exceptions.ServiceUnavailable(f"injected failure ({api})")
+
+
+def _ok() -> SimpleNamespace:
+    return SimpleNamespace(message="")
+
+
+class FakeVisionClient:
+    """`ImageAnnotatorClient` stand-in: SafeSearch, labels, objects."""
+
+    def __init__(self, backends: FakeBackends) -> None:
+        self._b = backends
+
+    def _flagged(self, content: bytes) -> bool:
+        return self._b.unit(content, "flag") < self._b.config.flag_rate
+
+    def safe_search_detection(self, image, **kwargs):
+        content = image.content
+        self._b.request("vision.safe_search", content)
+        flagged = self._flagged(content)
+        level = LIKELY if flagged else VERY_UNLIKELY
+        annotation = SimpleNamespace(
+            adult=level, violence=level, racy=VERY_UNLIKELY, medical=VERY_UNLIKELY, spoof=VERY_UNLIKELY,
+        )
+        return SimpleNamespace(safe_search_annotation=annotation, error=_ok())
+
+    def label_detection(self, image, **kwargs):
+        content = image.content
+        self._b.request("vision.label_detection", content)
+        labels = [SimpleNamespace(description="Pattern", score=0.9), SimpleNamespace(description="Colorfulness", score=0.8)]
+        if self._flagged(content):
+            labels.append(SimpleNamespace(description="Weapon", score=0.85))
+        return SimpleNamespace(label_annotations=labels, error=_ok())
+
+    def object_localization(self, image, **kwargs):
+        content = image.content
+        self._b.request("vision.object_localization", content)
+        objects = []
+        if self._flagged(content):
+            x = 0.6 * self._b.unit(content, "x")
+            y = 0.6 * self._b.unit(content, "y")
+            vertices = [
+                SimpleNamespace(x=x, y=y), SimpleNamespace(x=x + 0.3, y=y),
+                SimpleNamespace(x=x + 0.3, y=y + 0.3), SimpleNamespace(x=x, y=y + 0.3),
+            ]
+            objects.append(SimpleNamespace(
+                name="Weapon", score=0.8, mid="/m/083kb",
+                bounding_poly=SimpleNamespace(normalized_vertices=vertices),
+            ))
+        return SimpleNamespace(localized_object_annotations=objects, error=_ok())
+
+
+class FakeSpeechClient:
+    """`SpeechClient.recognize` stand-in: filler words, some profanity, silence stays silent."""
+
+    def __init__(self, backends: FakeBackends) -> None:
+        self._b = backends
+
+    def recognize(self, config, audio, **kwargs):
+        content = audio.content
+        self._b.request("stt.recognize", content)
+        if content.count(0) == len(content):   # digital silence
+            return SimpleNamespace(results=[])
+
+        seconds = len(content) / (2.0 * (config.sample_rate_hertz or 16000))
+        count = int(seconds * WORDS_PER_SECOND)
+        profane_at = -1
+        if count and self._b.unit(content, "profanity") < self._b.config.profanity_rate:
+            profane_at = int(self._b.unit(content, "position") * count)
+
+        words: List[SimpleNamespace] = []
+        for i in range(count):
+            text = PROFANE_WORD if i == profane_at else FILLER_WORDS[int(self._b.unit(content, f"w{i}") * len(FILLER_WORDS))]
+            start = i / WORDS_PER_SECOND
+            words.append(SimpleNamespace(
+                word=text,
+                start_time=datetime.timedelta(seconds=start),
+                end_time=datetime.timedelta(seconds=start + 0.8 / WORDS_PER_SECOND),
+            ))
+        if not words:
+            return SimpleNamespace(results=[])
+        alternative = SimpleNamespace(transcript=" ".join(w.word for w in words), words=words)
+        return SimpleNamespace(results=[SimpleNamespace(alternatives=[alternative])])
@@ -0,0 +1,134 @@
+"""
+Synthetic benchmark media generated with ffmpeg lavfi sources.
+
+Video pictures: `testsrc` (moving counter / gradients), `smptebars`
+(static colour bars), `testsrc2`. Audio: `sine` tone, digital silence
+(`anullsrc`) and speech-like noise (band-limited pink noise with a ~4 Hz
+syllable-rate tremolo, so VAD and chunking see speech-shaped energy).
+
+    spec = FixtureSpec("video", "bars_speech", duration=60, resolution="1280x720")
+    path = ensure_fixture(spec, "benchmarks/.fixtures")   # generated once, then reused
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+FPS = 25
+AUDIO_RATE = 48000
+
+AUDIO_SOURCES: Dict[str, str] = {
+    "tone": f"sine=frequency=440:sample_rate={AUDIO_RATE}",
+    "silence": f"anullsrc=channel_layout=mono:sample_rate={AUDIO_RATE}",
+    "speech": (
+        f"anoisesrc=color=pink:amplitude=0.4:sample_rate={AUDIO_RATE},"
+        "highpass=f=200,lowpass=f=3400,tremolo=f=4:d=0.9"
+    ),
+}
+
+# name -> (picture source, audio source)
+VIDEO_SOURCES: Dict[str, Tuple[str, str]] = {
+    "testsrc_tone": ("testsrc", "tone"),
+    "bars_speech": ("smptebars", "speech"),
+    "testsrc2_silence": ("testsrc2", "silence"),
+}
+
+DEFAULT_DURATIONS = (10.0, 60.0)
+DEFAULT_RESOLUTIONS = ("640x360", "1280x720")
+
+
+@dataclass(frozen=True)
+class FixtureSpec:
+    media_type: str     # "audio" | "video"
+    source: str         # key of AUDIO_SOURCES / VIDEO_SOURCES
+    duration: float     # seconds
+    resolution: str = ""   # "WxH", video only
+
+    @property
+    def name(self) -> str:
+        parts = [self.media_type, self.source, f"{self.duration:g}s"]
+        if self.media_type == "video":
+            parts.append(self.resolution)
+        return "-".join(parts)
+
+    @property
+    def ext(self) -> str:
+        return ".mp4" if self.media_type == "video" else ".wav"
+
+
+def fixture_matrix(
+    durations: Iterable[float] = DEFAULT_DURATIONS,
+    resolutions: Iterable[str] = DEFAULT_RESOLUTIONS,
+    audio_sources: Iterable[str] = tuple(AUDIO_SOURCES),
+    video_sources: Iterable[str] = tuple(VIDEO_SOURCES),
+) -> List[FixtureSpec]:
+    durations = list(durations)
+    specs = [FixtureSpec("audio", src, d) for src in audio_sources for d in durations]
+    specs += [FixtureSpec("video", src, d, res) for src in video_sources for d in durations for res in resolutions]
+    return specs
+
+
+def ffmpeg_command(spec: FixtureSpec, output_path: str) -> List[str]:
+    d = f"{spec.duration:g}"
+    if spec.media_type == "audio":
+        if spec.source not in AUDIO_SOURCES:
+            raise ValueError(f"Unknown audio source: {spec.source!r}")
+        return [
+            "ffmpeg", "-y", "-v", "error",
+            "-f", "lavfi", "-i", AUDIO_SOURCES[spec.source],
+            "-t", d, "-ac", "1", "-c:a", "pcm_s16le",
+            output_path,
+        ]
+
+    if spec.source not in VIDEO_SOURCES:
+        raise ValueError(f"Unknown video source: {spec.source!r}")
+    picture, audio = VIDEO_SOURCES[spec.source]
+    return [
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"{picture}=size={spec.resolution}:rate={FPS}",
+        "-f", "lavfi", "-i", AUDIO_SOURCES[audio],
+        "-t", d,
+        "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p", "-g", str(2 * FPS),
+        "-c:a", "aac", "-b:a", "128k", "-ac", "2",
+        output_path,
+    ]
+
+
+def ensure_fixture(spec: FixtureSpec, fixture_dir: str) -> str:
+    """Path of the fixture file, generating it when missing."""
+    path = os.path.join(fixture_dir, spec.name + spec.ext)
+    if os.path.isfile(path) and os.path.getsize(path) > 0:
+        return path
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg is required to generate benchmark fixtures")
+    os.makedirs(fixture_dir, exist_ok=True)
+    tmp = path + ".tmp" + spec.ext
+    subprocess.run(ffmpeg_command(spec, tmp), check=True)
+    os.replace(tmp, path)
+    print(f"[fixtures] Generated {path}")
+    return path
+
+
+def split_fixture(path: str, chunk_seconds: float, out_dir: str) -> List[str]:
+    """
+    Cut a fixture into `chunk_seconds` pieces for the stream pipelines
+    (re-encoded with a keyframe at every cut so chunks are exact).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    ext = os.path.splitext(path)[1]
+    pattern = os.path.join(out_dir, f"chunk_%04d{ext}")
+    cmd = ["ffmpeg", "-y", "-v", "error", "-i", path]
+    if ext == ".mp4":
+        cmd += [
+            "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+            "-force_key_frames", f"expr:gte(t,n_forced*{chunk_seconds:g})",
+            "-c:a", "aac",
+        ]
+    else:
+        cmd += ["-c:a", "pcm_s16le"]
+    cmd += ["-f", "segment", "-segment_time", f"{chunk_seconds:g}", "-reset_timestamps", "1", pattern]
+    subprocess.run(cmd, check=True)
+    return sorted(os.path.join(out_dir, f) for f in os.listdir(out_dir) if f.startswith("chunk_"))
@@ -0,0 +1,381 @@
+"""
+Micro-benchmarks for the pure-Python / OpenCV hot paths, scaled from small
+to large generated inputs.
+
+Each benchmark is timed at several input sizes n, timeit-style:
+* loop count calibrated so one round takes at least `--min-time`;
+* warmup rounds, then `--repeats` timed rounds;
+* min / median / mean / stdev per call.
+
+The scaling exponent k is the least-squares slope of
+log(median) against log(n), i.e. time ~ n^k. Roughly 1 is linear; well
+above 1 (`SCALES_BADLY_ABOVE`) means the algorithm will hurt on
+production-sized inputs.
+
+    python -m benchmarks.micro
+    python -m benchmarks.micro --only merge_intervals,_build_tracked_objects --repeats 9
+    python -m benchmarks.micro --quick               # three smallest sizes, fewer rounds
+
+Results go to `benchmarks/results/micro-<time>.json` (or `--out`).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# Allow running as a standalone script
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from src.aegisai.moderation.bad_words_list import BAD_WORDS
+
+DEFAULT_REPEATS = 7
+DEFAULT_WARMUP = 2
+DEFAULT_MIN_TIME = 0.05     # seconds per timed round
+SCALES_BADLY_ABOVE = 1.3    # scaling exponent
+
+FILLER = ("the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "we", "said", "it", "was", "fine")
+PROFANITY_RATE = 0.02
+
+Setup = Callable[[int, random.Random], Callable[[], Any]]
+
+
+class Bench(NamedTuple):
+    name: str
+    unit: str                  # what n counts
+    sizes: Tuple[int, ...]
+    setup: Setup               # (n, rng) -> zero-argument callable to time
+
+
+class Timing(NamedTuple):
+    n: int
+    loops: int
+    rounds: int
+    min: float
+    median: float
+    mean: float
+    stdev: float
+
+
+# -------------------------------------------------------------------
+# Measurement
+# -------------------------------------------------------------------
+
+def measure(
+    fn: Callable[[], Any],
+    n: int,
+    repeats: int = DEFAULT_REPEATS,
+    warmup: int = DEFAULT_WARMUP,
+    min_time: float = DEFAULT_MIN_TIME,
+) -> Timing:
+    """Per-call seconds of `fn` over `repeats` calibrated rounds."""
+    loops = 1
+    while True:
+        t = _round(fn, loops)
+        if t >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2 if t <= 0 else max(2, min(10, int(math.ceil(min_time / t))))
+    for _ in range(warmup):
+        _round(fn, loops)
+    samples = [_round(fn, loops) / loops for _ in range(max(1, repeats))]
+    return Timing(
+        n=n,
+        loops=loops,
+        rounds=len(samples),
+        min=min(samples),
+        median=statistics.median(samples),
+        mean=statistics.fmean(samples),
+        stdev=statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    )
+
+
+def _round(fn: Callable[[], Any], loops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(loops):
+        fn()
+    return time.perf_counter() - start
+
+
+def scaling_exponent(timings: Sequence[Timing]) -> Optional[float]:
+    """Least-squares slope of log(median) over log(n); None with < 2 sizes."""
+    points = [(math.log(t.n), math.log(t.median)) for t in timings if t.n > 0 and t.median > 0]
+    if len(points) < 2:
+        return None
+    mx = statistics.fmean(x for x, _ in points)
+    my = statistics.fmean(y for _, y in points)
+    var = sum((x - mx) ** 2 for x, _ in points)
+    if var == 0:
+        return None
+    return sum((x - mx) * (y - my) for x, y in points) / var
+
+
+# -------------------------------------------------------------------
+# Input generators
+# -------------------------------------------------------------------
+
+def _words(n: int, rng: random.Random) -> List[str]:
+    bad = sorted(w for w in BAD_WORDS if " " not in w)
+    return [rng.choice(bad) if rng.random() < PROFANITY_RATE else rng.choice(FILLER) for _ in range(n)]
+
+
+def _timed_words(n: int, rng: random.Random) -> List[Dict[str, Any]]:
+    out, t = [], 0.0
+    for word in _words(n, rng):
+        start = t + rng.uniform(0.02, 0.3)
+        end = start + rng.uniform(0.15, 0.6)
+        out.append({"word": word, "start": start, "end": end})
+        t = end
+    return out
+
+
+def _setup_find_bad_words(n, rng):
+    from src.aegisai.moderation.bad_words_list import find_bad_words_in_text
+
+    text = " ".join(_words(n, rng))
+    return lambda: find_bad_words_in_text(text)
+
+
+def _setup_detect_toxic_segments(n, rng):
+    from src.aegisai.audio.intervals import detect_toxic_segments
+
+    words = _timed_words(n, rng)
+    return lambda: detect_toxic_segments(words)
+
+
+def _setup_merge_intervals(n, rng):
+    from src.aegisai.audio.intervals import merge_intervals
+
+    span = n * 2.0
+    intervals = []
+    for _ in range(n):
+        start = rng.uniform(0, span)
+        intervals.append((start, start + rng.uniform(0.1, 3.0)))
+    return lambda: merge_intervals(intervals, gap_threshold=0.1)
+
+
+def _frame_result(ts: float, block: bool):
+    # safe_search first: importing vision_rules on its own hits the
+    # safe_search <-> vision_rules import cycle.
+    from src.aegisai.vision.safe_search import Likelihood
+    from src.aegisai.vision.vision_rules import FrameModerationResult
+
+    level = Likelihood.LIKELY if block else Likelihood.VERY_UNLIKELY
+    return FrameModerationResult(
+        timestamp=ts,
+        safesearch={"adult": level, "violence": level, "racy": Likelihood.VERY_UNLIKELY, "block": block},
+        labels={"violence_detected": block},
+        block=block,
+    )
+
+
+def _setup_intervals_from_frames(n, rng):
+    frames, block = [], False
+    for i in range(n):
+        if rng.random() < 0.1:      # runs of blocked / clean frames
+            block = not block
+        frames.append(_frame_result(i / 6.0, block))
+
+    from src.aegisai.vision.vision_rules import intervals_from_frames
+    return lambda: intervals_from_frames(frames, 1 / 6.0)
+
+
+def _setup_parse_subtitle_file(n, rng):
+    from src.aegisai.audio.subtitle_parser import parse_subtitle_file
+
+    def ts(sec: float) -> str:
+        ms = int(round(sec * 1000))
+        return f"{ms // 3_600_000:02d}:{ms // 60_000 % 60:02d}:{ms // 1000 % 60:02d},{ms % 1000:03d}"
+
+    fd, path = tempfile.mkstemp(prefix="aegis_micro_", suffix=".srt")
+    t = 0.0
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for i in range(1, n + 1):
+            start, end = t + 0.2, t + rng.uniform(1.0, 4.0)
+            t = end
+            f.write(f"{i}\n{ts(start)} --> {ts(end)}\n{' '.join(_words(rng.randint(3, 12), rng))}\n\n")
+    _TEMP_FILES.append(path)
+    return lambda: parse_subtitle_file(path)
+
+
+def _setup_build_tracked_objects(n, rng):
+    from src.aegisai.video.region_blur import _build_tracked_objects
+
+    # n sampled frames at 6 fps, 3 objects drifting across a 1280x720 frame;
+    # each leaves after ~3 s on average and a new one appears elsewhere.
+    lookup = {}
+    positions = [[rng.uniform(0, 1100), rng.uniform(0, 560)] for _ in range(3)]
+    for i in range(n):
+        entries = []
+        for j, pos in enumerate(positions):
+            if rng.random() < 1 / 18:
+                pos[0], pos[1] = rng.uniform(0, 1100), rng.uniform(0, 560)
+            pos[0] = min(1100.0, max(0.0, pos[0] + rng.uniform(-15, 15)))
+            pos[1] = min(560.0, max(0.0, pos[1] + rng.uniform(-10, 10)))
+            x, y = int(pos[0]), int(pos[1])
+            entries.append(((x, y, x + 160, y + 140), ("Gun", "Person", "Knife")[j], "weapon", 0.8))
+        lookup[round(i / 6.0, 3)] = entries
+    return lambda: _build_tracked_objects(lookup, 1280, 720)
+
+
+def _setup_blur(method: str) -> Setup:
+    def setup(n, rng):
+        import numpy as np
+
+        from src.aegisai.video.ffmpeg_edit import blur_boxes_in_frame
+
+        # n = frame pixels (16:9); four boxes covering ~20% of the frame.
+        h = int(round(math.sqrt(n * 9 / 16)))
+        w = n // h
+        frame = np.random.default_rng(rng.randrange(1 << 30)).integers(0, 256, (h, w, 3), dtype=np.uint8)
+        bw, bh = w // 5, h // 4
+        boxes = [(x, y, x + bw, y + bh) for x, y in ((w // 10, h // 10), (w // 2, h // 8), (w // 5, h // 2), (2 * w // 3, h // 2))]
+        return lambda: blur_boxes_in_frame(frame, boxes, method=method)
+    return setup
+
+
+def _localized_objects(n, rng):
+    from src.aegisai.vision.object_localization import LocalizedObject
+
+    names = ("Gun", "Knife", "Person", "Car", "Bottle", "Chair")
+    objects = []
+    for _ in range(n):
+        x, y = rng.randint(0, 1100), rng.randint(0, 560)
+        objects.append(LocalizedObject(
+            name=rng.choice(names),
+            score=rng.uniform(0.1, 0.99),
+            bbox=(x, y, x + rng.randint(40, 180), y + rng.randint(40, 160)),
+        ))
+    return objects
+
+
+def _setup_select_problematic_objects(n, rng):
+    from src.aegisai.vision.object_rules import select_problematic_objects
+
+    objects = _localized_objects(n, rng)
+    frame = _frame_result(0.0, True)
+    return lambda: select_problematic_objects(objects, frame)
+
+
+def _setup_deduplicate_objects(n, rng):
+    from src.aegisai.vision.object_localization import _deduplicate_objects
+
+    objects = _localized_objects(n, rng)
+    return lambda: _deduplicate_objects(objects)
+
+
+_TEMP_FILES: List[str] = []
+BLUR_SIZES = (426 * 240, 854 * 480, 1280 * 720, 1920 * 1080)
+
+BENCHMARKS: Tuple[Bench, ...] = (
+    Bench("find_bad_words_in_text", "words", (100, 1_000, 10_000, 100_000), _setup_find_bad_words),
+    Bench("detect_toxic_segments", "words", (100, 1_000, 10_000, 100_000), _setup_detect_toxic_segments),
+    Bench("merge_intervals", "intervals", (100, 1_000, 10_000, 100_000), _setup_merge_intervals),
+    Bench("intervals_from_frames", "frames", (100, 1_000, 10_000, 100_000), _setup_intervals_from_frames),
+    Bench("parse_subtitle_file", "cues", (100, 1_000, 10_000, 50_000), _setup_parse_subtitle_file),
+    Bench("_build_tracked_objects", "sampled frames", (30, 120, 480, 1_920, 7_680), _setup_build_tracked_objects),
+    Bench("blur_boxes_in_frame[heavy]", "frame pixels", BLUR_SIZES, _setup_blur("heavy")),
+    Bench("blur_boxes_in_frame[pixelate]", "frame pixels", BLUR_SIZES, _setup_blur("pixelate")),
+    Bench("blur_boxes_in_frame[blackout]", "frame pixels", BLUR_SIZES, _setup_blur("blackout")),
+    Bench("blur_boxes_in_frame[combined]", "frame pixels", BLUR_SIZES, _setup_blur("combined")),
+    Bench("select_problematic_objects", "objects", (10, 50, 200, 1_000), _setup_select_problematic_objects),
+    Bench("_deduplicate_objects", "objects", (10, 100, 1_000, 5_000), _setup_deduplicate_objects),
+)
+
+
+def run_bench(
+    bench: Bench,
+    sizes: Optional[Sequence[int]] = None,
+    repeats: int = DEFAULT_REPEATS,
+    warmup: int = DEFAULT_WARMUP,
+    min_time: float = DEFAULT_MIN_TIME,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    timings = []
+    for n in sizes or bench.sizes:
+        fn = bench.setup(n, random.Random(f"{seed}:{bench.name}:{n}"))
+        timings.append(measure(fn, n, repeats, warmup, min_time))
+    exponent = scaling_exponent(timings)
+    return {
+        "name": bench.name,
+        "unit": bench.unit,
+        "timings": [t._asdict() for t in timings],
+        "exponent": round(exponent, 3) if exponent is not None else None,
+        "scales_badly": exponent is not None and exponent > SCALES_BADLY_ABOVE,
+    }
+
+
+def _fmt_seconds(s: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if s >= scale:
+            return f"{s / scale:.2f}{unit}"
+    return f"{s / 1e-9:.0f}ns"
+
+
+def format_results(results: Sequence[Dict[str, Any]]) -> str:
+    lines = []
+    for r in results:
+        exp = "n/a" if r["exponent"] is None else f"{r['exponent']:.2f}"
+        flag = "  <-- scales badly" if r["scales_badly"] else ""
+        lines.append(f"{r['name']}  (n = {r['unit']}, time ~ n^{exp}){flag}")
+        for t in r["timings"]:
+            lines.append(
+                f"  n={t['n']:>8}  median={_fmt_seconds(t['median']):>9}  min={_fmt_seconds(t['min']):>9}"
+                f"  stdev={_fmt_seconds(t['stdev']):>9}  ({t['rounds']}x{t['loops']})"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="AegisAI hot-path micro-benchmarks")
+    parser.add_argument("--only", default="", help="comma-separated benchmark names (prefix match)")
+    parser.add_argument("--quick", action="store_true", help="three smallest sizes, 3 rounds")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="results JSON (default benchmarks/results/micro-<time>.json)")
+    parser.add_argument("--list", action="store_true")
+    args = parser.parse_args(argv)
+
+    wanted = [w for w in args.only.split(",") if w]
+    benches = [b for b in BENCHMARKS if not wanted or any(b.name.startswith(w) for w in wanted)]
+    if args.list:
+        print("\n".join(f"{b.name}  sizes={b.sizes}" for b in benches))
+        return 0
+    repeats = 3 if args.quick else args.repeats
+
+    results = []
+    try:
+        for bench in benches:
+            print(f"[micro] {bench.name}")
+            sizes = bench.sizes[:3] if args.quick else bench.sizes
+            results.append(run_bench(bench, sizes, repeats, args.warmup, args.min_time, args.seed))
+    finally:
+        for path in _TEMP_FILES:
+            os.remove(path)
+        _TEMP_FILES.clear()
+
+    out = Path(args.out) if args.out else ROOT / "benchmarks" / "results" / f"micro-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        "meta": {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+                 "repeats": repeats, "min_time": args.min_time, "seed": args.seed},
+        "benchmarks": results,
+    }, indent=2))
+    print(format_results(results))
+    print(f"[micro] Results written to {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,396 @@
+"""
+End-to-end pipeline benchmarks on synthetic media with fake cloud backends.
+
+Every `use_cases.py` config runs against every matching fixture (audio
+configs on audio fixtures, video configs on video fixtures), each case in
+a fresh process so peak RSS belongs to that case alone. File configs run
+`run_file_job`; stream configs get the fixture cut into chunks and fed
+through the stream filters as fast as they accept them.
+
+    python -m benchmarks.run --quick
+    python -m benchmarks.run --configs VIDEO_FILE_AUDIO_VIDEO --durations 60,300 --latency 0.12
+    python -m benchmarks.run --save-baseline          # store as benchmarks/baseline.json
+    python -m benchmarks.run --fail-on-regression     # exit 1 if worse than the baseline
+
+Real content works too: `--input clip.mp4` benchmarks given files instead
+of the fixtures, and `--cassette run.cassette` answers Google calls from a
+record / replay cassette (`runtime.cassette`) instead of the fakes:
+
+    python -m benchmarks.run --input clip.mp4 --cassette clip.cassette --cassette-mode record
+    python -m benchmarks.run --input clip.mp4 --cassette clip.cassette --cassette-latency zero
+
+Per case: wall / CPU seconds (process + ffmpeg children), peak RSS, API
+calls and failures, realtime factor (media seconds per wall second).
+Results go to `benchmarks/results/bench-<time>.json`, with a comparison
+against the baseline when one exists.
+"""
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+# Allow running as a standalone script
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+
+from benchmarks.fakes import FakeBackends, FakeConfig
+from benchmarks.fixtures import (
+    AUDIO_SOURCES,
+    DEFAULT_DURATIONS,
+    DEFAULT_RESOLUTIONS,
+    VIDEO_SOURCES,
+    FixtureSpec,
+    ensure_fixture,
+    fixture_matrix,
+    split_fixture,
+)
+from src.aegisai.pipeline import use_cases
+from src.aegisai.pipeline.config import PipelineConfig
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+DEFAULT_RESULTS_DIR = BENCH_DIR / "results"
+DEFAULT_FIXTURE_DIR = BENCH_DIR / ".fixtures"
+DEFAULT_TOLERANCE = 0.10
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".m4a", ".aac", ".ogg")
+
+LOWER_IS_BETTER = ("wall_seconds", "cpu_seconds", "peak_rss_mb", "api_calls")
+HIGHER_IS_BETTER = ("realtime_factor",)
+
+
+def use_case_configs() -> Dict[str, PipelineConfig]:
+    return {name: value for name, value in vars(use_cases).items() if isinstance(value, PipelineConfig)}
+
+
+def build_cases(
+    configs: Sequence[str],
+    fixtures: Sequence[FixtureSpec],
+    fakes: FakeConfig,
+    chunk_seconds: float,
+    inputs: Sequence[str] = (),
+    cassette: Optional[Dict[str, str]] = None,
+) -> List[Dict[str, Any]]:
+    """Cases for `configs` on `inputs` when given, else on the fixtures."""
+    known = use_case_configs()
+    media: List[Dict[str, Any]] = [
+        {"name": os.path.basename(path), "media_type": _media_type(path), "input": os.path.abspath(path)}
+        for path in inputs
+    ] or [{"name": spec.name, "media_type": spec.media_type, "fixture": asdict(spec)} for spec in fixtures]
+
+    cases = []
+    for name in configs:
+        if name not in known:
+            raise ValueError(f"Unknown use case {name!r}; choose from {sorted(known)}")
+        for m in media:
+            if m["media_type"] != known[name].media_type:
+                continue
+            case = {
+                "case": f"{name}/{m['name']}",
+                "config": name,
+                "fakes": asdict(fakes),
+                "cassette": cassette,
+                "chunk_seconds": chunk_seconds,
+            }
+            case.update({k: m[k] for k in ("fixture", "input") if k in m})
+            cases.append(case)
+    return cases
+
+
+def _media_type(path: str) -> str:
+    return "audio" if os.path.splitext(path)[1].lower() in AUDIO_EXTENSIONS else "video"
+
+
+# -------------------------------------------------------------------
+# One case (runs in its own process)
+# -------------------------------------------------------------------
+
+def _usage() -> Dict[str, float]:
+    if resource is None:
+        return {"cpu": time.process_time(), "rss_kb": 0.0, "child_rss_kb": 0.0}
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    scale = 1 / 1024 if sys.platform == "darwin" else 1   # bytes on macOS, KiB elsewhere
+    return {
+        "cpu": own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime,
+        "rss_kb": own.ru_maxrss * scale,
+        "child_rss_kb": children.ru_maxrss * scale,
+    }
+
+
+class _CassetteBackends:
+    """`FakeBackends`-shaped wrapper around a process-wide cassette."""
+
+    def __init__(self, path: str, mode: str, latency: str) -> None:
+        self.path, self.mode, self.latency = path, mode, latency
+        self._stats: Dict[str, int] = {}
+
+    def __enter__(self) -> "_CassetteBackends":
+        from src.aegisai.runtime.cassette import use_cassette
+
+        use_cassette(self.path, self.mode, self.latency)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        from src.aegisai.runtime.cassette import active_cassette, use_cassette
+
+        self._stats = active_cassette().stats()
+        use_cassette(None)
+
+    def stats(self) -> dict:
+        s = self._stats
+        calls = s.get("recorded", 0) + s.get("replayed", 0) + s.get("misses", 0)
+        return {"calls": {f"cassette.{self.mode}": calls}, "failures": {"cassette.miss": s.get("misses", 0)},
+                "api_calls": calls}
+
+
+def _run_stream(cfg: PipelineConfig, chunks: List[str], chunk_seconds: float, out_dir: str) -> int:
+    """Feed pre-cut chunks through the stream filters; returns chunks released."""
+    from src.aegisai.audio.filter_stream import AudioStreamFilter
+    from src.aegisai.moderation.policy import resolve_policy
+    from src.aegisai.pipeline.stream_runner import ChunkDescriptor, run_stream_job
+
+    released = 0
+    if cfg.media_type == "audio":
+        audio = AudioStreamFilter(
+            deadline_seconds=cfg.audio_deadline_seconds,
+            deadline_policy=cfg.audio_deadline_policy,
+            policy=resolve_policy(cfg.policy),
+        )
+        for i, path in enumerate(chunks):
+            audio.submit_chunk(i, path, i * chunk_seconds, chunk_seconds)
+        audio.close()
+        while audio.get_result_nowait() is not None:
+            released += 1
+        return released
+
+    descriptors = (ChunkDescriptor(i, i * chunk_seconds, chunk_seconds, path, path)
+                   for i, path in enumerate(chunks))
+    return len(run_stream_job(cfg, descriptors, out_dir))
+
+
+def run_case(case: Dict[str, Any], fixture_dir: str) -> Dict[str, Any]:
+    # Every run pays for its STT requests.
+    os.environ["AEGIS_TRANSCRIPT_CACHE"] = "0"
+    from src.aegisai.pipeline.file_runner import run_file_job
+    from src.aegisai.pipeline.sharded_runner import probe_duration
+
+    cfg = use_case_configs()[case["config"]]
+    spec = FixtureSpec(**case["fixture"]) if "fixture" in case else None
+    result: Dict[str, Any] = {"case": case["case"], "config": case["config"]}
+    backends = _CassetteBackends(**case["cassette"]) if case.get("cassette") \
+        else FakeBackends(FakeConfig(**case["fakes"]))
+
+    try:
+        input_path = case.get("input") or ensure_fixture(spec, fixture_dir)
+        media_seconds = spec.duration if spec else probe_duration(input_path)
+        result.update(input=input_path, media_seconds=media_seconds)
+        ext = os.path.splitext(input_path)[1]
+        with tempfile.TemporaryDirectory(prefix="aegis_bench_") as tmp:
+            chunks = split_fixture(input_path, case["chunk_seconds"], os.path.join(tmp, "chunks")) \
+                if cfg.mode == "stream" else []
+            before = _usage()
+            t0 = time.perf_counter()
+            with backends:
+                if cfg.mode == "file":
+                    out = run_file_job(cfg, input_path, os.path.join(tmp, "output" + ext))
+                    result["intervals"] = {
+                        "audio": len(out.get("audio_intervals") or []),
+                        "video": len(out.get("video_intervals") or []),
+                    }
+                else:
+                    result["chunks_released"] = _run_stream(cfg, chunks, case["chunk_seconds"], os.path.join(tmp, "out"))
+            wall = time.perf_counter() - t0
+            after = _usage()
+    except Exception as e:
+        result.update(status="failed", error=f"{type(e).__name__}: {e}")
+        return result
+
+    stats = backends.stats()
+    result.update(
+        status="ok",
+        wall_seconds=round(wall, 3),
+        cpu_seconds=round(after["cpu"] - before["cpu"], 3),
+        peak_rss_mb=round(after["rss_kb"] / 1024, 1),
+        ffmpeg_peak_rss_mb=round(after["child_rss_kb"] / 1024, 1),
+        api_calls=stats["api_calls"],
+        api_calls_by_api=stats["calls"],
+        api_failures=stats["failures"],
+        realtime_factor=round(media_seconds / wall, 3) if wall > 0 else None,
+    )
+    return result
+
+
+def run_isolated(case: Dict[str, Any], fixture_dir: str) -> Dict[str, Any]:
+    """`run_case` in a fresh spawned process (clean RSS high-water mark)."""
+    ctx = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+        return pool.submit(run_case, case, fixture_dir).result()
+
+
+# -------------------------------------------------------------------
+# Baseline comparison
+# -------------------------------------------------------------------
+
+def compare(
+    cases: Sequence[Dict[str, Any]],
+    baseline: Sequence[Dict[str, Any]],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> List[Dict[str, Any]]:
+    """One row per (case, metric) present in both runs; `regressed` past `tolerance`."""
+    base = {c["case"]: c for c in baseline if c.get("status") == "ok"}
+    rows = []
+    for case in cases:
+        old_case = base.get(case["case"])
+        if old_case is None or case.get("status") != "ok":
+            continue
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            old, new = old_case.get(metric), case.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            regressed = change > tolerance if metric in LOWER_IS_BETTER else change < -tolerance
+            rows.append({
+                "case": case["case"],
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "change": round(change, 4),
+                "regressed": regressed,
+            })
+    return rows
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except Exception:
+        return None
+
+
+def format_results(cases: Sequence[Dict[str, Any]], comparison: Sequence[Dict[str, Any]]) -> str:
+    lines = [f"{'case':<58} {'wall':>8} {'cpu':>8} {'rss MB':>8} {'calls':>6} {'x rt':>7}"]
+    for c in cases:
+        if c.get("status") != "ok":
+            lines.append(f"{c['case']:<58} FAILED {c.get('error', '')}")
+            continue
+        lines.append(
+            f"{c['case']:<58} {c['wall_seconds']:>8.2f} {c['cpu_seconds']:>8.2f} "
+            f"{c['peak_rss_mb']:>8.1f} {c['api_calls']:>6} {c['realtime_factor'] or 0:>7.2f}"
+        )
+    regressions = [r for r in comparison if r["regressed"]]
+    if comparison:
+        lines.append(f"baseline: {len(comparison)} metrics compared, {len(regressions)} regressed")
+    for r in regressions:
+        lines.append(f"  REGRESSED {r['case']} {r['metric']}: {r['baseline']} -> {r['current']} ({r['change']:+.1%})")
+    return "\n".join(lines)
+
+
+# -------------------------------------------------------------------
+# CLI
+# -------------------------------------------------------------------
+
+def _csv(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="AegisAI end-to-end pipeline benchmarks")
+    parser.add_argument("--configs", type=_csv, default=list(use_case_configs()), help="use_cases.py config names")
+    parser.add_argument("--durations", type=_csv, default=[f"{d:g}" for d in DEFAULT_DURATIONS])
+    parser.add_argument("--resolutions", type=_csv, default=list(DEFAULT_RESOLUTIONS))
+    parser.add_argument("--audio-sources", type=_csv, default=list(AUDIO_SOURCES))
+    parser.add_argument("--video-sources", type=_csv, default=list(VIDEO_SOURCES))
+    parser.add_argument("--quick", action="store_true", help="one 10s duration at 640x360")
+    parser.add_argument("--chunk-seconds", type=float, default=2.0, help="stream configs: chunk length")
+    parser.add_argument("--latency", type=float, default=FakeConfig.latency, help="fake API latency (s)")
+    parser.add_argument("--jitter", type=float, default=FakeConfig.jitter)
+    parser.add_argument("--failure-rate", type=float, default=FakeConfig.failure_rate)
+    parser.add_argument("--flag-rate", type=float, default=FakeConfig.flag_rate)
+    parser.add_argument("--profanity-rate", type=float, default=FakeConfig.profanity_rate)
+    parser.add_argument("--seed", type=int, default=FakeConfig.seed)
+    parser.add_argument("--fixture-dir", default=str(DEFAULT_FIXTURE_DIR))
+    parser.add_argument("--input", action="append", default=[], help="benchmark this file instead of the fixtures (repeatable)")
+    parser.add_argument("--cassette", default=None, help="record / replay Google calls with this cassette instead of the fakes")
+    parser.add_argument("--cassette-mode", choices=("record", "replay"), default="replay")
+    parser.add_argument("--cassette-latency", choices=("recorded", "zero"), default="recorded")
+    parser.add_argument("--out", default=None, help="results JSON (default benchmarks/results/bench-<time>.json)")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--list", action="store_true", help="print the cases and exit")
+    args = parser.parse_args(argv)
+
+    durations = [10.0] if args.quick else [float(d) for d in args.durations]
+    resolutions = ["640x360"] if args.quick else args.resolutions
+    fakes = FakeConfig(
+        latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate,
+        flag_rate=args.flag_rate, profanity_rate=args.profanity_rate, seed=args.seed,
+    )
+    fixtures = fixture_matrix(durations, resolutions, args.audio_sources, args.video_sources)
+    cassette = {"path": os.path.abspath(args.cassette), "mode": args.cassette_mode,
+                "latency": args.cassette_latency} if args.cassette else None
+    cases = build_cases(args.configs, fixtures, fakes, args.chunk_seconds, args.input, cassette)
+
+    if args.list:
+        print("\n".join(c["case"] for c in cases))
+        return 0
+
+    results = []
+    for i, case in enumerate(cases, 1):
+        print(f"[bench] ({i}/{len(cases)}) {case['case']}")
+        results.append(run_isolated(case, args.fixture_dir))
+
+    comparison: List[Dict[str, Any]] = []
+    baseline_path = Path(args.baseline)
+    if baseline_path.is_file() and not args.save_baseline:
+        comparison = compare(results, json.loads(baseline_path.read_text())["cases"], args.tolerance)
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "fakes": asdict(fakes),
+            "cassette": cassette,
+            "chunk_seconds": args.chunk_seconds,
+        },
+        "cases": results,
+        "comparison": comparison,
+    }
+    out = Path(args.out) if args.out else DEFAULT_RESULTS_DIR / f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"[bench] Baseline saved to {baseline_path}")
+
+    print(format_results(results, comparison))
+    print(f"[bench] Results written to {out}")
+    if args.fail_on_regression and any(r["regressed"] for r in comparison):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
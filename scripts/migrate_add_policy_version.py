@@ -0,0 +1,52 @@
+"""
+Migration script for per-user moderation policies.
+
+This script:
+1. Creates the moderation_policy table if it doesn't exist
+2. Adds the policy_version column to processed_media (existing rows keep NULL,
+   so they are reprocessed once instead of being served for a new policy)
+
+Run this once on databases created before moderation policies existed.
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.backend.db import init_db, engine
+from sqlalchemy import inspect, text
+
+
+def column_exists(table_name: str, column_name: str) -> bool:
+    """Check if a column exists in a table."""
+    inspector = inspect(engine)
+    columns = [col['name'] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+def migrate():
+    """Run the migration."""
+    print("Starting policy migration...")
+
+    # Creates moderation_policy (and any other missing tables)
+    init_db()
+    print("   OK: Tables initialized")
+
+    if column_exists('processed_media', 'policy_version'):
+        print("   OK: policy_version column already exists")
+        return
+
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE processed_media ADD COLUMN policy_version VARCHAR(64)"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_processed_media_policy_version "
+            "ON processed_media (policy_version)"
+        ))
+    print("   OK: Added processed_media.policy_version")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,50 @@
+"""
+Migration script for resumable pipeline jobs.
+
+This script adds the stage checkpoint columns to processed_media:
+1. work_dir       - per-media work directory of the last (failed) run
+2. stage_manifest - JSON manifest of the stages that run completed
+
+Run this once on databases created before stage checkpoints existed.
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.backend.db import init_db, engine
+from sqlalchemy import inspect, text
+
+
+def column_exists(table_name: str, column_name: str) -> bool:
+    """Check if a column exists in a table."""
+    inspector = inspect(engine)
+    columns = [col['name'] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+def migrate():
+    """Run the migration."""
+    print("Starting stage checkpoint migration...")
+
+    init_db()
+    print("   OK: Tables initialized")
+
+    columns = {
+        "work_dir": "VARCHAR(512)",
+        "stage_manifest": "TEXT",
+    }
+    with engine.begin() as conn:
+        for name, sql_type in columns.items():
+            if column_exists('processed_media', name):
+                print(f"   OK: {name} column already exists")
+                continue
+            conn.execute(text(f"ALTER TABLE processed_media ADD COLUMN {name} {sql_type}"))
+            print(f"   OK: Added processed_media.{name}")
+
+
+if __name__ == "__main__":
+    migrate()
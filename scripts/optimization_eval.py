@@ -6,12 +6,17 @@ The script:
 - builds 60 test transcripts (50+ as requested)
 - compares baseline detection (full blocklist) vs optimized (top-k blocklist)
 - reports token usage, estimated cost, latency (p95), and precision/recall
+- benchmarks the compiled phrase matcher against the legacy per-term regex loop
+- benchmarks the relevance index against the legacy per-term top-k scoring
+  (full list and a synthetic 10k-term tenant list)
+- benchmarks batch subtitle analysis (analyze_texts) against per-cue analyze_text
 """
 
 from __future__ import annotations
 
 import math
 import random
+import re
 import statistics
 import sys
 import time
@@ -23,11 +28,17 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.append(str(ROOT))
 
-from src.aegisai.moderation.bad_words_list import BAD_WORDS, find_bad_words_in_text
+from src.aegisai.moderation.bad_words_list import (
+    BAD_WORDS,
+    find_bad_words_in_text,
+    normalize_text_for_matching,
+)
+from src.aegisai.moderation.text_rules import analyze_text, analyze_text_top_k, analyze_texts
 from src.aegisai.moderation.optimization import (
     calculate_request_tokens,
     deduplicate_blocklist,
     estimate_tokens,
+    get_relevance_index,
     get_relevant_blocklist,
 )
 
@@ -38,6 +49,11 @@ OPT_PROMPT_TOKENS = 15
 RESPONSE_BUFFER = 85
 TOP_K = 20
 COST_PER_TOKEN = 10 / 1_000_000  # $10 per 1M input tokens (GPT-4 Turbo)
+MATCHER_ROUNDS = 50
+RELEVANCE_ROUNDS = 20
+TENANT_TERMS = 10_000
+SUBTITLE_CUES = 1500
+SUBTITLE_ROUNDS = 20
 
 
 def percentile(values: Sequence[float], pct: float) -> float:
@@ -205,6 +221,156 @@ def evaluate() -> dict:
     return {"cases": cases, **stats}
 
 
+def _legacy_find_bad_words(text: str, blocklist: Iterable[str]) -> List[str]:
+    """The original one-regex-per-term loop, kept as the benchmark baseline."""
+    lowered = normalize_text_for_matching(text)
+    return [w for w in blocklist if re.search(r"\b" + re.escape(w) + r"\b", lowered)]
+
+
+def benchmark_matcher(cases: Sequence[dict], rounds: int = MATCHER_ROUNDS) -> dict:
+    """Time legacy loop vs compiled matcher over the dataset (full blocklist)."""
+    blocklist = list(BAD_WORDS)
+    texts = [case["text"] for case in cases]
+
+    mismatches = [
+        text for text in texts
+        if _legacy_find_bad_words(text, blocklist) != find_bad_words_in_text(text, blocklist)
+    ]
+
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            _legacy_find_bad_words(text, blocklist)
+    legacy = time.perf_counter() - t0
+
+    t1 = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            find_bad_words_in_text(text, blocklist)
+    compiled = time.perf_counter() - t1
+
+    calls = rounds * len(texts)
+    return {
+        "calls": calls,
+        "legacy_us": legacy / calls * 1e6,
+        "compiled_us": compiled / calls * 1e6,
+        "mismatches": mismatches,
+    }
+
+
+def _legacy_relevant_blocklist(transcript: str, blocklist: Sequence[str], k: int = TOP_K) -> List[str]:
+    """The original two-scans-per-term top-k scoring, kept as the benchmark baseline."""
+    lowered = transcript.lower()
+    scored = []
+    for word in blocklist:
+        w = word.lower()
+        score = (10 if w in lowered else 0) + lowered.count(w)
+        if score > 0:
+            scored.append((score, word))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    if not scored:
+        return list(blocklist)[:k]
+    return [word for _, word in scored[:k]]
+
+
+def _tenant_blocklist(n: int = TENANT_TERMS) -> List[str]:
+    """Built-in list plus `n` synthetic tenant terms (brand names, slurs, slang)."""
+    rng = random.Random(99)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    extra = ["".join(rng.choice(letters) for _ in range(rng.randint(4, 10))) for _ in range(n)]
+    return list(BAD_WORDS) + extra
+
+
+def benchmark_relevance(cases: Sequence[dict], rounds: int = RELEVANCE_ROUNDS) -> dict:
+    """
+    Per-call top-k selection: legacy scoring vs the public calls as callers
+    use them (`get_relevant_blocklist`, `analyze_text_top_k`, index lookup
+    included) and the bare `RelevanceIndex.top_k` on a held index.
+    """
+    texts = [case["text"] for case in cases]
+    results = {}
+    for name, blocklist in (("full", deduplicate_blocklist(list(BAD_WORDS))), ("tenant", _tenant_blocklist())):
+        mismatches = sum(
+            _legacy_relevant_blocklist(t, blocklist) != get_relevant_blocklist(t, blocklist, k=TOP_K)
+            for t in texts
+        )
+        index = get_relevance_index(blocklist)
+        analyze_text_top_k(texts[0], blocklist, k=TOP_K)   # builds its deduplicated index
+
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            for text in texts:
+                _legacy_relevant_blocklist(text, blocklist)
+        legacy = time.perf_counter() - t0
+
+        t1 = time.perf_counter()
+        for _ in range(rounds):
+            for text in texts:
+                get_relevant_blocklist(text, blocklist, k=TOP_K)
+        public = time.perf_counter() - t1
+
+        t2 = time.perf_counter()
+        for _ in range(rounds):
+            for text in texts:
+                analyze_text_top_k(text, blocklist, k=TOP_K)
+        analyzed = time.perf_counter() - t2
+
+        t3 = time.perf_counter()
+        for _ in range(rounds):
+            for text in texts:
+                index.top_k(text, TOP_K)
+        indexed = time.perf_counter() - t3
+
+        calls = rounds * len(texts)
+        results[name] = {
+            "terms": len(blocklist),
+            "legacy_us": legacy / calls * 1e6,
+            "public_us": public / calls * 1e6,
+            "analyze_top_k_us": analyzed / calls * 1e6,
+            "index_us": indexed / calls * 1e6,
+            "mismatches": mismatches,
+        }
+    return results
+
+
+def _subtitle_cues(cases: Sequence[dict], n: int = SUBTITLE_CUES) -> List[dict]:
+    """Feature-length SRT stand-in: `n` two-second cues cycled from the dataset."""
+    return [
+        {"start": 2.0 * i, "end": 2.0 * i + 1.8, "text": cases[i % len(cases)]["text"]}
+        for i in range(n)
+    ]
+
+
+def benchmark_subtitles(cases: Sequence[dict], rounds: int = SUBTITLE_ROUNDS) -> dict:
+    """Time per-cue analyze_text (old subtitle path) vs one analyze_texts pass."""
+    segments = _subtitle_cues(cases)
+
+    def per_cue() -> List[tuple]:
+        return [
+            (seg["start"], seg["end"])
+            for seg in segments
+            if analyze_text(seg["text"], strict=True).block
+        ]
+
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        expected = per_cue()
+    per_cue_s = (time.perf_counter() - t0) / rounds
+
+    t1 = time.perf_counter()
+    for _ in range(rounds):
+        intervals = analyze_texts(segments, strict=True)
+    batch_s = (time.perf_counter() - t1) / rounds
+
+    return {
+        "cues": len(segments),
+        "muted": len(intervals),
+        "per_cue_ms": per_cue_s * 1e3,
+        "batch_ms": batch_s * 1e3,
+        "identical": intervals == expected,
+    }
+
+
 def _precision_recall(confusion: Sequence[int]) -> tuple[float, float]:
     tp, fp, fn = confusion
     precision = tp / (tp + fp) if (tp + fp) else 1.0
@@ -248,6 +414,31 @@ def main() -> None:
     print(f"Recall    baseline/optimized: {rec_b:.3f} / {rec_o:.3f}")
     print(f"Optimized misses vs baseline: {len(results['misses'])}")
 
+    bench = benchmark_matcher(results["cases"])
+    print("\n=== Phrase Matcher Benchmark (full blocklist) ===")
+    print(f"Calls: {bench['calls']}")
+    print(f"Legacy regex loop: {bench['legacy_us']:.1f} us/call")
+    print(f"Compiled matcher:  {bench['compiled_us']:.1f} us/call")
+    print(f"Speedup: {bench['legacy_us'] / max(bench['compiled_us'], 1e-9):.1f}x")
+    print(f"Result mismatches: {len(bench['mismatches'])}")
+
+    rel = benchmark_relevance(results["cases"])
+    print("\n=== Relevance Index (top-k selection) ===")
+    for name, r in rel.items():
+        print(
+            f"{name} ({r['terms']} terms): legacy {r['legacy_us']:.1f} us/call, "
+            f"get_relevant_blocklist {r['public_us']:.1f} us/call, "
+            f"analyze_text_top_k {r['analyze_top_k_us']:.1f} us/call, "
+            f"held index {r['index_us']:.1f} us/call, mismatches {r['mismatches']}"
+        )
+
+    subs = benchmark_subtitles(results["cases"])
+    print("\n=== Subtitle Batch Analysis ===")
+    print(f"Cues: {subs['cues']} (muted: {subs['muted']})")
+    print(f"Per-cue analyze_text: {subs['per_cue_ms']:.2f} ms")
+    print(f"Batch analyze_texts:  {subs['batch_ms']:.2f} ms")
+    print(f"Identical intervals: {subs['identical']}")
+
     if results["misses"]:
         print("\nSample misses (optimized lost detections):")
         for miss in results["misses"][:5]:
@@ -0,0 +1,340 @@
+# src/aegisai/audio/audio_source.py
+"""
+In-memory audio sources for STT chunking.
+
+An AudioSource exposes a 16-bit mono PCM stream that can be sliced into
+chunks without writing per-chunk WAV files:
+
+- WavAudioSource memory-maps an already extracted LINEAR16 mono WAV (e.g.
+  from `video.segment.extract_audio_track`) and hands out zero-copy
+  memoryview windows into the mapping.
+- FFmpegAudioSource decodes any ffmpeg-readable input to 16 kHz mono PCM
+  through a pipe and yields each chunk as soon as it has been decoded, so
+  STT workers can start on chunk 0 while decoding continues.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import subprocess
+from contextlib import ExitStack
+from typing import Iterator, NamedTuple, Optional
+
+import numpy as np
+
+from src.aegisai.runtime.governor import FFMPEG_DECODE, get_governor, governed_run
+
+STT_SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # LINEAR16
+
+
+class AudioChunk(NamedTuple):
+    index: int
+    start_ts: float      # seconds from the start of the source
+    duration: float      # seconds
+    pcm: memoryview      # raw LINEAR16 mono samples
+    sample_rate: int
+
+
+class AudioSource:
+    """
+    Base class for sequential 16-bit mono PCM sources.
+
+    Subclasses implement `peek(n_frames)` (return up to n frames from the
+    current position without consuming them) and `consume(n_frames)`.
+    """
+
+    sample_rate: int = STT_SAMPLE_RATE
+
+    def __init__(self) -> None:
+        self.position = 0  # frames consumed so far
+
+    def peek(self, n_frames: int) -> memoryview:
+        raise NotImplementedError
+
+    def consume(self, n_frames: int) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "AudioSource":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _make_chunk(self, index: int, pcm: memoryview) -> AudioChunk:
+        frames = len(pcm) // SAMPLE_WIDTH
+        return AudioChunk(
+            index=index,
+            start_ts=self.position / self.sample_rate,
+            duration=frames / self.sample_rate,
+            pcm=pcm,
+            sample_rate=self.sample_rate,
+        )
+
+    def iter_chunks(self, chunk_seconds: float) -> Iterator[AudioChunk]:
+        """Yield fixed-length chunks until the source is exhausted."""
+        chunk_frames = max(1, int(round(chunk_seconds * self.sample_rate)))
+        index = 0
+        while True:
+            pcm = self.peek(chunk_frames)
+            if len(pcm) < SAMPLE_WIDTH:
+                break
+            chunk = self._make_chunk(index, pcm)
+            self.consume(len(pcm) // SAMPLE_WIDTH)
+            yield chunk
+            index += 1
+
+    def iter_planned_chunks(self, planner) -> Iterator[AudioChunk]:
+        """
+        Yield variable-length chunks cut where `planner` decides
+        (see `chunk_planner.ChunkPlanner`).
+        """
+        max_frames = int(planner.max_seconds * self.sample_rate)
+        index = 0
+        while True:
+            pcm = self.peek(max_frames)
+            n_frames = len(pcm) // SAMPLE_WIDTH
+            if n_frames == 0:
+                break
+
+            window = np.frombuffer(pcm, dtype=np.int16)
+            cut = planner.plan(window, self.sample_rate, at_eof=n_frames < max_frames)
+            del window
+
+            if cut.skip_frames:
+                self.consume(cut.skip_frames)
+            if cut.length_frames <= 0:
+                if cut.skip_frames == 0:
+                    break
+                continue
+
+            start = cut.skip_frames * SAMPLE_WIDTH
+            chunk = self._make_chunk(index, pcm[start:start + cut.length_frames * SAMPLE_WIDTH])
+            self.consume(cut.length_frames)
+            yield chunk
+            index += 1
+
+
+# ─────────────────────────────────────────────────────────
+# Memory-mapped WAV
+# ─────────────────────────────────────────────────────────
+
+class WavFormat(NamedTuple):
+    channels: int
+    sample_rate: int
+    bits_per_sample: int
+    data_offset: int
+    data_size: int
+
+
+def read_wav_format(path: str) -> Optional[WavFormat]:
+    """
+    Parse the RIFF header of a PCM WAV file.
+    Returns None if the file is not a PCM WAV we can map directly.
+    """
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            return None
+
+        fmt = None
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack("<4sI", chunk_header)
+
+            if chunk_id == b"fmt ":
+                body = f.read(chunk_size)
+                if len(body) < 16:
+                    return None
+                if chunk_size & 1:
+                    f.seek(1, os.SEEK_CUR)
+                audio_format, channels, sample_rate = struct.unpack("<HHI", body[:8])
+                bits = struct.unpack("<H", body[14:16])[0]
+                # 1 = PCM, 0xFFFE = WAVE_FORMAT_EXTENSIBLE (ffmpeg writes it for some layouts)
+                if audio_format not in (1, 0xFFFE):
+                    return None
+                fmt = (channels, sample_rate, bits)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    return None
+                offset = f.tell()
+                # Streamed WAVs may carry a placeholder size; clamp to the file.
+                size = min(chunk_size, file_size - offset)
+                return WavFormat(fmt[0], fmt[1], fmt[2], offset, size)
+            else:
+                f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+
+class WavAudioSource(AudioSource):
+    """Zero-copy source over a memory-mapped 16-bit mono WAV file."""
+
+    def __init__(self, path: str, fmt: Optional[WavFormat] = None) -> None:
+        super().__init__()
+        fmt = fmt or read_wav_format(path)
+        if fmt is None or fmt.channels != 1 or fmt.bits_per_sample != 16:
+            raise ValueError(f"Not a 16-bit mono PCM WAV: {path}")
+
+        self.path = path
+        self.sample_rate = fmt.sample_rate
+        self._file = open(path, "rb")
+        self._mm: Optional[mmap.mmap] = None
+        data_size = fmt.data_size - (fmt.data_size % SAMPLE_WIDTH)
+        if data_size > 0:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._mm)[fmt.data_offset:fmt.data_offset + data_size]
+        else:
+            self._view = memoryview(b"")
+        self.total_frames = data_size // SAMPLE_WIDTH
+
+    def peek(self, n_frames: int) -> memoryview:
+        start = self.position * SAMPLE_WIDTH
+        return self._view[start:start + n_frames * SAMPLE_WIDTH]
+
+    def consume(self, n_frames: int) -> None:
+        self.position = min(self.total_frames, self.position + n_frames)
+
+    def close(self) -> None:
+        try:
+            self._view.release()
+            if self._mm is not None:
+                self._mm.close()
+        except BufferError:
+            # A chunk view is still referenced somewhere; the mapping is
+            # released when the last view is garbage-collected.
+            pass
+        self._file.close()
+
+
+# ─────────────────────────────────────────────────────────
+# ffmpeg decode pipe
+# ─────────────────────────────────────────────────────────
+
+class FFmpegAudioSource(AudioSource):
+    """Decode any ffmpeg input to 16 kHz mono PCM through a pipe."""
+
+    def __init__(
+        self,
+        path: str,
+        sample_rate: int = STT_SAMPLE_RATE,
+        read_size: int = 64 * 1024,
+    ) -> None:
+        super().__init__()
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Audio input not found: {path}")
+
+        self.path = path
+        self.sample_rate = sample_rate
+        self._read_size = read_size
+        self._buf = bytearray()
+        self._eof = False
+        # The decoder runs for the life of the source: hold a decode slot until close().
+        self._slot = ExitStack()
+        self._slot.enter_context(get_governor().acquire(FFMPEG_DECODE))
+        try:
+            self._proc = subprocess.Popen(
+                [
+                    "ffmpeg", "-v", "error",
+                    "-i", path,
+                    "-vn",
+                    "-ac", "1",
+                    "-ar", str(sample_rate),
+                    "-f", "s16le", "-acodec", "pcm_s16le",
+                    "pipe:1",
+                ],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except BaseException:
+            self._slot.close()
+            raise
+
+    def _fill(self, n_bytes: int) -> None:
+        while len(self._buf) < n_bytes and not self._eof:
+            data = self._proc.stdout.read(max(self._read_size, n_bytes - len(self._buf)))
+            if not data:
+                self._eof = True
+                rc = self._proc.wait()
+                if rc != 0:
+                    raise RuntimeError(f"ffmpeg decode failed for {self.path} (code={rc})")
+                break
+            self._buf.extend(data)
+
+    def peek(self, n_frames: int) -> memoryview:
+        n_bytes = n_frames * SAMPLE_WIDTH
+        self._fill(n_bytes)
+        usable = min(n_bytes, len(self._buf) - len(self._buf) % SAMPLE_WIDTH)
+        # Copy out of the bytearray so it can keep growing/shrinking.
+        return memoryview(bytes(self._buf[:usable]))
+
+    def consume(self, n_frames: int) -> None:
+        del self._buf[:n_frames * SAMPLE_WIDTH]
+        self.position += n_frames
+
+    def close(self) -> None:
+        if self._proc.poll() is None:
+            self._proc.kill()
+        self._proc.stdout.close()
+        self._proc.wait()
+        self._slot.close()
+
+
+def read_pcm(path: str, sample_rate: int = STT_SAMPLE_RATE) -> bytes:
+    """
+    Read a whole (short) file as LINEAR16 mono PCM at `sample_rate`.
+    A matching WAV is read directly; anything else goes through one ffmpeg
+    pipe (no temporary WAV file).
+    """
+    fmt = read_wav_format(path) if path.lower().endswith(".wav") else None
+    if (
+        fmt is not None
+        and fmt.channels == 1
+        and fmt.bits_per_sample == 16
+        and fmt.sample_rate == sample_rate
+    ):
+        with open(path, "rb") as f:
+            f.seek(fmt.data_offset)
+            data = f.read(fmt.data_size)
+        return data[:len(data) - len(data) % SAMPLE_WIDTH]
+
+    proc = governed_run(
+        [
+            "ffmpeg", "-v", "error",
+            "-i", path,
+            "-vn",
+            "-ac", "1",
+            "-ar", str(sample_rate),
+            "-f", "s16le", "-acodec", "pcm_s16le",
+            "pipe:1",
+        ],
+        FFMPEG_DECODE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"ffmpeg decode failed for {path} (code={proc.returncode}): "
+            f"{proc.stderr.decode(errors='replace')[:400]}"
+        )
+    return proc.stdout
+
+
+def open_audio_source(path: str) -> AudioSource:
+    """
+    Memory-map `path` if it already is a 16-bit mono PCM WAV, otherwise
+    decode it to 16 kHz mono through an ffmpeg pipe.
+    """
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Audio input not found: {path}")
+
+    fmt = read_wav_format(path) if path.lower().endswith(".wav") else None
+    if fmt is not None and fmt.channels == 1 and fmt.bits_per_sample == 16:
+        return WavAudioSource(path, fmt)
+    return FFmpegAudioSource(path)
@@ -0,0 +1,118 @@
+# src/aegisai/audio/chunk_planner.py
+"""
+Silence-aligned, variable-length chunk planning for STT.
+
+Instead of cutting every `chunk_seconds`, the planner looks at the next
+`max_seconds` of audio and cuts at the quietest point near `target_seconds`,
+so words are not split across requests. Leading silence is skipped
+entirely. Chunks keep their absolute offset (`AudioChunk.start_ts`), so word
+timestamps from STT map straight back onto the source timeline.
+
+Use it through `AudioSource.iter_planned_chunks(planner)`.
+
+Google's synchronous `recognize` accepts up to ~60 s of audio per request;
+`max_seconds` defaults to 55 s to stay clear of that limit.
+"""
+from __future__ import annotations
+
+from typing import NamedTuple
+
+import numpy as np
+
+DEFAULT_TARGET_SECONDS = 30.0
+DEFAULT_MAX_SECONDS = 55.0
+DEFAULT_SEARCH_SECONDS = 10.0   # look for a cut within ±this of the target
+DEFAULT_FRAME_MS = 20
+
+
+class ChunkCut(NamedTuple):
+    skip_frames: int    # leading silence to drop
+    length_frames: int  # audio to emit after the skipped part (0 = nothing left)
+
+
+def frame_energy_db(samples: np.ndarray, frame_len: int) -> np.ndarray:
+    """RMS level (dBFS) of consecutive `frame_len`-sample frames."""
+    n_frames = len(samples) // frame_len
+    if n_frames == 0:
+        return np.empty(0, dtype=np.float32)
+    frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len).astype(np.float32)
+    frames /= 32768.0
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return 20.0 * np.log10(rms + 1e-10)
+
+
+class ChunkPlanner:
+    """
+    Decide where the next STT chunk starts and ends.
+
+    Args:
+        target_seconds: Preferred chunk length.
+        max_seconds: Hard upper bound (sync API limit).
+        min_seconds: Never cut earlier than this (unless the audio ends).
+        search_seconds: Cut search window around the target.
+        silence_db: Frames below this level count as silence when
+                    trimming leading audio.
+        frame_ms: Analysis frame length.
+    """
+
+    def __init__(
+        self,
+        target_seconds: float = DEFAULT_TARGET_SECONDS,
+        max_seconds: float = DEFAULT_MAX_SECONDS,
+        min_seconds: float = 5.0,
+        search_seconds: float = DEFAULT_SEARCH_SECONDS,
+        silence_db: float = -50.0,
+        frame_ms: int = DEFAULT_FRAME_MS,
+    ) -> None:
+        if not 0 < min_seconds <= target_seconds <= max_seconds:
+            raise ValueError("Expected 0 < min_seconds <= target_seconds <= max_seconds")
+        self.target_seconds = target_seconds
+        self.max_seconds = max_seconds
+        self.min_seconds = min_seconds
+        self.search_seconds = search_seconds
+        self.silence_db = silence_db
+        self.frame_ms = frame_ms
+
+    def plan(self, window: np.ndarray, sample_rate: int, at_eof: bool) -> ChunkCut:
+        """
+        Plan one chunk from `window` (int16 samples starting at the current
+        position, at most `max_seconds` long). `at_eof` means no audio follows.
+        """
+        frame_len = max(1, int(sample_rate * self.frame_ms / 1000))
+        energy = frame_energy_db(window, frame_len)
+
+        # Skip leading silence (whole frames only).
+        loud = np.flatnonzero(energy >= self.silence_db)
+        if loud.size == 0:
+            if at_eof or len(window) < frame_len:
+                return ChunkCut(len(window), 0)
+            # A full window of silence: drop it all but keep frame alignment.
+            return ChunkCut(len(energy) * frame_len, 0)
+        skip = int(loud[0]) * frame_len
+        remaining = len(window) - skip
+        if at_eof:
+            return ChunkCut(skip, remaining)
+        if skip:
+            # Drop the silence first and plan again from a full window, so the
+            # cut search always sees `max_seconds` of audio.
+            return ChunkCut(skip, 0)
+
+        # Candidate frames: [target - search, target + search], clamped to
+        # [min_seconds, max_seconds] and to the audio we actually have.
+        lo = int(max(self.min_seconds, self.target_seconds - self.search_seconds) * 1000 / self.frame_ms)
+        hi = int(min(self.max_seconds, self.target_seconds + self.search_seconds) * 1000 / self.frame_ms)
+        hi = min(hi, len(energy))
+        if hi <= lo:
+            return ChunkCut(0, min(remaining, int(self.max_seconds * sample_rate)))
+
+        candidates = energy[lo:hi]
+        # Prefer the quietest frame; among near-equal ones, the one closest
+        # to the target (the penalty is small compared to a pause's dB drop).
+        target_frame = int(self.target_seconds * 1000 / self.frame_ms)
+        distance = np.abs(np.arange(lo, hi) - target_frame) / max(1, hi - lo)
+        best = lo + int(np.argmin(candidates + 3.0 * distance))
+
+        # Cut in the middle of the quiet frame.
+        cut = best * frame_len + frame_len // 2
+        return ChunkCut(0, min(cut, remaining))
+
@@ -2,26 +2,31 @@
 from __future__ import annotations
 
 import os
-import subprocess
-import tempfile
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
-from src.aegisai.audio.speech_to_text import transcribe_audio
+from src.aegisai.audio.speech_to_text import get_speech_backend
 from src.aegisai.audio.intervals import detect_toxic_segments
-from src.aegisai.moderation.text_rules import analyze_text, TextModerationResult
-from src.aegisai.video.segment import extract_audio_chunks_from_video  # works for any media input
+from src.aegisai.moderation.text_rules import TextModerationResult
 from src.aegisai.audio.intervals import merge_intervals
 import queue
 import threading
 
 from src.aegisai.audio.text_buffer import TextBuffer
 from src.aegisai.audio.workers import audio_worker
-from src.aegisai.audio.subtitle_parser import parse_subtitle_file
-from src.aegisai.moderation.text_rules import analyze_text
-from pydub import AudioSegment
+from src.aegisai.audio.audio_source import open_audio_source
+from src.aegisai.audio.chunk_planner import ChunkPlanner
+from src.aegisai.audio.vad import EnergyVAD, VadStats, VoiceActivityDetector, chunk_has_speech
+from src.aegisai.moderation.policy import PolicyLike, resolve_policy
+from src.aegisai.audio.subtitle_parser import iter_subtitle_file
+from src.aegisai.moderation.text_rules import analyze_text_stream
+from src.aegisai.audio.pcm_mute import mute_audio_file
+from src.aegisai.runtime.governor import FFMPEG_ENCODE, governed_run
+from src.aegisai.runtime import tracing
 
 Interval = Tuple[float, float]
 
+DEFAULT_CHUNK_SECONDS = 5  # Fixed chunk length when variable_chunks is off
+
 
 def _mute_intervals_in_audio_file(
     audio_path: str,
@@ -29,8 +34,9 @@ def _mute_intervals_in_audio_file(
     output_audio_path: str,
 ) -> None:
     """
-    Apply muting to an audio-only file using pydub for precise control.
-    Applies fade out/in to avoid popping artifacts.
+    Apply muting to an audio-only file with the NumPy PCM engine.
+    The track is decoded once, intervals are zeroed in place with short
+    fade ramps (no popping artifacts), and the result is encoded once.
 
     If intervals is empty, the input is simply copied to output_audio_path.
 
@@ -39,77 +45,33 @@ def _mute_intervals_in_audio_file(
     """
 
     if not intervals:
-        subprocess.run(
+        governed_run(
             ["ffmpeg", "-y", "-i", audio_path, "-c", "copy", output_audio_path],
+            FFMPEG_ENCODE,
             check=True,
         )
         return
 
-    # Load audio
-    original_audio = AudioSegment.from_file(audio_path)
-    total_duration_ms = len(original_audio)
-
-    # Create silence chunk for muting (or use original_audio[s:e] - 100dB)
-    # But here we just want silence.
-
-    # Process intervals:
-    # We will construct the final audio by concatenating "clean" chunks.
-    # To handle overlapping or out-of-order intervals, they must be sorted and merged (which they are).
-
-    final_audio = AudioSegment.empty()
-    last_pos_ms = 0
-    fade_duration_ms = 20 # 20ms fade
-
-    for start_sec, end_sec in intervals:
-        start_ms = int(start_sec * 1000)
-        end_ms = int(end_sec * 1000)
-
-        # Clamp to audio duration
-        start_ms = max(0, min(start_ms, total_duration_ms))
-        end_ms = max(0, min(end_ms, total_duration_ms))
-
-        if end_ms <= start_ms:
-            continue
-
-        # Append clean audio from last_pos to start
-        if start_ms > last_pos_ms:
-            clean_chunk = original_audio[last_pos_ms:start_ms]
-            # Fade out at the end of the clean chunk
-            if len(clean_chunk) > fade_duration_ms:
-                clean_chunk = clean_chunk.fade_out(fade_duration_ms)
-            final_audio += clean_chunk
-
-        # Mute period (append silence)
-        mute_duration = end_ms - start_ms
-        silence_chunk = AudioSegment.silent(duration=mute_duration)
-        final_audio += silence_chunk
-
-        last_pos_ms = end_ms
-
-    # Append remaining audio
-    if last_pos_ms < total_duration_ms:
-        remaining = original_audio[last_pos_ms:]
-        # Fade in at start of remaining
-        if len(remaining) > fade_duration_ms and last_pos_ms > 0:
-             remaining = remaining.fade_in(fade_duration_ms)
-        final_audio += remaining
-
-    # Export
-    # Determine format from extension or default to mp3/aac
-    ext = os.path.splitext(output_audio_path)[1].lower().replace(".", "")
-    if not ext:
-        ext = "mp3"
-
-    # Pydub export
-    final_audio.export(output_audio_path, format=ext)
+    mute_audio_file(
+        input_path=audio_path,
+        intervals=intervals,
+        output_path=output_audio_path,
+        fade_ms=20.0,
+    )
 
 
+@tracing.traced(cat="audio")
 def filter_audio_file(
     audio_path: str,
     output_audio_path: str | None = None,
-    chunk_seconds: int = 5,
+    chunk_seconds: int | None = None,
     progress_callback: Optional[callable] = None,
     subtitle_path: str | None = None,
+    use_vad: bool = True,
+    vad: Optional[VoiceActivityDetector] = None,
+    variable_chunks: bool | None = None,
+    chunk_planner: Optional[ChunkPlanner] = None,
+    policy: PolicyLike = None,
 ) -> List[Interval]:
     """
     Run audio-only moderation on an AUDIO file.
@@ -127,10 +89,30 @@ def filter_audio_file(
             If provided, write a filtered audio file with toxic segments muted.
             If None, no audio file is written; we only return the intervals.
         chunk_seconds:
-            Length of each audio chunk processed by STT.
+            Length of each audio chunk processed by STT. Setting it selects
+            fixed-length chunks (unless `variable_chunks` is passed
+            explicitly); None = planned chunks, or DEFAULT_CHUNK_SECONDS
+            with `variable_chunks=False`. Chunks are sliced in memory (see
+            `audio_source.py`) and handed to the workers as soon as they
+            are decoded.
         subtitle_path:
             Optional path to an SRT or VTT subtitle file.
             If provided, STT is skipped and subtitles are used for moderation.
+        use_vad:
+            Run local voice activity detection on each chunk and drop chunks
+            without speech (silence, room tone, steady music) before STT.
+        vad:
+            Detector to use when `use_vad` is set (default: EnergyVAD).
+        variable_chunks:
+            Cut chunks at quiet points near ~30 s (up to 55 s) instead of
+            every `chunk_seconds`; fewer requests, fewer split words.
+            None = True unless `chunk_seconds` is set. An explicit True
+            ignores `chunk_seconds` (with a warning).
+        chunk_planner:
+            Planner to use when `variable_chunks` is set (default: ChunkPlanner()).
+        policy:
+            Moderation policy (preset name, PolicySpec or CompiledPolicy);
+            None = built-in word list and rules.
 
     Returns:
         List of merged (start, end) intervals where audio should be muted.
@@ -139,6 +121,14 @@ def filter_audio_file(
         raise FileNotFoundError(f"Audio file not found: {audio_path}")
 
     muted_intervals: List[Interval] = []
+    policy = resolve_policy(policy)
+
+    if variable_chunks is None:
+        variable_chunks = chunk_seconds is None
+    elif variable_chunks and chunk_seconds is not None:
+        print(f"[filter_audio_file] WARNING: chunk_seconds={chunk_seconds} ignored with variable_chunks=True")
+    if chunk_seconds is None:
+        chunk_seconds = DEFAULT_CHUNK_SECONDS
 
     # logic to determine if we run STT
     run_stt = True
@@ -149,22 +139,16 @@ def filter_audio_file(
             progress_callback(5, "Processing subtitles...")
 
         try:
-            segments = parse_subtitle_file(subtitle_path)
+            # Cues stream from the file straight into batched text moderation.
+            subtitle_intervals = list(
+                analyze_text_stream(iter_subtitle_file(subtitle_path), policy=policy, strict=True)
+            )
             # If we got here, parsing succeeded
-            run_stt = False 
-            
-            count_muted = 0
-            for seg in segments:
-                text = seg["text"]
-                start_ts = seg["start"]
-                end_ts = seg["end"]
-
-                result = analyze_text(text, strict=True)
-                if result.block:
-                    print(f"[filter_audio_file] Muting subtitle segment: '{text}' ({start_ts}-{end_ts})")
-                    muted_intervals.append((start_ts, end_ts))
-                    count_muted += 1
-            
+            run_stt = False
+            muted_intervals.extend(subtitle_intervals)
+            count_muted = len(subtitle_intervals)
+            print(f"[filter_audio_file] Muting {count_muted} subtitle segments")
+
             if progress_callback:
                 progress_callback(10, f"Subtitle analysis complete. Found {count_muted} segments to mute.")
 
@@ -180,72 +164,87 @@ def filter_audio_file(
              print("[filter_audio_file] Running STT fallback...")
         
         # Standard STT workflow
-        text_buffer = TextBuffer()             # shared rolling text buffer
-        audio_q: "queue.Queue" = queue.Queue()
+        text_buffer = TextBuffer(policy=policy)   # shared rolling text buffer
+        num_workers = 12
+        # Bounded so decoding never runs far ahead of the STT workers.
+        audio_q: "queue.Queue" = queue.Queue(maxsize=num_workers * 2)
         event_q: "queue.Queue" = queue.Queue()
 
-        num_workers = 12
+        try:
+            # One tuned gRPC channel per few workers
+            get_speech_backend().ensure_capacity(num_workers)
+        except Exception as e:
+            print(f"[filter_audio_file] Speech backend setup failed: {e}")
 
         # Start audio_worker threads
         workers: list[threading.Thread] = []
         for _ in range(num_workers):
             t = threading.Thread(
-                target=audio_worker,
-                args=(audio_q, event_q, text_buffer, muted_intervals, chunk_seconds),
+                target=tracing.bind(audio_worker),
+                args=(audio_q, event_q, text_buffer, muted_intervals, chunk_seconds, policy),
                 daemon=True,
             )
             t.start()
             workers.append(t)
 
-        with tempfile.TemporaryDirectory(prefix="aegis_audio_") as tmpdir:
-            print("[filter_audio_file] Running ffmpeg segmentation...")
-            if progress_callback:
-                progress_callback(10, "Segmenting audio for STT...")
-
-            try:
-                # This function name says 'video_path' but it just means "ffmpeg input path".
-                # It's safe to use it for audio-only files as well.
-                chunk_files = extract_audio_chunks_from_video(
-                    video_path=audio_path,
-                    output_dir=tmpdir,
-                    chunk_seconds=chunk_seconds,
-                )
-            except Exception as e:
-                print(f"[filter_audio_file] Segmentation failed: {e}")
-                for _ in range(num_workers):
-                    audio_q.put(None)
-                audio_q.join()
-                for t in workers:
-                    t.join()
-                return []
-
-            print(f"[filter_audio_file] Found {len(chunk_files)} chunks")
-
-            # Enqueue chunks for workers
-            for idx, wav_path in enumerate(chunk_files):
-                ts = float(idx * chunk_seconds)
+        print("[filter_audio_file] Streaming audio chunks to STT workers...")
+        if progress_callback:
+            progress_callback(10, "Decoding audio for STT...")
+
+        source = None
+        queued = 0
+        detector = (vad or EnergyVAD()) if use_vad else None
+        vad_stats = VadStats()
+        decode_failed = False
+        try:
+            # Memory-maps an extracted 16 kHz mono WAV, otherwise decodes
+            # through an ffmpeg pipe; chunks are queued as soon as they exist.
+            source = open_audio_source(audio_path)
+            if variable_chunks:
+                chunks = source.iter_planned_chunks(chunk_planner or ChunkPlanner())
+            else:
+                chunks = source.iter_chunks(chunk_seconds)
+            for chunk in chunks:
+                if detector is not None:
+                    speech = chunk_has_speech(chunk.pcm, chunk.sample_rate, detector)
+                    vad_stats.record(chunk.duration, skipped=not speech)
+                    if not speech:
+                        print(
+                            f"[filter_audio_file] VAD: no speech in chunk {chunk.index} "
+                            f"at t={chunk.start_ts:.1f}s, skipping STT"
+                        )
+                        continue
                 print(
-                    f"[filter_audio_file] Queueing chunk {idx} "
-                    f"at t={ts:.1f}s -> {wav_path}"
+                    f"[filter_audio_file] Queueing chunk {chunk.index} "
+                    f"at t={chunk.start_ts:.1f}s ({chunk.duration:.1f}s)"
                 )
-                audio_q.put((wav_path, ts))
-
-            if progress_callback:
-                progress_callback(15, f"Queued {len(chunk_files)} audio chunks for analysis")
-
-            # Send stop signals
+                audio_q.put(chunk)
+                queued += 1
+        except Exception as e:
+            print(f"[filter_audio_file] Audio decode failed: {e}")
+            decode_failed = True
+        finally:
+            # Send stop signals, wait until all items processed, then join
             for _ in range(num_workers):
                 audio_q.put(None)
-
-            # Wait until all items processed
             audio_q.join()
+            for t in workers:
+                t.join()
+            if source is not None:
+                source.close()
+
+        if decode_failed:
+            return []
 
-        # Join worker threads (clean exit)
-        for t in workers:
-            t.join()
+        print(f"[filter_audio_file] Processed {queued} chunks")
+        tracing.current_span().set("chunks", queued)
+        done_msg = "Audio analysis complete"
+        if detector is not None:
+            print(f"[filter_audio_file] VAD {vad_stats.summary()}")
+            done_msg += f" (VAD {vad_stats.summary()})"
 
         if progress_callback:
-            progress_callback(90, "Audio analysis complete")
+            progress_callback(90, done_msg)
 
     # (Optional) you can drain event_q here if you want to log/use events:
     # while not event_q.empty():
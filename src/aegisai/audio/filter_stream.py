@@ -1,19 +1,25 @@
 # src/aegisai/audio/filter_stream.py
 from __future__ import annotations
 
-import os
 import queue
-import subprocess
-import tempfile
 import threading
 import time
-from typing import List, Tuple, NamedTuple, Optional
+from collections import OrderedDict
+from typing import Callable, List, Tuple, NamedTuple, Optional
 
-from src.aegisai.audio.speech_to_text import transcribe_audio
+from src.aegisai.audio.audio_source import read_pcm
+from src.aegisai.audio.intervals import detect_toxic_segments, merge_intervals, toxic_word_stream
+from src.aegisai.audio.speech_to_text import STT_SAMPLE_RATE, transcribe_pcm
 from src.aegisai.audio.text_buffer import TextBuffer
+from src.aegisai.moderation.metrics import increment_counter
+from src.aegisai.moderation.policy import PolicyLike, resolve_policy
+from src.aegisai.moderation.text_rules import analyze_text
+from src.aegisai.runtime import tracing
 
 Interval = Tuple[float, float]
 
+DEFAULT_STREAMING_DEADLINE = 3.0   # seconds after submit, streaming mode
+
 
 class AudioJob(NamedTuple):
     chunk_id: int
@@ -24,45 +30,143 @@ class AudioJob(NamedTuple):
 
 class AudioResult(NamedTuple):
     chunk_id: int
-    # For now we only return empty intervals (no muting),
-    # but the structure supports real intervals later.
     intervals: List[Interval]  # ABSOLUTE timestamps in stream timeline
+    # True if the chunk was released by the deadline policy before STT answered.
+    timed_out: bool = False
 
 
-class AudioStreamFilter:
-    """
-    Streaming audio pipeline.
+class _PendingChunk:
+    """A submitted chunk waiting to be released (in order)."""
+
+    def __init__(self, job: AudioJob) -> None:
+        self.job = job
+        self.submitted_at = time.monotonic()
+        self.fed_at: Optional[float] = None          # streaming: fully fed to the session
+        self.intervals: Optional[List[Interval]] = None  # batch: STT + moderation done
+        self.failed = False                          # decode/STT failed
+
+    @property
+    def end_ts(self) -> float:
+        return self.job.start_ts + self.job.duration
+
+
+def _transcript_text(raw) -> Tuple[str, List[dict]]:
+    """Normalize STT output to (text, words)."""
+    if isinstance(raw, dict):
+        return " ".join(raw.get("transcripts", []) or []).strip(), raw.get("words", []) or []
+    if isinstance(raw, list):
+        return " ".join(str(x) for x in raw).strip(), []
+    return str(raw).strip(), []
+
 
-    Right now this does:
-      - Convert chunk media (e.g. mp4) -> 16kHz mono WAV
-      - Run STT (transcribe_audio) on that chunk
-      - If there is speech, we just log it and return NO mute intervals.
+def _overlaps(iv: Interval, start: float, end: float) -> bool:
+    return iv[1] > start and iv[0] < end
 
-    This is intentionally minimal and consistent with your current code,
-    without introducing analyze_text or detect_toxic_segments here.
+
+class AudioStreamFilter:
+    """
+    Streaming audio pipeline with word-level muting.
+
+    Two STT modes:
+
+    - "batch" (default): each chunk is decoded to 16 kHz mono PCM and sent
+      to a synchronous `recognize` call by one of `num_workers` threads.
+    - "streaming": one long-lived `streaming_recognize` session per stream
+      (see `streaming_stt.py`). A single feeder thread decodes chunks in
+      order and feeds their PCM continuously; interim/final transcripts are
+      published on `transcript_q`.
+
+    Mute intervals come from `detect_toxic_segments` on word timestamps
+    (in streaming mode with one phrase matcher per stream, so multi-word
+    entries split across final results still match), or the whole chunk when STT returns text without word offsets and
+    `analyze_text(strict=True)` blocks it.
+
+    Results are released in chunk order from `get_result_nowait()`. If STT
+    has not answered within `deadline_seconds` of submission, the chunk is
+    released anyway according to `deadline_policy`:
+      - "open":   no muting (stream keeps flowing, may leak a word),
+      - "closed": mute the whole chunk.
+    Intervals that arrive after their chunk was released are carried into
+    the next released result, so the part that still overlaps the next
+    chunk (padding, words across the boundary) is muted there.
+
+    `policy` (preset name, PolicySpec or CompiledPolicy) selects the word
+    list used for muting.
     """
 
     def __init__(
         self,
         num_workers: int = 12,
         text_buffer: Optional[TextBuffer] = None,
+        mode: str = "batch",
+        deadline_seconds: Optional[float] = None,
+        deadline_policy: str = "open",
+        max_wait_seconds: float = 0.8,
+        recognizer_factory: Optional[Callable] = None,
+        transcriber: Optional[Callable] = None,
+        policy: PolicyLike = None,
     ) -> None:
-        self.num_workers = num_workers
-        self.text_buffer = text_buffer or TextBuffer()
+        if mode not in {"batch", "streaming"}:
+            raise ValueError(f"Unsupported audio STT mode: {mode}")
+        if deadline_policy not in {"open", "closed"}:
+            raise ValueError(f"Unsupported deadline policy: {deadline_policy}")
+
+        self.mode = mode
+        self.num_workers = num_workers if mode == "batch" else 1
+        self.deadline_policy = deadline_policy
+        if deadline_seconds is None and mode == "streaming":
+            deadline_seconds = DEFAULT_STREAMING_DEADLINE
+        self.deadline_seconds = deadline_seconds   # None = wait for STT (batch)
+        self.max_wait_seconds = max_wait_seconds   # streaming: silence release
+        self.transcriber = transcriber or transcribe_pcm
+        self.policy = resolve_policy(policy)
+        self.text_buffer = text_buffer or TextBuffer(policy=self.policy)
 
         self.job_q: "queue.Queue[Optional[AudioJob]]" = queue.Queue()
         self.result_q: "queue.Queue[AudioResult]" = queue.Queue()
+        self.transcript_q: "queue.Queue" = queue.Queue()
 
         self._workers: List[threading.Thread] = []
         self._closed = False
 
+        self._pending: "OrderedDict[int, _PendingChunk]" = OrderedDict()
+        self._state_lock = threading.Lock()
+        self._released_until = 0.0         # end ts of the last released chunk
+        self._carry: List[Interval] = []   # late intervals for the next result
+
+        # streaming-mode state
+        self._recognizer = None
+        self._final_end_ts = 0.0
+        self._interim_end_ts = 0.0
+        self._interim_text = ""
+        self._segments: List[Interval] = []   # toxic segments from final results
+        # Phrases may span consecutive final results ("son of a" | "bitch").
+        self._word_stream = toxic_word_stream(policy=self.policy)
+        self._word_lock = threading.Lock()
+
+        if mode == "streaming":
+            if recognizer_factory is None:
+                from src.aegisai.audio.streaming_stt import StreamingRecognizer
+                recognizer_factory = StreamingRecognizer
+            self._recognizer = recognizer_factory(on_event=self._on_transcript)
+
         self._start_workers()
 
     # ---------------- worker management ----------------
     def _start_workers(self) -> None:
+        if self.mode == "streaming":
+            t = threading.Thread(
+                target=tracing.bind(self._feeder_loop),
+                name="AudioStreamFeeder",
+                daemon=True,
+            )
+            t.start()
+            self._workers.append(t)
+            return
+
         for i in range(self.num_workers):
             t = threading.Thread(
-                target=self._worker_loop,
+                target=tracing.bind(self._worker_loop),
                 name=f"AudioStreamWorker-{i}",
                 daemon=True,
             )
@@ -76,97 +180,226 @@ class AudioStreamFilter:
                 self.job_q.task_done()
                 break
 
+            intervals = None
             try:
-                result = self._process_job(job)
-                if result is not None:
-                    self.result_q.put(result)
+                intervals = self._process_job(job)
             except Exception as e:
                 print(f"[AudioStreamFilter] Error processing job {job}: {e}")
             finally:
+                self._complete_job(job, intervals)
                 self.job_q.task_done()
 
-    # ---------------- core logic ----------------
-    def _process_job(self, job: AudioJob) -> Optional[AudioResult]:
+    # ---------------- core logic (batch) ----------------
+    def _process_job(self, job: AudioJob) -> Optional[List[Interval]]:
+        """
+        Decode + STT + moderation for one chunk.
+        Returns ABSOLUTE mute intervals, or None if the chunk could not be analyzed.
+        """
         chunk_id = job.chunk_id
-        input_media = job.audio_path
         start_ts = job.start_ts
-        duration = job.duration
 
         t0 = time.time()
         print(f"[audio] chunk {chunk_id} START at {t0:.3f}")
 
-        # 0) Convert the input media (e.g. mp4) into a 16kHz mono WAV chunk
-        with tempfile.TemporaryDirectory(prefix="aegis_stream_audio_") as tmpdir:
-            wav_path = os.path.join(tmpdir, f"chunk_{chunk_id:06d}.wav")
-
-            ff_cmd = [
-                "ffmpeg",
-                "-y",
-                "-i", input_media,
-                "-ac", "1",          # mono
-                "-ar", "16000",      # 16 kHz
-                "-f", "wav",
-                wav_path,
-            ]
-            proc = subprocess.run(
-                ff_cmd,
-                check=False,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.PIPE,
-                text=True,
+        # 0) Decode the input media (e.g. mp4) to 16kHz mono PCM in memory
+        try:
+            pcm = read_pcm(job.audio_path, STT_SAMPLE_RATE)
+        except Exception as e:
+            print(f"[audio] chunk {chunk_id} decode failed: {e}")
+            return None
+
+        # 1) STT
+        t_stt0 = time.time()
+        try:
+            raw = self.transcriber(pcm, STT_SAMPLE_RATE)
+        except Exception as e:
+            print(
+                f"[audio] chunk {chunk_id} STT failed after "
+                f"{time.time() - t_stt0:.3f}s: {e}"
             )
-            if proc.returncode != 0:
-                print(
-                    f"[audio] chunk {chunk_id} ffmpeg conv failed "
-                    f"(code={proc.returncode}): {proc.stderr[:400]}"
-                )
-                return AudioResult(chunk_id, [])
+            return None
+        print(f"[audio] chunk {chunk_id} STT done in {time.time() - t_stt0:.3f}s")
+
+        # 2) Normalize STT result
+        text, words = _transcript_text(raw)
+        if not text:
+            print(
+                f"[audio] chunk {chunk_id} no speech, "
+                f"total {time.time() - t0:.3f}s"
+            )
+            # No speech -> no mute intervals
+            return []
 
-            # 1) STT
-            t_stt0 = time.time()
+        self.text_buffer.add(start_ts, text)
+
+        # 3) Moderation -> absolute intervals
+        if words:
+            intervals = [
+                (start_ts + s, start_ts + e)
+                for s, e in detect_toxic_segments(words, policy=self.policy)
+            ]
+        elif analyze_text(text, strict=True, policy=self.policy).block:
+            # No word offsets: mute the whole chunk like the file path does.
+            intervals = [(start_ts, start_ts + job.duration)]
+        else:
+            intervals = []
+
+        print(
+            f"[audio] chunk {chunk_id} text='{text[:120]}' "
+            f"mute={intervals} total={time.time() - t0:.3f}s"
+        )
+        return intervals
+
+    def _complete_job(self, job: AudioJob, intervals: Optional[List[Interval]]) -> None:
+        with self._state_lock:
+            pending = self._pending.get(job.chunk_id)
+            if pending is not None:
+                if intervals is None:
+                    pending.failed = True
+                else:
+                    pending.intervals = intervals
+                return
+
+        # Already released by the deadline: apply to the next chunk instead.
+        if intervals:
+            self._carry_late(intervals)
+
+    def _carry_late(self, intervals: List[Interval]) -> None:
+        print(f"[audio] late mute intervals carried to next chunk: {intervals}")
+        increment_counter("stream_audio.late_intervals", len(intervals))
+        with self._state_lock:
+            self._carry.extend(intervals)
+
+    # ---------------- core logic (streaming) ----------------
+    def _feeder_loop(self) -> None:
+        """Decode chunks in submission order and feed the live session."""
+        while True:
+            job = self.job_q.get()
+            if job is None:
+                self.job_q.task_done()
+                break
+
+            with self._state_lock:
+                pending = self._pending.get(job.chunk_id)
             try:
-                raw = transcribe_audio(wav_path)
+                pcm = read_pcm(job.audio_path, STT_SAMPLE_RATE)
+                self._recognizer.feed(pcm, job.start_ts)
             except Exception as e:
-                print(
-                    f"[audio] chunk {chunk_id} STT failed after "
-                    f"{time.time() - t_stt0:.3f}s: {e}"
-                )
-                return AudioResult(chunk_id, [])
-            t_stt1 = time.time()
-            print(f"[audio] chunk {chunk_id} STT done in {t_stt1 - t_stt0:.3f}s")
-
-            # 2) Normalize STT result
-            transcripts: List[str] = []
-
-            if isinstance(raw, dict):
-                transcripts = raw.get("transcripts", []) or []
-            elif isinstance(raw, list):
-                transcripts = [str(x) for x in raw]
-            else:
-                transcripts = [str(raw)]
-
-            text = " ".join(transcripts).strip()
-            if not text:
-                print(
-                    f"[audio] chunk {chunk_id} no speech, "
-                    f"total {time.time() - t0:.3f}s"
-                )
-                # No speech -> no mute intervals
-                return AudioResult(chunk_id, [])
+                print(f"[audio] chunk {job.chunk_id} streaming feed failed: {e}")
+                if pending is not None:
+                    pending.failed = True
+            finally:
+                if pending is not None:
+                    pending.fed_at = time.monotonic()
+                self.job_q.task_done()
 
-            # For now, we only log the text.
-            # Your file-based moderation logic lives in audio_worker;
-            # when you’re ready, you can reuse that logic here.
-            print(
-                f"[audio] chunk {chunk_id} text='{text[:120]}' "
-                f"(len={len(text)}) total={time.time() - t0:.3f}s"
-            )
+    def _on_transcript(self, event) -> None:
+        """Called from the recognizer thread for every interim/final result."""
+        self.transcript_q.put(event)
+
+        if not event.is_final:
+            with self._state_lock:
+                self._interim_end_ts = max(self._interim_end_ts, event.end_ts)
+                self._interim_text = event.text
+            return
+
+        if event.text.strip():
+            self.text_buffer.add(event.end_ts, event.text)
+        segments: List[Interval] = []
+        if event.words:
+            with self._word_lock:
+                segments = detect_toxic_segments(event.words, stream=self._word_stream)
+
+        late: List[Interval] = []
+        with self._state_lock:
+            self._final_end_ts = max(self._final_end_ts, event.end_ts)
+            self._interim_text = ""
+            for seg in segments:
+                if seg[0] < self._released_until:
+                    late.append(seg)
+                if seg[1] > self._released_until:
+                    self._segments.append(seg)
+        if late:
+            self._carry_late(late)
+
+    # ---------------- release ----------------
+    def _deadline_passed(self, pending: _PendingChunk, now: float) -> bool:
+        return (
+            self.deadline_seconds is not None
+            and now - pending.submitted_at >= self.deadline_seconds
+        )
 
-            # TODO: plug in real moderation here if you want muting for streaming.
-            # For now, we return an empty list => no muted intervals.
-            intervals: List[Interval] = []
+    def _deadline_intervals(self, pending: _PendingChunk) -> List[Interval]:
+        whole = [(pending.job.start_ts, pending.end_ts)]
+        if self.deadline_policy == "closed":
+            return whole
+        # Fail-open, but an in-flight interim hypothesis that already
+        # contains profanity is enough to mute this chunk.
+        if self.mode == "streaming" and self._interim_text:
+            if analyze_text(self._interim_text, strict=True, policy=self.policy).block:
+                return whole
+        return []
+
+    def _try_release(self, pending: _PendingChunk, now: float, force: bool):
+        """Return (intervals, timed_out) if the chunk can be released now, else None."""
+        start, end = pending.job.start_ts, pending.end_ts
+
+        if pending.failed:
+            return self._deadline_intervals(pending), True
+
+        if self.mode == "batch":
+            if pending.intervals is not None:
+                return list(pending.intervals), False
+        else:
+            covered = self._final_end_ts >= end
+            # No speech in flight for this chunk: nothing left to wait for.
+            silent = (
+                pending.fed_at is not None
+                and self._interim_end_ts <= self._final_end_ts
+                and now - pending.fed_at >= self.max_wait_seconds
+            )
+            if covered or silent or force:
+                return [s for s in self._segments if _overlaps(s, start, end)], False
+
+        if force or self._deadline_passed(pending, now):
+            return self._deadline_intervals(pending), True
+        return None
+
+    def _release_ready_chunks(self, force: bool = False) -> None:
+        """Release pending chunks, in order, that are done or past their deadline."""
+        now = time.monotonic()
+        ready: List[AudioResult] = []
+        with self._state_lock:
+            while self._pending:
+                pending = next(iter(self._pending.values()))
+                decision = self._try_release(pending, now, force)
+                if decision is None:
+                    break
+                intervals, timed_out = decision
+
+                self._pending.popitem(last=False)
+                self._released_until = max(self._released_until, pending.end_ts)
+                if self._carry:
+                    intervals = intervals + self._carry
+                    self._carry = []
+                self._segments = [s for s in self._segments if s[1] > self._released_until]
+
+                if timed_out:
+                    increment_counter(f"stream_audio.deadline_{self.deadline_policy}")
+                    print(
+                        f"[audio] chunk {pending.job.chunk_id} released by deadline "
+                        f"policy={self.deadline_policy}"
+                    )
+                ready.append(
+                    AudioResult(
+                        chunk_id=pending.job.chunk_id,
+                        intervals=merge_intervals(intervals),
+                        timed_out=timed_out,
+                    )
+                )
 
-            return AudioResult(chunk_id=chunk_id, intervals=intervals)
+        for res in ready:
+            self.result_q.put(res)
 
     # ---------------- public API ----------------
     def submit_chunk(
@@ -189,18 +422,31 @@ class AudioStreamFilter:
             start_ts=float(start_ts),
             duration=float(duration),
         )
+        with self._state_lock:
+            self._pending[job.chunk_id] = _PendingChunk(job)
         self.job_q.put(job)
 
     def get_result_nowait(self) -> Optional[AudioResult]:
         """
         Non-blocking: return next AudioResult if available, else None.
-        Used by the pipeline poll loop.
+        Used by the pipeline poll loop; also enforces chunk deadlines.
         """
+        self._release_ready_chunks()
         try:
             return self.result_q.get_nowait()
         except queue.Empty:
             return None
 
+    def get_transcript_nowait(self):
+        """
+        Non-blocking: next streaming TranscriptEvent (interim or final),
+        else None. Always None in batch mode.
+        """
+        try:
+            return self.transcript_q.get_nowait()
+        except queue.Empty:
+            return None
+
     def close(self) -> None:
         """
         Stop workers after all existing jobs finish.
@@ -215,3 +461,10 @@ class AudioStreamFilter:
 
         for t in self._workers:
             t.join()
+
+        if self._recognizer is not None:
+            # Wait for the final results of everything that was fed.
+            self._recognizer.close()
+
+        # Everything is analyzed now; release whatever is still pending.
+        self._release_ready_chunks(force=True)
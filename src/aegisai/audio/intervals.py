@@ -1,5 +1,6 @@
-from typing import List, Dict, Tuple
-from src.aegisai.moderation.bad_words_list import is_bad_word
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from src.aegisai.moderation.bad_words_list import BAD_WORDS
+from src.aegisai.moderation.matcher import WordStreamMatcher, get_matcher
 Interval = Tuple[float, float]
 
 
@@ -7,65 +8,77 @@ def detect_toxic_segments(
     words: List[Dict],
     padding: float = 0.15,
     max_gap: float = 0.25,
+    blocklist: Optional[Iterable[str]] = None,
+    stream: Optional[WordStreamMatcher] = None,
+    policy=None,
 ) -> List[Tuple[float, float]]:
     """
     From word-level timestamps, return continuous toxic segments in *local*
     chunk time.
 
+    Single bad words and multi-word entries ("son of a bitch") are matched
+    with a compiled phrase automaton; a phrase is muted as one span from its
+    first word to its last. Pass a long-lived `stream` to keep partial
+    phrases across calls (consecutive transcript results of one stream).
+    `policy` (a CompiledPolicy) uses the policy's compiled word list.
+
     Implements 'smart padding': extends the mute interval to cover the silence
     gap up to the neighboring words (with a safety margin).
     """
+    if stream is None:
+        stream = toxic_word_stream(blocklist, policy=policy)
+    matches = sorted(stream.feed(words), key=lambda m: (m.first, m.last))
+
     segments: List[Tuple[float, float]] = []
     current_start = None
     current_end = None
 
-    for i, w in enumerate(words):
-        token = w.get("word", "")
-        if is_bad_word(token):
-            # Start logic: look at previous word end
-            start_val = float(w["start"])
-            if i > 0:
-                prev_end = float(words[i-1]["end"])
-                # Mute starts slightly after previous word ends (e.g. 50ms buffer)
-                # or midway if gap is very small.
-                # Here we ensure we mute the silence but don't clip previous word.
-                seg_start = prev_end + 0.05
-                # If calculated start is after the bad word start (unlikely but possible with overlap), clamp it.
-                # Actually, we want to mute BEFORE the bad word.
-                # Standard padding fallback:
-                if seg_start > start_val:
-                    seg_start = start_val - padding
-                else:
-                    # ensure we don't go back too far if gap is huge (cap at 2.0s extension)
-                    seg_start = max(seg_start, start_val - 2.0)
-            else:
-                seg_start = max(0.0, start_val - padding)
-
-            # End logic: look at next word start
-            end_val = float(w["end"])
-            if i < len(words) - 1:
-                next_start = float(words[i+1]["start"])
-                # Mute ends slightly before next word starts
-                seg_end = next_start - 0.05
-                # Fallback if gap is tiny or negative
-                if seg_end < end_val:
-                    seg_end = end_val + padding
-                else:
-                    # ensure we don't extend too far if gap is huge (cap at 2.0s extension)
-                    seg_end = min(seg_end, end_val + 2.0)
+    for match in matches:
+        # Start logic: look at previous word end
+        start_val = match.start
+        if match.first > 0:
+            prev_end = float(words[match.first - 1]["end"])
+            # Mute starts slightly after previous word ends (e.g. 50ms buffer)
+            # or midway if gap is very small.
+            # Here we ensure we mute the silence but don't clip previous word.
+            seg_start = prev_end + 0.05
+            # If calculated start is after the bad word start (unlikely but possible with overlap), clamp it.
+            # Actually, we want to mute BEFORE the bad word.
+            # Standard padding fallback:
+            if seg_start > start_val:
+                seg_start = start_val - padding
             else:
+                # ensure we don't go back too far if gap is huge (cap at 2.0s extension)
+                seg_start = max(seg_start, start_val - 2.0)
+        else:
+            # First word of the list, or a phrase that began in an earlier call.
+            seg_start = max(0.0, start_val - padding)
+
+        # End logic: look at next word start
+        end_val = match.end
+        if match.last < len(words) - 1:
+            next_start = float(words[match.last + 1]["start"])
+            # Mute ends slightly before next word starts
+            seg_end = next_start - 0.05
+            # Fallback if gap is tiny or negative
+            if seg_end < end_val:
                 seg_end = end_val + padding
+            else:
+                # ensure we don't extend too far if gap is huge (cap at 2.0s extension)
+                seg_end = min(seg_end, end_val + 2.0)
+        else:
+            seg_end = end_val + padding
 
-            if current_start is None:
+        if current_start is None:
+            current_start = seg_start
+            current_end = seg_end
+        else:
+            if seg_start <= current_end + max_gap:
+                current_end = max(current_end, seg_end)
+            else:
+                segments.append((current_start, current_end))
                 current_start = seg_start
                 current_end = seg_end
-            else:
-                if seg_start <= current_end + max_gap:
-                    current_end = max(current_end, seg_end)
-                else:
-                    segments.append((current_start, current_end))
-                    current_start = seg_start
-                    current_end = seg_end
 
     if current_start is not None:
         segments.append((current_start, current_end))
@@ -73,6 +86,14 @@ def detect_toxic_segments(
     return segments
 
 
+def toxic_word_stream(blocklist: Optional[Iterable[str]] = None, policy=None) -> WordStreamMatcher:
+    """Phrase matcher state for one word stream (default blocklist: BAD_WORDS)."""
+    if policy is not None:
+        return policy.word_stream()
+    terms: Sequence[str] = tuple(BAD_WORDS) if blocklist is None else tuple(blocklist)
+    return WordStreamMatcher(get_matcher(terms))
+
+
 
 def merge_intervals(
     intervals: List[Interval], 
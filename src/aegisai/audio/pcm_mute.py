@@ -0,0 +1,354 @@
+# src/aegisai/audio/pcm_mute.py
+"""
+Sample-accurate PCM muting engine.
+
+The audio is decoded once, a gain envelope (mute or duck, with linear fade
+ramps) is applied in place on NumPy sample blocks, and the result is encoded
+once. Processing is block-wise, so memory use stays flat no matter how long
+the input is.
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+import tempfile
+import wave
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.aegisai.runtime.governor import FFMPEG_DECODE, FFMPEG_ENCODE, get_governor, governed_run
+from src.aegisai.runtime.tracing import traced
+
+Interval = Tuple[float, float]
+
+DEFAULT_FADE_MS = 20.0        # Ramp length on each side of a muted interval
+DEFAULT_BLOCK_SECONDS = 10.0  # Samples processed per block in streaming mode
+DEFAULT_OUTPUT_FORMAT = "mp3"  # Encoder format when the output path has no extension
+
+_PCM_DTYPES = {2: np.int16, 4: np.int32}
+
+
+def intervals_to_frames(
+    intervals: Sequence[Interval],
+    sample_rate: int,
+    total_frames: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Convert (start_sec, end_sec) intervals into a sorted (N, 2) array of
+    sample-frame indices. Empty intervals are dropped, overlapping / nested /
+    touching ones are merged (so ends are sorted too) and, if `total_frames`
+    is given, everything is clamped to the audio length.
+    """
+    if not intervals:
+        return np.empty((0, 2), dtype=np.int64)
+
+    frames = np.rint(np.asarray(intervals, dtype=np.float64) * sample_rate).astype(np.int64)
+    frames = np.maximum(frames, 0)
+    if total_frames is not None:
+        frames = np.minimum(frames, total_frames)
+
+    frames = frames[frames[:, 1] > frames[:, 0]]
+    if len(frames) == 0:
+        return frames
+    frames = frames[np.argsort(frames[:, 0], kind="stable")]
+
+    # Merge: a new run starts where the start is past every earlier end
+    reach = np.maximum.accumulate(frames[:, 1])
+    new_run = np.ones(len(frames), dtype=bool)
+    new_run[1:] = frames[1:, 0] > reach[:-1]
+    firsts = np.flatnonzero(new_run)
+    lasts = np.append(firsts[1:] - 1, len(frames) - 1)
+    return np.stack([frames[firsts, 0], reach[lasts]], axis=1)
+
+
+def build_gain_envelope(
+    block_start: int,
+    num_frames: int,
+    frame_intervals: np.ndarray,
+    fade_frames: int,
+    gain: float = 0.0,
+) -> Tuple[np.ndarray, int, int]:
+    """
+    Build the gain envelope for the block [block_start, block_start + num_frames).
+
+    Inside an interval the gain is `gain` (0.0 = mute, e.g. 0.1 = duck);
+    `fade_frames` before/after each interval ramp linearly between 1.0 and
+    `gain`. Overlapping ramps take the minimum gain.
+
+    Returns:
+        (envelope, lo, hi) where only envelope[lo:hi] differs from 1.0.
+        lo == hi means the block is untouched.
+    """
+    env = np.ones(num_frames, dtype=np.float32)
+    block_end = block_start + num_frames
+    lo, hi = num_frames, 0
+
+    if len(frame_intervals) == 0 or num_frames <= 0:
+        return env, 0, 0
+
+    # First interval whose fade-in tail reaches into this block
+    first = int(np.searchsorted(frame_intervals[:, 1] + fade_frames, block_start, side="right"))
+
+    for start, end in frame_intervals[first:]:
+        start = int(start)
+        end = int(end)
+        if start - fade_frames >= block_end:
+            break
+
+        # Fade out: [start - fade, start)
+        if fade_frames > 0:
+            _apply_ramp(env, block_start, start - fade_frames, start, 1.0, gain)
+
+        # Fully attenuated: [start, end)
+        a = max(start, block_start) - block_start
+        b = min(end, block_end) - block_start
+        if b > a:
+            np.minimum(env[a:b], gain, out=env[a:b])
+
+        # Fade in: [end, end + fade)
+        if fade_frames > 0:
+            _apply_ramp(env, block_start, end, end + fade_frames, gain, 1.0)
+
+        lo = min(lo, max(start - fade_frames, block_start) - block_start)
+        hi = max(hi, min(end + fade_frames, block_end) - block_start)
+
+    if hi <= lo:
+        return env, 0, 0
+    return env, lo, hi
+
+
+def _apply_ramp(
+    env: np.ndarray,
+    block_start: int,
+    ramp_start: int,
+    ramp_end: int,
+    from_gain: float,
+    to_gain: float,
+) -> None:
+    """Write a linear ramp (absolute frames [ramp_start, ramp_end)) into env."""
+    length = ramp_end - ramp_start
+    a = max(ramp_start, block_start)
+    b = min(ramp_end, block_start + len(env))
+    if b <= a or length <= 0:
+        return
+
+    pos = np.arange(a - ramp_start, b - ramp_start, dtype=np.float32) / length
+    ramp = from_gain + (to_gain - from_gain) * pos
+    seg = env[a - block_start:b - block_start]
+    np.minimum(seg, ramp, out=seg)
+
+
+def apply_mute_intervals(
+    samples: np.ndarray,
+    sample_rate: int,
+    intervals: Sequence[Interval] | np.ndarray,
+    fade_ms: float = DEFAULT_FADE_MS,
+    gain: float = 0.0,
+    start_frame: int = 0,
+) -> np.ndarray:
+    """
+    Mute (or duck) `intervals` in a block of PCM samples, in place.
+
+    Args:
+        samples: (frames,) or (frames, channels) array, int16/int32/float.
+        sample_rate: Sample rate of `samples`.
+        intervals: (start_sec, end_sec) pairs on the absolute timeline, or a
+                   pre-computed frame array from `intervals_to_frames`.
+        fade_ms: Ramp length before/after each interval.
+        gain: Gain inside intervals (0.0 = silence).
+        start_frame: Absolute frame index of samples[0] (for block-wise use).
+
+    Returns:
+        The same `samples` array.
+    """
+    if isinstance(intervals, np.ndarray):
+        frame_intervals = intervals
+    else:
+        frame_intervals = intervals_to_frames(intervals, sample_rate)
+
+    fade_frames = int(round(sample_rate * fade_ms / 1000.0))
+    env, lo, hi = build_gain_envelope(
+        start_frame, samples.shape[0], frame_intervals, fade_frames, gain
+    )
+    if hi <= lo:
+        return samples
+
+    region = samples[lo:hi]
+    weights = env[lo:hi] if region.ndim == 1 else env[lo:hi, None]
+
+    if np.issubdtype(samples.dtype, np.floating):
+        region *= weights
+    else:
+        info = np.iinfo(samples.dtype)
+        scaled = np.rint(region * weights)
+        np.clip(scaled, info.min, info.max, out=scaled)
+        region[...] = scaled.astype(samples.dtype)
+
+    return samples
+
+
+# ─────────────────────────────────────────────────────────
+# File-level helpers
+# ─────────────────────────────────────────────────────────
+
+def mute_wav_file(
+    input_path: str,
+    intervals: Sequence[Interval],
+    output_path: str,
+    fade_ms: float = DEFAULT_FADE_MS,
+    gain: float = 0.0,
+    block_seconds: float = DEFAULT_BLOCK_SECONDS,
+) -> None:
+    """
+    Mute intervals in a PCM WAV file block by block (no ffmpeg involved).
+
+    Raises ValueError if the WAV sample width is not 16 or 32 bit.
+    """
+    with wave.open(input_path, "rb") as src:
+        params = src.getparams()
+        dtype = _PCM_DTYPES.get(params.sampwidth)
+        if dtype is None:
+            raise ValueError(f"Unsupported WAV sample width: {params.sampwidth * 8} bit")
+
+        sample_rate = params.framerate
+        channels = params.nchannels
+        frame_intervals = intervals_to_frames(intervals, sample_rate, params.nframes)
+        block_frames = max(1, int(sample_rate * block_seconds))
+
+        with wave.open(output_path, "wb") as dst:
+            dst.setparams(params)
+            pos = 0
+            while True:
+                data = src.readframes(block_frames)
+                if not data:
+                    break
+                block = np.frombuffer(data, dtype=dtype).reshape(-1, channels).copy()
+                apply_mute_intervals(
+                    block, sample_rate, frame_intervals,
+                    fade_ms=fade_ms, gain=gain, start_frame=pos,
+                )
+                dst.writeframes(block.tobytes())
+                pos += block.shape[0]
+
+
+def _probe_audio_format(path: str) -> Tuple[int, int]:
+    """Return (sample_rate, channels) of the first audio stream via ffprobe."""
+    cmd = [
+        "ffprobe",
+        "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "stream=sample_rate,channels",
+        "-of", "csv=p=0",
+        path,
+    ]
+    result = governed_run(cmd, FFMPEG_DECODE, capture_output=True, text=True, check=True)
+    fields = result.stdout.strip().splitlines()[0].split(",")
+    return int(fields[0]), int(fields[1])
+
+
+def _is_pcm_wav(path: str) -> bool:
+    if not path.lower().endswith(".wav"):
+        return False
+    try:
+        with wave.open(path, "rb") as w:
+            return w.getsampwidth() in _PCM_DTYPES
+    except (wave.Error, EOFError, OSError):
+        return False
+
+
+@traced(cat="ffmpeg")
+def mute_audio_file(
+    input_path: str,
+    intervals: Sequence[Interval],
+    output_path: str,
+    fade_ms: float = DEFAULT_FADE_MS,
+    gain: float = 0.0,
+    block_seconds: float = DEFAULT_BLOCK_SECONDS,
+) -> None:
+    """
+    Mute intervals in any ffmpeg-readable audio file.
+
+    PCM WAV -> PCM WAV is handled directly with the `wave` module. Anything
+    else is decoded once through an ffmpeg pipe to s16le, processed block-wise
+    and piped straight into a single ffmpeg encoder, so the full track is never
+    held in memory.
+    """
+    if _is_pcm_wav(input_path) and output_path.lower().endswith(".wav"):
+        mute_wav_file(input_path, intervals, output_path, fade_ms, gain, block_seconds)
+        return
+
+    sample_rate, channels = _probe_audio_format(input_path)
+    frame_intervals = intervals_to_frames(intervals, sample_rate)
+    block_frames = max(1, int(sample_rate * block_seconds))
+    block_bytes = block_frames * channels * 2
+
+    decode_cmd = [
+        "ffmpeg", "-v", "error",
+        "-i", input_path,
+        "-vn",
+        "-f", "s16le", "-acodec", "pcm_s16le",
+        "-ar", str(sample_rate), "-ac", str(channels),
+        "pipe:1",
+    ]
+    encode_cmd = [
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "s16le", "-ar", str(sample_rate), "-ac", str(channels),
+        "-i", "pipe:0",
+    ]
+    if not os.path.splitext(output_path)[1]:
+        encode_cmd += ["-f", DEFAULT_OUTPUT_FORMAT]
+    encode_cmd.append(output_path)
+
+    # Both pipe ends run for the whole call: hold a decode and an encode slot.
+    # Encoder stderr goes to a temp file: an undrained pipe would block ffmpeg
+    # (and this loop) once it fills up.
+    governor = get_governor()
+    with governor.acquire(FFMPEG_DECODE), governor.acquire(FFMPEG_ENCODE), \
+            tempfile.TemporaryFile() as encode_log:
+        decoder = subprocess.Popen(decode_cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        encoder = subprocess.Popen(encode_cmd, stdin=subprocess.PIPE, stderr=encode_log)
+        encoder_gone = False
+        try:
+            pos = 0
+            pending = b""
+            while True:
+                data = decoder.stdout.read(block_bytes)
+                if not data:
+                    break
+                data = pending + data
+                usable = len(data) - (len(data) % (channels * 2))
+                pending = data[usable:]
+
+                block = np.frombuffer(data[:usable], dtype=np.int16).reshape(-1, channels).copy()
+                apply_mute_intervals(
+                    block, sample_rate, frame_intervals,
+                    fade_ms=fade_ms, gain=gain, start_frame=pos,
+                )
+                try:
+                    encoder.stdin.write(block.tobytes())
+                except BrokenPipeError:
+                    # The encoder exited early; its code and stderr are reported below.
+                    encoder_gone = True
+                    break
+                pos += block.shape[0]
+        finally:
+            # Always reap both processes, even when a close fails or the loop raised.
+            decoder.stdout.close()
+            try:
+                encoder.stdin.close()
+            except BrokenPipeError:
+                encoder_gone = True
+            decode_rc = decoder.wait()
+            encode_rc = encoder.wait()
+            encode_log.seek(0)
+            encode_err = encode_log.read()
+
+    # A dead encoder makes the decoder die of SIGPIPE: report the encoder.
+    if decode_rc != 0 and not encoder_gone:
+        raise RuntimeError(f"ffmpeg decode failed for {input_path} (code={decode_rc})")
+    if encode_rc != 0 or encoder_gone:
+        raise RuntimeError(
+            f"ffmpeg encode failed for {output_path} (code={encode_rc}): "
+            f"{encode_err.decode(errors='replace')[:400]}"
+        )
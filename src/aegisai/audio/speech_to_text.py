@@ -1,46 +1,216 @@
+import hashlib
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
+
 from google.cloud import speech
+from google.cloud.speech_v1.services.speech.transports import SpeechGrpcTransport
 from src.aegisai.moderation.bad_words_list import BAD_WORDS
+from src.aegisai.audio.transcript_cache import get_transcript_cache, make_cache_key
+from src.aegisai.runtime.governor import CLOUD_IO, get_governor
+from src.aegisai.runtime import tracing
+from src.aegisai.runtime.cassette import wrap_client
 
+LANGUAGE_CODE = "en-US"
+MODEL = "video"
+PHRASE_BOOST = 20.0
+STT_SAMPLE_RATE = 16000
 
-_CLIENT: speech.SpeechClient | None = None
+# gRPC multiplexes concurrent calls over one HTTP/2 connection; a few
+# workers per channel keeps per-connection stream limits out of the way.
+WORKERS_PER_CHANNEL = 4
+MAX_CHANNELS = 8
+_CHANNEL_OPTIONS = [
+    ("grpc.max_send_message_length", 16 * 1024 * 1024),
+    ("grpc.max_receive_message_length", 16 * 1024 * 1024),
+    ("grpc.keepalive_time_ms", 30_000),
+    ("grpc.keepalive_timeout_ms", 10_000),
+    ("grpc.keepalive_permit_without_calls", 1),
+]
 
-def _get_client() -> speech.SpeechClient:
-    global _CLIENT
-    if _CLIENT is None:
-        _CLIENT = speech.SpeechClient()
-    return _CLIENT
+# Replaces the gRPC client in every backend (see `set_speech_client_factory`).
+_CLIENT_FACTORY: Optional[Callable[[], Any]] = None
 
-def transcribe_audio(file_path: str):
+
+class SpeechBackend:
     """
-    Transcribe a 16kHz mono LINEAR16 WAV file using Google Speech-to-Text.
+    Preconfigured Google Speech-to-Text backend.
+
+    The SpeechContext / RecognitionConfig are built once per phrase list
+    (per policy) instead of on every chunk, and requests are spread
+    round-robin over a small pool of tuned gRPC channels sized to the
+    number of worker threads.
     """
 
-    client = _get_client()
+    def __init__(
+        self,
+        phrases: Optional[Iterable[str]] = None,
+        pool_size: int = 1,
+        sample_rate: int = STT_SAMPLE_RATE,
+    ) -> None:
+        self.phrases = sorted(BAD_WORDS if phrases is None else phrases)
+        self.sample_rate = sample_rate
+        self._pool_size = max(1, min(pool_size, MAX_CHANNELS))
+        self._clients: list[speech.SpeechClient] = []
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self._configs: dict[int, speech.RecognitionConfig] = {}
+        self._fingerprints: dict[int, str] = {}
+
+        # Boost recognition of bad words to improve detection in songs
+        self._speech_context = speech.SpeechContext(
+            phrases=self.phrases,
+            boost=PHRASE_BOOST,
+        )
+        self.config_for(sample_rate)
+
+    # ----- configuration -----
+
+    def config_for(self, sample_rate: int) -> speech.RecognitionConfig:
+        config = self._configs.get(sample_rate)
+        if config is None:
+            config = speech.RecognitionConfig(
+                language_code=LANGUAGE_CODE,
+                model=MODEL,
+                encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+                sample_rate_hertz=sample_rate,
+                enable_word_time_offsets=True,
+                speech_contexts=[self._speech_context],
+            )
+            self._configs[sample_rate] = config
+        return config
+
+    def config_fingerprint(self, sample_rate: int) -> str:
+        """Identifies everything in the recognition config that affects the result."""
+        fp = self._fingerprints.get(sample_rate)
+        if fp is None:
+            parts = [LANGUAGE_CODE, MODEL, "LINEAR16", str(sample_rate), str(PHRASE_BOOST)]
+            parts.extend(self.phrases)
+            fp = hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+            self._fingerprints[sample_rate] = fp
+        return fp
+
+    # ----- client pool -----
+
+    @staticmethod
+    def _make_client() -> speech.SpeechClient:
+        if _CLIENT_FACTORY is not None:
+            return _CLIENT_FACTORY()
+        return wrap_client(_grpc_client)
+
+    def ensure_capacity(self, workers: int) -> None:
+        """Grow the channel pool to fit `workers` concurrent callers."""
+        wanted = max(1, min(MAX_CHANNELS, -(-workers // WORKERS_PER_CHANNEL)))
+        with self._lock:
+            self._pool_size = max(self._pool_size, wanted)
+
+    def client(self) -> speech.SpeechClient:
+        """Next client from the pool (round-robin)."""
+        with self._lock:
+            while len(self._clients) < self._pool_size:
+                self._clients.append(self._make_client())
+            return self._clients[next(self._next) % len(self._clients)]
+
+    def warm_up(self, timeout: float = 10.0) -> None:
+        """
+        Create every client in the pool and wait for its channel to connect
+        (DNS, TCP, TLS), so the first job does not pay for it. Clients
+        without a gRPC channel (cassette replay, test fakes) are skipped.
+        """
+        import grpc
+
+        with self._lock:
+            while len(self._clients) < self._pool_size:
+                self._clients.append(self._make_client())
+            clients = list(self._clients)
+
+        for client in clients:
+            channel = getattr(getattr(client, "transport", None), "grpc_channel", None)
+            if channel is not None:
+                grpc.channel_ready_future(channel).result(timeout=timeout)
+
+    def streaming_config(
+        self,
+        sample_rate: int = STT_SAMPLE_RATE,
+        interim_results: bool = True,
+    ) -> speech.StreamingRecognitionConfig:
+        return speech.StreamingRecognitionConfig(
+            config=self.config_for(sample_rate),
+            interim_results=interim_results,
+        )
+
+    # ----- recognition -----
+
+    def recognize(self, audio_bytes: bytes, sample_rate: int) -> dict:
+        cache = get_transcript_cache()
+        key = None
+        if cache is not None:
+            key = make_cache_key(audio_bytes, self.config_fingerprint(sample_rate))
+            cached = cache.get(key)
+            if cached is not None:
+                tracing.add("stt_cache_hits")
+                return cached
+
+        with get_governor().acquire(CLOUD_IO), tracing.api_call("stt.recognize", len(audio_bytes)):
+            response = self.client().recognize(
+                config=self.config_for(sample_rate),
+                audio=speech.RecognitionAudio(content=audio_bytes),
+            )
+        result = _response_to_dict(response)
 
-    # Load audio file
-    with open(file_path, "rb") as f:
-        audio_bytes = f.read()
+        if cache is not None:
+            cache.put(key, result)
+        return result
 
-    audio = speech.RecognitionAudio(content=audio_bytes)
+    def transcribe_pcm(self, pcm, sample_rate: int = STT_SAMPLE_RATE) -> dict:
+        # The protobuf field needs real bytes; this is the only copy of the chunk.
+        return self.recognize(bytes(pcm), sample_rate)
 
-    # Boost recognition of bad words to improve detection in songs
-    speech_context = speech.SpeechContext(
-        phrases=list(BAD_WORDS),
-        boost=20.0
-    )
+    def transcribe_file(self, file_path: str) -> dict:
+        with open(file_path, "rb") as f:
+            audio_bytes = f.read()
+        return self.recognize(audio_bytes, STT_SAMPLE_RATE)
 
-    config = speech.RecognitionConfig(
-        language_code="en-US",
-        model="video",
-        encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-        sample_rate_hertz=16000,
-        enable_word_time_offsets=True,
-        speech_contexts=[speech_context],
-    )
+    def transcribe_many(
+        self,
+        chunks: Iterable,
+        max_in_flight: Optional[int] = None,
+    ) -> Iterator[tuple]:
+        """
+        Pipeline requests for a stream of AudioChunk objects.
 
-    response = client.recognize(config=config, audio=audio)
+        Up to `max_in_flight` requests run concurrently; results are yielded
+        in input order as (chunk, result) pairs, where `result` is the STT
+        dict or the exception raised for that chunk.
+        """
+        max_in_flight = max_in_flight or self._pool_size * WORKERS_PER_CHANNEL
+        self.ensure_capacity(max_in_flight)
 
-    # Full transcripts 
+        pending: list = []
+        with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="stt") as pool:
+            for chunk in chunks:
+                pending.append((chunk, pool.submit(self.transcribe_pcm, chunk.pcm, chunk.sample_rate)))
+                if len(pending) >= max_in_flight:
+                    yield _settle(*pending.pop(0))
+            while pending:
+                yield _settle(*pending.pop(0))
+
+
+def _grpc_client() -> speech.SpeechClient:
+    channel = SpeechGrpcTransport.create_channel(options=_CHANNEL_OPTIONS)
+    return speech.SpeechClient(transport=SpeechGrpcTransport(channel=channel))
+
+
+def _settle(chunk, future) -> tuple:
+    try:
+        return chunk, future.result()
+    except Exception as e:
+        return chunk, e
+
+
+def _response_to_dict(response) -> dict:
+    # Full transcripts
     transcripts: list[str] = []
     # Word-level info
     words: list[dict] = []
@@ -65,4 +235,44 @@ def transcribe_audio(file_path: str):
     }
 
 
+_BACKENDS: dict[tuple, SpeechBackend] = {}
+_BACKENDS_LOCK = threading.Lock()
 
+
+def get_speech_backend(phrases: Optional[Sequence[str]] = None) -> SpeechBackend:
+    """Shared backend per phrase list (default: BAD_WORDS)."""
+    key = tuple(sorted(BAD_WORDS if phrases is None else phrases))
+    with _BACKENDS_LOCK:
+        backend = _BACKENDS.get(key)
+        if backend is None:
+            backend = SpeechBackend(phrases=key)
+            _BACKENDS[key] = backend
+        return backend
+
+
+def set_speech_client_factory(factory: Optional[Callable[[], Any]]) -> None:
+    """
+    Build STT clients with `factory()` instead of a gRPC `SpeechClient`
+    (anything with `recognize(config=, audio=)`, e.g. `benchmarks/fakes.py`).
+    Drops the shared backends so their client pools are rebuilt; None
+    restores the real client.
+    """
+    global _CLIENT_FACTORY
+    with _BACKENDS_LOCK:
+        _CLIENT_FACTORY = factory
+        _BACKENDS.clear()
+
+
+def transcribe_audio(file_path: str):
+    """
+    Transcribe a 16kHz mono LINEAR16 WAV file using Google Speech-to-Text.
+    """
+    return get_speech_backend().transcribe_file(file_path)
+
+
+def transcribe_pcm(pcm, sample_rate: int = STT_SAMPLE_RATE):
+    """
+    Transcribe raw LINEAR16 mono samples (bytes or memoryview) without
+    touching the filesystem. Same return shape as `transcribe_audio`.
+    """
+    return get_speech_backend().transcribe_pcm(pcm, sample_rate)
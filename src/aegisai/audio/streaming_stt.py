@@ -0,0 +1,217 @@
+# src/aegisai/audio/streaming_stt.py
+"""
+Long-lived Google `streaming_recognize` sessions for live audio.
+
+A StreamingRecognizer keeps one gRPC stream open per audio stream and is
+fed PCM continuously. Interim and final results come back as
+TranscriptEvent objects whose word times are already ABSOLUTE (seconds on
+the stream timeline), so callers never deal with session-relative offsets.
+
+The API caps a single streaming session at ~5 minutes of audio, so the
+recognizer rotates to a fresh session after `rotate_after_seconds` of fed
+audio (at a feed boundary). The old session is closed gracefully and keeps
+delivering its final results while the new one starts.
+"""
+from __future__ import annotations
+
+import bisect
+import queue
+import threading
+from typing import Callable, List, NamedTuple, Optional
+
+from google.cloud import speech
+
+from src.aegisai.audio.speech_to_text import STT_SAMPLE_RATE, SpeechBackend, get_speech_backend
+
+DEFAULT_ROTATE_AFTER_SECONDS = 240.0
+FRAME_SECONDS = 0.1   # audio per StreamingRecognizeRequest
+
+
+class TranscriptEvent(NamedTuple):
+    text: str
+    is_final: bool
+    words: List[dict]     # [{"word", "start", "end"}] in absolute seconds (final results only)
+    end_ts: float         # absolute stream time this result covers up to
+    stability: float
+
+
+class _Session:
+    """One `streaming_recognize` call with its own request queue and time map."""
+
+    def __init__(
+        self,
+        backend: SpeechBackend,
+        sample_rate: int,
+        interim_results: bool,
+        on_event: Callable[[TranscriptEvent], None],
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.fed_seconds = 0.0
+        self.failed: Optional[BaseException] = None
+        self._on_event = on_event
+        self._audio_q: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        # (session_offset_seconds, absolute_ts) for every feed() call, so
+        # session-relative times map back even if the stream has gaps.
+        self._offsets: List[float] = []
+        self._abs: List[float] = []
+        self._lock = threading.Lock()
+
+        self._client = backend.client()
+        self._config = backend.streaming_config(sample_rate, interim_results)
+        self._thread = threading.Thread(target=self._run, name="StreamingSTT", daemon=True)
+        self._thread.start()
+
+    # ----- feeding -----
+
+    def feed(self, pcm: bytes, start_ts: float) -> None:
+        with self._lock:
+            self._offsets.append(self.fed_seconds)
+            self._abs.append(start_ts)
+            self.fed_seconds += len(pcm) / (2 * self.sample_rate)
+
+        frame_bytes = int(self.sample_rate * FRAME_SECONDS) * 2
+        for i in range(0, len(pcm), frame_bytes):
+            self._audio_q.put(pcm[i:i + frame_bytes])
+
+    def finish(self) -> None:
+        self._audio_q.put(None)
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        self._thread.join(timeout)
+
+    # ----- time mapping -----
+
+    def to_abs(self, session_seconds: float) -> float:
+        with self._lock:
+            if not self._offsets:
+                return session_seconds
+            i = max(0, bisect.bisect_right(self._offsets, session_seconds) - 1)
+            return self._abs[i] + (session_seconds - self._offsets[i])
+
+    # ----- gRPC stream -----
+
+    def _requests(self):
+        while True:
+            data = self._audio_q.get()
+            if data is None:
+                return
+            yield speech.StreamingRecognizeRequest(audio_content=data)
+
+    def _run(self) -> None:
+        try:
+            responses = self._client.streaming_recognize(
+                config=self._config,
+                requests=self._requests(),
+            )
+            for response in responses:
+                for result in response.results:
+                    if not result.alternatives:
+                        continue
+                    self._emit(result)
+        except Exception as e:
+            self.failed = e
+            print(f"[streaming_stt] Session ended with error: {e}")
+            # Unblock the request generator if gRPC stopped consuming it.
+            while True:
+                try:
+                    self._audio_q.get_nowait()
+                except queue.Empty:
+                    break
+
+    def _emit(self, result) -> None:
+        alternative = result.alternatives[0]
+        words: List[dict] = []
+        if result.is_final:
+            for w in alternative.words:
+                words.append(
+                    {
+                        "word": w.word,
+                        "start": self.to_abs(w.start_time.total_seconds()),
+                        "end": self.to_abs(w.end_time.total_seconds()),
+                    }
+                )
+
+        event = TranscriptEvent(
+            text=alternative.transcript,
+            is_final=bool(result.is_final),
+            words=words,
+            end_ts=self.to_abs(result.result_end_time.total_seconds()),
+            stability=float(result.stability),
+        )
+        try:
+            self._on_event(event)
+        except Exception as e:
+            print(f"[streaming_stt] Event handler error: {e}")
+
+
+class StreamingRecognizer:
+    """
+    Continuous recognizer for one live stream.
+
+    Usage:
+        rec = StreamingRecognizer(on_event=handle)
+        rec.feed(pcm_bytes, start_ts)   # repeatedly, in stream order
+        rec.close()
+    """
+
+    def __init__(
+        self,
+        on_event: Callable[[TranscriptEvent], None],
+        backend: Optional[SpeechBackend] = None,
+        sample_rate: int = STT_SAMPLE_RATE,
+        interim_results: bool = True,
+        rotate_after_seconds: float = DEFAULT_ROTATE_AFTER_SECONDS,
+    ) -> None:
+        self.on_event = on_event
+        self.backend = backend or get_speech_backend()
+        self.sample_rate = sample_rate
+        self.interim_results = interim_results
+        self.rotate_after_seconds = rotate_after_seconds
+        self.sessions_started = 0
+
+        self._session: Optional[_Session] = None
+        self._retired: List[_Session] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _new_session(self) -> _Session:
+        self.sessions_started += 1
+        return _Session(self.backend, self.sample_rate, self.interim_results, self.on_event)
+
+    def feed(self, pcm, start_ts: float) -> None:
+        """Feed LINEAR16 mono PCM that starts at absolute time `start_ts`."""
+        data = bytes(pcm)
+        if not data:
+            return
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("StreamingRecognizer is closed")
+
+            session = self._session
+            if (
+                session is None
+                or session.failed is not None
+                or session.fed_seconds >= self.rotate_after_seconds
+            ):
+                if session is not None:
+                    session.finish()
+                    self._retired.append(session)
+                session = self._session = self._new_session()
+
+        session.feed(data, start_ts)
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Half-close every session and wait for their final results."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            sessions = self._retired + ([self._session] if self._session else [])
+            self._session = None
+            self._retired = []
+
+        for session in sessions:
+            session.finish()
+        for session in sessions:
+            session.join(timeout)
@@ -1,99 +1,165 @@
-import re
-from typing import List, Dict, TypedDict
-
-class SubtitleSegment(TypedDict):
-    start: float
-    end: float
-    text: str
-
-def _parse_timestamp(ts_str: str) -> float:
-    """
-    Parse timestamp string to seconds.
-    Formats: HH:MM:SS,mmm or HH:MM:SS.mmm or MM:SS.mmm (VTT)
-    """
-    ts_str = ts_str.replace(',', '.')
-    parts = ts_str.split(':')
-
-    if len(parts) == 3:
-        hours, minutes, seconds = parts
-        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
-    elif len(parts) == 2:
-        minutes, seconds = parts
-        return int(minutes) * 60 + float(seconds)
-    else:
-        raise ValueError(f"Invalid timestamp format: {ts_str}")
-
-def parse_subtitle_file(path: str) -> List[SubtitleSegment]:
-    """
-    Parse SRT or VTT file and return segments.
-    """
-    with open(path, 'r', encoding='utf-8') as f:
-        content = f.read()
+"""
+SRT / WebVTT parsing.
 
-    segments: List[SubtitleSegment] = []
+The parser is a small line state machine driven by one compiled tokenizer
+(`_TIMING_RE`, which also captures the timestamp fields), so it can run:
 
-    # Unified regex for SRT and VTT timestamps
-    ts_pattern = re.compile(r'((?:\d{1,2}:)?\d{1,2}:\d{2}[,.]\d{3})\s-->\s((?:\d{1,2}:)?\d{1,2}:\d{2}[,.]\d{3})')
-    # Regex for integer line (SRT index)
-    index_pattern = re.compile(r'^\d+$')
+- over a file handle as a generator (`iter_subtitle_file`) in constant
+  memory, for very large caption archives;
+- incrementally over raw bytes (`SubtitleStreamParser.feed`) for live
+  caption streams such as WebVTT segments pulled from HLS.
 
-    lines = content.splitlines()
-    i = 0
-    n = len(lines)
+`parse_subtitle_file` keeps its old behaviour and returns a list.
 
-    while i < n:
-        line = lines[i].strip()
+Cue rules (same as the original parser):
+- a cue starts at any line containing `start --> end`;
+- its text runs until a blank line, the next timing line, or an SRT index
+  line that is directly followed by a timing line;
+- text lines are joined with spaces and `<tags>` are removed.
 
-        # Check for timestamp line
-        match = ts_pattern.search(line)
-        if match:
-            try:
-                start_time = _parse_timestamp(match.group(1))
-                end_time = _parse_timestamp(match.group(2))
+Files are read with universal newlines (`\n`, `\r\n`, `\r`); the old
+whole-file `splitlines()` also split on rarer separators such as U+2028.
+"""
+from __future__ import annotations
 
-                # Extract text
-                text_lines = []
-                i += 1
-                while i < n:
-                    next_line = lines[i].strip()
-
-                    # Stop conditions:
-
-                    # 1. Empty line (Block separator)
-                    if not next_line:
-                        break
+import codecs
+import re
+from typing import Iterable, Iterator, List, Optional, TypedDict
 
-                    # 2. Next line is a timestamp (VTT no-blank-line case)
-                    if ts_pattern.search(next_line):
-                        break
 
-                    # 3. Next line is a number AND the line AFTER that is a timestamp (SRT no-blank-line case)
-                    # We need to peek 2 lines ahead effectively.
-                    if index_pattern.match(next_line):
-                        # Look ahead one more line if possible
-                        if i + 1 < n:
-                            after_next = lines[i+1].strip()
-                            if ts_pattern.search(after_next):
-                                # 'next_line' is an index, so we stop here.
-                                break
+class SubtitleSegment(TypedDict):
+    start: float
+    end: float
+    text: str
 
-                    text_lines.append(next_line)
-                    i += 1
 
-                text = " ".join(text_lines).strip()
-                text = re.sub(r'<[^>]+>', '', text) # Strip tags
+_TS = r"(?:(\d{1,2}):)?(\d{1,2}):(\d{2})[,.](\d{3})"
+# The one tokenizer: a cue timing line (anywhere in the line). Only lines
+# containing "-->" are searched; bare SRT indices are plain digit strings.
+_TIMING_RE = re.compile(rf"{_TS}\s-->\s{_TS}")
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def _timing(m: re.Match) -> tuple:
+    # HH:MM:SS.mmm or MM:SS.mmm (VTT); ',' or '.' before the milliseconds.
+    h1, m1, s1, f1, h2, m2, s2, f2 = m.groups()
+    start = int(h1 or 0) * 3600 + int(m1) * 60 + float(f"{s1}.{f1}")
+    end = int(h2 or 0) * 3600 + int(m2) * 60 + float(f"{s2}.{f2}")
+    return start, end
+
+
+class _CueBuilder:
+    """Line-driven cue state machine shared by every parsing mode."""
+
+    def __init__(self) -> None:
+        self._start: Optional[float] = None   # None = outside a cue
+        self._end = 0.0
+        self._lines: List[str] = []
+        # SRT index seen inside a cue: text, unless the next line is a timing line.
+        self._pending_index: Optional[str] = None
+
+    def _cue(self, start: float, end: float, lines: List[str]) -> SubtitleSegment:
+        return {"start": start, "end": end, "text": _TAG_RE.sub("", " ".join(lines).strip())}
+
+    def push_lines(self, lines: Iterable[str]) -> Iterator[SubtitleSegment]:
+        """Consume lines; yield each cue as soon as the line ending it arrives."""
+        start, end, text, pending = self._start, self._end, self._lines, self._pending_index
+        try:
+            for raw in lines:
+                line = raw.strip()
+                m = _TIMING_RE.search(line) if "-->" in line else None
+
+                if pending is not None:
+                    if m is None:
+                        text.append(pending)
+                    pending = None
+
+                if start is None:
+                    if m is not None:
+                        start, end = _timing(m)
+                elif m is not None:
+                    cue = self._cue(start, end, text)
+                    start, end = _timing(m)
+                    text = []
+                    yield cue
+                elif not line:
+                    cue = self._cue(start, end, text)
+                    start, text = None, []
+                    yield cue
+                elif line.isdecimal():   # bare number: decided by the next line
+                    pending = line
+                else:
+                    text.append(line)
+        finally:
+            self._start, self._end, self._lines, self._pending_index = start, end, text, pending
+
+    def close(self) -> Optional[SubtitleSegment]:
+        if self._pending_index is not None:
+            self._lines.append(self._pending_index)
+            self._pending_index = None
+        if self._start is None:
+            return None
+        cue = self._cue(self._start, self._end, self._lines)
+        self._start, self._lines = None, []
+        return cue
+
+
+def iter_subtitle_segments(lines: Iterable[str]) -> Iterator[SubtitleSegment]:
+    """Yield cues from any iterable of text lines (a file handle, a list, ...)."""
+    builder = _CueBuilder()
+    yield from builder.push_lines(lines)
+    segment = builder.close()
+    if segment is not None:
+        yield segment
+
+
+def iter_subtitle_file(path: str) -> Iterator[SubtitleSegment]:
+    """Stream cues from an SRT or VTT file without loading it into memory."""
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from iter_subtitle_segments(f)
 
-                segments.append({
-                    "start": start_time,
-                    "end": end_time,
-                    "text": text
-                })
 
-                continue
+def parse_subtitle_file(path: str) -> List[SubtitleSegment]:
+    """
+    Parse SRT or VTT file and return segments.
+    """
+    return list(iter_subtitle_file(path))
 
-            except ValueError:
-                pass
 
-        i += 1
+class SubtitleStreamParser:
+    """
+    Incremental parser for live captions.
+
+    Usage:
+        parser = SubtitleStreamParser()
+        for data in caption_chunks:          # bytes, split anywhere
+            for cue in parser.feed(data):
+                ...
+        cues = parser.close()                # flush the last cue
+
+    A cue is emitted once the line that ends it (blank line or next timing
+    line) has arrived; multi-byte UTF-8 characters split across chunks are
+    handled by an incremental decoder.
+    """
 
-    return segments
+    def __init__(self, encoding: str = "utf-8") -> None:
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self._builder = _CueBuilder()
+        self._partial = ""
+
+    def feed(self, data: bytes) -> List[SubtitleSegment]:
+        text = self._partial + self._decoder.decode(data)
+        lines = text.splitlines(keepends=True)
+        # Hold back the unterminated tail, and a trailing "\r" whose "\n"
+        # may arrive in the next chunk (otherwise it would look like a blank line).
+        self._partial = lines.pop() if lines and not lines[-1].endswith("\n") else ""
+        return list(self._builder.push_lines(lines))
+
+    def close(self) -> List[SubtitleSegment]:
+        lines = [self._partial + self._decoder.decode(b"", final=True)]
+        self._partial = ""
+        segments = list(self._builder.push_lines(lines))
+        segment = self._builder.close()
+        if segment is not None:
+            segments.append(segment)
+        return segments
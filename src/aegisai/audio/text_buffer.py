@@ -1,29 +1,99 @@
 # src/aegisai/audio/text_buffer.py
-from typing import List
+"""
+Rolling transcript window shared by the audio workers.
+
+Snippets are kept sorted by timestamp in a deque, so workers that finish
+out of order still produce an ordered window. The window ends at the
+newest timestamp seen; older snippets expire from the left.
+
+Each snippet is matched once when it is added, and a Counter of matched
+terms is updated as snippets enter and leave the window. Window-level bad
+words / severity are therefore available in O(new text) instead of
+re-analysing the whole window. Phrases that span two snippets are not
+counted (the same holds for per-chunk analysis).
+"""
+from __future__ import annotations
+
+import threading
+from collections import Counter, deque
+from typing import Deque, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from src.aegisai.moderation.bad_words_list import BAD_WORDS
+from src.aegisai.moderation.matcher import PhraseMatcher, get_matcher
+from src.aegisai.moderation.text_rules import _compute_severity
+
+
+class WindowStats(NamedTuple):
+    bad_words: List[str]   # distinct matched entries, blocklist order
+    count: int
+    severity: int          # text_rules severity bucket (0-3)
 
 
 class TextBuffer:
     """
     Stores (timestamp, text) pairs and keeps only entries from
     the last `window_seconds` seconds.
+
+    `policy` (a CompiledPolicy) or `blocklist` selects the matcher used for
+    the running window counts; default is the built-in word list.
     """
 
-    def __init__(self, window_seconds: int = 30) -> None:
+    def __init__(
+        self,
+        window_seconds: int = 30,
+        policy=None,
+        blocklist: Optional[Iterable[str]] = None,
+    ) -> None:
         self.window_seconds = window_seconds
-        self.items: List[tuple[float, str]] = []
+        self.items: Deque[Tuple[float, str]] = deque()
+        self._terms: Deque[FrozenSet[str]] = deque()   # parallel to items
+        self._counts: Counter = Counter()
+        self._latest: Optional[float] = None
+        self._lock = threading.Lock()
+
+        if policy is not None:
+            self.matcher: PhraseMatcher = policy.matcher
+        else:
+            self.matcher = get_matcher(tuple(blocklist) if blocklist is not None else tuple(BAD_WORDS))
 
     def add(self, timestamp: float, text: str) -> None:
         """Add a new text snippet with its start timestamp."""
-        self.items.append((timestamp, text))
-        self._cleanup(timestamp)
+        terms = frozenset(hit.term for hit in self.matcher.find_all(text))
+
+        with self._lock:
+            if self._latest is None or timestamp > self._latest:
+                self._latest = timestamp
+            elif self._latest - timestamp > self.window_seconds:
+                return   # arrived after its window already expired
+
+            # Late snippets usually land near the end; walk back from the right.
+            i = len(self.items)
+            while i and self.items[i - 1][0] > timestamp:
+                i -= 1
+            self.items.insert(i, (timestamp, text))
+            self._terms.insert(i, terms)
+            self._counts.update(terms)
+
+            self._cleanup(self._latest)
 
     def _cleanup(self, now: float) -> None:
         """Drop items older than `window_seconds` from the buffer."""
-        self.items = [
-            (t, txt) for (t, txt) in self.items
-            if now - t <= self.window_seconds
-        ]
+        while self.items and now - self.items[0][0] > self.window_seconds:
+            self.items.popleft()
+            for term in self._terms.popleft():
+                self._counts[term] -= 1
+                if not self._counts[term]:
+                    del self._counts[term]
 
     def get_text(self) -> str:
         """Return concatenated text from all items in the current window."""
-        return " ".join(txt for (_, txt) in self.items)
+        with self._lock:
+            return " ".join(txt for (_, txt) in self.items)
+
+    def window_stats(self) -> WindowStats:
+        """Bad words / severity of the current window from the running counts."""
+        with self._lock:
+            found = list(self._counts)
+        bad_words = self.matcher.ordered_terms(found)
+        count = len(bad_words)
+        return WindowStats(bad_words, count, _compute_severity(count))
@@ -0,0 +1,239 @@
+# src/aegisai/audio/transcript_cache.py
+"""
+Content-addressed cache for Speech-to-Text results.
+
+Entries are keyed by sha256(audio bytes + recognition config fingerprint),
+so the same audio transcribed with the same language / model / speech
+contexts is only sent to Google once: retries after a render failure,
+re-uploads, or an audio+video re-run of an audio-only job all hit the cache.
+
+Two tiers:
+  - a bounded in-memory LRU (OrderedDict) shared by all worker threads,
+  - a persistent SQLite file so hits survive process restarts. It is capped
+    by row count and result bytes; the oldest entries are evicted first.
+    Each thread uses its own connection (WAL mode), and no SQLite I/O runs
+    under the LRU lock, so a slow disk never stalls other workers' hits.
+
+Environment:
+  AEGIS_TRANSCRIPT_CACHE        "0" disables the cache entirely.
+  AEGIS_TRANSCRIPT_CACHE_PATH   SQLite file (default: <tmp>/aegisai/transcripts.sqlite3).
+                                Empty string = memory only.
+  AEGIS_TRANSCRIPT_CACHE_MAX_ROWS / AEGIS_TRANSCRIPT_CACHE_MAX_MB
+                                Caps of the SQLite file (default 100000 rows / 512 MB).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from src.aegisai.moderation.metrics import increment_counter
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_MAX_ROWS = 100_000
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+EVICT_FRACTION = 0.1   # share of the row cap dropped per eviction pass
+
+
+def default_cache_path() -> str:
+    return os.path.join(tempfile.gettempdir(), "aegisai", "transcripts.sqlite3")
+
+
+def make_cache_key(audio: bytes | memoryview, config_fingerprint: str) -> str:
+    h = hashlib.sha256()
+    h.update(config_fingerprint.encode("utf-8"))
+    h.update(b"\0")
+    h.update(audio)
+    return h.hexdigest()
+
+
+class TranscriptCache:
+    """
+    Thread-safe LRU of STT results ({"transcripts": [...], "words": [...]})
+    with optional SQLite persistence, capped at `max_rows` rows and
+    `max_bytes` bytes of stored results (oldest evicted first).
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self._lru: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Per-thread SQLite connections; `_conns` lets close() reach them all.
+        self._local = threading.local()
+        self._conns: list[sqlite3.Connection] = []
+        self._conns_lock = threading.Lock()
+        self._persistent = False
+        self._closed = False
+
+        # Approximate store size, re-synced from SQLite on every eviction pass.
+        self._rows = 0
+        self._bytes = 0
+        self._size_lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+
+        if path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._persistent = True
+                db = self._conn()
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS transcripts ("
+                    " key TEXT PRIMARY KEY,"
+                    " result TEXT NOT NULL,"
+                    " created_at REAL NOT NULL)"
+                )
+                db.execute("CREATE INDEX IF NOT EXISTS transcripts_created_at ON transcripts (created_at)")
+                db.commit()
+                self._sync_size(db)
+            except (sqlite3.Error, OSError) as e:
+                print(f"[transcript_cache] Persistent store disabled ({path}): {e}")
+                self._persistent = False
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        """This thread's connection to the store (None when memory only)."""
+        if not self._persistent or self._closed:
+            return None
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+            with self._conns_lock:
+                self._conns.append(db)
+        return db
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            result = self._lru.get(key)
+            if result is not None:
+                self._lru.move_to_end(key)
+
+        if result is None:
+            result = self._load(key)
+            if result is not None:
+                with self._lock:
+                    self._remember(key, result)
+
+        increment_counter("transcript_cache.hit" if result is not None else "transcript_cache.miss")
+        return result
+
+    def put(self, key: str, result: dict) -> None:
+        with self._lock:
+            self._remember(key, result)
+
+        db = self._conn()
+        if db is None:
+            return
+        payload = json.dumps(result)
+        try:
+            db.execute(
+                "INSERT OR REPLACE INTO transcripts (key, result, created_at) VALUES (?, ?, ?)",
+                (key, payload, time.time()),
+            )
+            db.commit()
+        except sqlite3.Error as e:
+            print(f"[transcript_cache] Failed to persist entry: {e}")
+            return
+
+        with self._size_lock:
+            self._rows += 1
+            self._bytes += len(payload)
+            over = self._rows > self.max_rows or self._bytes > self.max_bytes
+        if over:
+            self._evict(db)
+
+    def _load(self, key: str) -> Optional[dict]:
+        db = self._conn()
+        if db is None:
+            return None
+        try:
+            row = db.execute("SELECT result FROM transcripts WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"[transcript_cache] Failed to read entry: {e}")
+            return None
+        return json.loads(row[0]) if row is not None else None
+
+    def _sync_size(self, db: sqlite3.Connection) -> None:
+        rows, size = db.execute("SELECT COUNT(*), COALESCE(SUM(length(result)), 0) FROM transcripts").fetchone()
+        with self._size_lock:
+            self._rows, self._bytes = int(rows), int(size)
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        """Drop the oldest rows until the store is back under both caps."""
+        if not self._evict_lock.acquire(blocking=False):
+            return  # another thread is already evicting
+        try:
+            self._sync_size(db)
+            batch = max(1, int(self.max_rows * EVICT_FRACTION))
+            while self._rows > self.max_rows or self._bytes > self.max_bytes:
+                excess = max(self._rows - self.max_rows, 0)
+                db.execute(
+                    "DELETE FROM transcripts WHERE key IN ("
+                    " SELECT key FROM transcripts ORDER BY created_at, rowid LIMIT ?)",
+                    (max(excess, batch),),
+                )
+                db.commit()
+                self._sync_size(db)
+        except sqlite3.Error as e:
+            print(f"[transcript_cache] Eviction failed: {e}")
+        finally:
+            self._evict_lock.release()
+
+    def _remember(self, key: str, result: dict) -> None:
+        self._lru[key] = result
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def stored_rows(self) -> int:
+        """Rows in the SQLite store as of the last write / eviction."""
+        with self._size_lock:
+            return self._rows
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._lru)
+
+    def close(self) -> None:
+        self._closed = True
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+        for db in conns:
+            db.close()
+
+
+_CACHE: Optional[TranscriptCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_transcript_cache() -> Optional[TranscriptCache]:
+    """Process-wide cache, or None when disabled via AEGIS_TRANSCRIPT_CACHE=0."""
+    global _CACHE
+    if os.getenv("AEGIS_TRANSCRIPT_CACHE", "1") == "0":
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            path = os.getenv("AEGIS_TRANSCRIPT_CACHE_PATH", default_cache_path())
+            _CACHE = TranscriptCache(
+                path=path or None,
+                max_rows=int(os.getenv("AEGIS_TRANSCRIPT_CACHE_MAX_ROWS", DEFAULT_MAX_ROWS)),
+                max_bytes=int(float(os.getenv("AEGIS_TRANSCRIPT_CACHE_MAX_MB", DEFAULT_MAX_BYTES / 2**20)) * 2**20),
+            )
+        return _CACHE
@@ -0,0 +1,272 @@
+# src/aegisai/audio/vad.py
+"""
+Local voice activity detection used to skip STT on chunks without speech.
+
+Every chunk is split into short frames (30 ms by default) and each frame is
+classified as speech / non-speech. A chunk is sent to Speech-to-Text only if
+it contains enough speech frames to hold a word.
+
+Two detectors are available:
+
+- EnergyVAD: NumPy-only. Uses frame energy against an adaptive noise floor,
+  zero-crossing rate and spectral flatness. Thresholds are deliberately
+  conservative: a dropped chunk is a missed word, so anything ambiguous
+  counts as speech.
+- WebRTCVAD: adapter for the optional `webrtcvad` package.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_FRAME_MS = 30
+DEFAULT_MIN_SPEECH_MS = 150   # shortest speech run that keeps a chunk
+DEFAULT_SPAN_PAD_MS = 250     # padding around speech spans (also bridges syllable gaps)
+
+
+def pcm_to_float(pcm, dtype=np.int16) -> np.ndarray:
+    """View LINEAR16 bytes/memoryview as float32 samples in [-1, 1]."""
+    samples = np.frombuffer(pcm, dtype=dtype)
+    return samples.astype(np.float32) / 32768.0
+
+
+def frame_signal(samples: np.ndarray, sample_rate: int, frame_ms: int) -> np.ndarray:
+    """Split samples into a (n_frames, frame_len) array, dropping the tail."""
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    n_frames = len(samples) // frame_len
+    return samples[:n_frames * frame_len].reshape(n_frames, frame_len)
+
+
+def frame_features(frames: np.ndarray):
+    """
+    Per-frame features.
+
+    Returns:
+        (energy_db, zcr, flatness)
+        energy_db: RMS level in dBFS.
+        zcr: zero crossings per sample (0..1).
+        flatness: spectral flatness (0 = tonal, 1 = white noise).
+    """
+    if frames.shape[0] == 0:
+        empty = np.empty(0, dtype=np.float32)
+        return empty, empty, empty
+
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    energy_db = 20.0 * np.log10(rms + 1e-10)
+
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frames.shape[1]
+
+    window = np.hanning(frames.shape[1]).astype(np.float32)
+    power = np.abs(np.fft.rfft(frames * window, axis=1)) ** 2 + 1e-12
+    flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+
+    return energy_db, zcr, flatness
+
+
+class VoiceActivityDetector:
+    """
+    Base class for frame-level detectors.
+
+    Subclasses implement `speech_frames(pcm, sample_rate)` returning one
+    boolean per `frame_ms` frame.
+    """
+
+    frame_ms: int = DEFAULT_FRAME_MS
+    min_speech_ms: int = DEFAULT_MIN_SPEECH_MS
+
+    def speech_frames(self, pcm, sample_rate: int) -> np.ndarray:
+        raise NotImplementedError
+
+    def has_speech(self, pcm, sample_rate: int) -> bool:
+        """True if at least `min_speech_ms` worth of frames are speech."""
+        mask = self.speech_frames(pcm, sample_rate)
+        needed = max(1, int(np.ceil(self.min_speech_ms / self.frame_ms)))
+        return int(np.count_nonzero(mask)) >= needed
+
+
+class EnergyVAD(VoiceActivityDetector):
+    """
+    NumPy detector based on energy, zero-crossing rate and spectral flatness.
+
+    A frame is speech when it is:
+      - louder than `min_energy_db` and `noise_margin_db` above the chunk's
+        noise floor (a low percentile of frame energies),
+      - not noise-like (flatness below `max_flatness`),
+      - within the zero-crossing range of voiced/unvoiced speech.
+
+    Speech is also strongly modulated at the syllable rate, so a chunk whose
+    loud frames stay within `min_energy_std_db` of each other (sustained
+    instrument, hum, steady room tone) is treated as having no speech.
+    """
+
+    def __init__(
+        self,
+        frame_ms: int = DEFAULT_FRAME_MS,
+        min_speech_ms: int = DEFAULT_MIN_SPEECH_MS,
+        min_energy_db: float = -50.0,
+        noise_margin_db: float = 6.0,
+        noise_percentile: float = 10.0,
+        max_flatness: float = 0.6,
+        max_zcr: float = 0.45,
+        min_energy_std_db: float = 0.5,
+    ) -> None:
+        self.frame_ms = frame_ms
+        self.min_speech_ms = min_speech_ms
+        self.min_energy_db = min_energy_db
+        self.noise_margin_db = noise_margin_db
+        self.noise_percentile = noise_percentile
+        self.max_flatness = max_flatness
+        self.max_zcr = max_zcr
+        self.min_energy_std_db = min_energy_std_db
+
+    def speech_frames(self, pcm, sample_rate: int) -> np.ndarray:
+        frames = frame_signal(pcm_to_float(pcm), sample_rate, self.frame_ms)
+        energy_db, zcr, flatness = frame_features(frames)
+        if energy_db.size == 0:
+            return np.zeros(0, dtype=bool)
+
+        noise_floor = float(np.percentile(energy_db, self.noise_percentile))
+        # A chunk that is loud throughout (speech over music, dense dialogue)
+        # has no quiet frames to estimate the floor from; cap the margin so
+        # it never rejects the whole chunk.
+        threshold = max(self.min_energy_db, min(noise_floor + self.noise_margin_db, -30.0))
+        loud = energy_db > threshold
+
+        speech = loud & (flatness < self.max_flatness) & (zcr < self.max_zcr)
+        if speech.sum() > 1 and float(np.std(energy_db[speech])) < self.min_energy_std_db:
+            return np.zeros_like(speech)
+        return speech
+
+
+class WebRTCVAD(VoiceActivityDetector):
+    """
+    Adapter for the optional `webrtcvad` package (GMM-based frame classifier).
+
+    Supports 8/16/32/48 kHz and 10/20/30 ms frames.
+    """
+
+    def __init__(
+        self,
+        aggressiveness: int = 1,
+        frame_ms: int = DEFAULT_FRAME_MS,
+        min_speech_ms: int = DEFAULT_MIN_SPEECH_MS,
+    ) -> None:
+        try:
+            import webrtcvad
+        except ImportError as e:
+            raise ImportError("WebRTCVAD requires the 'webrtcvad' package") from e
+
+        if frame_ms not in (10, 20, 30):
+            raise ValueError("webrtcvad frames must be 10, 20 or 30 ms")
+        self._vad = webrtcvad.Vad(aggressiveness)
+        self.frame_ms = frame_ms
+        self.min_speech_ms = min_speech_ms
+
+    def speech_frames(self, pcm, sample_rate: int) -> np.ndarray:
+        data = memoryview(pcm).cast("B")
+        frame_bytes = int(sample_rate * self.frame_ms / 1000) * 2
+        n_frames = len(data) // frame_bytes
+        return np.array(
+            [
+                self._vad.is_speech(bytes(data[i * frame_bytes:(i + 1) * frame_bytes]), sample_rate)
+                for i in range(n_frames)
+            ],
+            dtype=bool,
+        )
+
+
+def get_vad(name: str = "energy", **kwargs) -> VoiceActivityDetector:
+    """Build a detector by name: "energy" or "webrtc"."""
+    if name == "energy":
+        return EnergyVAD(**kwargs)
+    if name == "webrtc":
+        return WebRTCVAD(**kwargs)
+    raise ValueError(f"Unknown VAD: {name!r}")
+
+
+@dataclass
+class VadStats:
+    """Counts of chunks kept / skipped by the VAD stage."""
+
+    total_chunks: int = 0
+    skipped_chunks: int = 0
+    total_seconds: float = 0.0
+    skipped_seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record(self, duration: float, skipped: bool) -> None:
+        with self._lock:
+            self.total_chunks += 1
+            self.total_seconds += duration
+            if skipped:
+                self.skipped_chunks += 1
+                self.skipped_seconds += duration
+
+    @property
+    def skip_ratio(self) -> float:
+        if self.total_chunks == 0:
+            return 0.0
+        return self.skipped_chunks / self.total_chunks
+
+    def summary(self) -> str:
+        return (
+            f"skipped {self.skipped_chunks}/{self.total_chunks} chunks "
+            f"({self.skip_ratio:.0%}, {self.skipped_seconds:.1f}s of "
+            f"{self.total_seconds:.1f}s) without speech"
+        )
+
+
+def chunk_has_speech(
+    pcm,
+    sample_rate: int,
+    vad: Optional[VoiceActivityDetector] = None,
+) -> bool:
+    """Convenience wrapper; on any VAD error the chunk is kept (fail open)."""
+    vad = vad or EnergyVAD()
+    try:
+        return vad.has_speech(pcm, sample_rate)
+    except Exception as e:
+        print(f"[vad] Error classifying chunk, keeping it: {e}")
+        return True
+
+
+def speech_spans(
+    pcm,
+    sample_rate: int,
+    vad: Optional[VoiceActivityDetector] = None,
+    pad_ms: int = DEFAULT_SPAN_PAD_MS,
+) -> List[Tuple[float, float]]:
+    """
+    (start_sec, end_sec) runs of speech frames within the chunk, padded by
+    `pad_ms` on each side and merged where the padding overlaps. Returns []
+    when there is no speech or the VAD fails.
+    """
+    vad = vad or EnergyVAD()
+    try:
+        mask = vad.speech_frames(pcm, sample_rate)
+    except Exception as e:
+        print(f"[vad] Error finding speech spans: {e}")
+        return []
+    if not mask.any():
+        return []
+
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    frame_s = vad.frame_ms / 1000.0
+    pad = pad_ms / 1000.0
+    duration = len(mask) * frame_s
+
+    spans: List[Tuple[float, float]] = []
+    for a, b in zip(starts, ends):
+        start = max(0.0, a * frame_s - pad)
+        end = min(duration, b * frame_s + pad)
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return spans
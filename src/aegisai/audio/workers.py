@@ -1,10 +1,13 @@
 import queue
 from typing import List
 
-from src.aegisai.audio.speech_to_text import transcribe_audio
+from src.aegisai.audio.audio_source import AudioChunk
+from src.aegisai.audio.speech_to_text import transcribe_audio, transcribe_pcm
 from src.aegisai.audio.intervals import detect_toxic_segments
 from src.aegisai.audio.text_buffer import TextBuffer
+from src.aegisai.audio.vad import speech_spans
 from src.aegisai.moderation.text_rules import analyze_text, TextModerationResult
+from src.aegisai.runtime import metrics, tracing
 
 def audio_worker(
     audio_q: "queue.Queue",
@@ -12,16 +15,21 @@ def audio_worker(
     text_buffer: TextBuffer,
     muted_intervals: list[tuple[float, float]],
     chunk_seconds: int,
+    policy=None,
 ) -> None:
     """
     Worker that processes audio chunks.
 
-    audio_q items: (wav_path: str, timestamp_start: float)
+    audio_q items: AudioChunk (in-memory PCM from `audio_source`) or
+    the legacy (wav_path: str, timestamp_start: float) tuple.
     For each chunk:
-      - transcribe_audio(wav_path)
+      - transcribe_pcm(chunk.pcm) / transcribe_audio(wav_path)
       - append to TextBuffer
-      - analyze_text(window_text)
-      - if result.block: put event into event_q
+      - analyze_text(chunk text)
+      - if result.block: put event into event_q (with the window's
+        running bad-word stats from `text_buffer.window_stats()`)
+
+    `policy` (a CompiledPolicy) supplies the word list and strictness.
     """
     while True:
         item = audio_q.get()
@@ -31,15 +39,27 @@ def audio_worker(
             audio_q.task_done()
             break
 
-        wav_path, ts = item
-        print(f"[audio_worker] Processing chunk at t={ts:.1f}s -> {wav_path}")
+        if isinstance(item, AudioChunk):
+            ts = item.start_ts
+            duration = item.duration
+            label = f"chunk {item.index}"
+        else:
+            wav_path, ts = item
+            duration = chunk_seconds
+            label = wav_path
+        print(f"[audio_worker] Processing chunk at t={ts:.1f}s -> {label}")
 
         try:
-            raw = transcribe_audio(wav_path)
+            with tracing.span("chunk", "audio", start_ts=round(ts, 3), duration=round(duration, 3)):
+                if isinstance(item, AudioChunk):
+                    raw = transcribe_pcm(item.pcm, sample_rate=item.sample_rate)
+                else:
+                    raw = transcribe_audio(wav_path)
         except Exception as e:
-            print(f"[audio_worker] Error in transcribe_audio({wav_path}): {e}")
+            print(f"[audio_worker] Error transcribing {label}: {e}")
             audio_q.task_done()
             continue
+        metrics.CHUNKS_TRANSCRIBED.inc()
 
         # =========================
         #  Normalize STT result
@@ -68,7 +88,7 @@ def audio_worker(
             text_buffer.add(ts, text)
 
             try:
-                result: TextModerationResult = analyze_text(text)
+                result: TextModerationResult = analyze_text(text, policy=policy)
             except Exception as e:
                 print(f"[audio_worker] Error in analyze_text: {e}")
                 result = TextModerationResult(
@@ -86,6 +106,7 @@ def audio_worker(
             )
 
             if result.block:
+                window = text_buffer.window_stats()
                 # Emit a moderation event
                 event_q.put({
                     "source": "audio",
@@ -94,6 +115,8 @@ def audio_worker(
                     "count": result.count,
                     "severity": result.severity,
                     "text_window": result.original_text,
+                    "window_bad_words": window.bad_words,
+                    "window_severity": window.severity,
                 })
 
 
@@ -103,7 +126,7 @@ def audio_worker(
         # =========================
         if words:
             # local segments: relative to this chunk (0..chunk_seconds)
-            local_segments = detect_toxic_segments(words)
+            local_segments = detect_toxic_segments(words, policy=policy)
             if local_segments:
                 print(f"[audio_worker] Toxic word segments (local): {local_segments}")
 
@@ -114,14 +137,24 @@ def audio_worker(
                 muted_intervals.append((start_global, end_global))
 
         else:
-            # Fallback: if no word timestamps but we decided to block,
-            # mute whole chunk like old behavior.
+            # Fallback: no word timestamps but we decided to block. Mute the
+            # chunk's speech spans, or the whole chunk when there are none.
             if text.strip():
                 try:
                     if result.block:
-                        muted_intervals.append((ts, ts + chunk_seconds))
+                        muted_intervals.extend(_fallback_intervals(item, ts, duration))
                 except NameError:
                     # if analyze_text failed entirely
                     pass
 
-        audio_q.task_done()
\ No newline at end of file
+        audio_q.task_done()
+
+def _fallback_intervals(item, ts: float, duration: float) -> list[tuple[float, float]]:
+    """
+    Global mute intervals for a blocked chunk without word timestamps: its
+    VAD speech spans, or the whole chunk if the VAD finds none (fail closed).
+    """
+    spans = speech_spans(item.pcm, item.sample_rate) if isinstance(item, AudioChunk) else []
+    if spans:
+        return [(ts + start, ts + end) for start, end in spans]
+    return [(ts, ts + duration)]
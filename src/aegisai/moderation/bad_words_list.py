@@ -8,6 +8,8 @@ from __future__ import annotations
 import re
 from typing import Iterable, List, Sequence
 
+from .matcher import PhraseMatcher, get_matcher
+
 BAD_WORDS = {
     # test words
     "today", "english", "word", "everybody", "hey", "speaking",
@@ -141,32 +143,31 @@ def is_bad_word(token: str, extra_bad: Iterable[str] | None = None) -> bool:
     Check if a single token should be considered profanity.
     Used by audio (word-level) and can be used by text.
     """
-    bad_set = BAD_WORDS if extra_bad is None else BAD_WORDS | set(extra_bad)
     norm = normalize_token(token)
-    return norm in bad_set
-
+    return norm in BAD_WORDS or (extra_bad is not None and norm in extra_bad)
 
 
-def _as_blocklist(blocklist: Iterable[str] | None) -> Sequence[str]:
+def _as_blocklist(blocklist: Iterable[str] | PhraseMatcher | None) -> Sequence[str] | PhraseMatcher:
     """
     Normalize an incoming blocklist to a sequence we can iterate multiple times.
+    Lists, tuples, sets and prebuilt matchers are passed through untouched so
+    `get_matcher` can find them by identity.
     """
     if blocklist is None:
         return BAD_WORDS
+    if isinstance(blocklist, (list, tuple, set, frozenset, PhraseMatcher)):
+        return blocklist
     return list(blocklist)
 
 
-def find_bad_words_in_text(text: str, blocklist: Iterable[str] | None = None) -> List[str]:
+def find_bad_words_in_text(text: str, blocklist: Iterable[str] | PhraseMatcher | None = None) -> List[str]:
     """
     Runs the same logic your old `analyze_text` used, but reusable.
-    You can optionally provide a custom blocklist (e.g., top-k words).
-    """
-    lowered = normalize_text_for_matching(text)
-    found: List[str] = []
+    You can optionally provide a custom blocklist (e.g., top-k words) or a
+    prebuilt `PhraseMatcher`.
 
-    for w in _as_blocklist(blocklist):
-        pattern = r"\b" + re.escape(w) + r"\b"  # whole-word match
-        if re.search(pattern, lowered):
-            found.append(w)
-
-    return found
\ No newline at end of file
+    Matching is one pass over the text with a compiled `PhraseMatcher`
+    (cached per blocklist, found by identity on repeat calls); results are
+    the same as the old per-term whole-word regex loop.
+    """
+    return get_matcher(_as_blocklist(blocklist)).matched_terms(text)
@@ -0,0 +1,283 @@
+# src/aegisai/moderation/matcher.py
+"""
+Compiled single-pass phrase matcher for blocklists.
+
+The legacy matcher ran one `\\b<term>\\b` regex per blocklist entry over the
+normalized text. On normalized text (only `[a-z0-9]` runs separated by
+spaces) that is exactly a whole-token sequence match, so a blocklist can be
+compiled once into a token trie and every occurrence of every term found in
+one left-to-right pass over the text's tokens.
+
+Terms that could never match the normalized text (uppercase, punctuation,
+double spaces, e.g. "piece-of-shit" or "i'll beat your ass") are kept for
+ordering but not compiled, which preserves the legacy results exactly.
+
+Compiled matchers are cached per blocklist fingerprint (`get_matcher`,
+`BlocklistCache`); repeat calls with the same blocklist object skip the
+fingerprint.
+
+`WordStreamMatcher` runs the same trie over STT word timestamps, keeping
+partial phrase matches between calls so "son of a | bitch" split across
+two transcript results is still one span.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")   # same as bad_words_list.normalize_token
+_MATCHABLE_TERM_RE = re.compile(r"[a-z0-9]+(?: [a-z0-9]+)*")
+
+_TERM = ""   # trie key holding the term that ends at a node (tokens are never empty)
+
+DEFAULT_MAX_MATCHERS = 64
+DEFAULT_MAX_WORD_GAP = 1.5   # seconds of silence that break a partial phrase
+
+
+class PhraseHit(NamedTuple):
+    term: str
+    start: int        # character offsets into text.lower()
+    end: int
+    token_start: int  # token indices (half-open)
+    token_end: int
+
+
+class WordMatch(NamedTuple):
+    term: str
+    start: float   # start of the first word, end of the last word
+    end: float
+    first: int     # index of the first word in the fed list (negative = earlier feed)
+    last: int      # index of the last word in the fed list
+
+
+def tokenize(text: str) -> List[re.Match]:
+    """`[a-z0-9]+` runs of the lowercased text (same tokens as normalize_text_for_matching)."""
+    return list(_TOKEN_RE.finditer(text.lower()))
+
+
+def token_words(text: str) -> List[str]:
+    """Token strings only; cheaper than `tokenize` when offsets are not needed."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def blocklist_fingerprint(terms: Iterable[str]) -> str:
+    return hashlib.sha256("\n".join(terms).encode("utf-8")).hexdigest()
+
+
+class PhraseMatcher:
+    """
+    Token trie over one blocklist.
+
+    `find_all` returns every occurrence (overlapping ones included);
+    `matched_terms` returns the matched entries in blocklist order, which is what
+    `find_bad_words_in_text` has always returned.
+    """
+
+    def __init__(self, terms: Iterable[str]) -> None:
+        self.terms: tuple = tuple(terms)
+        self.fingerprint = blocklist_fingerprint(self.terms)
+        self.root: Dict[str, dict] = {}
+        self.max_tokens = 0
+        # Blocklist positions of every compiled term, for legacy ordering.
+        self._positions: Dict[str, List[int]] = {}
+
+        for i, term in enumerate(self.terms):
+            if not _MATCHABLE_TERM_RE.fullmatch(term):
+                continue
+            if term in self._positions:
+                self._positions[term].append(i)
+                continue
+            self._positions[term] = [i]
+
+            tokens = term.split(" ")
+            node = self.root
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node[_TERM] = term
+            self.max_tokens = max(self.max_tokens, len(tokens))
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def scan(self, words: Sequence[str]) -> Iterator[Tuple[str, int, int]]:
+        """Yield `(term, token_start, token_end)` for every occurrence in a token list."""
+        root = self.root
+        n = len(words)
+        for i in range(n):
+            node = root.get(words[i])
+            j = i
+            while node is not None:
+                term = node.get(_TERM)
+                if term is not None:
+                    yield term, i, j + 1
+                j += 1
+                if j >= n:
+                    break
+                node = node.get(words[j])
+
+    def find_all(self, text: str) -> List[PhraseHit]:
+        tokens = tokenize(text)
+        words = [m.group(0) for m in tokens]
+        return [
+            PhraseHit(term, tokens[i].start(), tokens[j - 1].end(), i, j)
+            for term, i, j in self.scan(words)
+        ]
+
+    def matched_terms(self, text: str) -> List[str]:
+        return self.ordered_terms({hit.term for hit in self.find_all(text)})
+
+    def count_terms(self, found: Iterable[str]) -> int:
+        """`len(self.ordered_terms(found))` without building the list."""
+        return sum(len(self._positions[term]) for term in set(found))
+
+    def ordered_terms(self, found: Iterable[str]) -> List[str]:
+        """Blocklist entries for a set of matched terms, in blocklist order (duplicates kept)."""
+        positions = sorted(i for term in set(found) for i in self._positions[term])
+        return [self.terms[i] for i in positions]
+
+
+class WordStreamMatcher:
+    """
+    Incremental phrase matching over `{"word", "start", "end"}` dicts.
+
+    Words are normalized like `normalize_token` ("F***ing," -> "fing",
+    "mother-fucker" -> "motherfucker"); a single-word entry therefore matches
+    exactly when `is_bad_word` would. Partial matches survive between
+    `feed()` calls unless the next word starts more than `max_gap_seconds`
+    after the previous one ended.
+    """
+
+    def __init__(self, matcher: PhraseMatcher, max_gap_seconds: float = DEFAULT_MAX_WORD_GAP) -> None:
+        self.matcher = matcher
+        self.max_gap_seconds = max_gap_seconds
+        # (trie node, global index of first word, start time of first word)
+        self._partials: List[tuple] = []
+        self._fed = 0
+        self._last_end: Optional[float] = None
+
+    def reset(self) -> None:
+        self._partials = []
+        self._last_end = None
+
+    def feed(self, words: Sequence[dict]) -> List[WordMatch]:
+        """Consume words in order; return the phrases completed by them."""
+        base = self._fed
+        self._fed += len(words)
+        root = self.matcher.root
+        matches: List[WordMatch] = []
+
+        for i, w in enumerate(words):
+            token = _NON_ALNUM_RE.sub("", str(w.get("word", "")).lower())
+            if not token:
+                continue
+            start = float(w["start"])
+            end = float(w["end"])
+            if self._last_end is not None and start - self._last_end > self.max_gap_seconds:
+                self._partials = []
+            self._last_end = end
+
+            advanced: List[tuple] = []
+            for node, first, first_start in self._partials + [(root, base + i, start)]:
+                child = node.get(token)
+                if child is None:
+                    continue
+                term = child.get(_TERM)
+                if term is not None:
+                    matches.append(WordMatch(term, first_start, end, first - base, i))
+                if len(child) > (term is not None):
+                    advanced.append((child, first, first_start))
+            self._partials = advanced
+
+        return matches
+
+
+class _Pinned(NamedTuple):
+    source: Any     # the caller's blocklist object (kept alive, so its id stays unique)
+    snapshot: Any   # copy of a mutable source at build time; None if immutable
+    value: Any
+
+
+class BlocklistCache:
+    """
+    LRU of objects compiled from a blocklist (matchers, relevance indexes),
+    keyed by `blocklist_fingerprint` plus a caller-chosen `variant`.
+
+    A list / tuple / set seen before is found by identity first, so hot
+    callers that keep passing the same (large) blocklist do not pay for the
+    sha256 per call. Lists and sets are compared against a snapshot (one
+    C-level compare, ~18 us for 10k terms), so in-place edits rebuild.
+    """
+
+    def __init__(self) -> None:
+        self._by_key: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._pinned: "OrderedDict[tuple, _Pinned]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    def _pinned_value(self, key: tuple, blocklist: Any) -> Any:
+        with self._lock:
+            pinned = self._pinned.get(key)
+            if pinned is not None:
+                self._pinned.move_to_end(key)
+        if pinned is None or pinned.source is not blocklist:
+            return None
+        if pinned.snapshot is not None and blocklist != pinned.snapshot:
+            return None
+        return pinned.value
+
+    def get(
+        self,
+        blocklist: Iterable[str],
+        build: Callable[[Tuple[str, ...]], Any],
+        variant: Any = None,
+        max_entries: Optional[int] = DEFAULT_MAX_MATCHERS,
+    ) -> Any:
+        """Cached `build(terms)` for `blocklist` (terms in blocklist order)."""
+        pinnable = isinstance(blocklist, (list, tuple, set, frozenset))
+        if pinnable:
+            value = self._pinned_value((id(blocklist), variant), blocklist)
+            if value is not None:
+                return value
+
+        terms = tuple(blocklist)
+        key = (blocklist_fingerprint(terms), variant)
+        with self._lock:
+            value = self._by_key.get(key)
+        if value is None:
+            value = build(terms)
+
+        with self._lock:
+            self._by_key[key] = value
+            self._by_key.move_to_end(key)
+            if pinnable:
+                snapshot = None if isinstance(blocklist, (tuple, frozenset)) else type(blocklist)(blocklist)
+                self._pinned[(id(blocklist), variant)] = _Pinned(blocklist, snapshot, value)
+                self._pinned.move_to_end((id(blocklist), variant))
+            while max_entries is not None and len(self._by_key) > max_entries:
+                self._by_key.popitem(last=False)
+            while max_entries is not None and len(self._pinned) > max_entries:
+                self._pinned.popitem(last=False)
+        return value
+
+
+_MATCHERS = BlocklistCache()
+
+
+def get_matcher(
+    blocklist: Sequence[str] | PhraseMatcher,
+    max_entries: Optional[int] = DEFAULT_MAX_MATCHERS,
+) -> PhraseMatcher:
+    """
+    Compiled matcher for `blocklist`, shared across calls with the same terms
+    in the same order (found by identity on repeat calls, see BlocklistCache).
+    A prebuilt PhraseMatcher is returned as is.
+    """
+    if isinstance(blocklist, PhraseMatcher):
+        return blocklist
+    return _MATCHERS.get(blocklist, PhraseMatcher, max_entries=max_entries)
@@ -2,6 +2,8 @@
 Cost and latency tracking utilities for moderation operations.
 
 This module provides helpers to track API costs and latency for optimization analysis.
+Values live in the process metrics registry (`runtime.metrics`), which the
+backend serves at `/metrics`.
 """
 
 from __future__ import annotations
@@ -12,6 +14,8 @@ from contextlib import contextmanager
 from dataclasses import dataclass, field
 from typing import Dict, Optional
 
+from src.aegisai.runtime.metrics import MetricsRegistry, get_registry
+
 logger = logging.getLogger(__name__)
 
 
@@ -42,18 +46,65 @@ class OperationMetrics:
 
 
 class MetricsCollector:
-    """Collects metrics across multiple operations."""
-    
-    def __init__(self):
-        self.operations: Dict[str, list[OperationMetrics]] = {}
+    """
+    Collects metrics across multiple operations.
+
+    Backed by a `runtime.metrics.MetricsRegistry` (the process registry for
+    the global collector), so memory stays constant: latencies go into
+    fixed-bucket histograms and percentiles are bucket estimates.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry if registry is not None else MetricsRegistry()
         self.current_operation: Optional[OperationMetrics] = None
-    
+        self._latency = self.registry.histogram(
+            "aegis_operation_seconds", "Latency of tracked operations", ("operation",),
+        )
+        self._api_calls = self.registry.counter(
+            "aegis_operation_api_calls_total", "API calls made by tracked operations", ("operation",),
+        )
+        self._tokens = self.registry.counter(
+            "aegis_operation_tokens_total", "Tokens used by tracked operations", ("operation",),
+        )
+        self._cost = self.registry.counter(
+            "aegis_operation_cost_usd_total", "Cost of tracked operations in USD", ("operation",),
+        )
+        self._errors = self.registry.counter(
+            "aegis_operation_errors_total", "Tracked operations that raised", ("operation",),
+        )
+        self._events = self.registry.counter(
+            "aegis_events_total", "Named event counters (cache hits, late intervals, ...)", ("event",),
+        )
+        hit_ratio = self.registry.gauge(
+            "aegis_cache_hit_ratio", "Hits / (hits + misses) of each cache since start", ("cache",),
+        )
+        hit_ratio.set_function(self._cache_hit_ratios)
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """Increment a named counter (thread-safe)."""
+        self._events.inc(value, event=name)
+
+    def get_counters(self) -> Dict[str, int]:
+        """Snapshot of all counters."""
+        return {event: int(v) for (event,), v in self._events.values().items()}
+
+    def _cache_hit_ratios(self) -> Dict[tuple, float]:
+        """`<cache>.hit` / `<cache>.miss` event pairs -> hit ratio per cache."""
+        counters = self.get_counters()
+        ratios = {}
+        for name, hits in counters.items():
+            if name.endswith(".hit"):
+                cache = name[: -len(".hit")]
+                total = hits + counters.get(f"{cache}.miss", 0)
+                ratios[(cache,)] = hits / total if total else 0.0
+        return ratios
+
     @contextmanager
     def track_operation(self, name: str):
         """Context manager to track an operation's metrics."""
         op = OperationMetrics(operation_name=name)
         self.current_operation = op
-        
+
         try:
             yield op
         except Exception as e:
@@ -61,9 +112,12 @@ class MetricsCollector:
             raise
         finally:
             op.end_time = time.perf_counter()
-            if name not in self.operations:
-                self.operations[name] = []
-            self.operations[name].append(op)
+            self._latency.observe(op.end_time - op.start_time, operation=name)
+            self._api_calls.inc(op.api_calls, operation=name)
+            self._tokens.inc(op.tokens_used, operation=name)
+            self._cost.inc(op.cost_usd, operation=name)
+            if op.error:
+                self._errors.inc(operation=name)
             self.current_operation = None
             self._log_operation(op)
     
@@ -82,38 +136,24 @@ class MetricsCollector:
     def get_summary(self) -> Dict[str, Dict]:
         """Get summary statistics for all operations."""
         summary = {}
-        for name, ops in self.operations.items():
-            if not ops:
+        for (name,) in self._latency.label_sets():
+            _, total_seconds, count = self._latency.snapshot(operation=name)
+            if not count:
                 continue
-            
-            latencies = [op.latency_ms for op in ops if op.end_time is not None]
-            total_cost = sum(op.cost_usd for op in ops)
-            total_tokens = sum(op.tokens_used for op in ops)
-            total_api_calls = sum(op.api_calls for op in ops)
-            errors = sum(1 for op in ops if op.error)
-            
+
             summary[name] = {
-                "count": len(ops),
-                "total_cost_usd": total_cost,
-                "total_tokens": total_tokens,
-                "total_api_calls": total_api_calls,
-                "errors": errors,
-                "avg_latency_ms": sum(latencies) / len(latencies) if latencies else 0.0,
-                "p95_latency_ms": self._percentile(latencies, 0.95) if latencies else 0.0,
-                "p99_latency_ms": self._percentile(latencies, 0.99) if latencies else 0.0,
+                "count": count,
+                "total_cost_usd": self._cost.value(operation=name),
+                "total_tokens": int(self._tokens.value(operation=name)),
+                "total_api_calls": int(self._api_calls.value(operation=name)),
+                "errors": int(self._errors.value(operation=name)),
+                "avg_latency_ms": total_seconds / count * 1000,
+                "p95_latency_ms": self._latency.quantile(0.95, operation=name) * 1000,
+                "p99_latency_ms": self._latency.quantile(0.99, operation=name) * 1000,
             }
         
         return summary
     
-    @staticmethod
-    def _percentile(values: list[float], pct: float) -> float:
-        """Calculate percentile."""
-        if not values:
-            return 0.0
-        sorted_values = sorted(values)
-        k = max(0, min(len(sorted_values) - 1, int(pct * len(sorted_values))))
-        return sorted_values[k]
-    
     def log_summary(self):
         """Log summary statistics."""
         summary = self.get_summary()
@@ -127,10 +167,12 @@ class MetricsCollector:
                 f"p95_latency={stats['p95_latency_ms']:.2f}ms, "
                 f"errors={stats['errors']}"
             )
+        for name, value in sorted(self.get_counters().items()):
+            logger.info(f"{name}: {value}")
 
 
 # Global metrics collector instance
-_global_collector = MetricsCollector()
+_global_collector = MetricsCollector(get_registry())
 
 
 def get_metrics_collector() -> MetricsCollector:
@@ -142,3 +184,7 @@ def track_operation(name: str):
     """Convenience function to track an operation."""
     return _global_collector.track_operation(name)
 
+
+def increment_counter(name: str, value: int = 1) -> None:
+    """Convenience function to increment a global counter."""
+    _global_collector.increment(name, value)
@@ -4,14 +4,24 @@ to LLMs. Implements the strategies outlined in docs/token-cost-optimization.md:
 - top-k blocklist selection
 - blocklist deduplication
 - simple token estimation helpers
+
+Top-k selection runs on a `RelevanceIndex`: the (deduplicated) blocklist is
+compiled once into an Aho-Corasick automaton over its lowercased terms, so
+scoring a transcript is one pass over its characters instead of two
+substring scans per term. Indexes are cached per blocklist fingerprint and
+found by identity on repeat calls (`matcher.BlocklistCache`).
 """
 
 from __future__ import annotations
 
 import math
-from typing import Iterable, List, Sequence
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 from .bad_words_list import normalize_text_for_matching
+from .matcher import BlocklistCache
+
+DEFAULT_MAX_INDEXES = 64
 
 
 def estimate_tokens(text: str) -> int:
@@ -42,6 +52,118 @@ def deduplicate_blocklist(blocklist: Iterable[str]) -> List[str]:
     return deduped
 
 
+class RelevanceIndex:
+    """
+    Precompiled top-k scorer for one blocklist.
+
+    Scores are the same as the original per-term heuristic:
+    - substring presence (+10)
+    - raw frequency count (+n), non-overlapping like `str.count`
+    on the lowercased transcript, ranked by score with ties in blocklist order.
+    """
+
+    def __init__(self, blocklist: Iterable[str], dedupe: bool = False) -> None:
+        terms = list(blocklist)
+        self.terms: List[str] = deduplicate_blocklist(terms) if dedupe else terms
+
+        # Blocklist positions per distinct lowercased term.
+        self._positions: Dict[str, List[int]] = {}
+        for i, word in enumerate(self.terms):
+            self._positions.setdefault(word.lower(), []).append(i)
+        self._keys: List[str] = list(self._positions)
+
+        # Aho-Corasick automaton over the distinct non-empty keys.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        for key_id, key in enumerate(self._keys):
+            if not key:
+                continue
+            node = 0
+            for ch in key:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = nxt
+            self._out[node] = self._out[node] + (key_id,)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def counts(self, transcript: str) -> Dict[str, int]:
+        """Non-overlapping occurrence count of every matched lowercased term."""
+        text = transcript.lower()
+        goto, fail, out, keys = self._goto, self._fail, self._out, self._keys
+        counts: Dict[str, int] = {}
+        next_free: Dict[str, int] = {}   # earliest start a new occurrence may use
+
+        node = 0
+        for pos, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for key_id in out[node]:
+                key = keys[key_id]
+                start = pos - len(key) + 1
+                if start >= next_free.get(key, 0):
+                    counts[key] = counts.get(key, 0) + 1
+                    next_free[key] = pos + 1
+
+        if "" in self._positions:
+            counts[""] = len(text) + 1   # what str.count("") returns
+        return counts
+
+    def top_k(self, transcript: str, k: int = 20) -> List[str]:
+        scored: List[Tuple[int, int]] = []
+        for key, count in self.counts(transcript).items():
+            for i in self._positions[key]:
+                scored.append((-(10 + count), i))
+
+        # If nothing scored (clean transcript), still return a small slice
+        if not scored:
+            return self.terms[:k]
+
+        scored.sort()
+        return [self.terms[i] for _, i in scored[:k]]
+
+
+_INDEXES = BlocklistCache()
+
+
+def get_relevance_index(
+    blocklist: Iterable[str],
+    dedupe: bool = False,
+    max_entries: Optional[int] = DEFAULT_MAX_INDEXES,
+) -> RelevanceIndex:
+    """
+    Cached `RelevanceIndex` (deduplication included) for `blocklist`.
+    Pass the same list / tuple / set object on every call (or hold the
+    index) so the lookup stays O(1) instead of hashing the terms.
+    """
+    return _INDEXES.get(
+        blocklist,
+        lambda terms: RelevanceIndex(terms, dedupe=dedupe),
+        variant=dedupe,
+        max_entries=max_entries,
+    )
+
+
 def get_relevant_blocklist(
     transcript: str,
     blocklist: Sequence[str],
@@ -54,25 +176,7 @@ def get_relevant_blocklist(
     - substring presence (+10)
     - raw frequency count (+n)
     """
-    normalized_transcript = transcript.lower()
-    scored: List[tuple[int, str]] = []
-
-    for word in blocklist:
-        w_norm = word.lower()
-        score = 0
-        if w_norm in normalized_transcript:
-            score += 10
-        score += normalized_transcript.count(w_norm)
-        if score > 0:
-            scored.append((score, word))
-
-    scored.sort(key=lambda x: x[0], reverse=True)
-
-    # If nothing scored (clean transcript), still return a small slice
-    if not scored:
-        return list(blocklist[:k]) if isinstance(blocklist, list) else list(blocklist)[:k]
-
-    return [word for _, word in scored[:k]]
+    return get_relevance_index(blocklist).top_k(transcript, k)
 
 
 def calculate_request_tokens(
@@ -1,9 +1,265 @@
 """
-Policy helpers: how strict Aegis should be in different modes. 
-We can add modes in future(child, teen, adult, streamer, custom etc).
+Policy helpers: how strict Aegis should be in different modes.
+
+A `PolicySpec` is the editable description of a tenant policy (preset +
+custom words + thresholds). `compile_policy` turns it into an immutable
+`CompiledPolicy` that holds everything the pipeline needs per chunk / frame:
+the compiled phrase matcher, the violence label set, the object keyword
+tuples and the thresholds. Compiled policies are cached in an LRU keyed by
+the policy version hash, so jobs and chunks that share a policy reuse the
+same object.
+
+Presets: "default", "child", "teen", "broadcaster".
 """
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, Mapping, Optional, Tuple, Union
 
+from .bad_words_list import BAD_WORDS, normalize_text_for_matching
+from .matcher import PhraseMatcher, WordStreamMatcher, blocklist_fingerprint
 from .text_rules import TextModerationResult
+from src.aegisai.vision.label_lists import (
+    DANGEROUS_OBJECTS,
+    NUDITY_KEYWORDS,
+    PERSON_LABELS,
+    VIOLENCE_LABELS,
+    WEAPON_KEYWORDS,
+)
+
+# SafeSearch likelihood levels (same values as vision.safe_search.Likelihood).
+VERY_UNLIKELY = 1
+POSSIBLE = 3
+LIKELY = 4
+VERY_LIKELY = 5
+
+# Compiled policies kept in memory (~90 KB each, mostly the matcher); sized
+# for thousands of tenants. AEGIS_POLICY_CACHE_SIZE overrides it.
+DEFAULT_MAX_POLICIES = 4096
+
+
+@dataclass(frozen=True)
+class PolicySpec:
+    """
+    Editable policy description. Word and label lists are tuples so specs
+    stay hashable; `extra_*` entries are added to the built-in lists and
+    `allowed_words` are removed from the profanity list.
+    """
+    name: str = "default"
+    # text / audio
+    extra_words: Tuple[str, ...] = ()
+    allowed_words: Tuple[str, ...] = ()
+    strict_text: bool = False          # block on ANY bad word
+    # SafeSearch: block at or above these likelihoods
+    adult_block: int = LIKELY
+    violence_block: int = LIKELY
+    racy_block: int = VERY_LIKELY
+    # label detection
+    label_threshold: float = 0.15
+    extra_violence_labels: Tuple[str, ...] = ()
+    # object localization
+    weapon_threshold: float = 0.08
+    nudity_threshold: float = 0.20
+    person_threshold: float = 0.25
+    dangerous_threshold: float = 0.30
+    extra_weapon_keywords: Tuple[str, ...] = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: list(v) if isinstance(v, tuple) else v for k, v in dataclasses.asdict(self).items()}
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "PolicySpec":
+        names = {f.name: f for f in dataclasses.fields(cls)}
+        unknown = set(data) - set(names)
+        if unknown:
+            raise ValueError(f"Unknown policy fields: {sorted(unknown)}")
+        values = {k: tuple(v) if isinstance(v, (list, tuple)) else v for k, v in data.items()}
+        return cls(**values)
+
+
+# Scalar fields a tenant may override on top of a preset.
+POLICY_OVERRIDE_FIELDS: Tuple[str, ...] = tuple(
+    f.name for f in dataclasses.fields(PolicySpec)
+    if f.name != "name" and not isinstance(f.default, tuple)
+)
+
+
+def validate_overrides(overrides: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Check tenant overrides against `PolicySpec` and return them normalized.
+
+    Names must be in `POLICY_OVERRIDE_FIELDS`. Flags must be bools,
+    likelihood levels whole numbers in 1..5 (stored as int) and score
+    thresholds numbers in 0..1 (stored as float), so the same policy always
+    hashes to the same `policy_version`. Raises ValueError otherwise.
+    """
+    kinds = {f.name: type(f.default) for f in dataclasses.fields(PolicySpec) if f.name in POLICY_OVERRIDE_FIELDS}
+    unknown = set(overrides) - set(kinds)
+    if unknown:
+        raise ValueError(f"Unknown policy overrides: {sorted(unknown)}")
+
+    normalized: Dict[str, Any] = {}
+    for name, value in overrides.items():
+        kind = kinds[name]
+        is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+        if kind is bool:
+            if not isinstance(value, bool):
+                raise ValueError(f"Policy override {name} must be true or false, got {value!r}")
+        elif kind is int:
+            if not is_number or not float(value).is_integer() or not VERY_UNLIKELY <= value <= VERY_LIKELY:
+                raise ValueError(f"Policy override {name} must be a likelihood level 1..5, got {value!r}")
+            value = int(value)
+        else:
+            if not is_number or not 0.0 <= value <= 1.0:
+                raise ValueError(f"Policy override {name} must be a score between 0 and 1, got {value!r}")
+            value = float(value)
+        normalized[name] = value
+    return normalized
+
+
+PRESETS: Dict[str, PolicySpec] = {
+    "default": PolicySpec(),
+    "child": PolicySpec(
+        name="child",
+        strict_text=True,
+        adult_block=POSSIBLE,
+        violence_block=POSSIBLE,
+        racy_block=POSSIBLE,
+        label_threshold=0.10,
+        nudity_threshold=0.10,
+        person_threshold=0.20,
+        dangerous_threshold=0.20,
+    ),
+    "teen": PolicySpec(
+        name="teen",
+        strict_text=True,
+        racy_block=LIKELY,
+        dangerous_threshold=0.25,
+    ),
+    "broadcaster": PolicySpec(
+        name="broadcaster",
+        strict_text=True,
+    ),
+}
+
+
+def preset_spec(preset: str = "default", **overrides: Any) -> PolicySpec:
+    """A preset with some fields replaced (e.g. custom words, thresholds)."""
+    if preset not in PRESETS:
+        raise ValueError(f"Unknown policy preset: {preset}")
+    overrides = {k: tuple(v) if isinstance(v, list) else v for k, v in overrides.items()}
+    return dataclasses.replace(PRESETS[preset], **overrides)
+
+
+def _normalize_words(words: Iterable[str]) -> Tuple[str, ...]:
+    # Same normal form the matcher works on: lowercase tokens, single spaces.
+    normalized = (" ".join(normalize_text_for_matching(w).split()) for w in words)
+    return tuple(sorted({w for w in normalized if w}))
+
+
+_BASE_FINGERPRINT: Optional[str] = None
+
+
+def policy_version(spec: PolicySpec) -> str:
+    """Stable hash of the spec and the built-in lists it extends."""
+    global _BASE_FINGERPRINT
+    if _BASE_FINGERPRINT is None:
+        _BASE_FINGERPRINT = blocklist_fingerprint(sorted(BAD_WORDS))
+    payload = json.dumps(spec.to_dict(), sort_keys=True)
+    return hashlib.sha256(f"{_BASE_FINGERPRINT}\n{payload}".encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class CompiledPolicy:
+    """Immutable, ready-to-use policy. Build with `compile_policy`."""
+    spec: PolicySpec
+    version: str
+    blocklist: Tuple[str, ...]
+    matcher: PhraseMatcher = field(repr=False, compare=False)
+    violence_labels: FrozenSet[str] = field(repr=False)
+    weapon_keywords: Tuple[str, ...] = field(repr=False)
+    nudity_keywords: Tuple[str, ...] = field(repr=False)
+    person_labels: Tuple[str, ...] = field(repr=False)
+    dangerous_objects: Tuple[str, ...] = field(repr=False)
+
+    @property
+    def name(self) -> str:
+        return self.spec.name
+
+    def word_stream(self) -> WordStreamMatcher:
+        """Fresh phrase-matching state over STT words for this policy."""
+        return WordStreamMatcher(self.matcher)
+
+
+def _build(spec: PolicySpec, version: str) -> CompiledPolicy:
+    allowed = set(_normalize_words(spec.allowed_words))
+    words = set(BAD_WORDS) | set(_normalize_words(spec.extra_words))
+    blocklist = tuple(sorted(w for w in words if w not in allowed))
+    return CompiledPolicy(
+        spec=spec,
+        version=version,
+        blocklist=blocklist,
+        matcher=PhraseMatcher(blocklist),
+        violence_labels=frozenset(VIOLENCE_LABELS) | frozenset(spec.extra_violence_labels),
+        weapon_keywords=tuple(WEAPON_KEYWORDS) + tuple(k.lower() for k in spec.extra_weapon_keywords),
+        nudity_keywords=tuple(NUDITY_KEYWORDS),
+        person_labels=tuple(PERSON_LABELS),
+        dangerous_objects=tuple(DANGEROUS_OBJECTS),
+    )
+
+
+_POLICIES: "OrderedDict[str, CompiledPolicy]" = OrderedDict()
+_POLICIES_LOCK = threading.Lock()
+_max_policies = int(os.getenv("AEGIS_POLICY_CACHE_SIZE", DEFAULT_MAX_POLICIES))
+
+
+def set_policy_cache_size(max_entries: int) -> None:
+    """Resize the compiled-policy LRU (evicts the oldest entries if smaller)."""
+    global _max_policies
+    if max_entries < 1:
+        raise ValueError(f"Policy cache size must be >= 1, got {max_entries}")
+    with _POLICIES_LOCK:
+        _max_policies = max_entries
+        while len(_POLICIES) > _max_policies:
+            _POLICIES.popitem(last=False)
+
+
+def compile_policy(spec: PolicySpec, max_entries: Optional[int] = None) -> CompiledPolicy:
+    """Compiled policy for `spec`, shared by every caller with the same version."""
+    version = policy_version(spec)
+    with _POLICIES_LOCK:
+        policy = _POLICIES.get(version)
+        if policy is not None:
+            _POLICIES.move_to_end(version)
+            return policy
+
+    policy = _build(spec, version)
+    with _POLICIES_LOCK:
+        _POLICIES[version] = policy
+        while len(_POLICIES) > (max_entries or _max_policies):
+            _POLICIES.popitem(last=False)
+    return policy
+
+
+PolicyLike = Union[None, str, PolicySpec, CompiledPolicy]
+
+
+def resolve_policy(policy: PolicyLike) -> Optional[CompiledPolicy]:
+    """
+    Accept a preset name, spec or compiled policy; None stays None (callers
+    then use the built-in defaults, which equal the "default" preset).
+    """
+    if policy is None or isinstance(policy, CompiledPolicy):
+        return policy
+    if isinstance(policy, str):
+        return compile_policy(preset_spec(policy))
+    return compile_policy(policy)
 
 
 def should_block_text(result: TextModerationResult, mode: str = "default") -> bool:
@@ -2,13 +2,16 @@
 Text moderation rules: bad words / profanity detection.
 """
 
+from bisect import bisect_right
 from dataclasses import dataclass
-from typing import List, Iterable
+from itertools import islice
+from typing import Dict, List, Iterable, Iterator, Mapping, Sequence, Set, Tuple
 from .bad_words_list import BAD_WORDS
 import re
 
-from .bad_words_list import find_bad_words_in_text
-from .optimization import deduplicate_blocklist, get_relevant_blocklist
+from .bad_words_list import _as_blocklist, find_bad_words_in_text
+from .matcher import get_matcher, token_words
+from .optimization import get_relevance_index
 
 
 @dataclass
@@ -37,11 +40,24 @@ def _compute_severity(count: int) -> int:
     return 3
 
 
-def analyze_text(text: str, blocklist: Iterable[str] | None = None, strict: bool = False) -> TextModerationResult:
+def analyze_text(
+    text: str,
+    blocklist: Iterable[str] | None = None,
+    strict: bool = False,
+    policy=None,
+) -> TextModerationResult:
     """
     Analyze a single text string (e.g. one chunk of transcript).
+
+    `policy` (a `policy.CompiledPolicy`) replaces `blocklist` with the
+    policy's compiled matcher; a policy with `strict_text` blocks on any
+    bad word.
     """
-    found = find_bad_words_in_text(text, blocklist)
+    if policy is not None:
+        found = policy.matcher.matched_terms(text)
+        strict = strict or policy.spec.strict_text
+    else:
+        found = find_bad_words_in_text(text, blocklist)
     count = len(found)
     severity = _compute_severity(count)
 
@@ -62,6 +78,70 @@ def analyze_text(text: str, blocklist: Iterable[str] | None = None, strict: bool
 
 
 
+def analyze_texts(
+    segments: Sequence[Mapping],
+    policy=None,
+    blocklist: Iterable[str] | None = None,
+    strict: bool = True,
+) -> List[Tuple[float, float]]:
+    """
+    Batch version of `analyze_text` for timed cues (e.g. parsed subtitles).
+
+    Every cue's tokens are joined into one buffer and the compiled matcher
+    runs over it once; hits are mapped back to cues through an offset index. Hits that
+    would span two cues are dropped, so each cue gets exactly the result
+    `analyze_text(seg["text"], blocklist, strict, policy)` would give.
+
+    Returns the `(start, end)` of every blocked cue, in cue order.
+    """
+    if policy is not None:
+        matcher = policy.matcher
+        strict = strict or policy.spec.strict_text
+    else:
+        matcher = get_matcher(_as_blocklist(blocklist))
+
+    # Cue i owns tokens[offsets[i]:offsets[i + 1]] of the joined token buffer.
+    words: List[str] = []
+    offsets: List[int] = []
+    for seg in segments:
+        offsets.append(len(words))
+        words.extend(token_words(seg["text"]))
+    offsets.append(len(words))
+
+    found: Dict[int, Set[str]] = {}
+    for term, first, last in matcher.scan(words):
+        cue = bisect_right(offsets, first) - 1
+        if last <= offsets[cue + 1]:
+            found.setdefault(cue, set()).add(term)
+
+    # Strict blocks on any hit; otherwise the same severity rule as analyze_text.
+    blocked = sorted(
+        cue for cue, terms in found.items()
+        if strict or _compute_severity(matcher.count_terms(terms)) >= 2
+    )
+    return [(segments[cue]["start"], segments[cue]["end"]) for cue in blocked]
+
+
+def analyze_text_stream(
+    segments: Iterable[Mapping],
+    policy=None,
+    blocklist: Iterable[str] | None = None,
+    strict: bool = True,
+    batch_size: int = 512,
+) -> Iterator[Tuple[float, float]]:
+    """
+    `analyze_texts` over a cue iterator (e.g. `iter_subtitle_file`), in
+    batches of `batch_size` cues, so memory stays flat for any input size.
+    Yields blocked cue intervals in cue order.
+    """
+    it = iter(segments)
+    while True:
+        batch = list(islice(it, batch_size))
+        if not batch:
+            return
+        yield from analyze_texts(batch, policy=policy, blocklist=blocklist, strict=strict)
+
+
 def analyze_transcript(chunks: List[str]) -> TextModerationResult:
     """
     Analyze a full transcript represented as list of text chunks.
@@ -81,12 +161,13 @@ def analyze_text_top_k(
     top-k words most relevant to the transcript. This mirrors the
     token-reduction strategy described in docs/token-cost-optimization.md.
     """
-    blocklist_source = list(base_blocklist) if base_blocklist is not None else list(BAD_WORDS)
-    deduped = deduplicate_blocklist(blocklist_source)
-    relevant = get_relevant_blocklist(text, deduped, k=k)
+    # Deduplication and the scoring automaton are built once per blocklist
+    # (no per-call copy, so repeat calls find the index by identity).
+    index = get_relevance_index(base_blocklist if base_blocklist is not None else BAD_WORDS, dedupe=True)
+    relevant = index.top_k(text, k=k)
 
     # Fallback: keep a small slice to avoid empty matching lists
     if not relevant:
-        relevant = deduped[:k]
+        relevant = index.terms[:k]
 
     return analyze_text(text, blocklist=relevant)
@@ -0,0 +1,137 @@
+"""
+Stage checkpoints for resumable file jobs.
+
+A job that runs in a persistent work directory (`cfg.work_dir`) records
+the outputs of every finished stage in `<work_dir>/manifest.json`; file
+artifacts (`*_path` outputs: extracted audio, subtitles, blurred video)
+live in the same directory. When the job is run again with the same work
+directory, `StageScheduler` takes completed stages from the manifest
+instead of re-running them, so a failed render does not repeat STT and
+Vision calls.
+
+The manifest is keyed by `job_key(cfg, input_path)`; a different input
+file, subtitle file, sampling rate, policy or filter set starts from
+scratch. A checkpointed stage is only reused while all of its file
+artifacts still exist: `*_path` outputs and any path under the work
+directory nested in an output (e.g. the `(frame_path, ts)` list of
+`extract_frames`).
+
+    checkpoint = StageCheckpoint(work_dir, job_key(cfg, input_path))
+    run = StageScheduler(checkpoint=checkpoint).run(graph, artifacts)
+    run.resumed   # stages taken from the manifest
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+MANIFEST_NAME = "manifest.json"
+
+# Config fields that change what a stage produces.
+_KEY_FIELDS = (
+    "media_type", "filter_audio", "filter_video", "subtitle_path",
+    "extract_subtitles", "audio_chunk_seconds", "sample_fps", "policy",
+)
+
+
+def _file_stamp(path: str) -> List[str]:
+    st = os.stat(path)
+    return [os.path.abspath(path), str(st.st_size), str(st.st_mtime_ns)]
+
+
+def job_key(cfg: Any, input_path: str) -> str:
+    """Fingerprint of the input (and subtitle) file and the output-relevant config."""
+    parts = _file_stamp(input_path)
+    parts += [f"{name}={getattr(cfg, name, None)!r}" for name in _KEY_FIELDS]
+    subtitle_path = getattr(cfg, "subtitle_path", None)
+    if subtitle_path and os.path.exists(subtitle_path):
+        # An edited subtitle file changes the subtitle/STT intervals.
+        parts += _file_stamp(subtitle_path)
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def read_manifest(work_dir: str) -> Dict[str, Any]:
+    """The manifest of `work_dir` ({} when there is none or it is unreadable)."""
+    try:
+        with open(os.path.join(work_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _restore(value: Any) -> Any:
+    # JSON turns interval tuples into lists.
+    if isinstance(value, list):
+        return [tuple(v) if isinstance(v, list) else v for v in value]
+    return value
+
+
+class StageCheckpoint:
+    """Manifest of completed stages in one job work directory."""
+
+    def __init__(self, work_dir: str, key: str) -> None:
+        self.work_dir = work_dir
+        self.key = key
+        self._lock = threading.Lock()
+        os.makedirs(work_dir, exist_ok=True)
+        manifest = read_manifest(work_dir)
+        if manifest.get("job_key") != key:
+            manifest = {"job_key": key, "stages": {}}
+        self._manifest = manifest
+
+    @property
+    def completed(self) -> List[str]:
+        return list(self._manifest["stages"])
+
+    def load(self, stage) -> Optional[Dict[str, Any]]:
+        """Recorded outputs of `stage`, or None if it has to run."""
+        entry = self._manifest["stages"].get(stage.name)
+        if entry is None:
+            return None
+        outputs = entry.get("outputs", {})
+        if set(outputs) != set(stage.outputs):
+            return None
+        for name, value in outputs.items():
+            if any(not os.path.exists(path) for path in self._artifact_paths(name, value)):
+                return None
+        return {name: _restore(value) for name, value in outputs.items()}
+
+    def _artifact_paths(self, name: str, value: Any) -> List[str]:
+        """Files an output refers to: a `*_path` value, or work-dir paths nested in it."""
+        if name.endswith("_path") and isinstance(value, str):
+            return [value]
+        root = os.path.join(os.path.abspath(self.work_dir), "")
+        found: List[str] = []
+        stack = [value]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                if os.path.abspath(item).startswith(root):
+                    found.append(item)
+            elif isinstance(item, (list, tuple)):
+                stack.extend(item)
+            elif isinstance(item, dict):
+                stack.extend(item.values())
+        return found
+
+    def save(self, stage, outputs: Dict[str, Any], seconds: float = 0.0) -> None:
+        entry = {"outputs": outputs, "seconds": round(seconds, 3), "finished_at": time.time()}
+        try:
+            json.dumps(entry)
+        except (TypeError, ValueError):
+            print(f"[checkpoint] {stage.name}: outputs are not JSON-serialisable, not checkpointed")
+            return
+        with self._lock:
+            self._manifest["stages"][stage.name] = entry
+            self._write()
+
+    def _write(self) -> None:
+        path = os.path.join(self.work_dir, MANIFEST_NAME)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f, indent=2)
+        os.replace(tmp, path)
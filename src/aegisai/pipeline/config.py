@@ -1,6 +1,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Mapping
+
+from src.aegisai.moderation.policy import PolicySpec
+
+# Longest a stream chunk waits for its audio analysis before it is released.
+DEFAULT_AUDIO_DEADLINE_SECONDS = 3.0
 
 
 @dataclass(frozen=True)
@@ -12,12 +18,41 @@ class PipelineConfig:
     - mode: "file" or "stream"
     - filter_audio: whether to apply audio moderation
     - filter_video: whether to apply video/visual moderation
+    - subtitle_path: subtitles to moderate instead of running STT
+    - extract_subtitles: video files only; pull the first embedded subtitle
+      stream when no subtitle_path is given
+    - shards: video files only; split long inputs into this many keyframe
+      shards processed in parallel (see sharded_runner)
+    - policy: moderation policy (None = built-in defaults)
+    - memory_mb: working set reserved from the "memory-mb" budget per
+      file job (only limits anything when a budget is configured)
+    - work_dir: file jobs only; persistent job directory for stage
+      checkpoints, so a re-run resumes after the last completed stage
+      (None = throwaway temp dir)
+    - stage_limits: file jobs only; per-resource-class concurrency of the
+      stage scheduler ("cpu", "ffmpeg", "cloud-io"), on top of the defaults
+      in pipeline.stages
+    - audio_deadline_seconds: streams only; release a chunk after this long
+      even if STT has not answered (None = wait indefinitely)
+    - audio_deadline_policy: streams only; what a late chunk gets: "open"
+      (pass unmuted) or "closed" (mute the whole chunk)
+    - audio_stt_mode: streams only; "batch" (one recognize call per chunk)
+      or "streaming" (one live streaming_recognize session per stream)
     """
     media_type: str          # "audio" | "video"
     mode: str                # "file" | "stream"
     filter_audio: bool
     filter_video: bool
     subtitle_path: str | None = None
+    extract_subtitles: bool = False
+    shards: int = 1
+    policy: PolicySpec | None = None
+    memory_mb: int = 512
+    work_dir: str | None = None
+    stage_limits: Mapping[str, int] | None = None
+    audio_deadline_seconds: float | None = DEFAULT_AUDIO_DEADLINE_SECONDS
+    audio_deadline_policy: str = "open"
+    audio_stt_mode: str = "batch"
 
     def validate(self) -> None:
         """
@@ -32,3 +67,16 @@ class PipelineConfig:
         # Audio-only media cannot have filter_video
         if self.media_type == "audio" and self.filter_video:
             raise ValueError("Audio-only media cannot have filter_video=True")
+        if self.shards < 1:
+            raise ValueError(f"shards must be >= 1, got {self.shards}")
+        for resource, limit in (self.stage_limits or {}).items():
+            if resource not in {"cpu", "ffmpeg", "cloud-io"}:
+                raise ValueError(f"Unknown stage resource class: {resource}")
+            if limit < 1:
+                raise ValueError(f"stage_limits[{resource!r}] must be >= 1, got {limit}")
+        if self.audio_deadline_policy not in {"open", "closed"}:
+            raise ValueError(f"Unsupported audio_deadline_policy: {self.audio_deadline_policy}")
+        if self.audio_deadline_seconds is not None and self.audio_deadline_seconds <= 0:
+            raise ValueError(f"audio_deadline_seconds must be > 0, got {self.audio_deadline_seconds}")
+        if self.audio_stt_mode not in {"batch", "streaming"}:
+            raise ValueError(f"Unsupported audio_stt_mode: {self.audio_stt_mode}")
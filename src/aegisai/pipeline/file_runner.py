@@ -1,16 +1,29 @@
 from __future__ import annotations
 
+import contextlib
 import os
 import shutil
 import tempfile
-import concurrent.futures
 from typing import Any, Optional, List, Tuple, Dict
 
+from src.aegisai.pipeline.checkpoint import StageCheckpoint, job_key
 from src.aegisai.pipeline.config import PipelineConfig
+from src.aegisai.pipeline.stages import Stage, StageGraph, StageScheduler, format_timings
+from src.aegisai.pipeline.use_cases import file_graph_template
+from src.aegisai.moderation.policy import CompiledPolicy, resolve_policy
 from src.aegisai.audio.filter_file import filter_audio_file
-from src.aegisai.video.filter_file import filter_video_file, blur_intervals_in_video
+from src.aegisai.video.filter_file import (
+    DEFAULT_SAMPLE_FPS,
+    blur_intervals_in_video,
+    localize_frames,
+    moderate_frames,
+    sample_frames,
+)
+from src.aegisai.vision.vision_rules import FrameModerationResult
 from src.aegisai.video.ffmpeg_edit import mute_intervals_in_video
-from src.aegisai.video.segment import extract_audio_track
+from src.aegisai.video.segment import extract_audio_track, extract_subtitles_from_video
+from src.aegisai.runtime.governor import MEMORY_MB, get_governor
+from src.aegisai.runtime import metrics, tracing
 
 Interval = Tuple[float, float]
 
@@ -71,26 +84,284 @@ def _copy_if_needed(src: str, dst: str) -> None:
     shutil.copy2(src, dst)
 
 
-def _analyze_audio_from_video(
-    video_path: str,
-    tmpdir: str,
-    chunk_seconds: int,
-    subtitle_path: str | None = None,
-) -> List[Interval]:
+# -------------------------------------------------------------------
+# Stage graph templates
+# -------------------------------------------------------------------
+
+class _JobContext:
+    """Per-job settings the stage functions close over."""
+
+    def __init__(self, cfg: PipelineConfig, policy: Optional[CompiledPolicy], progress_callback) -> None:
+        # An explicit chunk size selects fixed-length chunks; None = planned chunks.
+        chunk_seconds = getattr(cfg, "audio_chunk_seconds", None)
+        self.chunk_seconds = int(chunk_seconds) if chunk_seconds is not None else None
+        self.subtitle_path = getattr(cfg, "subtitle_path", None)
+        self.extract_subtitles = bool(getattr(cfg, "extract_subtitles", False))
+        self.sample_fps = float(getattr(cfg, "sample_fps", DEFAULT_SAMPLE_FPS))
+        self.policy = policy
+        self.progress_callback = progress_callback
+
+
+def _audio_file_graph(ctx: _JobContext) -> StageGraph:
+    def filter_audio(input_path: str, output_path: str) -> List[Interval]:
+        _ensure_parent_dir(output_path)
+        intervals = filter_audio_file(
+            audio_path=input_path,
+            output_audio_path=output_path,
+            chunk_seconds=ctx.chunk_seconds,
+            progress_callback=ctx.progress_callback,
+            subtitle_path=ctx.subtitle_path,
+            policy=ctx.policy,
+        )
+        return _normalize_interval_list(intervals)
+
+    return StageGraph([
+        Stage("filter_audio", filter_audio, ("input_path", "output_path"), ("audio_intervals",), "cloud-io"),
+    ])
+
+
+def _audio_stages(ctx: _JobContext) -> List[Stage]:
+    """Subtitles + audio extraction (ffmpeg, in parallel) -> STT / subtitle analysis."""
+
+    def subtitles(input_path: str, tmpdir: str) -> Optional[str]:
+        if ctx.subtitle_path or not ctx.extract_subtitles:
+            return ctx.subtitle_path
+        path = os.path.join(tmpdir, "extracted_subtitles.srt")
+        if extract_subtitles_from_video(input_path, path):
+            print(f"[file_runner] Extracted subtitles to {path}")
+            return path
+        return None
+
+    def extract_audio(input_path: str, tmpdir: str) -> str:
+        tmp_audio = os.path.join(tmpdir, "extracted_audio.wav")
+        extract_audio_track(input_path, tmp_audio)
+        return tmp_audio
+
+    def analyze_audio(audio_path: str, subtitle_path: Optional[str]) -> List[Interval]:
+        audio_result = filter_audio_file(
+            audio_path=audio_path,
+            output_audio_path=None,        # analysis-only
+            chunk_seconds=ctx.chunk_seconds,
+            subtitle_path=subtitle_path,
+            policy=ctx.policy,
+        )
+        return _normalize_interval_list(audio_result)
+
+    return [
+        Stage("subtitles", subtitles, ("input_path", "tmpdir"), ("subtitle_path",), "ffmpeg"),
+        Stage("extract_audio", extract_audio, ("input_path", "tmpdir"), ("audio_path",), "ffmpeg"),
+        Stage("analyze_audio", analyze_audio, ("audio_path", "subtitle_path"), ("audio_intervals",), "cloud-io"),
+    ]
+
+
+def _video_stages(ctx: _JobContext) -> List[Stage]:
+    """
+    Frame sampling (ffmpeg) -> SafeSearch + labels (cloud-io) -> object
+    localization (cloud-io). Sampling overlaps with audio extraction / STT;
+    localization only feeds metadata, so blur and render do not wait for it.
+    """
+
+    def extract_frames(input_path: str, tmpdir: str) -> List[Tuple[str, float]]:
+        frames_dir = os.path.join(tmpdir, "frames")
+        os.makedirs(frames_dir, exist_ok=True)
+        return sample_frames(input_path, frames_dir, ctx.sample_fps, ctx.progress_callback)
+
+    def moderate(frames: List[Tuple[str, float]]) -> Tuple[List[Interval], List[Dict[str, Any]]]:
+        intervals, results = moderate_frames(
+            frames, ctx.sample_fps, progress_callback=ctx.progress_callback, policy=ctx.policy,
+        )
+        # Plain dicts so the stage can be checkpointed.
+        verdicts = [
+            {"timestamp": r.timestamp, "safesearch": r.safesearch, "labels": r.labels, "block": r.block}
+            for r in results
+        ]
+        return _normalize_interval_list(intervals), verdicts
+
+    def localize(frames: List[Tuple[str, float]], frame_verdicts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        results = [FrameModerationResult(**v) for v in frame_verdicts]
+        return localize_frames(frames, results, progress_callback=ctx.progress_callback, policy=ctx.policy)
+
+    return [
+        Stage("extract_frames", extract_frames, ("input_path", "tmpdir"), ("frames",), "ffmpeg"),
+        Stage("moderate_frames", moderate, ("frames",), ("video_intervals", "frame_verdicts"), "cloud-io"),
+        Stage("localize_objects", localize, ("frames", "frame_verdicts"), ("object_boxes",), "cloud-io"),
+    ]
+
+
+def _mute(video_path: str, audio_intervals: List[Interval], output_path: str, reencode: bool = False) -> str:
+    if audio_intervals or reencode:
+        _ensure_parent_dir(output_path)
+        extra = {"reencode_when_empty": True} if reencode else {}
+        mute_intervals_in_video(
+            video_path=video_path,
+            mute_intervals=audio_intervals,
+            output_video_path=output_path,
+            **extra,
+        )
+    else:
+        # No bad audio intervals -> just copy
+        _copy_if_needed(video_path, output_path)
+    return output_path
+
+
+def _blur(video_path: str, video_intervals: List[Interval], output_path: str, reencode: bool = False) -> str:
+    if video_intervals or reencode:
+        _ensure_parent_dir(output_path)
+        extra = {"reencode_when_empty": True} if reencode else {}
+        blur_intervals_in_video(
+            video_path=video_path,
+            intervals=video_intervals,
+            output_video_path=output_path,
+            **extra,
+        )
+        return output_path
+    _copy_if_needed(video_path, output_path)
+    return output_path
+
+
+def _video_mute_graph(ctx: _JobContext) -> StageGraph:
+    def render(input_path: str, audio_intervals: List[Interval], output_path: str) -> str:
+        return _mute(input_path, audio_intervals, output_path)
+
+    return StageGraph(_audio_stages(ctx) + [
+        Stage("render", render, ("input_path", "audio_intervals", "output_path"), ("rendered_path",), "ffmpeg"),
+    ])
+
+
+def _video_blur_graph(ctx: _JobContext) -> StageGraph:
+    def render(input_path: str, video_intervals: List[Interval], output_path: str) -> str:
+        print("Video intervals to blur:", video_intervals)
+        return _blur(input_path, video_intervals, output_path)
+
+    return StageGraph(_video_stages(ctx) + [
+        Stage("render", render, ("input_path", "video_intervals", "output_path"), ("rendered_path",), "ffmpeg"),
+    ])
+
+
+def _video_blur_mute_graph(ctx: _JobContext) -> StageGraph:
+    def blur(input_path: str, video_intervals: List[Interval], tmpdir: str) -> str:
+        # Blur starts as soon as vision is done, while STT may still be running.
+        if not video_intervals:
+            return input_path
+        return _blur(input_path, video_intervals, os.path.join(tmpdir, "video_blurred.mp4"))
+
+    def render(blurred_path: str, audio_intervals: List[Interval], output_path: str) -> str:
+        return _mute(blurred_path, audio_intervals, output_path)
+
+    return StageGraph(_audio_stages(ctx) + _video_stages(ctx) + [
+        Stage("blur", blur, ("input_path", "video_intervals", "tmpdir"), ("blurred_path",), "ffmpeg"),
+        Stage("render", render, ("blurred_path", "audio_intervals", "output_path"), ("rendered_path",), "ffmpeg"),
+    ])
+
+
+_GRAPH_BUILDERS = {
+    "audio_file": _audio_file_graph,
+    "video_mute": _video_mute_graph,
+    "video_blur": _video_blur_graph,
+    "video_blur_mute": _video_blur_mute_graph,
+}
+
+
+_RENDER_STAGES = ("blur", "render")
+
+
+def _observe_stage(timing) -> None:
+    metrics.STAGE_SECONDS.observe(timing.seconds, stage=timing.name)
+
+
+def _observe_render(template: str, run, input_path: str) -> None:
+    """Render seconds per second of media, for jobs whose render stages ran."""
+    seconds = sum(run.timings[name].seconds for name in _RENDER_STAGES if name in run.timings)
+    if not seconds:
+        return
+    # Imported here: sharded_runner builds on this module.
+    from src.aegisai.pipeline.sharded_runner import probe_duration
+    try:
+        duration = probe_duration(input_path)
+    except Exception as e:
+        print(f"[file_runner] Could not probe duration for render metrics: {e}")
+        return
+    if duration > 0:
+        metrics.RENDER_RATIO.observe(seconds / duration, template=template)
+
+
+def _job_memory(cfg: PipelineConfig):
     """
-    Extract audio from `video_path` into `tmpdir` and run audio moderation.
-    Returns a list of absolute time intervals (in seconds).
+    Reserve the job's working set (`cfg.memory_mb`) from the memory budget.
+    Pool limits are process settings (env / `configure_governor` at
+    startup); a job never changes them.
     """
-    tmp_audio = os.path.join(tmpdir, "extracted_audio.wav")
-    extract_audio_track(video_path, tmp_audio)
-
-    audio_result = filter_audio_file(
-        audio_path=tmp_audio,
-        output_audio_path=None,        # analysis-only
-        chunk_seconds=chunk_seconds,
-        subtitle_path=subtitle_path,
+    return get_governor().acquire(MEMORY_MB, getattr(cfg, "memory_mb", 0))
+
+
+def build_file_graph(
+    cfg: PipelineConfig,
+    policy: Optional[CompiledPolicy] = None,
+    progress_callback=None,
+    render: bool = True,
+) -> StageGraph:
+    """
+    Stage graph for a file job, from the use-case template of `cfg`.
+    `render=False` keeps only the analysis stages (video templates).
+    """
+    graph = _GRAPH_BUILDERS[file_graph_template(cfg)](_JobContext(cfg, policy, progress_callback))
+    if not render:
+        graph = StageGraph(s for s in graph.stages if s.name not in _RENDER_STAGES)
+    return graph
+
+
+def analyze_video_file(cfg: PipelineConfig, input_path: str, trace_context=None) -> Dict[str, Any]:
+    """
+    Analysis half of a video file job (no output written).
+    Returns `audio_intervals`, `video_intervals` (None when not filtered)
+    and `stage_timings`. `trace_context` (`tracing.trace_context()` of the
+    calling job) makes the span part of that job's trace.
+    """
+    if cfg.media_type != "video":
+        raise ValueError("analyze_video_file only handles video inputs.")
+
+    policy = resolve_policy(getattr(cfg, "policy", None))
+    graph = build_file_graph(cfg, policy, render=False)
+    job_span = tracing.span(
+        "analyze_video_file", "job", context=trace_context, input=os.path.basename(input_path),
     )
-    return _normalize_interval_list(audio_result)
+    with job_span, _job_memory(cfg), tempfile.TemporaryDirectory(prefix="aegis_analyze_") as tmpdir:
+        run = StageScheduler(limits=cfg.stage_limits).run(
+            graph, {"input_path": input_path, "tmpdir": tmpdir},
+        )
+    return {
+        "audio_intervals": run.artifacts.get("audio_intervals"),
+        "video_intervals": run.artifacts.get("video_intervals"),
+        "stage_timings": {name: t.seconds for name, t in run.timings.items()},
+    }
+
+
+def render_video_file(
+    input_path: str,
+    output_path: str,
+    audio_intervals: Optional[List[Interval]],
+    video_intervals: Optional[List[Interval]],
+    reencode: bool = False,
+    trace_context=None,
+) -> str:
+    """
+    Render half of a video file job: blur `video_intervals`, then mute
+    `audio_intervals` (None = that track is not filtered, kept as is).
+    With `reencode`, filtered tracks are re-encoded even without intervals.
+    `trace_context` as for `analyze_video_file`.
+    """
+    job_span = tracing.span(
+        "render_video_file", "job", context=trace_context, input=os.path.basename(input_path),
+    )
+    with job_span, tempfile.TemporaryDirectory(prefix="aegis_render_") as tmpdir:
+        working = input_path
+        if video_intervals is not None and (video_intervals or reencode):
+            target = output_path if audio_intervals is None else os.path.join(tmpdir, "video_blurred.mp4")
+            working = _blur(input_path, video_intervals, target, reencode)
+        if audio_intervals is not None:
+            return _mute(working, audio_intervals, output_path, reencode)
+        _copy_if_needed(working, output_path)
+    return output_path
 
 
 # -------------------------------------------------------------------
@@ -106,11 +377,23 @@ def run_file_job(
     """
     Run a **file-based** moderation job (audio or video).
 
+    The job is a stage graph (see `pipeline.stages`) picked from the
+    use-case template of `cfg`; independent stages (subtitle / audio /
+    frame extraction, STT, Vision, object localization, blur) overlap under
+    per-resource limits (`cfg.stage_limits` overrides the defaults). Subprocesses and cloud calls also draw
+    from the process-wide `runtime.governor` pools.
+
+    With `cfg.work_dir` set, intermediate files are kept there and every
+    finished stage is checkpointed (`pipeline.checkpoint`); running the
+    same job again resumes after the last completed stage.
+
     Returns:
         {
             "audio_intervals": List[Interval] | None,
             "video_intervals": List[Interval] | None,
             "output_path": str,
+            "stage_timings": {stage_name: seconds},
+            "resumed_stages": [stage_name, ...],
         }
     """
     cfg.validate()
@@ -124,157 +407,60 @@ def run_file_job(
     if media_type not in ("audio", "video"):
         raise ValueError(f"Unsupported media_type for file pipeline: {media_type!r}")
 
-    # Allow config to override chunk size; fallback to 5 seconds.
-    audio_chunk_seconds = int(getattr(cfg, "audio_chunk_seconds", 5))
+    if media_type == "audio" and not getattr(cfg, "filter_audio", False):
+        raise ValueError("Audio file pipeline without audio filtering does not make sense.")
+    if not getattr(cfg, "filter_audio", False) and not getattr(cfg, "filter_video", False):
+        raise ValueError("File pipeline with neither audio nor video filtering is meaningless.")
 
-    # Retrieve subtitle_path from config
-    subtitle_path = getattr(cfg, "subtitle_path", None)
+    # Compiled once per job (and shared with other jobs on the same policy)
+    policy = resolve_policy(getattr(cfg, "policy", None))
+    graph = build_file_graph(cfg, policy, progress_callback)
 
     if progress_callback:
         progress_callback(1, f"Starting {media_type} pipeline")
 
-    # ---------------------------------------------------------------
-    # AUDIO FILE CASE
-    # ---------------------------------------------------------------
-    if media_type == "audio":
-        if not getattr(cfg, "filter_audio", False):
-            raise ValueError("Audio file pipeline without audio filtering does not make sense.")
-
-        _ensure_parent_dir(output_path)
-
-        intervals = filter_audio_file(
-            audio_path=input_path,
-            output_audio_path=output_path,
-            chunk_seconds=audio_chunk_seconds,
-            progress_callback=progress_callback,
-            subtitle_path=subtitle_path,
-        )
-        audio_intervals = _normalize_interval_list(intervals)
-
-        return {
-            "audio_intervals": audio_intervals,
-            "video_intervals": None,
-            "output_path": output_path,
-        }
+    work_dir = getattr(cfg, "work_dir", None)
+    checkpoint = StageCheckpoint(work_dir, job_key(cfg, input_path)) if work_dir else None
+    if checkpoint and checkpoint.completed and progress_callback:
+        progress_callback(1, f"Resuming {media_type} pipeline after {', '.join(checkpoint.completed)}")
 
-    # ---------------------------------------------------------------
-    # VIDEO FILE CASE
-    # ---------------------------------------------------------------
-    filter_audio_flag = bool(getattr(cfg, "filter_audio", False))
-    filter_video_flag = bool(getattr(cfg, "filter_video", False))
-
-    if not filter_audio_flag and not filter_video_flag:
-        raise ValueError("File pipeline with neither audio nor video filtering is meaningless.")
-
-    # Video file -> filtered audio, same video ----
-    if filter_audio_flag and not filter_video_flag:
-        with tempfile.TemporaryDirectory(prefix="aegis_video_audio_") as tmpdir:
-            audio_intervals = _analyze_audio_from_video(
-                video_path=input_path,
-                tmpdir=tmpdir,
-                chunk_seconds=audio_chunk_seconds,
-                subtitle_path=subtitle_path,
-            )
-
-        if audio_intervals:
-            _ensure_parent_dir(output_path)
-            mute_intervals_in_video(
-                video_path=input_path,
-                mute_intervals=audio_intervals,
-                output_video_path=output_path,
-            )
-        else:
-            # No bad audio intervals -> just copy the original video
-            _copy_if_needed(input_path, output_path)
-
-        return {
-            "audio_intervals": audio_intervals,
-            "video_intervals": None,
-            "output_path": output_path,
-        }
-
-    if filter_video_flag and not filter_audio_flag:
-        video_result = filter_video_file(
-            input_path, 
-            output_path=None, 
-            progress_callback=progress_callback
-        )
-        video_intervals = _normalize_interval_list(video_result)
-        print("Video intervals to blur:", video_intervals)
-        if video_intervals:
-            _ensure_parent_dir(output_path)
-            blur_intervals_in_video(
-                video_path=input_path,
-                intervals=video_intervals,
-                output_video_path=output_path,
+    template = file_graph_template(cfg)
+    scheduler = StageScheduler(
+        limits=cfg.stage_limits,
+        on_stage_done=_observe_stage,
+        checkpoint=checkpoint,
+    )
+    job_dir = contextlib.nullcontext(work_dir) if work_dir else tempfile.TemporaryDirectory(prefix="aegis_job_")
+    job_span = tracing.span(
+        "file_job", "job",
+        template=template,
+        input=os.path.basename(input_path),
+        input_bytes=os.path.getsize(input_path),
+    )
+    try:
+        with job_span, _job_memory(cfg), job_dir as tmpdir:
+            run = scheduler.run(
+                graph,
+                {"input_path": input_path, "output_path": output_path, "tmpdir": tmpdir},
             )
-        else:
-            _copy_if_needed(input_path, output_path)
-
-        return {
-            "audio_intervals": None,
-            "video_intervals": video_intervals,
-            "output_path": output_path,
-        }
-
-    # Video file -> filtered video and audio ----
-    if filter_audio_flag and filter_video_flag:
-        with tempfile.TemporaryDirectory(prefix="aegis_video_both_") as tmpdir:
-
-            def audio_job() -> List[Interval]:
-                return _analyze_audio_from_video(
-                    video_path=input_path,
-                    tmpdir=tmpdir,
-                    chunk_seconds=audio_chunk_seconds,
-                    subtitle_path=subtitle_path,
-                )
-
-            def video_job() -> Dict[str, Any]:
-                return filter_video_file(
-                    input_path, 
-                    output_path=None, 
-                    progress_callback=progress_callback
-                )
-
-            # Run audio + video analysis in parallel
-            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-                audio_future = executor.submit(audio_job)
-                video_future = executor.submit(video_job)
-
-                audio_intervals = audio_future.result()
-                video_result = video_future.result()
-                video_intervals = _normalize_interval_list(video_result)
-                object_boxes = video_result.get("object_boxes", [])
-                sample_fps = float(video_result.get("sample_fps", 6.0))
-
-            working_video = input_path
-
-            if video_intervals:
-                working_video = os.path.join(tmpdir, "video_blurred.mp4")
-                blur_intervals_in_video(
-                    video_path=input_path,
-                    intervals=video_intervals,
-                    output_video_path=working_video,
-                )
-
-            if audio_intervals:
-                _ensure_parent_dir(output_path)
-                mute_intervals_in_video(
-                    video_path=working_video,
-                    mute_intervals=audio_intervals,
-                    output_video_path=output_path,
-                )
-            else:
-                _copy_if_needed(working_video, output_path)
-
-        return {
-            "audio_intervals": audio_intervals,
-            "video_intervals": video_intervals,
-            "output_path": output_path,
-        }
-
-    # Should be unreachable because of earlier checks
-    raise RuntimeError("Unhandled file pipeline configuration state.")
+            if run.resumed:
+                job_span.set("resumed", ",".join(run.resumed))
+    except Exception:
+        metrics.FILE_JOBS.inc(template=template, status="failed")
+        raise
+    metrics.FILE_JOBS.inc(template=template, status="done")
+    _observe_render(template, run, input_path)
+    print(f"[file_runner] Stage timings:\n{format_timings(run)}")
+    if job_span.trace is not None:
+        print(f"[file_runner] Trace summary:\n{tracing.format_summary(job_span.trace)}")
+
+    return {
+        "audio_intervals": run.artifacts.get("audio_intervals"),
+        "video_intervals": run.artifacts.get("video_intervals"),
+        "output_path": output_path,
+        "stage_timings": {name: t.seconds for name, t in run.timings.items()},
+        "resumed_stages": list(run.resumed),
+    }
 
 
 def run_job(
@@ -296,4 +482,9 @@ def run_job(
     if output_path is None:
         raise ValueError("For file pipelines, output_path is required.")
 
+    if cfg.media_type == "video" and getattr(cfg, "shards", 1) > 1:
+        # Imported here: sharded_runner builds on this module.
+        from src.aegisai.pipeline.sharded_runner import run_sharded_file_job
+        return run_sharded_file_job(cfg, input_path_or_stream, output_path, progress_callback)
+
     return run_file_job(cfg, input_path_or_stream, output_path, progress_callback)
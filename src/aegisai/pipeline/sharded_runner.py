@@ -0,0 +1,327 @@
+"""
+Sharded file mode for long videos.
+
+One long upload is normally one pipeline in one Python process. Here the
+input is cut at keyframes into N time shards (stream copy, no re-encode),
+each shard is analysed and rendered in its own worker process, and the
+rendered shards are concatenated with the concat demuxer (stream copy).
+
+Steps:
+1. probe duration + keyframes, plan cut points (`plan_shards`)
+2. subtitles (if any) are moderated once on the full timeline
+3. split into shard files
+4. analyse shards in a process pool (`file_runner.analyze_video_file`)
+5. stitch intervals: shift to the global timeline, merge across cuts and
+   pad hits that touch a cut into the neighbouring shard (`stitch_intervals`)
+6. render shards in the pool with their clipped local intervals, every
+   shard through the same encoders (`file_runner.render_video_file`)
+7. concat
+
+Audio files, short videos and single-shard plans use `run_file_job`.
+
+Tracing: the whole job is one trace. The parent's `sharded_job` span is
+passed to the shard workers (`tracing.trace_context()`), whose
+`analyze_video_file` / `render_video_file` spans join it.
+
+Memory: the parent reserves `cfg.memory_mb` per shard from its governor's
+"memory-mb" budget for the whole job; shard workers reserve nothing
+themselves (each spawned worker has its own, unshared governor).
+"""
+from __future__ import annotations
+
+import concurrent.futures
+import dataclasses
+import functools
+import multiprocessing
+import os
+import subprocess
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.aegisai.audio.intervals import merge_intervals
+from src.aegisai.audio.subtitle_parser import iter_subtitle_file
+from src.aegisai.moderation.policy import resolve_policy
+from src.aegisai.moderation.text_rules import analyze_text_stream
+from src.aegisai.pipeline.config import PipelineConfig
+from src.aegisai.pipeline.file_runner import (
+    analyze_video_file,
+    render_video_file,
+    run_file_job,
+)
+from src.aegisai.runtime.governor import FFMPEG_DECODE, FFMPEG_ENCODE, MEMORY_MB, get_governor, governed_run
+from src.aegisai.runtime import tracing
+from src.aegisai.runtime.tracing import traced
+from src.aegisai.video.segment import extract_subtitles_from_video
+
+Interval = Tuple[float, float]
+
+DEFAULT_MIN_SHARD_SECONDS = 120.0
+BOUNDARY_MARGIN = 0.5   # a hit this close to a cut is extended across it
+
+
+# -------------------------------------------------------------------
+# Planning / interval stitching (pure)
+# -------------------------------------------------------------------
+
+def plan_shards(
+    duration: float,
+    keyframes: Sequence[float],
+    shards: int,
+    min_shard_seconds: float = DEFAULT_MIN_SHARD_SECONDS,
+) -> List[float]:
+    """
+    Cut points (keyframe times) splitting `duration` into at most `shards`
+    roughly equal shards of at least `min_shard_seconds` each.
+    """
+    count = min(shards, int(duration // min_shard_seconds)) if min_shard_seconds > 0 else shards
+    if count < 2 or not keyframes:
+        return []
+
+    keys = sorted(k for k in keyframes if 0.0 < k < duration)
+    cuts: List[float] = []
+    for i in range(1, count):
+        target = duration * i / count
+        best = min(keys, key=lambda k: abs(k - target), default=None)
+        if best is None:
+            break
+        prev = cuts[-1] if cuts else 0.0
+        if best - prev >= min_shard_seconds / 2 and duration - best >= min_shard_seconds / 2:
+            cuts.append(best)
+    return sorted(set(cuts))
+
+
+def shard_bounds(duration: float, cuts: Sequence[float]) -> List[Interval]:
+    edges = [0.0] + list(cuts) + [duration]
+    return [(edges[i], edges[i + 1]) for i in range(len(edges) - 1)]
+
+
+def stitch_intervals(
+    intervals: Sequence[Interval],
+    cuts: Sequence[float],
+    margin: float = BOUNDARY_MARGIN,
+) -> List[Interval]:
+    """
+    Merge global intervals from all shards and widen the ones within
+    `margin` of a cut to cover [cut - margin, cut + margin]: a word or scene
+    split by the cut is only partly seen by each shard.
+    """
+    padded: List[Interval] = []
+    for start, end in merge_intervals(list(intervals)):
+        for cut in cuts:
+            if start <= cut + margin and end >= cut - margin:
+                start = max(0.0, min(start, cut - margin))
+                end = max(end, cut + margin)
+        padded.append((start, end))
+    return merge_intervals(padded)
+
+
+def split_intervals(intervals: Sequence[Interval], bounds: Sequence[Interval]) -> List[List[Interval]]:
+    """Clip global intervals to each shard and make them shard-local."""
+    per_shard: List[List[Interval]] = []
+    for lo, hi in bounds:
+        local = [
+            (max(s, lo) - lo, min(e, hi) - lo)
+            for s, e in intervals
+            if e > lo and s < hi
+        ]
+        per_shard.append(local)
+    return per_shard
+
+
+# -------------------------------------------------------------------
+# ffmpeg helpers
+# -------------------------------------------------------------------
+
+def probe_duration(path: str) -> float:
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        path,
+    ]
+    out = governed_run(cmd, FFMPEG_DECODE, capture_output=True, text=True, check=True).stdout.strip()
+    return float(out)
+
+
+def probe_keyframes(path: str) -> List[float]:
+    """Keyframe timestamps of the first video stream (packet flags, no decode)."""
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "csv=p=0",
+        path,
+    ]
+    out = governed_run(cmd, FFMPEG_DECODE, capture_output=True, text=True, check=True).stdout
+    keyframes: List[float] = []
+    for line in out.splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags and pts not in ("", "N/A"):
+            keyframes.append(float(pts))
+    return sorted(keyframes)
+
+
+@traced(cat="ffmpeg")
+def split_video(input_path: str, cuts: Sequence[float], out_dir: str) -> List[str]:
+    """Stream-copy `input_path` into one file per shard, cut at `cuts`."""
+    ext = os.path.splitext(input_path)[1] or ".mp4"
+    pattern = os.path.join(out_dir, f"shard_%03d{ext}")
+    cmd = [
+        "ffmpeg", "-y", "-i", input_path,
+        "-map", "0", "-c", "copy",
+        "-f", "segment",
+        "-segment_times", ",".join(f"{c:.6f}" for c in cuts),
+        "-reset_timestamps", "1",
+        pattern,
+    ]
+    governed_run(cmd, FFMPEG_DECODE, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return [pattern % i for i in range(len(cuts) + 1)]
+
+
+@traced(cat="ffmpeg")
+def concat_videos(paths: Sequence[str], output_path: str, work_dir: str) -> None:
+    """Concat demuxer, stream copy (all inputs come from the same encoders)."""
+    list_path = os.path.join(work_dir, "concat.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        for p in paths:
+            escaped = os.path.abspath(p).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    parent = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(parent, exist_ok=True)
+    cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", output_path]
+    governed_run(cmd, FFMPEG_ENCODE, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+# -------------------------------------------------------------------
+# Runner
+# -------------------------------------------------------------------
+
+def _subtitle_intervals(cfg: PipelineConfig, input_path: str, tmpdir: str) -> Optional[List[Interval]]:
+    """Moderate subtitles once on the full timeline; None = no usable subtitles."""
+    path = cfg.subtitle_path
+    if not path and cfg.extract_subtitles:
+        candidate = os.path.join(tmpdir, "extracted_subtitles.srt")
+        if extract_subtitles_from_video(input_path, candidate):
+            path = candidate
+    if not path:
+        return None
+    try:
+        policy = resolve_policy(cfg.policy)
+        return list(analyze_text_stream(iter_subtitle_file(path), policy=policy, strict=True))
+    except Exception as e:
+        print(f"[sharded_runner] Error parsing subtitles: {e}. Shards will run STT.")
+        return None
+
+
+def _make_executor(kind: str, workers: int) -> concurrent.futures.Executor:
+    if kind == "process":
+        # Spawn, not fork: the parent may already hold gRPC channels (pooled
+        # Speech clients, the shared Vision client), and gRPC does not
+        # survive a fork.
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+        )
+    if kind == "thread":
+        return concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    raise ValueError(f"Unsupported shard executor: {kind!r}")
+
+
+def run_sharded_file_job(
+    cfg: PipelineConfig,
+    input_path: str,
+    output_path: str,
+    progress_callback: Optional[callable] = None,
+    shards: Optional[int] = None,
+    min_shard_seconds: float = DEFAULT_MIN_SHARD_SECONDS,
+    executor: str = "process",
+) -> Dict[str, Any]:
+    """
+    `run_file_job` for long videos, split over `shards` worker processes
+    (default `cfg.shards`). Same return shape as `run_file_job`, plus
+    `"shards": [(start, end), ...]`.
+    """
+    cfg.validate()
+    shards = int(shards if shards is not None else getattr(cfg, "shards", 1) or 1)
+    if cfg.media_type != "video" or shards < 2:
+        return run_file_job(cfg, input_path, output_path, progress_callback)
+    if not os.path.isfile(input_path):
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+
+    timings: Dict[str, float] = {}
+    t = time.perf_counter()
+    duration = probe_duration(input_path)
+    cuts = plan_shards(duration, probe_keyframes(input_path), shards, min_shard_seconds)
+    timings["probe"] = time.perf_counter() - t
+    if not cuts:
+        return run_file_job(cfg, input_path, output_path, progress_callback)
+
+    bounds = shard_bounds(duration, cuts)
+    print(f"[sharded_runner] {duration:.1f}s input -> {len(bounds)} shards at {cuts}")
+    if progress_callback:
+        progress_callback(1, f"Starting sharded video pipeline ({len(bounds)} shards)")
+
+    # N shards run at once: reserve all their working sets here, where the
+    # budget is shared with the other jobs of this process.
+    memory = get_governor().acquire(MEMORY_MB, cfg.memory_mb * len(bounds))
+    job_span = tracing.span("sharded_job", "job", input=os.path.basename(input_path), shards=len(bounds))
+    with job_span, memory, tempfile.TemporaryDirectory(prefix="aegis_shards_") as tmpdir:
+        trace_context = tracing.trace_context()
+        t = time.perf_counter()
+        subtitle_intervals = _subtitle_intervals(cfg, input_path, tmpdir) if cfg.filter_audio else None
+        paths = split_video(input_path, cuts, tmpdir)
+        timings["split"] = time.perf_counter() - t
+
+        # Shards analyse what subtitles did not already cover.
+        shard_cfg = dataclasses.replace(
+            cfg,
+            filter_audio=cfg.filter_audio and subtitle_intervals is None,
+            subtitle_path=None,
+            extract_subtitles=False,
+            shards=1,
+            work_dir=None,
+            memory_mb=0,   # reserved above for all shards
+        )
+        analyse = shard_cfg.filter_audio or shard_cfg.filter_video
+
+        with _make_executor(executor, len(paths)) as pool:
+            t = time.perf_counter()
+            analyze = functools.partial(analyze_video_file, trace_context=trace_context)
+            results = list(pool.map(analyze, [shard_cfg] * len(paths), paths)) if analyse else []
+            timings["analyze"] = time.perf_counter() - t
+            if progress_callback:
+                progress_callback(60, "Shard analysis complete, rendering")
+
+            audio_intervals: Optional[List[Interval]] = None
+            video_intervals: Optional[List[Interval]] = None
+            if cfg.filter_audio:
+                raw = subtitle_intervals if subtitle_intervals is not None else [
+                    (s + lo, e + lo) for (lo, _), r in zip(bounds, results) for s, e in r["audio_intervals"]
+                ]
+                audio_intervals = stitch_intervals(raw, cuts)
+            if cfg.filter_video:
+                raw = [(s + lo, e + lo) for (lo, _), r in zip(bounds, results) for s, e in r["video_intervals"]]
+                video_intervals = stitch_intervals(raw, cuts)
+
+            ext = os.path.splitext(output_path)[1] or ".mp4"
+            rendered = [os.path.join(tmpdir, f"rendered_{i:03d}{ext}") for i in range(len(paths))]
+            per_audio = split_intervals(audio_intervals, bounds) if audio_intervals is not None else [None] * len(paths)
+            per_video = split_intervals(video_intervals, bounds) if video_intervals is not None else [None] * len(paths)
+
+            t = time.perf_counter()
+            render = functools.partial(render_video_file, trace_context=trace_context)
+            list(pool.map(render, paths, rendered, per_audio, per_video, [True] * len(paths)))
+            timings["render"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        concat_videos(rendered, output_path, tmpdir)
+        timings["concat"] = time.perf_counter() - t
+
+    print(f"[sharded_runner] Stage timings: {timings}")
+    return {
+        "audio_intervals": audio_intervals,
+        "video_intervals": video_intervals,
+        "output_path": output_path,
+        "stage_timings": timings,
+        "shards": bounds,
+    }
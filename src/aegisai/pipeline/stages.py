@@ -0,0 +1,263 @@
+"""
+Declarative stage graph for file jobs.
+
+A `Stage` names the artifacts it reads (`inputs`) and writes (`outputs`)
+and the resource class it occupies while running:
+
+* "cpu"      – local compute
+* "ffmpeg"   – decode / encode subprocesses
+* "cloud-io" – work bound on Google STT / Vision round-trips
+
+`StageScheduler.run(graph, artifacts)` starts every stage whose inputs are
+available, as soon as its resource class has a free slot, so independent
+stages of one job overlap as much as the limits allow. It returns the final
+artifacts plus per-stage timings.
+
+With a `checkpoint` (see `pipeline.checkpoint`) every finished stage is
+recorded, and stages already recorded by an earlier run are restored
+instead of run (`StageRun.resumed`).
+
+Example:
+
+    graph = StageGraph([
+        Stage("extract", extract, inputs=("input_path",), outputs=("audio_path",), resource="ffmpeg"),
+        Stage("analyze", analyze, inputs=("audio_path",), outputs=("intervals",), resource="cloud-io"),
+    ])
+    run = StageScheduler().run(graph, {"input_path": path})
+    run.artifacts["intervals"], run.timings["analyze"].seconds
+"""
+from __future__ import annotations
+
+import concurrent.futures
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from src.aegisai.runtime import tracing
+
+RESOURCE_CLASSES = ("cpu", "ffmpeg", "cloud-io")
+
+DEFAULT_LIMITS: Dict[str, int] = {
+    "cpu": max(1, os.cpu_count() or 1),
+    "ffmpeg": 2,
+    "cloud-io": 4,
+}
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One unit of work. `fn` is called with the input artifacts as keyword
+    arguments and returns the single output (one name in `outputs`), a
+    tuple in `outputs` order (several names), or nothing (no outputs).
+    """
+    name: str
+    fn: Callable[..., Any] = field(repr=False)
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    resource: str = "cpu"
+
+    def __post_init__(self) -> None:
+        if self.resource not in RESOURCE_CLASSES:
+            raise ValueError(f"Unknown resource class for stage {self.name!r}: {self.resource!r}")
+
+
+class StageTiming(NamedTuple):
+    name: str
+    resource: str
+    ready: float      # seconds since run start when inputs became available
+    started: float    # ... when it got a slot
+    finished: float
+
+    @property
+    def seconds(self) -> float:
+        return self.finished - self.started
+
+    @property
+    def waited(self) -> float:
+        return self.started - self.ready
+
+
+class StageRun(NamedTuple):
+    artifacts: Dict[str, Any]
+    timings: Dict[str, StageTiming]
+    wall_seconds: float
+    resumed: Tuple[str, ...] = ()   # stages restored from a checkpoint
+
+
+class StageGraph:
+    """Stages wired by artifact names; validated against the initial artifacts."""
+
+    def __init__(self, stages: Iterable[Stage] = ()) -> None:
+        self.stages: List[Stage] = []
+        self._producers: Dict[str, str] = {}
+        for stage in stages:
+            self.add(stage)
+
+    def add(self, stage: Stage) -> "StageGraph":
+        if any(s.name == stage.name for s in self.stages):
+            raise ValueError(f"Duplicate stage name: {stage.name!r}")
+        for out in stage.outputs:
+            if out in self._producers:
+                raise ValueError(f"Artifact {out!r} produced by both {self._producers[out]!r} and {stage.name!r}")
+            self._producers[out] = stage.name
+        self.stages.append(stage)
+        return self
+
+    def validate(self, initial: Iterable[str]) -> None:
+        """Every input must be initial or produced, and the graph must be acyclic."""
+        available = set(initial)
+        for out, producer in self._producers.items():
+            if out in available:
+                raise ValueError(f"Artifact {out!r} is both an initial artifact and produced by {producer!r}")
+
+        pending = list(self.stages)
+        while pending:
+            runnable = [s for s in pending if all(i in available for i in s.inputs)]
+            if not runnable:
+                missing = {i for s in pending for i in s.inputs if i not in available and i not in self._producers}
+                if missing:
+                    raise ValueError(f"Stage inputs never produced: {sorted(missing)}")
+                raise ValueError(f"Cycle between stages: {[s.name for s in pending]}")
+            for s in runnable:
+                available.update(s.outputs)
+                pending.remove(s)
+
+
+class StageScheduler:
+    """
+    Runs a StageGraph on a thread pool with per-resource-class concurrency
+    limits. The first stage error stops new submissions; running stages are
+    allowed to finish and the error is re-raised.
+
+    `checkpoint` is any object with `load(stage) -> outputs | None` and
+    `save(stage, outputs, seconds)` (e.g. `checkpoint.StageCheckpoint`).
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Mapping[str, int]] = None,
+        on_stage_done: Optional[Callable[[StageTiming], None]] = None,
+        checkpoint: Optional[Any] = None,
+    ) -> None:
+        self.limits = dict(DEFAULT_LIMITS)
+        self.limits.update(limits or {})
+        self.on_stage_done = on_stage_done
+        self.checkpoint = checkpoint
+
+    def run(self, graph: StageGraph, artifacts: Optional[Mapping[str, Any]] = None) -> StageRun:
+        values: Dict[str, Any] = dict(artifacts or {})
+        graph.validate(values)
+
+        t0 = time.perf_counter()
+
+        def now() -> float:
+            return time.perf_counter() - t0
+
+        pending = list(graph.stages)
+        resumed: List[str] = []
+        if self.checkpoint is not None:
+            for stage in list(pending):
+                outputs = self.checkpoint.load(stage)
+                if outputs is not None:
+                    values.update(outputs)
+                    pending.remove(stage)
+                    resumed.append(stage.name)
+            if resumed:
+                print(f"[stages] Resumed from checkpoint: {resumed}")
+                self._drop_unneeded(graph, pending)
+
+        ready_at: Dict[str, float] = {}
+        running: Dict[concurrent.futures.Future, Tuple[Stage, float]] = {}
+        in_use = {cls: 0 for cls in self.limits}
+        timings: Dict[str, StageTiming] = {}
+        error: Optional[BaseException] = None
+
+        workers = max(1, sum(self.limits.values()))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stage") as pool:
+            while pending or running:
+                if error is None:
+                    for stage in list(pending):
+                        if not all(i in values for i in stage.inputs):
+                            continue
+                        ready_at.setdefault(stage.name, now())
+                        if in_use[stage.resource] >= self.limits[stage.resource]:
+                            continue
+                        in_use[stage.resource] += 1
+                        pending.remove(stage)
+                        kwargs = {i: values[i] for i in stage.inputs}
+                        running[pool.submit(tracing.bind(self._call), stage, kwargs)] = (stage, now())
+                elif not running:
+                    break
+
+                if not running:
+                    # Validated graph: something is always runnable or running.
+                    raise RuntimeError(f"Stage graph stalled with pending stages {[s.name for s in pending]}")
+
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    stage, started = running.pop(future)
+                    in_use[stage.resource] -= 1
+                    timing = StageTiming(stage.name, stage.resource, ready_at[stage.name], started, now())
+                    timings[stage.name] = timing
+
+                    exc = future.exception()
+                    if exc is not None:
+                        print(f"[stages] {stage.name} failed after {timing.seconds:.2f}s: {exc}")
+                        error = error or exc
+                        continue
+
+                    # Only this thread touches `values`.
+                    self._store(stage, future.result(), values)
+                    if self.checkpoint is not None:
+                        self.checkpoint.save(stage, {o: values[o] for o in stage.outputs}, timing.seconds)
+                    if self.on_stage_done:
+                        self.on_stage_done(timing)
+
+        if error is not None:
+            raise error
+
+        return StageRun(values, timings, now(), tuple(resumed))
+
+    @staticmethod
+    def _call(stage: Stage, kwargs: Dict[str, Any]) -> Any:
+        with tracing.span(stage.name, "stage", resource=stage.resource):
+            return stage.fn(**kwargs)
+
+    @staticmethod
+    def _drop_unneeded(graph: StageGraph, pending: List[Stage]) -> None:
+        """Remove pending stages whose outputs only fed restored stages."""
+        consumed = {i for s in graph.stages for i in s.inputs}
+        while True:
+            needed = {i for s in pending for i in s.inputs}
+            unneeded = [
+                s for s in pending
+                if s.outputs and all(o in consumed and o not in needed for o in s.outputs)
+            ]
+            if not unneeded:
+                return
+            for stage in unneeded:
+                print(f"[stages] Skipping {stage.name}: only feeds restored stages")
+                pending.remove(stage)
+
+    @staticmethod
+    def _store(stage: Stage, result: Any, values: Dict[str, Any]) -> None:
+        if len(stage.outputs) == 1:
+            values[stage.outputs[0]] = result
+        elif stage.outputs:
+            if not isinstance(result, tuple) or len(result) != len(stage.outputs):
+                raise ValueError(f"Stage {stage.name!r} must return {len(stage.outputs)} values")
+            values.update(zip(stage.outputs, result))
+
+
+def format_timings(run: StageRun) -> str:
+    """One line per stage, in start order, for logs."""
+    lines = [
+        f"{t.name:<16} {t.resource:<8} start={t.started:6.2f}s took={t.seconds:6.2f}s waited={t.waited:5.2f}s"
+        for t in sorted(run.timings.values(), key=lambda t: t.started)
+    ]
+    if run.resumed:
+        lines.append(f"resumed={', '.join(run.resumed)}")
+    lines.append(f"wall={run.wall_seconds:.2f}s")
+    return "\n".join(lines)
@@ -6,12 +6,14 @@ import queue
 import threading
 import concurrent.futures
 from dataclasses import dataclass
-from typing import List, Dict, Tuple, Optional, Any
+from typing import Callable, Iterable, List, Dict, Tuple, Optional, Any
 
 from src.aegisai.audio.filter_stream import AudioStreamFilter, AudioResult
 from src.aegisai.video.filter_stream import VideoStreamFilter, VideoResult
 from src.aegisai.video.ffmpeg_edit import blur_and_mute_intervals_in_video
 from src.aegisai.pipeline.config import PipelineConfig
+from src.aegisai.moderation.policy import PolicyLike, resolve_policy
+from src.aegisai.runtime import tracing
 
 Interval = Tuple[float, float]
 
@@ -138,14 +140,33 @@ class StreamModerationPipeline:
         video_workers: int = 20,
         sample_fps: float = 1.0,
         ffmpeg_workers: int = 2,
+        audio_stt_mode: str = "batch",
+        on_transcript: Optional[Callable[[Any], None]] = None,
+        audio_deadline_seconds: Optional[float] = None,
+        audio_deadline_policy: str = "open",
+        policy: PolicyLike = None,
     ) -> None:
         self.output_dir = output_dir
+        # Moderation policy shared by the audio and video filters.
+        self.policy = resolve_policy(policy)
         _ensure_dir(self.output_dir)
 
-        self.audio_filter = AudioStreamFilter(num_workers=audio_workers)
+        # "streaming" keeps one live streaming_recognize session per stream;
+        # interim/final transcripts are handed to `on_transcript` from poll().
+        self.on_transcript = on_transcript
+        # Audio results are released after at most `audio_deadline_seconds`;
+        # "open" lets an unanalyzed chunk through, "closed" mutes it.
+        self.audio_filter = AudioStreamFilter(
+            num_workers=audio_workers,
+            mode=audio_stt_mode,
+            deadline_seconds=audio_deadline_seconds,
+            deadline_policy=audio_deadline_policy,
+            policy=self.policy,
+        )
         self.video_filter = VideoStreamFilter(
             num_workers=video_workers,
             sample_fps=sample_fps,
+            policy=self.policy,
         )
 
         self._chunks: Dict[int, _ChunkState] = {}
@@ -201,6 +222,17 @@ class StreamModerationPipeline:
 
         Safe to call frequently (e.g. on a timer or after each submitted chunk).
         """
+        # Drain live transcripts (streaming STT mode only)
+        while True:
+            evt = self.audio_filter.get_transcript_nowait()
+            if evt is None:
+                break
+            if self.on_transcript is not None:
+                try:
+                    self.on_transcript(evt)
+                except Exception as e:
+                    print(f"[StreamModerationPipeline] on_transcript error: {e}")
+
         # Drain all available audio results
         while True:
             res: Optional[AudioResult] = self.audio_filter.get_result_nowait()
@@ -344,7 +376,7 @@ class StreamModerationPipeline:
                     # Replace with logging if desired
                     print(f"[StreamModerationPipeline] Error copying safe chunk {desc.chunk_id}: {e}")
 
-            self._ffmpeg_pool.submit(copy_job)
+            self._ffmpeg_pool.submit(tracing.bind(copy_job))
             return
 
         # Otherwise run one ffmpeg command to blur + mute this chunk.
@@ -367,7 +399,7 @@ class StreamModerationPipeline:
                 # Replace with logging if desired
                 print(f"[StreamModerationPipeline] Error processing chunk {desc.chunk_id}: {e}")
 
-        self._ffmpeg_pool.submit(ffmpeg_job)
+        self._ffmpeg_pool.submit(tracing.bind(ffmpeg_job))
 
 
 # -------------------------------------------------------------------
@@ -377,6 +409,7 @@ class StreamModerationPipeline:
 def create_stream_pipeline(
     cfg: PipelineConfig,
     output_dir: str,
+    on_transcript: Optional[Callable[[Any], None]] = None,
 ) -> StreamModerationPipeline:
     """
     Helper to build a StreamModerationPipeline from PipelineConfig.
@@ -390,7 +423,10 @@ def create_stream_pipeline(
         - video_workers
         - sample_fps
         - ffmpeg_workers
-    and they will be picked up if present.
+    and they will be picked up if present. `cfg.policy` (PolicySpec /
+    preset name) selects the moderation policy, `cfg.audio_stt_mode` the STT
+    mode; `cfg.audio_deadline_seconds` and `cfg.audio_deadline_policy` bound
+    how long a chunk waits for STT.
     """
     if getattr(cfg, "mode", None) != "stream":
         raise ValueError("create_stream_pipeline expects cfg.mode == 'stream'")
@@ -400,6 +436,7 @@ def create_stream_pipeline(
     video_workers = int(getattr(cfg, "video_workers", 20))
     sample_fps = float(getattr(cfg, "sample_fps", 1.0))
     ffmpeg_workers = int(getattr(cfg, "ffmpeg_workers", 2))
+    audio_deadline_seconds = cfg.audio_deadline_seconds
 
     return StreamModerationPipeline(
         output_dir=output_dir,
@@ -407,4 +444,50 @@ def create_stream_pipeline(
         video_workers=video_workers,
         sample_fps=sample_fps,
         ffmpeg_workers=ffmpeg_workers,
+        audio_stt_mode=cfg.audio_stt_mode,
+        on_transcript=on_transcript,
+        audio_deadline_seconds=(
+            float(audio_deadline_seconds) if audio_deadline_seconds is not None else None
+        ),
+        audio_deadline_policy=cfg.audio_deadline_policy,
+        policy=cfg.policy,
     )
+
+
+def _drain_ready(pipeline: StreamModerationPipeline) -> List[FilteredChunk]:
+    ready: List[FilteredChunk] = []
+    while True:
+        chunk = pipeline.get_ready_chunk_nowait()
+        if chunk is None:
+            return ready
+        ready.append(chunk)
+
+
+def run_stream_job(
+    cfg: PipelineConfig,
+    chunks: Iterable[ChunkDescriptor],
+    output_dir: str,
+    on_transcript: Optional[Callable[[Any], None]] = None,
+) -> List[FilteredChunk]:
+    """
+    Run a **stream** moderation job over `chunks` (in stream order).
+
+    Builds the pipeline with `create_stream_pipeline(cfg, ...)`, submits and
+    polls each chunk as it arrives, closes the pipeline when `chunks` ends
+    and returns every released FilteredChunk, ordered by chunk id. With
+    tracing on, the job is one `stream_job` trace.
+    """
+    cfg.validate()
+    released: List[FilteredChunk] = []
+    with tracing.span("stream_job", "job", stt_mode=cfg.audio_stt_mode) as job_span:
+        pipeline = create_stream_pipeline(cfg, output_dir, on_transcript=on_transcript)
+        try:
+            for desc in chunks:
+                pipeline.submit_chunk(desc)
+                pipeline.poll()
+                released.extend(_drain_ready(pipeline))
+        finally:
+            pipeline.close()
+        released.extend(_drain_ready(pipeline))
+        job_span.set("chunks", len(released))
+    return sorted(released, key=lambda c: c.chunk_id)
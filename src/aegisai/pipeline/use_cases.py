@@ -1,6 +1,6 @@
 from  __future__ import annotations
 
-from src.aegisai.pipeline.config import PipelineConfig
+from src.aegisai.pipeline.config import DEFAULT_AUDIO_DEADLINE_SECONDS, PipelineConfig
 
 """
 Predefined 8 high-level business use cases for Aegis.
@@ -23,6 +23,8 @@ AUDIO_STREAM_FILTER = PipelineConfig(
     mode="stream",
     filter_audio=True,
     filter_video=False,
+    audio_deadline_seconds=DEFAULT_AUDIO_DEADLINE_SECONDS,
+    audio_deadline_policy="open",
 )
 
 # 3) Video file -> filtered audio, same video
@@ -55,6 +57,8 @@ VIDEO_STREAM_AUDIO_ONLY = PipelineConfig(
     mode="stream",
     filter_audio=True,
     filter_video=False,
+    audio_deadline_seconds=DEFAULT_AUDIO_DEADLINE_SECONDS,
+    audio_deadline_policy="open",
 )
 
 # 7) Video stream -> filtered video, same audio stream
@@ -63,6 +67,8 @@ VIDEO_STREAM_VIDEO_ONLY = PipelineConfig(
     mode="stream",
     filter_audio=False,
     filter_video=True,
+    audio_deadline_seconds=DEFAULT_AUDIO_DEADLINE_SECONDS,
+    audio_deadline_policy="open",
 )
 
 # 8) Video stream -> filtered video and audio stream
@@ -71,4 +77,26 @@ VIDEO_STREAM_AUDIO_VIDEO = PipelineConfig(
     mode="stream",
     filter_audio=True,
     filter_video=True,
+    audio_deadline_seconds=DEFAULT_AUDIO_DEADLINE_SECONDS,
+    audio_deadline_policy="open",
 )
+
+
+# File use cases -> stage graph template (graphs are built in file_runner).
+# Keyed by (media_type, filter_audio, filter_video) so configs derived with
+# dataclasses.replace (subtitles, policy, ...) map to the same template.
+FILE_GRAPH_TEMPLATES = {
+    (AUDIO_FILE_FILTER.media_type, AUDIO_FILE_FILTER.filter_audio, AUDIO_FILE_FILTER.filter_video): "audio_file",
+    (VIDEO_FILE_AUDIO_ONLY.media_type, VIDEO_FILE_AUDIO_ONLY.filter_audio, VIDEO_FILE_AUDIO_ONLY.filter_video): "video_mute",
+    (VIDEO_FILE_VIDEO_ONLY.media_type, VIDEO_FILE_VIDEO_ONLY.filter_audio, VIDEO_FILE_VIDEO_ONLY.filter_video): "video_blur",
+    (VIDEO_FILE_AUDIO_VIDEO.media_type, VIDEO_FILE_AUDIO_VIDEO.filter_audio, VIDEO_FILE_AUDIO_VIDEO.filter_video): "video_blur_mute",
+}
+
+
+def file_graph_template(cfg: PipelineConfig) -> str:
+    """Name of the stage graph template that runs `cfg` in file mode."""
+    key = (cfg.media_type, bool(cfg.filter_audio), bool(cfg.filter_video))
+    if key not in FILE_GRAPH_TEMPLATES:
+        raise ValueError(f"No file pipeline for media_type={cfg.media_type!r}, "
+                         f"filter_audio={cfg.filter_audio}, filter_video={cfg.filter_video}")
+    return FILE_GRAPH_TEMPLATES[key]
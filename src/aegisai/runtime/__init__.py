@@ -0,0 +1,6 @@
+"""
+Runtime services shared by all pipelines in a process (resource governor,
+tracing, metrics, record / replay cassette).
+"""
+
+__all__ = []
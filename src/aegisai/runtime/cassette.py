@@ -0,0 +1,407 @@
+"""
+Record / replay of Google Vision and Speech responses.
+
+In "record" mode the real clients are wrapped: every SafeSearch, label,
+object and STT `recognize` call is stored in a SQLite cassette, keyed by a
+fingerprint of the method and the serialized request. The stored data is
+the compressed protobuf response (or the exception raised) plus the
+measured latency. A `streaming_recognize` session is stored the same way,
+keyed by its config and the whole request stream, with every response and
+its arrival time. In "replay" mode no Google client is built at all.
+Calls are answered from the cassette, sleeping for the recorded latency
+("recorded") or not at all ("zero"). This gives offline, quota-free runs
+of the real pipeline on real content, for benchmarks and profiling.
+
+    use_cassette("data/run1.cassette", mode="record")     # real run
+    use_cassette("data/run1.cassette", mode="replay", latency="zero")
+
+or from the environment, read on first client creation:
+
+    AEGIS_CASSETTE=data/run1.cassette
+    AEGIS_CASSETTE_MODE=record | replay        (default replay)
+    AEGIS_CASSETTE_LATENCY=recorded | zero     (default recorded)
+
+A request missing from the cassette raises `CassetteMiss` in replay mode.
+Only request hashes are stored; the audio and frames themselves are not.
+A replayed stream is answered once the caller has half-closed it (its key
+needs every request), so interim results arrive late in replay.
+"""
+from __future__ import annotations
+
+import hashlib
+import importlib
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+RECORDED_METHODS = frozenset({
+    "safe_search_detection",
+    "label_detection",
+    "object_localization",
+    "recognize",
+    "streaming_recognize",
+})
+# Request iterator in, response iterator out.
+STREAMING_METHODS = frozenset({"streaming_recognize"})
+_FRAME = struct.Struct(">dI")   # response arrival offset (s), payload length
+MODES = ("record", "replay")
+LATENCIES = ("recorded", "zero")
+
+
+class CassetteMiss(LookupError):
+    """Replay of a request that was never recorded."""
+
+
+class Entry(NamedTuple):
+    method: str
+    response_type: Optional[str]   # "module:QualName" of the proto-plus message
+    response: Optional[bytes]      # zlib-compressed wire format
+    error_type: Optional[str]      # "module:QualName" of the exception
+    error_message: Optional[str]
+    seconds: float
+
+
+def _type_name(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _load_type(name: str) -> type:
+    module, _, qualname = name.partition(":")
+    obj: Any = importlib.import_module(module)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _pack_stream(frames: List[Tuple[float, bytes]]) -> bytes:
+    return b"".join(_FRAME.pack(offset, len(data)) + data for offset, data in frames)
+
+
+def _unpack_stream(blob: bytes) -> List[Tuple[float, bytes]]:
+    frames, pos = [], 0
+    while pos < len(blob):
+        offset, size = _FRAME.unpack_from(blob, pos)
+        pos += _FRAME.size
+        frames.append((offset, blob[pos:pos + size]))
+        pos += size
+    return frames
+
+
+def _split_requests(args: tuple, kwargs: Dict[str, Any]) -> Tuple[tuple, Dict[str, Any], Any]:
+    """(args, kwargs, request iterator) of a streaming call."""
+    if "requests" in kwargs:
+        kwargs = dict(kwargs)
+        return args, kwargs, kwargs.pop("requests")
+    return args[:-1], kwargs, args[-1]
+
+
+def _stream_fingerprint(method: str, args: tuple, kwargs: Dict[str, Any], requests: List[bytes]) -> str:
+    stream = b"".join(struct.pack(">I", len(r)) + r for r in requests)
+    return fingerprint(method, args, dict(kwargs, requests=stream))
+
+
+def _serialize(value: Any) -> bytes:
+    cls = type(value)
+    if hasattr(cls, "serialize") and hasattr(cls, "deserialize"):   # proto-plus message
+        return cls.serialize(value)
+    if hasattr(value, "SerializeToString"):                         # raw protobuf
+        return value.SerializeToString()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value)
+    return repr(value).encode("utf-8")
+
+
+def fingerprint(method: str, args: tuple, kwargs: Dict[str, Any]) -> str:
+    """sha256 over the method name and every serialized argument."""
+    h = hashlib.sha256(method.encode("utf-8"))
+    for value in args:
+        h.update(b"\0")
+        h.update(_serialize(value))
+    for name in sorted(kwargs):
+        h.update(b"\0" + name.encode("utf-8") + b"=")
+        h.update(_serialize(kwargs[name]))
+    return h.hexdigest()
+
+
+class Cassette:
+    """SQLite store of recorded calls; safe to share between threads."""
+
+    def __init__(self, path: str, mode: str = "replay", latency: str = "recorded") -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode!r}")
+        if latency not in LATENCIES:
+            raise ValueError(f"Unknown cassette latency: {latency!r}")
+        if mode == "replay" and not os.path.isfile(path):
+            raise FileNotFoundError(f"Cassette not found: {path}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._stats = {"recorded": 0, "replayed": 0, "misses": 0}
+
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS calls ("
+            " fingerprint TEXT PRIMARY KEY,"
+            " method TEXT NOT NULL,"
+            " response_type TEXT,"
+            " response BLOB,"
+            " error_type TEXT,"
+            " error_message TEXT,"
+            " seconds REAL NOT NULL,"
+            " recorded_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[Entry]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT method, response_type, response, error_type, error_message, seconds"
+                " FROM calls WHERE fingerprint = ?", (key,)
+            ).fetchone()
+        return Entry(*row) if row is not None else None
+
+    def put(self, key: str, entry: Entry) -> None:
+        """First recording of a request wins (repeated frames keep one entry)."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO calls VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, *entry, time.time()),
+            )
+            self._db.commit()
+            self._stats["recorded"] += 1
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = self._db.execute("SELECT COUNT(*) FROM calls").fetchone()[0]
+        return stats
+
+    def __len__(self) -> int:
+        return self.stats()["entries"]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # ----- record / replay one call -----
+
+    def record(self, method: str, call: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+        key = fingerprint(method, args, kwargs)
+        start = time.perf_counter()
+        try:
+            response = call(*args, **kwargs)
+        except Exception as e:
+            seconds = time.perf_counter() - start
+            self.put(key, Entry(method, None, None, _type_name(type(e)), str(e), seconds))
+            raise
+        seconds = time.perf_counter() - start
+
+        cls = type(response)
+        if not hasattr(cls, "serialize"):
+            print(f"[cassette] {method}: {cls.__name__} is not a proto-plus message; not recorded")
+            return response
+        payload = zlib.compress(cls.serialize(response))
+        self.put(key, Entry(method, _type_name(cls), payload, None, None, seconds))
+        return response
+
+    def replay(self, method: str, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        key = fingerprint(method, args, kwargs)
+        entry = self._lookup(method, key)
+        if self.latency == "recorded" and entry.seconds > 0:
+            time.sleep(entry.seconds)
+        if entry.error_type is not None:
+            raise _rebuild_error(entry.error_type, entry.error_message or "")
+        return _load_type(entry.response_type).deserialize(zlib.decompress(entry.response))
+
+    def _lookup(self, method: str, key: str) -> Entry:
+        entry = self.get(key)
+        if entry is None:
+            self._count("misses")
+            raise CassetteMiss(f"{method} request {key[:12]} is not in cassette {self.path}")
+        self._count("replayed")
+        return entry
+
+    # ----- record / replay one stream -----
+
+    def record_stream(self, method: str, call: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Iterator[Any]:
+        args, kwargs, requests = _split_requests(args, kwargs)
+        sent: List[bytes] = []
+
+        def tee():
+            for request in requests:
+                sent.append(_serialize(request))
+                yield request
+
+        start = time.perf_counter()
+        frames: List[Tuple[float, bytes]] = []
+        response_type: Optional[str] = None
+        error: Optional[Exception] = None
+        finished = False
+        try:
+            for response in call(*args, requests=tee(), **kwargs):
+                cls = type(response)
+                if hasattr(cls, "serialize"):
+                    response_type = _type_name(cls)
+                    frames.append((time.perf_counter() - start, cls.serialize(response)))
+                yield response
+            finished = True
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            # A stream the caller stopped reading early is not stored.
+            if finished or error is not None:
+                self.put(_stream_fingerprint(method, args, kwargs, sent), Entry(
+                    method,
+                    response_type,
+                    zlib.compress(_pack_stream(frames)),
+                    _type_name(type(error)) if error is not None else None,
+                    str(error) if error is not None else None,
+                    time.perf_counter() - start,
+                ))
+
+    def replay_stream(self, method: str, args: tuple, kwargs: Dict[str, Any]) -> Iterator[Any]:
+        args, kwargs, requests = _split_requests(args, kwargs)
+        start = time.perf_counter()
+        sent = [_serialize(request) for request in requests]
+        entry = self._lookup(method, _stream_fingerprint(method, args, kwargs, sent))
+        return self._stream_responses(entry, start)
+
+    def _stream_responses(self, entry: Entry, start: float) -> Iterator[Any]:
+        cls = _load_type(entry.response_type) if entry.response_type else None
+        for offset, data in _unpack_stream(zlib.decompress(entry.response)):
+            if self.latency == "recorded":
+                time.sleep(max(0.0, offset - (time.perf_counter() - start)))
+            yield cls.deserialize(data)
+        if entry.error_type is not None:
+            raise _rebuild_error(entry.error_type, entry.error_message or "")
+
+
+def _rebuild_error(type_name: str, message: str) -> Exception:
+    try:
+        cls = _load_type(type_name)
+        if isinstance(cls, type) and issubclass(cls, Exception):
+            return cls(message)
+    except Exception:
+        pass
+    return RuntimeError(f"{type_name}: {message}")
+
+
+class RecordingClient:
+    """Real client proxy; recorded methods go through `Cassette.record`."""
+
+    def __init__(self, client: Any, cassette: Cassette) -> None:
+        self._client = client
+        self._cassette = cassette
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if name not in RECORDED_METHODS:
+            return attr
+
+        if name in STREAMING_METHODS:
+            def recorded_stream(*args, **kwargs):
+                return self._cassette.record_stream(name, attr, args, kwargs)
+            return recorded_stream
+
+        def recorded(*args, **kwargs):
+            return self._cassette.record(name, attr, args, kwargs)
+        return recorded
+
+
+class ReplayClient:
+    """
+    Client stand-in answering recorded methods from the cassette. It has
+    no `transport`: there is no channel to warm up or close.
+    """
+
+    def __init__(self, cassette: Cassette) -> None:
+        self._cassette = cassette
+
+    def __getattr__(self, name: str) -> Any:
+        if name not in RECORDED_METHODS:
+            raise AttributeError(f"{name} is not available when replaying a cassette")
+
+        if name in STREAMING_METHODS:
+            def replayed_stream(*args, **kwargs):
+                return self._cassette.replay_stream(name, args, kwargs)
+            return replayed_stream
+
+        def replayed(*args, **kwargs):
+            return self._cassette.replay(name, args, kwargs)
+        return replayed
+
+
+# -------------------------------------------------------------------
+# Process-wide cassette
+# -------------------------------------------------------------------
+
+_cassette: Optional[Cassette] = None
+_env_checked = False
+_lock = threading.Lock()
+
+
+def use_cassette(path: Optional[str], mode: str = "replay", latency: str = "recorded") -> Optional[Cassette]:
+    """
+    Record to / replay from `path` for every Vision and STT client built from
+    now on (None turns it off). Shared clients are dropped so they are
+    rebuilt through the cassette; this also removes installed fake backends.
+    """
+    global _cassette, _env_checked
+    with _lock:
+        if _cassette is not None:
+            _cassette.close()
+        _cassette = Cassette(path, mode, latency) if path else None
+        _env_checked = True
+        cassette = _cassette
+
+    from src.aegisai.audio.speech_to_text import set_speech_client_factory
+    from src.aegisai.vision.client import set_vision_client
+
+    set_vision_client(None)
+    set_speech_client_factory(None)
+    if cassette is not None:
+        print(f"[cassette] {cassette.mode} {cassette.path} (latency={cassette.latency})")
+    return cassette
+
+
+def active_cassette() -> Optional[Cassette]:
+    """The cassette set by `use_cassette`, else the one named by AEGIS_CASSETTE."""
+    global _cassette, _env_checked
+    with _lock:
+        if not _env_checked:
+            _env_checked = True
+            path = os.getenv("AEGIS_CASSETTE")
+            if path:
+                _cassette = Cassette(
+                    path,
+                    os.getenv("AEGIS_CASSETTE_MODE", "replay"),
+                    os.getenv("AEGIS_CASSETTE_LATENCY", "recorded"),
+                )
+                print(f"[cassette] {_cassette.mode} {path} (latency={_cassette.latency})")
+        return _cassette
+
+
+def wrap_client(factory: Callable[[], Any]) -> Any:
+    """
+    Build a Google client through the active cassette: the real client when
+    there is none, a recording proxy in record mode, a `ReplayClient` (no
+    real client, no credentials) in replay mode.
+    """
+    cassette = active_cassette()
+    if cassette is None:
+        return factory()
+    if cassette.mode == "replay":
+        return ReplayClient(cassette)
+    return RecordingClient(factory(), cassette)
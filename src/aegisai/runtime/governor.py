@@ -0,0 +1,269 @@
+"""
+Process-wide resource governor.
+
+Every job used to size its own thread pools and start ffmpeg subprocesses
+freely, so a few concurrent uploads oversubscribed CPU, file descriptors
+and cloud quotas. The governor owns named pools shared by everything in
+the process:
+
+* "ffmpeg-decode" – probe / extract / decode subprocesses
+* "ffmpeg-encode" – encode / remux subprocesses
+* "cloud-io"      – concurrent Google STT / Vision requests
+* "memory-mb"     – working-set budget reserved per file job (weighted)
+
+Thread pools keep their sizes; each task acquires "cloud-io" around the
+actual request, so the number of requests in flight is bounded per
+process no matter how many jobs (or pools) are running.
+
+With a lock directory (`AEGIS_GOVERNOR_DIR`) the slot pools are also
+shared across processes (queue workers, shard processes) through one
+lock file per slot. The memory budget is per process.
+
+Limits come from the environment (see `limits_from_env`) and can be
+overridden once at process / worker startup with `configure_governor`;
+jobs never change them, so one job's settings cannot leak into the
+others. `stats()` reports per-pool wait times.
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Mapping, NamedTuple, Optional
+
+from src.aegisai.runtime import metrics, tracing
+
+try:
+    import fcntl
+except ImportError:   # Windows: no cross-process slots
+    fcntl = None
+
+FFMPEG_DECODE = "ffmpeg-decode"
+FFMPEG_ENCODE = "ffmpeg-encode"
+CLOUD_IO = "cloud-io"
+MEMORY_MB = "memory-mb"
+
+POOLS = (FFMPEG_DECODE, FFMPEG_ENCODE, CLOUD_IO, MEMORY_MB)
+SLOT_POOLS = (FFMPEG_DECODE, FFMPEG_ENCODE, CLOUD_IO)
+
+_ENV_LIMITS = {
+    FFMPEG_DECODE: "AEGIS_FFMPEG_DECODE_SLOTS",
+    FFMPEG_ENCODE: "AEGIS_FFMPEG_ENCODE_SLOTS",
+    CLOUD_IO: "AEGIS_CLOUD_IO_SLOTS",
+    MEMORY_MB: "AEGIS_MEMORY_BUDGET_MB",
+}
+
+LOCK_POLL_SECONDS = 0.05
+
+
+def default_limits() -> Dict[str, int]:
+    cpus = os.cpu_count() or 1
+    return {
+        FFMPEG_DECODE: max(2, cpus // 2),
+        FFMPEG_ENCODE: max(1, cpus // 4),
+        CLOUD_IO: 32,
+        MEMORY_MB: 0,   # 0 = unlimited
+    }
+
+
+def limits_from_env() -> Dict[str, int]:
+    limits = default_limits()
+    for pool, var in _ENV_LIMITS.items():
+        value = os.getenv(var)
+        if value:
+            limits[pool] = int(value)
+    return limits
+
+
+class PoolStats(NamedTuple):
+    name: str
+    limit: int            # 0 = unlimited
+    in_use: int
+    acquired: int         # completed acquisitions
+    waited: int           # ... of which had to wait
+    total_wait: float     # seconds
+    max_wait: float
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.acquired if self.acquired else 0.0
+
+
+class _Pool:
+    def __init__(self, name: str, limit: int) -> None:
+        self.name = name
+        self.limit = limit
+        self.in_use = 0
+        self.cond = threading.Condition()
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def take(self, amount: int, timeout: Optional[float]) -> int:
+        """Wait for `amount` units; returns the units actually held."""
+        with self.cond:
+            if self.limit > 0:
+                amount = min(amount, self.limit)   # a request above the limit runs alone
+                ok = self.cond.wait_for(lambda: self.in_use + amount <= self.limit, timeout)
+                if not ok:
+                    raise TimeoutError(f"Timed out waiting for {amount} of {self.name!r}")
+            self.in_use += amount
+            return amount
+
+    def give(self, amount: int) -> None:
+        with self.cond:
+            self.in_use -= amount
+            self.cond.notify_all()
+
+    def record(self, wait: float) -> None:
+        with self.cond:
+            self.acquired += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            if wait > 0.001:
+                self.waited += 1
+
+    def stats(self) -> PoolStats:
+        with self.cond:
+            return PoolStats(self.name, self.limit, self.in_use, self.acquired,
+                             self.waited, self.total_wait, self.max_wait)
+
+
+class ResourceGovernor:
+    """
+    Named counting pools. `acquire(pool, amount)` is a context manager that
+    blocks until the pool has room; unknown pool names raise ValueError.
+    """
+
+    def __init__(self, limits: Optional[Mapping[str, int]] = None, lock_dir: Optional[str] = None) -> None:
+        merged = default_limits()
+        merged.update(limits or {})
+        self._pools: Dict[str, _Pool] = {name: _Pool(name, int(limit)) for name, limit in merged.items()}
+        self.lock_dir = lock_dir if fcntl is not None else None
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def configure(self, limits: Mapping[str, int]) -> None:
+        """Change limits in place; waiters re-check against the new limit."""
+        for name, limit in limits.items():
+            pool = self._pool(name)
+            with pool.cond:
+                pool.limit = int(limit)
+                pool.cond.notify_all()
+
+    def _pool(self, name: str) -> _Pool:
+        try:
+            return self._pools[name]
+        except KeyError:
+            raise ValueError(f"Unknown resource pool: {name!r}") from None
+
+    def _lock_slot(self, pool: _Pool, deadline: Optional[float]) -> Optional[int]:
+        """Hold one of the pool's slot files (cross-process); returns its fd."""
+        if not self.lock_dir or pool.name not in SLOT_POOLS or pool.limit <= 0:
+            return None
+        paths: List[str] = [os.path.join(self.lock_dir, f"{pool.name}.{i}.lock") for i in range(pool.limit)]
+        while True:
+            for path in paths:
+                fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return fd
+                except OSError:
+                    os.close(fd)
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out waiting for a {pool.name!r} slot")
+            time.sleep(LOCK_POLL_SECONDS)
+
+    @contextmanager
+    def acquire(self, name: str, amount: int = 1, timeout: Optional[float] = None) -> Iterator[None]:
+        pool = self._pool(name)
+        start = time.monotonic()
+        held = pool.take(amount, timeout)
+        fd = None
+        try:
+            deadline = start + timeout if timeout is not None else None
+            fd = self._lock_slot(pool, deadline)
+            pool.record(time.monotonic() - start)
+            yield
+        finally:
+            if fd is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+            pool.give(held)
+
+    def run(self, cmd: List[str], pool: str = FFMPEG_ENCODE, **kwargs: Any) -> subprocess.CompletedProcess:
+        """
+        `subprocess.run(cmd, **kwargs)` while holding one `pool` slot,
+        traced as a "subprocess" span (slot wait, exit code, output size).
+        """
+        name = os.path.basename(str(cmd[0]))
+        with tracing.span(name, "subprocess", pool=pool) as sp:
+            start = time.perf_counter()
+            with self.acquire(pool):
+                started = time.perf_counter()
+                sp.set("wait_seconds", round(started - start, 4))
+                try:
+                    proc = subprocess.run(cmd, **kwargs)
+                finally:
+                    metrics.SUBPROCESS_SECONDS.observe(time.perf_counter() - started, command=name, pool=pool)
+            sp.set("returncode", proc.returncode)
+            # ffmpeg takes the output file as its last argument.
+            if tracing.tracing_enabled() and name.startswith("ffmpeg") and os.path.isfile(str(cmd[-1])):
+                sp.add("bytes_out", os.path.getsize(str(cmd[-1])))
+            return proc
+
+    def stats(self) -> Dict[str, PoolStats]:
+        return {name: pool.stats() for name, pool in self._pools.items()}
+
+
+_GOVERNOR: Optional[ResourceGovernor] = None
+_GOVERNOR_LOCK = threading.Lock()
+
+
+def get_governor() -> ResourceGovernor:
+    """The process-wide governor, created from the environment on first use."""
+    global _GOVERNOR
+    if _GOVERNOR is None:
+        with _GOVERNOR_LOCK:
+            if _GOVERNOR is None:
+                _GOVERNOR = ResourceGovernor(limits_from_env(), lock_dir=os.getenv("AEGIS_GOVERNOR_DIR") or None)
+    return _GOVERNOR
+
+
+def configure_governor(limits: Optional[Mapping[str, int]] = None) -> ResourceGovernor:
+    """
+    Apply limit overrides to the global governor. Call once at process /
+    worker startup: the pools are shared by every job in the process.
+    """
+    governor = get_governor()
+    if limits:
+        governor.configure(limits)
+    return governor
+
+
+def governed_run(cmd: List[str], pool: str = FFMPEG_ENCODE, **kwargs: Any) -> subprocess.CompletedProcess:
+    """`subprocess.run` under a slot of the global governor."""
+    return get_governor().run(cmd, pool, **kwargs)
+
+
+_IN_USE = metrics.get_registry().gauge(
+    "aegis_resource_in_use", "Units held per governor pool (running ffmpeg processes, cloud requests, MB)", ("pool",),
+)
+_IN_USE.set_function(lambda: {(s.name,): s.in_use for s in get_governor().stats().values()})
+_LIMIT = metrics.get_registry().gauge("aegis_resource_limit", "Governor pool limit (0 = unlimited)", ("pool",))
+_LIMIT.set_function(lambda: {(s.name,): s.limit for s in get_governor().stats().values()})
+_WAIT = metrics.get_registry().gauge(
+    "aegis_resource_wait_seconds", "Total time spent waiting for governor pools since start", ("pool",),
+)
+_WAIT.set_function(lambda: {(s.name,): s.total_wait for s in get_governor().stats().values()})
+
+
+def format_stats(stats: Mapping[str, PoolStats]) -> str:
+    return "\n".join(
+        f"{s.name:<14} limit={s.limit or '-':<4} in_use={s.in_use:<3} acquired={s.acquired:<6} "
+        f"waited={s.waited:<5} mean_wait={s.mean_wait * 1000:7.1f}ms max_wait={s.max_wait * 1000:7.1f}ms"
+        for s in stats.values()
+    )
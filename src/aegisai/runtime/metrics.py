@@ -0,0 +1,326 @@
+"""
+Process-wide metrics registry (counters, gauges, fixed-bucket histograms)
+with Prometheus text exposition.
+
+Every metric keeps one value (or one bucket array) per label set, so
+memory does not grow with traffic. Percentiles are estimated from the
+buckets, the way Prometheus' `histogram_quantile` does.
+
+    FRAMES = get_registry().counter("aegis_frames_analyzed_total", "Frames sent to SafeSearch")
+    FRAMES.inc()
+    API_SECONDS.observe(0.42, api="stt.recognize")
+    with API_SECONDS.time(api="vision.safe_search"):
+        ...
+    get_registry().render()   # text for GET /metrics
+
+Gauges can also be computed when scraped (`set_function`), e.g. governor
+slots in use. Worker processes that run outside the API can expose their
+own registry with `serve_metrics(port)`.
+"""
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds: 5 ms .. 5 min.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Mapping[str, str]) -> LabelKey:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _labels(self, key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, key))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """(suffix, rendered labels, value) rows for the exposition."""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{self.name}{suffix}{labels} {_format_value(value)}" for suffix, labels, value in self.samples()]
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("Counters only go up")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def values(self) -> Dict[LabelKey, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        return [("", self._labels(k), v) for k, v in sorted(self.values().items())]
+
+
+class Gauge(_Metric):
+    """Current value per label set, set directly or computed at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+        self._fn: Optional[Callable[[], Mapping[LabelKey, float]]] = None
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], Mapping[LabelKey, float]]) -> None:
+        """Compute the values on every scrape: `fn() -> {label_values_tuple: value}`."""
+        self._fn = fn
+
+    def values(self) -> Dict[LabelKey, float]:
+        if self._fn is not None:
+            try:
+                return {tuple(str(v) for v in k): float(val) for k, val in self._fn().items()}
+            except Exception as e:
+                print(f"[metrics] {self.name} callback failed: {e}")
+                return {}
+        with self._lock:
+            return dict(self._values)
+
+    def value(self, **labels: str) -> float:
+        return self.values().get(self._key(labels), 0)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        return [("", self._labels(k), v) for k, v in sorted(self.values().items())]
+
+
+class _Buckets:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, n: int) -> None:
+        self.counts = [0] * n      # per bucket, not cumulative; last = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    """Fixed buckets per label set: count, sum and per-bucket counts."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        self._series: Dict[LabelKey, _Buckets] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Buckets(len(self.buckets) + 1)
+            series.counts[idx] += 1
+            series.sum += value
+            series.count += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels: str) -> Tuple[List[int], float, int]:
+        """(per-bucket counts, sum, count) for one label set."""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            if series is None:
+                return [0] * (len(self.buckets) + 1), 0.0, 0
+            return list(series.counts), series.sum, series.count
+
+    def quantile(self, q: float, **labels: str) -> float:
+        """Bucket-interpolated estimate (0.0 without observations)."""
+        counts, _, total = self.snapshot(**labels)
+        if total == 0:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for i, c in enumerate(counts):
+            if c and seen + c >= rank:
+                if i == len(self.buckets):        # +Inf bucket: best bound we have
+                    return self.buckets[-1] if self.buckets else 0.0
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / c
+            seen += c
+        return self.buckets[-1] if self.buckets else 0.0
+
+    def label_sets(self) -> List[LabelKey]:
+        with self._lock:
+            return sorted(self._series)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            series = {k: (list(s.counts), s.sum, s.count) for k, s in self._series.items()}
+        rows: List[Tuple[str, str, float]] = []
+        for key in sorted(series):
+            counts, total_sum, count = series[key]
+            cumulative = 0
+            for bound, c in zip(self.buckets + (math.inf,), counts):
+                cumulative += c
+                rows.append(("_bucket", self._labels(key, ("le", _format_value(bound))), cumulative))
+            rows.append(("_sum", self._labels(key), total_sum))
+            rows.append(("_count", self._labels(key), count))
+        return rows
+
+
+class MetricsRegistry:
+    """Named metrics; `counter` / `gauge` / `histogram` return the existing one if registered."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name!r} already registered as {metric.kind} {metric.labelnames}")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Prometheus text format (version 0.0.4)."""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        return "\n".join(m.render() for m in metrics) + "\n"
+
+
+_REGISTRY = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    return _REGISTRY
+
+
+def serve_metrics(port: int, registry: Optional[MetricsRegistry] = None, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve `GET /metrics` for `registry` from a daemon thread (for worker processes)."""
+    registry = registry or _REGISTRY
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+# -------------------------------------------------------------------
+# Pipeline metrics (shared names, registered once per process)
+# -------------------------------------------------------------------
+
+API_SECONDS = _REGISTRY.histogram(
+    "aegis_api_request_seconds", "Latency of one Google STT / Vision request", ("api",),
+)
+API_ERRORS = _REGISTRY.counter(
+    "aegis_api_errors_total", "Google STT / Vision requests that raised", ("api",),
+)
+FRAMES_ANALYZED = _REGISTRY.counter(
+    "aegis_frames_analyzed_total", "Video frames run through SafeSearch / label moderation",
+)
+CHUNKS_TRANSCRIBED = _REGISTRY.counter(
+    "aegis_audio_chunks_transcribed_total", "Audio chunks transcribed (file pipeline)",
+)
+SUBPROCESS_SECONDS = _REGISTRY.histogram(
+    "aegis_subprocess_seconds", "ffmpeg / ffprobe subprocess run time (slot held)", ("command", "pool"),
+)
+STAGE_SECONDS = _REGISTRY.histogram(
+    "aegis_stage_seconds", "Duration of one file-job stage", ("stage",),
+)
+FILE_JOBS = _REGISTRY.counter(
+    "aegis_file_jobs_total", "File jobs by graph template and outcome", ("template", "status"),
+)
+RENDER_RATIO = _REGISTRY.histogram(
+    "aegis_render_seconds_per_media_second", "Blur / mute render time per second of media", ("template",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0),
+)
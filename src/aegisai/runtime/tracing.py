@@ -0,0 +1,398 @@
+"""
+Nestable spans for job timing (job -> stage -> frame / chunk / subprocess).
+
+    with span("file_job", "job", media_type="video") as job:
+        with span("analyze_video", "stage"):
+            with span("frame", "vision", ts=1.5):
+                add("api_calls")
+
+A span records start / end, the thread it ran on, free-form attributes
+and counters (`add("api_calls")`, `add("bytes_out", n)`). A span opened
+outside any other span starts a new trace; spans opened inside it (also
+in pool threads, see `bind`) belong to that trace. Work handed to another
+process joins the trace through `trace_context()`:
+
+    ctx = trace_context()                       # in the parent job
+    with span("analyze_shard", "job", context=ctx):   # in the worker process
+        ...
+
+Tracing is off unless `AEGIS_TRACE_DIR` is set or `enable_tracing()` is
+called. While off, `span()` returns a shared no-op object and `traced`
+functions cost one flag check.
+
+Only jobs are written: when a root span of category "job" ends and an
+output directory is configured (a root span of any other category, e.g.
+a `traced` helper called outside a job, is dropped), the trace is
+written as `<name>-<time>-<id>.trace.json` (Chrome trace format: open in
+chrome://tracing or https://ui.perfetto.dev) and `.otlp.json` (OTLP/JSON
+`ExportTraceServiceRequest`, accepted by OpenTelemetry collectors).
+Each process writes its own part of a cross-process trace
+(`<name>-<time>-<id>-<part>`); the parts share the trace id.
+"""
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.aegisai.runtime import metrics
+
+SERVICE_NAME = "aegisai"
+ROOT_CATEGORY = "job"   # root spans of this category are written as traces
+
+_enabled = False
+_out_dir: Optional[str] = None
+_current: ContextVar[Optional["Span"]] = ContextVar("aegis_span", default=None)
+
+
+def enable_tracing(out_dir: Optional[str] = None) -> None:
+    """Start recording spans; with `out_dir`, write every finished trace there."""
+    global _enabled, _out_dir
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    _out_dir = out_dir
+    _enabled = True
+
+
+def disable_tracing() -> None:
+    global _enabled, _out_dir
+    _enabled = False
+    _out_dir = None
+
+
+def tracing_enabled() -> bool:
+    return _enabled
+
+
+class Trace:
+    """Finished spans of one root span, exportable as Chrome / OTLP JSON."""
+
+    def __init__(self, name: str, trace_id: Optional[str] = None) -> None:
+        self.name = name
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.spans: List[Span] = []
+        self.lock = threading.Lock()
+
+    def _record(self, span: "Span") -> None:
+        with self.lock:
+            self.spans.append(span)
+
+    def _origin_ns(self) -> int:
+        return min((s.start_ns for s in self.spans), default=0)
+
+    def to_chrome(self) -> Dict[str, Any]:
+        pid = os.getpid()
+        t0 = self._origin_ns()
+        events: List[Dict[str, Any]] = []
+        threads: Dict[int, str] = {}
+        for s in sorted(self.spans, key=lambda s: s.start_ns):
+            threads[s.thread_id] = s.thread_name
+            args = dict(s.attrs)
+            if s.error:
+                args["error"] = s.error
+            events.append({
+                "name": s.name,
+                "cat": s.cat or "default",
+                "ph": "X",
+                "ts": (s.start_ns - t0) / 1000.0,
+                "dur": (s.end_ns - s.start_ns) / 1000.0,
+                "pid": pid,
+                "tid": s.thread_id,
+                "args": args,
+            })
+        for tid, tname in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}})
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"trace_id": self.trace_id}}
+
+    def to_otlp(self) -> Dict[str, Any]:
+        spans = []
+        for s in self.spans:
+            attrs = dict(s.attrs, **{"aegis.category": s.cat, "thread.id": s.thread_id, "thread.name": s.thread_name})
+            item = {
+                "traceId": self.trace_id,
+                "spanId": s.span_id,
+                "name": s.name,
+                "kind": 1,   # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(s.wall_ns),
+                "endTimeUnixNano": str(s.wall_ns + s.end_ns - s.start_ns),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in attrs.items()],
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+            }
+            if s.parent_id:
+                item["parentSpanId"] = s.parent_id
+            spans.append(item)
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": SERVICE_NAME}},
+                    {"key": "process.pid", "value": {"intValue": str(os.getpid())}},
+                ]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }]
+        }
+
+    def summary(self) -> Dict[Tuple[str, str], Dict[str, float]]:
+        """Per (category, name): count, total seconds and summed counters."""
+        out: Dict[Tuple[str, str], Dict[str, float]] = {}
+        for s in self.spans:
+            row = out.setdefault((s.cat, s.name), {"count": 0, "seconds": 0.0})
+            row["count"] += 1
+            row["seconds"] += s.seconds
+            for k, v in s.attrs.items():
+                if k in s.counters:
+                    row[k] = row.get(k, 0) + v
+        return out
+
+    def write(self, out_dir: str, part: Optional[str] = None) -> Tuple[str, str]:
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        base = os.path.join(out_dir, f"{self.name}-{stamp}-{self.trace_id[:8]}")
+        if part:
+            base += f"-{part}"
+        with open(base + ".trace.json", "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome(), f)
+        with open(base + ".otlp.json", "w", encoding="utf-8") as f:
+            json.dump(self.to_otlp(), f)
+        return base + ".trace.json", base + ".otlp.json"
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """One timed operation; use as a context manager (see `span`)."""
+
+    __slots__ = ("name", "cat", "trace", "span_id", "parent_id", "root", "attrs", "counters",
+                 "start_ns", "end_ns", "wall_ns", "thread_id", "thread_name", "error", "_token")
+
+    def __init__(
+        self,
+        name: str,
+        cat: str,
+        parent: Optional["Span"],
+        attrs: Dict[str, Any],
+        context: Optional[Tuple[str, str, Optional[str]]] = None,
+    ) -> None:
+        self.name = name
+        self.cat = cat
+        self.span_id = os.urandom(8).hex()
+        # Root of this process's part of the trace (maybe under a remote parent).
+        self.root = parent is None
+        if parent is not None:
+            self.trace = parent.trace
+            self.parent_id = parent.span_id
+        elif context is not None:
+            self.trace = Trace(name, trace_id=context[0])
+            self.parent_id = context[1]
+        else:
+            self.trace = Trace(name)
+            self.parent_id = None
+        self.attrs = attrs
+        self.counters: set = set()
+        self.start_ns = self.end_ns = self.wall_ns = 0
+        self.thread_id = 0
+        self.thread_name = ""
+        self.error: Optional[str] = None
+        self._token = None
+
+    @property
+    def seconds(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def set(self, key: str, value: Any) -> None:
+        self.attrs[key] = value
+
+    def add(self, key: str, n: float = 1) -> None:
+        """Thread-safe counter on this span (API calls, bytes, ...)."""
+        with self.trace.lock:
+            self.attrs[key] = self.attrs.get(key, 0) + n
+            self.counters.add(key)
+
+    def __enter__(self) -> "Span":
+        self.thread_id = threading.get_native_id()
+        self.thread_name = threading.current_thread().name
+        self._token = _current.set(self)
+        self.wall_ns = time.time_ns()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end_ns = time.perf_counter_ns()
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current.reset(self._token)
+        self.trace._record(self)
+        if self.root and self.cat == ROOT_CATEGORY and _out_dir:
+            try:
+                # A part of a cross-process trace is named after its own root.
+                chrome, _ = self.trace.write(_out_dir, part=self.span_id[:8] if self.parent_id else None)
+                print(f"[tracing] {self.name}: {len(self.trace.spans)} spans -> {chrome}")
+            except OSError as e:
+                print(f"[tracing] Could not write trace for {self.name}: {e}")
+        return False
+
+
+class _NoopSpan:
+    """Returned while tracing is off (or outside any span for `current_span`)."""
+
+    __slots__ = ()
+    name = ""
+    trace = None
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def add(self, key: str, n: float = 1) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, cat: str = "", context: Optional[Tuple[str, str, Optional[str]]] = None, **attrs: Any):
+    """
+    Context manager timing one operation, nested under the current span.
+    With the `context` of a span in another process (`trace_context()`),
+    a span opened outside any other span joins that trace, and tracing is
+    switched on here if the other process had it on.
+    """
+    if context is not None and not _enabled:
+        enable_tracing(context[2])
+    if not _enabled:
+        return NOOP_SPAN
+    return Span(name, cat, _current.get(), attrs, context)
+
+
+def trace_context() -> Optional[Tuple[str, str, Optional[str]]]:
+    """
+    (trace id, span id, output dir) of the current span, for `span(...,
+    context=...)` in a worker process; None when not tracing. Picklable.
+    """
+    if not _enabled:
+        return None
+    s = _current.get()
+    if s is None:
+        return None
+    return (s.trace.trace_id, s.span_id, _out_dir)
+
+
+def current_span():
+    """The innermost open span of this thread / context (no-op if none)."""
+    if not _enabled:
+        return NOOP_SPAN
+    return _current.get() or NOOP_SPAN
+
+
+def add(key: str, n: float = 1) -> None:
+    """Add to a counter on the current span."""
+    if _enabled:
+        s = _current.get()
+        if s is not None:
+            s.add(key, n)
+
+
+class _ApiCall:
+    """Latency metric for one cloud request, plus its span when tracing is on."""
+
+    __slots__ = ("api", "span", "start")
+
+    def __init__(self, api: str, span: Optional[Span]) -> None:
+        self.api = api
+        self.span = span
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self.span.__enter__() if self.span is not None else NOOP_SPAN
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        metrics.API_SECONDS.observe(time.perf_counter() - self.start, api=self.api)
+        if exc is not None:
+            metrics.API_ERRORS.inc(api=self.api)
+        if self.span is not None:
+            self.span.__exit__(exc_type, exc, tb)
+        return False
+
+
+def api_call(name: str, bytes_sent: int = 0) -> _ApiCall:
+    """
+    Instrument one cloud request: always observed in the
+    `aegis_api_request_seconds{api=name}` histogram (`runtime.metrics`);
+    with tracing on, also a "cloud" span that counts `api_calls` and
+    `bytes_sent` on the enclosing span (the frame / chunk).
+    """
+    if not _enabled:
+        return _ApiCall(name, None)
+    parent = _current.get()
+    if parent is not None:
+        parent.add("api_calls")
+        parent.add("bytes_sent", bytes_sent)
+    return _ApiCall(name, Span(name, "cloud", parent, {"bytes_sent": bytes_sent}))
+
+
+def bind(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    `fn` run under the span current at bind time. Use for callables handed
+    to thread pools / threads, which do not inherit the caller's span.
+    """
+    if not _enabled:
+        return fn
+    parent = _current.get()
+    if parent is None:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _current.set(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+
+    return wrapper
+
+
+def traced(name: Optional[str] = None, cat: str = ""):
+    """Decorator: run every call of the function in a span."""
+    def decorate(fn: Callable[..., Any]) -> Callable[..., Any]:
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with Span(label, cat, _current.get(), {}):
+                return fn(*args, **kwargs)
+
+        return wrapper
+    return decorate
+
+
+def format_summary(trace: Trace) -> str:
+    """One log line per (category, name), slowest first."""
+    rows = sorted(trace.summary().items(), key=lambda kv: -kv[1]["seconds"])
+    lines = []
+    for (cat, name), row in rows:
+        extra = " ".join(f"{k}={v:g}" for k, v in row.items() if k not in ("count", "seconds"))
+        lines.append(f"{cat or '-':<10} {name:<28} n={row['count']:<5} total={row['seconds']:8.3f}s {extra}".rstrip())
+    return "\n".join(lines)
+
+
+if os.getenv("AEGIS_TRACE_DIR"):
+    enable_tracing(os.environ["AEGIS_TRACE_DIR"])
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-import subprocess
 from typing import Sequence, Tuple, List, Optional
 import cv2
 import numpy as np
 
+from src.aegisai.runtime.governor import FFMPEG_ENCODE, governed_run
+from src.aegisai.runtime.tracing import traced
+
 Interval = Tuple[float, float]
 Box = Tuple[int, int, int, int]  # (x1, y1, x2, y2)
 
@@ -129,6 +131,7 @@ def blur_full_frame(
     return blurred
 
 
+@traced(cat="ffmpeg")
 def blur_and_mute_intervals_in_video(
     video_path: str,
     blur_intervals: Sequence[Interval],
@@ -150,8 +153,9 @@ def blur_and_mute_intervals_in_video(
 
     # If nothing to do, just remux
     if not has_video_filter and not has_audio_filter:
-        subprocess.run(
+        governed_run(
             ["ffmpeg", "-y", "-i", video_path, "-c", "copy", output_video_path],
+            FFMPEG_ENCODE,
             check=True,
         )
         return
@@ -223,28 +227,33 @@ def blur_and_mute_intervals_in_video(
 
     cmd.append(output_video_path)
 
-    subprocess.run(cmd, check=True)
+    governed_run(cmd, FFMPEG_ENCODE, check=True)
 
 
+@traced(cat="ffmpeg")
 def mute_intervals_in_video(
     video_path: str,
     mute_intervals: List[Interval],
     output_video_path: str,
+    reencode_when_empty: bool = False,
 ) -> None:
     """
     Apply muting to the audio track of `video_path` for all given intervals.
-    If `mute_intervals` is empty, the input is simply copied to `output_video_path`.
+    If `mute_intervals` is empty, the input is simply copied to `output_video_path`
+    (unless `reencode_when_empty`: the audio still goes through the encoder,
+    so sharded outputs all share one audio format).
     """
     # No muting needed: just copy/remux
-    if not mute_intervals:
-        subprocess.run(
+    if not mute_intervals and not reencode_when_empty:
+        governed_run(
             ["ffmpeg", "-y", "-i", video_path, "-c", "copy", output_video_path],
+            FFMPEG_ENCODE,
             check=True,
         )
         return
 
     # Build volume filter string to mute all intervals
-    af_filter = _build_volume_mute_filter(mute_intervals)
+    af_filter = _build_volume_mute_filter(mute_intervals) if mute_intervals else "anull"
     
     is_webm = output_video_path.lower().endswith(".webm")
 
@@ -266,10 +275,11 @@ def mute_intervals_in_video(
 
     cmd_mute.append(output_video_path)
 
-    subprocess.run(cmd_mute, check=True)
+    governed_run(cmd_mute, FFMPEG_ENCODE, check=True)
 
 
 
+@traced(cat="ffmpeg")
 def blur_intervals_in_video(
     video_path: str,
     blur_intervals: Sequence[Interval],
@@ -285,8 +295,9 @@ def blur_intervals_in_video(
     """
     # No blur needed: just copy/remux
     if not blur_intervals:
-        subprocess.run(
+        governed_run(
             ["ffmpeg", "-y", "-i", video_path, "-c", "copy", output_video_path],
+            FFMPEG_ENCODE,
             check=True,
         )
         return
@@ -321,7 +332,7 @@ def blur_intervals_in_video(
 
     cmd.append(output_video_path)
 
-    subprocess.run(cmd, check=True)
+    governed_run(cmd, FFMPEG_ENCODE, check=True)
 
 
 
@@ -4,12 +4,13 @@ FFmpeg integration helpers for extracting frames from video sources.
 
 from __future__ import annotations
 
-import subprocess
 import shutil
 from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Optional
 
+from src.aegisai.runtime.governor import FFMPEG_DECODE, governed_run
+
 
 class FFmpegFrameExtractionError(RuntimeError):
     """Raised when FFmpeg fails to extract frames."""
@@ -150,8 +151,9 @@ class FFmpegFrameExtractor:
             ]
         )
 
-        process = subprocess.run(
+        process = governed_run(
             cmd,
+            FFMPEG_DECODE,
             capture_output=True,
             text=True,
             check=False,
@@ -14,6 +14,8 @@ from src.aegisai.vision.safe_search import (
 )
 from src.aegisai.vision.vision_rules import intervals_from_frames
 from src.aegisai.audio.intervals import merge_intervals  # or video.merge_intervals
+from src.aegisai.moderation.policy import PolicyLike, resolve_policy
+from src.aegisai.runtime import tracing
 
 Interval = Tuple[float, float]
 
@@ -47,9 +49,11 @@ class VideoStreamFilter:
         self,
         sample_fps: float = 1.0,
         num_workers: int = 20,
+        policy: PolicyLike = None,
     ) -> None:
         self.sample_fps = sample_fps
         self.num_workers = num_workers
+        self.policy = resolve_policy(policy)
 
         self.job_q: "queue.Queue[Optional[VideoJob]]" = queue.Queue()
         self.result_q: "queue.Queue[VideoResult]" = queue.Queue()
@@ -63,7 +67,7 @@ class VideoStreamFilter:
     def _start_workers(self) -> None:
         for i in range(self.num_workers):
             t = threading.Thread(
-                target=self._worker_loop,
+                target=tracing.bind(self._worker_loop),
                 name=f"VideoStreamWorker-{i}",
                 daemon=True,
             )
@@ -115,11 +119,11 @@ class VideoStreamFilter:
             results: List[FrameModerationResult] = []
 
             def _moderate_one(frame_path: str, ts_local: float) -> FrameModerationResult:
-                return analyze_frame_moderation(frame_path, timestamp=ts_local)
+                return analyze_frame_moderation(frame_path, timestamp=ts_local, policy=self.policy)
 
             with ThreadPoolExecutor(max_workers=max_workers) as executor:
                 futures = [
-                    executor.submit(_moderate_one, frame_path, ts)
+                    executor.submit(tracing.bind(_moderate_one), frame_path, ts)
                     for (frame_path, ts) in frames
                 ]
                 for fut in futures:
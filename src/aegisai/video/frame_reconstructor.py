@@ -5,7 +5,6 @@ Frame reconstruction pipeline with region-level censoring effects.
 from __future__ import annotations
 
 import shutil
-import subprocess
 import tempfile
 from dataclasses import dataclass, field
 from enum import Enum
@@ -14,6 +13,8 @@ from typing import Iterable, List, Sequence
 
 from PIL import Image, ImageFilter
 
+from src.aegisai.runtime.governor import FFMPEG_ENCODE, governed_run
+
 
 class ReconstructionError(RuntimeError):
     """Raised when frame reconstruction fails."""
@@ -139,7 +140,7 @@ class FrameReconstructionPipeline:
                 ]
             )
 
-            process = subprocess.run(cmd, capture_output=True, text=True, check=False)
+            process = governed_run(cmd, FFMPEG_ENCODE, capture_output=True, text=True, check=False)
             if process.returncode != 0:
                 raise ReconstructionError(
                     f"FFmpeg reconstruction failed: {process.stderr.strip()}"
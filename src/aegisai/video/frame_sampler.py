@@ -9,6 +9,7 @@ from pathlib import Path
 from typing import List, Tuple
 
 from src.aegisai.video.ffmpeg_extractor import FFmpegFrameExtractor
+from src.aegisai.runtime.tracing import traced
 
 
 @dataclass(frozen=True)
@@ -85,6 +86,7 @@ class FrameSampler:
 FrameInfo = Tuple[str, float]  # (frame_path, timestamp_seconds)
 
 
+@traced(cat="ffmpeg")
 def extract_sampled_frames_from_file(
     video_path: str | Path,
     output_dir: str | Path,
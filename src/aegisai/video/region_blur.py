@@ -2,7 +2,6 @@ from __future__ import annotations
 
 import os
 import shutil
-import subprocess
 import tempfile
 from collections import defaultdict
 from dataclasses import dataclass, field
@@ -13,6 +12,7 @@ import cv2
 import numpy as np
 
 from src.aegisai.video.ffmpeg_edit import blur_boxes_in_frame
+from src.aegisai.runtime.governor import FFMPEG_ENCODE, governed_run
 
 Interval = Tuple[float, float]
 Box = Tuple[int, int, int, int]
@@ -597,6 +597,6 @@ def blur_moving_objects_with_intervals(
             "-shortest",
             str(output_video_path),
         ]
-        subprocess.run(cmd, check=True)
+        governed_run(cmd, FFMPEG_ENCODE, check=True)
         
         print(f"[region_blur] Processed {frame_idx} frames, output: {output_video_path}")
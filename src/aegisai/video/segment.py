@@ -3,7 +3,11 @@ import glob
 import subprocess
 from typing import List
 
+from src.aegisai.runtime.governor import FFMPEG_DECODE, governed_run
+from src.aegisai.runtime.tracing import traced
 
+
+@traced(cat="ffmpeg")
 def extract_audio_chunks_from_video(
     video_path: str,
     output_dir: str,
@@ -37,8 +41,9 @@ def extract_audio_chunks_from_video(
     ]
 
     try:
-        subprocess.run(
+        governed_run(
             cmd,
+            FFMPEG_DECODE,
             check=True,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
@@ -53,6 +58,7 @@ def extract_audio_chunks_from_video(
 
 
 
+@traced(cat="ffmpeg")
 def extract_audio_track(video_path: str, audio_out_path: str) -> None:
     """
     Extract audio track from a video file into a standalone audio file.
@@ -84,7 +90,7 @@ def extract_audio_track(video_path: str, audio_out_path: str) -> None:
         video_path
     ]
     try:
-        result = subprocess.run(probe_cmd, capture_output=True, text=True, check=True, encoding="utf-8", errors="replace")
+        result = governed_run(probe_cmd, FFMPEG_DECODE, capture_output=True, text=True, check=True, encoding="utf-8", errors="replace")
         if not result.stdout.strip():
             # No audio stream, create silent audio
             print("No audio stream found, creating silent audio track.")
@@ -96,7 +102,7 @@ def extract_audio_track(video_path: str, audio_out_path: str) -> None:
                 "-of", "default=noprint_wrappers=1:nokey=1",
                 video_path
             ]
-            duration_res = subprocess.run(duration_cmd, capture_output=True, text=True, check=True, encoding="utf-8", errors="replace")
+            duration_res = governed_run(duration_cmd, FFMPEG_DECODE, capture_output=True, text=True, check=True, encoding="utf-8", errors="replace")
             duration = duration_res.stdout.strip()
 
             cmd = [
@@ -110,9 +116,10 @@ def extract_audio_track(video_path: str, audio_out_path: str) -> None:
     except Exception as e:
         print(f"Error probing video: {e}")
 
-    subprocess.run(cmd, check=True)
+    governed_run(cmd, FFMPEG_DECODE, check=True)
 
 
+@traced(cat="ffmpeg")
 def extract_subtitles_from_video(video_path: str, output_path: str) -> bool:
     """
     Extract the first available subtitle stream from `video_path` to `output_path`.
@@ -130,8 +137,9 @@ def extract_subtitles_from_video(video_path: str, output_path: str) -> bool:
     ]
 
     try:
-        subprocess.run(
+        governed_run(
             cmd,
+            FFMPEG_DECODE,
             check=True,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
@@ -0,0 +1,38 @@
+"""
+Shared Google Vision client.
+
+`ImageAnnotatorClient` is thread-safe and owns a gRPC channel, so one
+instance is reused by SafeSearch, label detection and object localization
+instead of building a client (and a connection) per frame.
+
+`set_vision_client(client)` installs any object with the same methods
+(`safe_search_detection`, `label_detection`, `object_localization`), e.g.
+the fake backends in `benchmarks/fakes.py`; `set_vision_client(None)`
+goes back to the real client. With a record / replay cassette
+(`runtime.cassette`) the client is built through it.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Optional
+
+from google.cloud import vision
+
+from src.aegisai.runtime.cassette import wrap_client
+
+_client: Optional[Any] = None
+_lock = threading.Lock()
+
+
+def get_vision_client() -> Any:
+    global _client
+    with _lock:
+        if _client is None:
+            _client = wrap_client(vision.ImageAnnotatorClient)
+        return _client
+
+
+def set_vision_client(client: Optional[Any]) -> None:
+    global _client
+    with _lock:
+        _client = client
@@ -1,13 +1,17 @@
 from google.cloud import vision
 
+from src.aegisai.runtime.governor import CLOUD_IO, get_governor
+from src.aegisai.vision.client import get_vision_client
+from src.aegisai.runtime import tracing
+
 
 def analyze_labels(image_path: str):
     """
     Analyze an image using Google Cloud Vision label detection.
     Uses the same service account as SafeSearch for consistency.
     """
-    # Use the service account key (important!)
-    client = vision.ImageAnnotatorClient()
+    # Shared client (same service account as SafeSearch)
+    client = get_vision_client()
 
     # Load the image
     with open(image_path, "rb") as f:
@@ -16,7 +20,8 @@ def analyze_labels(image_path: str):
     image = vision.Image(content=content)
 
     # Request label detection
-    response = client.label_detection(image=image)
+    with get_governor().acquire(CLOUD_IO), tracing.api_call("vision.label_detection", len(content)):
+        response = client.label_detection(image=image)
 
     # Convert labels to a clean Python list
     labels = []
@@ -61,4 +61,54 @@ VIOLENCE_LABELS = {
 
     # --- DRUGS / SUBSTANCE ABUSE ---
     "Drugs", "Marijuana", "Pot", "Smoke", "Cigarette", "Cigarettes"
-}
\ No newline at end of file
+}
+
+
+# ─────────────────────────────────────────────────────────
+# Extended keyword lists for comprehensive detection
+# ─────────────────────────────────────────────────────────
+
+# Keywords are compared using lowercase substring checks to tolerate
+# variations like "Machine gun" vs "gun" or "Breast (anatomy)".
+WEAPON_KEYWORDS = (
+    # Firearms
+    "gun", "firearm", "weapon", "handgun", "pistol", "revolver",
+    "rifle", "shotgun", "assault rifle", "machine gun", "submachine",
+    "sniper", "ak-47", "ar-15", "m16", "uzi", "glock", "beretta",
+    "automatic weapon", "semi-automatic",
+    # Explosives
+    "grenade", "explosive", "bomb", "rocket", "missile", "bazooka",
+    "dynamite", "molotov", "c4", "ied", "landmine", "mortar",
+    "rocket launcher", "rpg",
+    # Bladed weapons
+    "knife", "blade", "dagger", "sword", "machete", "katana",
+    "axe", "hatchet", "cleaver", "scalpel", "switchblade",
+    "butterfly knife", "stiletto",
+    # Other weapons
+    "club", "bat", "baton", "taser", "stun gun", "pepper spray",
+    "crossbow", "bow", "arrow", "spear", "brass knuckles",
+    "nunchaku", "throwing star", "shuriken",
+    # Military
+    "cannon", "artillery", "tank gun", "turret",
+)
+
+NUDITY_KEYWORDS = (
+    "breast", "breasts", "nipple", "nipples",
+    "torso", "chest", "bare chest", "naked",
+    "buttock", "buttocks", "genitalia", "nude",
+    "bikini", "lingerie", "underwear",
+)
+
+PERSON_LABELS = (
+    "person", "man", "woman", "boy", "girl",
+    "human", "people", "face", "body", "figure",
+    "child", "adult", "male", "female",
+)
+
+# Additional dangerous objects that should trigger alerts
+DANGEROUS_OBJECTS = (
+    "blood", "wound", "injury", "corpse", "dead body",
+    "fire", "flames", "smoke", "explosion",
+    "drug", "syringe", "needle", "pills",
+    "alcohol", "beer", "wine", "liquor", "cigarette",
+)
@@ -15,6 +15,10 @@ import hashlib
 from google.cloud import vision
 from PIL import Image as PILImage
 
+from src.aegisai.runtime.governor import CLOUD_IO, get_governor
+from src.aegisai.vision.client import get_vision_client
+from src.aegisai.runtime import tracing
+
 
 @dataclass
 class LocalizedObject:
@@ -172,7 +176,7 @@ def localize_objects_bytes(
     Returns:
         List of LocalizedObject with comprehensive detections
     """
-    client = vision.ImageAnnotatorClient()
+    client = get_vision_client()
     image = vision.Image(content=image_bytes)
     
     results: List[LocalizedObject] = []
@@ -181,7 +185,8 @@ def localize_objects_bytes(
     # 1. Primary: Object Localization API
     # ─────────────────────────────────────────────────────────
     try:
-        response = client.object_localization(image=image)
+        with get_governor().acquire(CLOUD_IO), tracing.api_call("vision.object_localization", len(image_bytes)):
+            response = client.object_localization(image=image)
         
         if response.error.message:
             print(f"[object_localization] API error: {response.error.message}")
@@ -225,7 +230,8 @@ def localize_objects_bytes(
     # ─────────────────────────────────────────────────────────
     if include_labels:
         try:
-            label_response = client.label_detection(image=image)
+            with get_governor().acquire(CLOUD_IO), tracing.api_call("vision.label_detection", len(image_bytes)):
+                label_response = client.label_detection(image=image)
             
             if not label_response.error.message:
                 for label in label_response.label_annotations:
@@ -3,58 +3,21 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Iterable, List, Sequence, Tuple, Optional
 
+from src.aegisai.vision.label_lists import (
+    DANGEROUS_OBJECTS,
+    NUDITY_KEYWORDS,
+    PERSON_LABELS,
+    WEAPON_KEYWORDS,
+)
 from src.aegisai.vision.object_localization import LocalizedObject
 from src.aegisai.vision.safe_search import Likelihood
 from src.aegisai.vision.vision_rules import FrameModerationResult
 
-# ─────────────────────────────────────────────────────────
-# Extended keyword lists for comprehensive detection
-# ─────────────────────────────────────────────────────────
-
-# Keywords are compared using lowercase substring checks to tolerate
-# variations like "Machine gun" vs "gun" or "Breast (anatomy)".
-_WEAPON_KEYWORDS: Sequence[str] = (
-    # Firearms
-    "gun", "firearm", "weapon", "handgun", "pistol", "revolver",
-    "rifle", "shotgun", "assault rifle", "machine gun", "submachine",
-    "sniper", "ak-47", "ar-15", "m16", "uzi", "glock", "beretta",
-    "automatic weapon", "semi-automatic",
-    # Explosives
-    "grenade", "explosive", "bomb", "rocket", "missile", "bazooka",
-    "dynamite", "molotov", "c4", "ied", "landmine", "mortar",
-    "rocket launcher", "rpg",
-    # Bladed weapons
-    "knife", "blade", "dagger", "sword", "machete", "katana",
-    "axe", "hatchet", "cleaver", "scalpel", "switchblade",
-    "butterfly knife", "stiletto",
-    # Other weapons
-    "club", "bat", "baton", "taser", "stun gun", "pepper spray",
-    "crossbow", "bow", "arrow", "spear", "brass knuckles",
-    "nunchaku", "throwing star", "shuriken",
-    # Military
-    "cannon", "artillery", "tank gun", "turret",
-)
-
-_NUDITY_KEYWORDS: Sequence[str] = (
-    "breast", "breasts", "nipple", "nipples",
-    "torso", "chest", "bare chest", "naked",
-    "buttock", "buttocks", "genitalia", "nude",
-    "bikini", "lingerie", "underwear",
-)
-
-_PERSON_LABELS: Sequence[str] = (
-    "person", "man", "woman", "boy", "girl",
-    "human", "people", "face", "body", "figure",
-    "child", "adult", "male", "female",
-)
-
-# Additional dangerous objects that should trigger alerts
-_DANGEROUS_OBJECTS: Sequence[str] = (
-    "blood", "wound", "injury", "corpse", "dead body",
-    "fire", "flames", "smoke", "explosion",
-    "drug", "syringe", "needle", "pills",
-    "alcohol", "beer", "wine", "liquor", "cigarette",
-)
+# Keyword lists live in label_lists.py so moderation policies can extend them.
+_WEAPON_KEYWORDS: Sequence[str] = WEAPON_KEYWORDS
+_NUDITY_KEYWORDS: Sequence[str] = NUDITY_KEYWORDS
+_PERSON_LABELS: Sequence[str] = PERSON_LABELS
+_DANGEROUS_OBJECTS: Sequence[str] = DANGEROUS_OBJECTS
 
 
 @dataclass(frozen=True)
@@ -189,6 +152,7 @@ def select_problematic_objects(
     person_confidence_threshold: float = 0.25,   # Slightly higher for people
     dangerous_confidence_threshold: float = 0.30,
     merge_overlapping: bool = True,
+    policy=None,
 ) -> List[ProblematicObject]:
     """
     Keep only objects that correspond to harmful content we want to obscure.
@@ -208,10 +172,31 @@ def select_problematic_objects(
         person_confidence_threshold: Minimum confidence for people (default 0.25)
         dangerous_confidence_threshold: Minimum for dangerous objects (default 0.30)
         merge_overlapping: Whether to merge overlapping boxes (default True)
+        policy: Optional CompiledPolicy; its thresholds and keyword lists
+                replace the defaults above.
         
     Returns:
         List of ProblematicObject with blur regions and metadata
     """
+    weapon_keywords = _WEAPON_KEYWORDS
+    nudity_keywords = _NUDITY_KEYWORDS
+    person_labels = _PERSON_LABELS
+    dangerous_objects = _DANGEROUS_OBJECTS
+    adult_block = racy_block = violence_block = Likelihood.LIKELY
+    if policy is not None:
+        spec = policy.spec
+        weapon_confidence_threshold = spec.weapon_threshold
+        nudity_confidence_threshold = spec.nudity_threshold
+        person_confidence_threshold = spec.person_threshold
+        dangerous_confidence_threshold = spec.dangerous_threshold
+        weapon_keywords = policy.weapon_keywords
+        nudity_keywords = policy.nudity_keywords
+        person_labels = policy.person_labels
+        dangerous_objects = policy.dangerous_objects
+        adult_block = min(spec.adult_block, Likelihood.LIKELY)
+        racy_block = min(spec.racy_block, Likelihood.LIKELY)
+        violence_block = min(spec.violence_block, Likelihood.LIKELY)
+
     # Parse frame moderation result
     allow_person_blur = False
     violence_detected = False
@@ -226,9 +211,9 @@ def select_problematic_objects(
         
         # Allow person blur if adult/racy content or high violence
         allow_person_blur = (
-            adult_score >= Likelihood.LIKELY or 
-            racy_score >= Likelihood.LIKELY or
-            violence_score >= Likelihood.LIKELY
+            adult_score >= adult_block or
+            racy_score >= racy_block or
+            violence_score >= violence_block
         )
         violence_detected = bool(labels_info.get("violence_detected"))
         
@@ -247,7 +232,7 @@ def select_problematic_objects(
         # ─────────────────────────────────────────────────────────
         # Category 1: WEAPONS (highest priority, lowest threshold)
         # ─────────────────────────────────────────────────────────
-        if _matches_any(name, _WEAPON_KEYWORDS):
+        if _matches_any(name, weapon_keywords):
             threshold_to_use = weapon_confidence_threshold
             if score >= threshold_to_use:
                 reason = "weapon"
@@ -255,7 +240,7 @@ def select_problematic_objects(
         # ─────────────────────────────────────────────────────────
         # Category 2: NUDITY
         # ─────────────────────────────────────────────────────────
-        elif _matches_any(name, _NUDITY_KEYWORDS):
+        elif _matches_any(name, nudity_keywords):
             threshold_to_use = nudity_confidence_threshold
             if score >= threshold_to_use:
                 reason = "nudity"
@@ -263,7 +248,7 @@ def select_problematic_objects(
         # ─────────────────────────────────────────────────────────
         # Category 3: PEOPLE (only in flagged content)
         # ─────────────────────────────────────────────────────────
-        elif _matches_any(name, _PERSON_LABELS):
+        elif _matches_any(name, person_labels):
             threshold_to_use = person_confidence_threshold
             if score >= threshold_to_use:
                 if allow_person_blur:
@@ -275,7 +260,7 @@ def select_problematic_objects(
         # ─────────────────────────────────────────────────────────
         # Category 4: DANGEROUS OBJECTS
         # ─────────────────────────────────────────────────────────
-        elif _matches_any(name, _DANGEROUS_OBJECTS):
+        elif _matches_any(name, dangerous_objects):
             threshold_to_use = dangerous_confidence_threshold
             if score >= threshold_to_use:
                 reason = "dangerous"
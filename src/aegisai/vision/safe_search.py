@@ -6,6 +6,10 @@ from dataclasses import dataclass
 from enum import IntEnum
 from google.cloud import vision
 
+from src.aegisai.runtime.governor import CLOUD_IO, get_governor
+from src.aegisai.vision.client import get_vision_client
+from src.aegisai.runtime import tracing
+
 
 class Likelihood(IntEnum):
     UNKNOWN = 0
@@ -26,13 +30,14 @@ class SafeSearchResult:
 
 
 def analyze_safesearch(image_path: str) -> SafeSearchResult:
-    client = vision.ImageAnnotatorClient()
+    client = get_vision_client()
 
     with open(image_path, "rb") as f:
         content = f.read()
 
     image = vision.Image(content=content)
-    response = client.safe_search_detection(image=image)
+    with get_governor().acquire(CLOUD_IO), tracing.api_call("vision.safe_search", len(content)):
+        response = client.safe_search_detection(image=image)
 
     safe = response.safe_search_annotation
 
@@ -57,21 +62,23 @@ from src.aegisai.vision.vision_rules import (
 def analyze_frame_moderation(
     image_path: str,
     timestamp: float,
+    policy=None,
 ) -> FrameModerationResult:
     """
     Full per-frame moderation:
       - SafeSearch
       - label detection
-      - classification + final block decision
+      - classification + final block decision (thresholds from `policy`
+        when given, a `moderation.policy.CompiledPolicy`)
     """
     # 1) SafeSearch
     ss_result = analyze_safesearch(image_path)
-    ss_info = classify_safesearch(ss_result)
+    ss_info = classify_safesearch(ss_result, policy=policy)
     #print(f"[analyze_frame_moderation] SafeSearch info: {ss_info} for {image_path}")
 
     # 2) Labels (violence etc.)
     labels = analyze_labels(image_path)
-    labels_info = classify_labels(labels)
+    labels_info = classify_labels(labels, policy=policy)
     #print(f"Labels: {labels}")
     #print(f"[analyze_frame_moderation] Labels info: {labels_info} for {image_path}")
 
@@ -5,20 +5,29 @@ from .label_lists import VIOLENCE_LABELS
 from .safe_search import Likelihood
 
 
-def classify_safesearch(result):
+def classify_safesearch(result, policy=None):
     """
     result: SafeSearchResult from safe_search.py
+    policy: optional CompiledPolicy with its own likelihood thresholds.
     """
     adult = result.adult.value
     violence = result.violence.value
     racy = result.racy.value
 
-    # Block when SafeSearch is LIKELY or VERY_LIKELY
-    block = (
-        adult >= Likelihood.LIKELY or
-        violence >= Likelihood.LIKELY or
-        racy >= Likelihood.VERY_LIKELY
-    )
+    if policy is not None:
+        spec = policy.spec
+        block = (
+            adult >= spec.adult_block or
+            violence >= spec.violence_block or
+            racy >= spec.racy_block
+        )
+    else:
+        # Block when SafeSearch is LIKELY or VERY_LIKELY
+        block = (
+            adult >= Likelihood.LIKELY or
+            violence >= Likelihood.LIKELY or
+            racy >= Likelihood.VERY_LIKELY
+        )
 
     return {
         "adult": adult,
@@ -27,20 +36,26 @@ def classify_safesearch(result):
         "block": block,
     }
 
-def classify_labels(labels, threshold=0.15):
+def classify_labels(labels, threshold=0.15, policy=None):
     """
     labels: output from analyze_labels()
     threshold: minimum score to consider relevant.
                Lowered to 0.15 for aggressive weapon detection - better to 
                over-detect than miss a weapon, especially in dark/unclear footage.
+    policy: optional CompiledPolicy; its label set and threshold win.
     """
+    violence_labels = VIOLENCE_LABELS
+    if policy is not None:
+        violence_labels = policy.violence_labels
+        threshold = policy.spec.label_threshold
+
     for item in labels:
         desc = item["description"]
         score = item["score"]
 
         # Check if label is a violence-related keyword
         # Very low threshold to catch weapons even with low confidence
-        if desc in VIOLENCE_LABELS and score >= threshold:
+        if desc in violence_labels and score >= threshold:
             return {
                 "violence_detected": True,
                 "label": desc,
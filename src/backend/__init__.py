@@ -1 +1,7 @@
-from .main import app
+def __getattr__(name):
+    # Lazy, so worker processes importing backend.* do not load the API
+    # (and its backend.log handler).
+    if name == "app":
+        from .main import app
+        return app
+    raise AttributeError(name)
@@ -0,0 +1,175 @@
+"""
+Durable pipeline job queue on the application database.
+
+`/process` inserts a PipelineJob row; worker processes (`backend.worker`)
+lease jobs, renew the lease with heartbeats while the pipeline runs, and
+mark them done or failed. A job whose lease expires (worker killed, host
+lost) becomes available again; failures are retried with backoff until
+`max_attempts` is reached.
+
+Leasing is a compare-and-swap UPDATE on the candidate row, so only one
+worker can win a job. On PostgreSQL the candidate SELECT also uses
+`FOR UPDATE SKIP LOCKED`, so concurrent workers skip rows another worker
+is claiming instead of waiting on them.
+"""
+from __future__ import annotations
+
+import os
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from .models import JobStatus, PipelineJob, utc_now
+
+DEFAULT_MAX_ATTEMPTS = int(os.getenv("AEGIS_JOB_MAX_ATTEMPTS", "3"))
+DEFAULT_LEASE_SECONDS = 60.0
+RETRY_BACKOFF_SECONDS = 30.0     # doubled per failed attempt
+LEASE_CANDIDATES = 5
+
+
+def enqueue_job(db: Session, media_id: int, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> PipelineJob:
+    job = PipelineJob(media_id=media_id, status=JobStatus.QUEUED, max_attempts=max_attempts, run_after=utc_now())
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _available(now):
+    return or_(
+        and_(PipelineJob.status == JobStatus.QUEUED, PipelineJob.run_after <= now),
+        and_(
+            PipelineJob.status == JobStatus.LEASED,
+            PipelineJob.lease_expires_at < now,
+            PipelineJob.attempts < PipelineJob.max_attempts,
+        ),
+    )
+
+
+def lease_job(db: Session, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[PipelineJob]:
+    """Claim the oldest available job for `worker_id`; None when the queue is empty."""
+    now = utc_now()
+    candidates = (
+        db.query(PipelineJob.id)
+        .filter(_available(now))
+        .order_by(PipelineJob.run_after, PipelineJob.id)
+        .limit(LEASE_CANDIDATES)
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        candidates = candidates.with_for_update(skip_locked=True)
+
+    for (job_id,) in candidates.all():
+        claimed = (
+            db.query(PipelineJob)
+            .filter(PipelineJob.id == job_id, _available(now))
+            .update(
+                {
+                    PipelineJob.status: JobStatus.LEASED,
+                    PipelineJob.lease_owner: worker_id,
+                    PipelineJob.lease_expires_at: now + timedelta(seconds=lease_seconds),
+                    PipelineJob.heartbeat_at: now,
+                    PipelineJob.attempts: PipelineJob.attempts + 1,
+                    PipelineJob.updated_at: now,
+                },
+                synchronize_session=False,
+            )
+        )
+        if claimed:
+            db.commit()
+            job = db.get(PipelineJob, job_id)
+            db.refresh(job)
+            return job
+
+    db.commit()
+    return None
+
+
+def _owned(db: Session, job_id: int, worker_id: str):
+    return db.query(PipelineJob).filter(
+        PipelineJob.id == job_id,
+        PipelineJob.status == JobStatus.LEASED,
+        PipelineJob.lease_owner == worker_id,
+    )
+
+
+def heartbeat(db: Session, job_id: int, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+    """Extend the lease; False if `worker_id` no longer holds it."""
+    now = utc_now()
+    renewed = _owned(db, job_id, worker_id).update(
+        {
+            PipelineJob.lease_expires_at: now + timedelta(seconds=lease_seconds),
+            PipelineJob.heartbeat_at: now,
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+    return bool(renewed)
+
+
+def complete_job(db: Session, job_id: int, worker_id: str) -> bool:
+    done = _owned(db, job_id, worker_id).update(
+        {PipelineJob.status: JobStatus.DONE, PipelineJob.lease_expires_at: None, PipelineJob.updated_at: utc_now()},
+        synchronize_session=False,
+    )
+    db.commit()
+    return bool(done)
+
+
+def fail_job(db: Session, job_id: int, worker_id: str, error: str) -> Optional[str]:
+    """
+    Record a failed attempt. Returns the new status: QUEUED (retry after
+    backoff) or FAILED (attempts exhausted); None if the lease was lost.
+    """
+    job = _owned(db, job_id, worker_id).first()
+    if job is None:
+        db.commit()
+        return None
+
+    now = utc_now()
+    job.last_error = error
+    job.lease_owner = None
+    job.lease_expires_at = None
+    if job.attempts >= job.max_attempts:
+        job.status = JobStatus.FAILED
+    else:
+        job.status = JobStatus.QUEUED
+        job.run_after = now + timedelta(seconds=RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1))
+    db.commit()
+    return job.status
+
+
+def reap_expired(db: Session) -> List[int]:
+    """
+    Fail jobs whose lease expired on their last attempt (they are not
+    leasable again). Returns their media ids.
+    """
+    now = utc_now()
+    jobs = (
+        db.query(PipelineJob)
+        .filter(
+            PipelineJob.status == JobStatus.LEASED,
+            PipelineJob.lease_expires_at < now,
+            PipelineJob.attempts >= PipelineJob.max_attempts,
+        )
+        .all()
+    )
+    for job in jobs:
+        job.status = JobStatus.FAILED
+        job.last_error = job.last_error or f"Lease expired (worker {job.lease_owner} stopped heartbeating)"
+        job.lease_owner = None
+        job.lease_expires_at = None
+    db.commit()
+    return [job.media_id for job in jobs]
+
+
+def queue_depth(db: Session) -> Dict[str, int]:
+    """Number of queued and leased jobs (for the `/metrics` gauge)."""
+    counts = dict(
+        db.query(PipelineJob.status, func.count(PipelineJob.id))
+        .filter(PipelineJob.status.in_((JobStatus.QUEUED, JobStatus.LEASED)))
+        .group_by(PipelineJob.status)
+        .all()
+    )
+    return {status: int(counts.get(status, 0)) for status in (JobStatus.QUEUED, JobStatus.LEASED)}
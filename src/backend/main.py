@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import hashlib
+import json
 import logging
 import os
+import shutil
+import threading
 from datetime import datetime
 from contextlib import asynccontextmanager
 from pathlib import Path
@@ -11,11 +14,12 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
-from fastapi import BackgroundTasks, Depends, FastAPI, File, HTTPException, Query, Request, UploadFile
+from fastapi import Depends, FastAPI, File, HTTPException, Query, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, PlainTextResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy import and_
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from jose import jwt, JWTError
 import sys
@@ -28,9 +32,13 @@ if hasattr(sys.stderr, "reconfigure"):
 
 
 from .db import get_db, init_db
-from .models import CensorSegment, ProcessStatus, ProcessedMedia, User, utc_now
-from .schemas import HealthResponse, MediaListResponse, MediaResponse, MessageResponse, RawFileResponse, SegmentResponse, StatsResponse, Token, UserLogin, UserRegister, UserResponse
-from .services.pipeline_wrapper import process_media
+from .models import CensorSegment, ModerationPolicy, ProcessStatus, ProcessedMedia, User
+from .schemas import HealthResponse, MediaListResponse, MediaResponse, MessageResponse, PolicyResponse, PolicyUpdate, RawFileResponse, SegmentResponse, StatsResponse, Token, UserLogin, UserRegister, UserResponse
+from .job_queue import enqueue_job, queue_depth
+from .policies import get_user_policy, load_json_list, policy_spec
+from .services.pipeline_wrapper import build_policy_spec, policy_presets, policy_version, validate_policy_overrides, warm_up_pipeline
+from .worker import start_embedded_workers
+from src.aegisai.runtime.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, get_registry
 from .auth import authenticate_user, create_access_token, get_current_user, get_password_hash, get_user_by_email, SECRET_KEY, ALGORITHM
 from datetime import timedelta
 
@@ -106,11 +114,13 @@ def _to_response(media: ProcessedMedia) -> MediaResponse:
         input_type=media.input_type,
         filter_audio=media.filter_audio,
         filter_video=media.filter_video,
+        policy_version=media.policy_version,
         status=media.status,
         progress=media.progress,
         current_activity=media.current_activity,
         logs=media.logs.split("\n") if media.logs else [],
         error_message=media.error_message,
+        completed_stages=list(json.loads(media.stage_manifest).get("stages", {})) if media.stage_manifest else [],
         created_at=media.created_at,
         updated_at=media.updated_at,
         segments=[
@@ -154,8 +164,14 @@ def _validate_upload(filename: str, content_type: str | None, size: int) -> None
 async def lifespan(app: FastAPI):
     _ensure_directories()
     init_db()
+    if os.getenv("AEGIS_SPEECH_WARMUP", "1") != "0":
+        threading.Thread(target=warm_up_pipeline, name="pipeline-warmup", daemon=True).start()
+    # Queue workers inside the API process, so uploads are processed even
+    # without a separate aegisai-worker (docker-compose sets 0 and runs one).
+    stop_workers = start_embedded_workers(int(os.getenv("AEGIS_EMBEDDED_WORKERS", "1")))
     logger.info("Backend started")
     yield
+    stop_workers()
     logger.info("Backend stopped")
 
 
@@ -174,11 +190,31 @@ app.add_middleware(
 )
 
 
+QUEUE_DEPTH = get_registry().gauge("aegis_job_queue_depth", "Pipeline jobs waiting or running", ("status",))
+
+
 @app.get("/health", response_model=HealthResponse)
 def health():
     return HealthResponse(status="ok")
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics(db: Session = Depends(get_db)):
+    """
+    Prometheus metrics of this process (pipeline runs here with embedded
+    workers; separate workers serve their own, see `--metrics-port`) plus
+    the database-wide job queue depth.
+    """
+    try:
+        for status, count in queue_depth(db).items():
+            QUEUE_DEPTH.set(count, status=status)
+    except SQLAlchemyError as e:
+        # Still serve the process metrics when the database is unavailable.
+        logger.warning(f"Queue depth unavailable: {e}")
+        db.rollback()
+    return PlainTextResponse(get_registry().render(), media_type=METRICS_CONTENT_TYPE)
+
+
 # Authentication endpoints
 @app.post("/auth/register", response_model=UserResponse, status_code=201)
 def register(user_data: UserRegister, db: Session = Depends(get_db)):
@@ -239,6 +275,64 @@ def get_current_user_info(current_user: User = Depends(get_current_user)):
     )
 
 
+@app.get("/policy", response_model=PolicyResponse)
+def get_policy(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the current user's moderation policy (default preset if none saved)."""
+    policy = get_user_policy(db, current_user.id)
+    if policy is None:
+        return PolicyResponse(version=policy_version(policy_spec(None)), presets=policy_presets())
+
+    return PolicyResponse(
+        preset=policy.preset,
+        custom_words=load_json_list(policy.custom_words),
+        allowed_words=load_json_list(policy.allowed_words),
+        overrides=json.loads(policy.overrides) if policy.overrides else {},
+        version=policy.version,
+        presets=policy_presets(),
+    )
+
+
+@app.put("/policy", response_model=PolicyResponse)
+def update_policy(
+    policy_data: PolicyUpdate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Create or replace the current user's moderation policy."""
+    try:
+        overrides = validate_policy_overrides(policy_data.overrides)
+        spec = build_policy_spec(
+            preset=policy_data.preset,
+            custom_words=policy_data.custom_words,
+            allowed_words=policy_data.allowed_words,
+            overrides=overrides,
+        )
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    policy = get_user_policy(db, current_user.id)
+    if policy is None:
+        policy = ModerationPolicy(user_id=current_user.id)
+        db.add(policy)
+
+    policy.preset = policy_data.preset
+    policy.custom_words = json.dumps(policy_data.custom_words)
+    policy.allowed_words = json.dumps(policy_data.allowed_words)
+    policy.overrides = json.dumps(overrides)
+    policy.version = policy_version(spec)
+    db.commit()
+
+    return PolicyResponse(
+        **policy_data.model_dump(exclude={"overrides"}),
+        overrides=overrides,
+        version=policy.version,
+        presets=policy_presets(),
+    )
+
+
 @app.get("/stats", response_model=StatsResponse)
 def get_stats(
     current_user: User = Depends(get_current_user),
@@ -387,6 +481,7 @@ def delete_media(
 
     input_path = Path(media.input_path) if media.input_path else None
     output_path = Path(media.output_path) if media.output_path else None
+    work_dir = Path(media.work_dir) if media.work_dir else None
 
     db.delete(media)
     db.commit()
@@ -395,10 +490,43 @@ def delete_media(
         input_path.unlink()
     if output_path and output_path.exists():
         output_path.unlink()
+    if work_dir and work_dir.exists():
+        shutil.rmtree(work_dir, ignore_errors=True)
 
     return MessageResponse(message="Deleted")
 
 
+@app.post("/media/{media_id}/retry", response_model=MediaResponse)
+def retry_media(
+    media_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Re-queue a failed media job. Stages checkpointed by the failed run
+    (transcripts, vision results, extracted files) are reused.
+    """
+    media = db.query(ProcessedMedia).filter(
+        ProcessedMedia.id == media_id,
+        ProcessedMedia.user_id == current_user.id
+    ).first()
+    if not media:
+        raise HTTPException(status_code=404, detail="Media not found")
+    if media.status != ProcessStatus.FAILED:
+        raise HTTPException(status_code=409, detail=f"Only failed jobs can be retried: {media.status}")
+    if not media.input_path or not Path(media.input_path).exists():
+        raise HTTPException(status_code=404, detail="Input file missing on disk")
+
+    media.status = ProcessStatus.CREATED
+    media.progress = 0
+    media.current_activity = "Queued for retry"
+    db.commit()
+
+    enqueue_job(db, media.id)
+    db.refresh(media)
+    return _to_response(media)
+
+
 @app.get("/outputs/files", response_model=list[RawFileResponse])
 def list_output_files(
     current_user: User = Depends(get_current_user),
@@ -526,81 +654,8 @@ def get_logs(
         return f"Error reading logs: {str(e)}"
 
 
-def run_pipeline_background(media_id: int, db: Session):
-    try:
-        media = db.query(ProcessedMedia).filter(ProcessedMedia.id == media_id).first()
-        if not media:
-            return
-
-        media.status = ProcessStatus.PROCESSING
-        media.progress = 0
-        media.current_activity = "Starting..."
-        db.commit()
-
-        def progress_callback(progress: int, activity: str):
-            try:
-                # Re-fetch to avoid stale object? 
-                # Or just update inplace if session is alive.
-                # Just separate transaction might be safer if frequent updates.
-                media.progress = progress
-                media.current_activity = activity
-                
-                # Append to logs
-                timestamp = utc_now().strftime("%H:%M:%S")
-                log_entry = f"[{timestamp}] {activity}"
-                if media.logs:
-                    media.logs = media.logs + "\n" + log_entry
-                else:
-                    media.logs = log_entry
-                    
-                db.commit()
-            except Exception as e:
-                logger.error(f"Error updating progress: {e}")
-
-        subtitle_path = Path(media.subtitle_path) if media.subtitle_path else None
-
-        result = process_media(
-            input_path=Path(media.input_path),
-            input_type=media.input_type,
-            output_dir=OUTPUTS_DIR,
-            filter_audio=media.filter_audio,
-            filter_video=media.filter_video,
-            progress_callback=progress_callback,
-            subtitle_path=subtitle_path,
-        )
-
-        media.output_path = result["output_path"]
-        media.status = ProcessStatus.DONE
-        media.progress = 100
-        media.current_activity = "Completed"
-        db.commit()
-
-        for seg in result.get("segments", []):
-            db.add(CensorSegment(
-                media_id=media.id,
-                start_ms=int(seg["start_ms"]),
-                end_ms=int(seg["end_ms"]),
-                action_type=str(seg.get("action_type") or "mute"),
-                reason=str(seg.get("reason") or ""),
-            ))
-
-        db.commit()
-
-    except Exception as exc:
-        logger.exception("Pipeline failed")
-        try:
-            media = db.query(ProcessedMedia).filter(ProcessedMedia.id == media_id).first()
-            if media:
-                media.status = ProcessStatus.FAILED
-                media.error_message = str(exc)
-                db.commit()
-        except:
-            pass
-
-
 @app.post("/process", response_model=MediaResponse)
 async def process_file(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     subtitle_file: UploadFile = File(None),
     filter_audio: bool = Query(True),
@@ -647,8 +702,9 @@ async def process_file(
 
     input_type = _detect_input_type(upload_path)
     file_hash = _compute_file_hash(upload_path)
+    current_policy_version = policy_version(policy_spec(get_user_policy(db, current_user.id)))
 
-    # Check for existing media with same hash and filters (only for this user)
+    # Check for existing media with same hash, filters and policy (only for this user)
     existing = (
         db.query(ProcessedMedia)
         .filter(
@@ -657,6 +713,7 @@ async def process_file(
                 ProcessedMedia.file_hash == file_hash,
                 ProcessedMedia.filter_audio == filter_audio,
                 ProcessedMedia.filter_video == filter_video,
+                ProcessedMedia.policy_version == current_policy_version,
                 ProcessedMedia.status == ProcessStatus.DONE,
             )
         )
@@ -675,6 +732,7 @@ async def process_file(
         filter_audio=filter_audio,
         filter_video=filter_video,
         subtitle_path=subtitle_path_str,
+        policy_version=current_policy_version,
         status=ProcessStatus.CREATED,
         progress=0,
         current_activity="Queued",
@@ -683,7 +741,8 @@ async def process_file(
     db.commit()
     db.refresh(media)
 
-    background_tasks.add_task(run_pipeline_background, media.id, db)
+    # Picked up by a worker process (python -m src.backend.worker).
+    enqueue_job(db, media.id)
 
     return _to_response(media)
 
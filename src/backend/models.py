@@ -20,6 +20,13 @@ class ProcessStatus:
     FAILED = "failed"
 
 
+class JobStatus:
+    QUEUED = "queued"
+    LEASED = "leased"
+    DONE = "done"
+    FAILED = "failed"
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -33,6 +40,9 @@ class User(Base):
     media: Mapped[list["ProcessedMedia"]] = relationship(
         "ProcessedMedia", back_populates="user", cascade="all, delete-orphan"
     )
+    policy: Mapped[Optional["ModerationPolicy"]] = relationship(
+        "ModerationPolicy", back_populates="user", cascade="all, delete-orphan", uselist=False
+    )
 
 
 class ProcessedMedia(Base):
@@ -47,11 +57,15 @@ class ProcessedMedia(Base):
     filter_audio: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     filter_video: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     subtitle_path: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
+    policy_version: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
     status: Mapped[str] = mapped_column(String(32), default=ProcessStatus.CREATED, nullable=False)
     progress: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     current_activity: Mapped[Optional[str]] = mapped_column(String(256), nullable=True)
     logs: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Stage checkpoints of the last run (kept until the job succeeds).
+    work_dir: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
+    stage_manifest: Mapped[Optional[str]] = mapped_column(Text, nullable=True)   # JSON
     created_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, onupdate=utc_now, nullable=False)
 
@@ -72,3 +86,42 @@ class CensorSegment(Base):
     reason: Mapped[Optional[str]] = mapped_column(String(256), nullable=True)
 
     media: Mapped[ProcessedMedia] = relationship("ProcessedMedia", back_populates="segments")
+
+
+class ModerationPolicy(Base):
+    """Per-user moderation policy: a preset plus custom words / threshold overrides (JSON)."""
+    __tablename__ = "moderation_policy"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), unique=True, nullable=False, index=True)
+    preset: Mapped[str] = mapped_column(String(32), default="default", nullable=False)
+    custom_words: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    allowed_words: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    overrides: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    version: Mapped[str] = mapped_column(String(64), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, onupdate=utc_now, nullable=False)
+
+    user: Mapped["User"] = relationship("User", back_populates="policy")
+
+
+class PipelineJob(Base):
+    """
+    Durable queue entry for one pipeline run of a ProcessedMedia row.
+    Workers lease jobs (lease_owner / lease_expires_at) and renew the lease
+    with heartbeats; an expired lease makes the job available again.
+    """
+    __tablename__ = "pipeline_job"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    media_id: Mapped[int] = mapped_column(ForeignKey("processed_media.id", ondelete="CASCADE"), nullable=False, index=True)
+    status: Mapped[str] = mapped_column(String(32), default=JobStatus.QUEUED, nullable=False, index=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=3, nullable=False)
+    run_after: Mapped[datetime] = mapped_column(DateTime, default=utc_now, nullable=False, index=True)
+    lease_owner: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, index=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, onupdate=utc_now, nullable=False)
@@ -0,0 +1,29 @@
+"""Stored moderation policies -> PolicySpec (shared by the API and workers)."""
+from __future__ import annotations
+
+import json
+
+from sqlalchemy.orm import Session
+
+from .models import ModerationPolicy
+from .services.pipeline_wrapper import build_policy_spec
+
+
+def load_json_list(raw: str | None) -> list:
+    return json.loads(raw) if raw else []
+
+
+def policy_spec(policy: ModerationPolicy | None):
+    """PolicySpec for a stored policy row (None -> default preset)."""
+    if policy is None:
+        return build_policy_spec()
+    return build_policy_spec(
+        preset=policy.preset,
+        custom_words=load_json_list(policy.custom_words),
+        allowed_words=load_json_list(policy.allowed_words),
+        overrides=json.loads(policy.overrides) if policy.overrides else {},
+    )
+
+
+def get_user_policy(db: Session, user_id: int) -> ModerationPolicy | None:
+    return db.query(ModerationPolicy).filter(ModerationPolicy.user_id == user_id).first()
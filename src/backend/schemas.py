@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, StrictBool, StrictFloat, StrictInt
 
 
 class SegmentResponse(BaseModel):
@@ -23,11 +23,13 @@ class MediaResponse(BaseModel):
     filter_audio: bool
     filter_video: bool
     subtitle_path: Optional[str] = None
+    policy_version: Optional[str] = None
     status: str
     progress: int = 0
     current_activity: Optional[str] = None
     logs: Optional[list[str]] = None
     error_message: Optional[str] = None
+    completed_stages: list[str] = []
     created_at: datetime
     updated_at: datetime
     segments: list[SegmentResponse] = []
@@ -36,6 +38,19 @@ class MediaResponse(BaseModel):
         from_attributes = True
 
 
+class PolicyUpdate(BaseModel):
+    preset: str = "default"
+    custom_words: list[str] = []
+    allowed_words: list[str] = []
+    # Exact JSON types: checked and normalized against PolicySpec by the service.
+    overrides: dict[str, StrictBool | StrictInt | StrictFloat] = {}
+
+
+class PolicyResponse(PolicyUpdate):
+    version: str
+    presets: list[str] = []
+
+
 class MediaListResponse(BaseModel):
     total: int
     skip: int
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+import os
 from pathlib import Path
 from typing import List, Literal, TypedDict
 
@@ -50,6 +51,64 @@ def _ensure_pipeline_imports():
         PipelineConfig = _PipelineConfig
 
 
+def warm_up_pipeline() -> None:
+    """
+    Import the pipeline and open the Speech-to-Text channels ahead of the
+    first job. Meant to run in a background thread at startup; failures
+    are logged and the first job simply pays the cold start instead.
+    """
+    try:
+        _ensure_pipeline_imports()
+        from src.aegisai.audio.speech_to_text import get_speech_backend
+
+        backend = get_speech_backend()
+        backend.ensure_capacity(12)  # filter_audio_file worker count
+        backend.warm_up()
+        logger.info("Speech backend warmed up")
+    except Exception as e:
+        logger.warning(f"Pipeline warm-up failed: {e}")
+
+
+def build_policy_spec(
+    preset: str = "default",
+    custom_words: List[str] | None = None,
+    allowed_words: List[str] | None = None,
+    overrides: dict | None = None,
+):
+    """
+    PolicySpec for a stored user policy. Raises ValueError for an unknown
+    preset, an unknown override field or an override of the wrong type.
+    """
+    from src.aegisai.moderation.policy import preset_spec
+
+    overrides = validate_policy_overrides(overrides or {})
+    return preset_spec(
+        preset,
+        extra_words=tuple(custom_words or ()),
+        allowed_words=tuple(allowed_words or ()),
+        **overrides,
+    )
+
+
+def validate_policy_overrides(overrides: dict) -> dict:
+    """Overrides checked against PolicySpec and normalized (see moderation.policy.validate_overrides)."""
+    from src.aegisai.moderation.policy import validate_overrides
+
+    return validate_overrides(overrides)
+
+
+def policy_version(spec) -> str:
+    from src.aegisai.moderation.policy import policy_version as _policy_version
+
+    return _policy_version(spec)
+
+
+def policy_presets() -> List[str]:
+    from src.aegisai.moderation.policy import PRESETS
+
+    return sorted(PRESETS)
+
+
 InputType = Literal["audio", "video"]
 
 
@@ -111,6 +170,8 @@ def process_media(
     filter_video: bool,
     progress_callback: callable = None,
     subtitle_path: Path | None = None,
+    policy=None,
+    work_dir: Path | None = None,
 ) -> PipelineResult:
     output_dir.mkdir(parents=True, exist_ok=True)
     output_filename = f"{input_path.stem}_censored{input_path.suffix}"
@@ -119,45 +180,46 @@ def process_media(
     _ensure_pipeline_imports()
 
     config = _select_pipeline_config(input_type, filter_audio, filter_video)
+    if policy is not None:
+        import dataclasses
+        config = dataclasses.replace(config, policy=policy)
 
-    # Inject subtitle_path into config if provided
-    # Inject subtitle_path into config if provided, or attempt extraction
-    extracted_subtitle_path = None
+    # Inject subtitle_path into config if provided; otherwise video jobs
+    # extract embedded subtitles inside the stage graph (overlapping with
+    # audio extraction and vision).
     if subtitle_path:
         import dataclasses
         config = dataclasses.replace(config, subtitle_path=str(subtitle_path))
-    else:
-        # Attempt to extract subtitles from the video if it's a video input
-        if input_type == "video":
-            from src.aegisai.video.segment import extract_subtitles_from_video
-            extraction_path = output_dir / f"{input_path.stem}_extracted.srt"
-            if extract_subtitles_from_video(str(input_path), str(extraction_path)):
-                logger.info(f"Extracted subtitles to {extraction_path}")
-                import dataclasses
-                config = dataclasses.replace(config, subtitle_path=str(extraction_path))
-                extracted_subtitle_path = extraction_path
-            else:
-                 logger.info("No subtitles extracted from video.")
-    
+    elif input_type == "video":
+        import dataclasses
+        config = dataclasses.replace(config, extract_subtitles=True)
+
+    # Stage checkpoints: re-running with the same work_dir resumes the job.
+    if work_dir is not None:
+        import dataclasses
+        config = dataclasses.replace(config, work_dir=str(work_dir))
+
+    # Long videos can be split across worker processes (AEGIS_FILE_SHARDS=N).
+    shards = int(os.environ.get("AEGIS_FILE_SHARDS", "1") or 1)
+    if input_type == "video" and shards > 1:
+        import dataclasses
+        config = dataclasses.replace(config, shards=shards)
+
     if config.subtitle_path:
         logger.info(f"Pipeline configured with subtitle path: {config.subtitle_path}")
         if progress_callback:
             progress_callback(1, "Pipeline configured with subtitles")
 
-    try:
-        result = run_job(
-            cfg=config,
-            input_path_or_stream=str(input_path),
-            output_path=str(output_path),
-            progress_callback=progress_callback,
-        )
-    finally:
-        # clean up extracted subtitle file if we created one
-        if extracted_subtitle_path and extracted_subtitle_path.exists():
-            try:
-                extracted_subtitle_path.unlink()
-            except Exception as e:
-                logger.warning(f"Failed to cleanup extracted subtitle file: {e}")
+    result = run_job(
+        cfg=config,
+        input_path_or_stream=str(input_path),
+        output_path=str(output_path),
+        progress_callback=progress_callback,
+    )
+    logger.info(f"Stage timings: {result.get('stage_timings')}")
+
+    from src.aegisai.runtime.governor import format_stats, get_governor
+    logger.info(f"Resource pools (process totals):\n{format_stats(get_governor().stats())}")
 
     audio_intervals = result.get("audio_intervals") or []
     video_intervals = result.get("video_intervals") or []
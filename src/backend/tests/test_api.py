@@ -14,6 +14,14 @@ def test_health():
     assert response.json() == {"status": "ok"}
 
 
+def test_metrics():
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE aegis_job_queue_depth gauge" in response.text
+    assert 'aegis_resource_limit{pool="ffmpeg-encode"}' in response.text
+
+
 def test_stats():
     response = client.get("/stats")
     assert response.status_code == 200
@@ -80,3 +88,98 @@ def test_process_invalid_mimetype():
     assert response.status_code == 400
     assert "Invalid content type" in response.json()["detail"]
 
+
+
+@pytest.fixture
+def retry_db(tmp_path, monkeypatch):
+    """A throwaway database and a logged-in user for the retry endpoint."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from backend import worker
+    from backend.auth import get_current_user
+    from backend.db import Base, get_db
+    from backend.models import User
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'api.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    db = factory()
+    user = User(email="retry@b.c", hashed_password="x")
+    db.add(user)
+    db.commit()
+
+    def override_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    monkeypatch.setattr(worker, "WORK_DIR_TTL_SECONDS", 0.0)
+    yield factory, db, user
+    app.dependency_overrides.clear()
+    db.close()
+    engine.dispose()
+
+
+def _failed_media(db, user, tmp_path, status="failed"):
+    from backend.models import ProcessedMedia
+
+    src = tmp_path / "in.mp4"
+    src.write_bytes(b"x")
+    media = ProcessedMedia(user_id=user.id, input_path=str(src), input_type="video", file_hash="h", status=status)
+    db.add(media)
+    db.commit()
+    return media.id
+
+
+def test_retry_requeues_failed_media(retry_db, tmp_path):
+    from backend.models import JobStatus, PipelineJob
+
+    factory, db, user = retry_db
+    media_id = _failed_media(db, user, tmp_path)
+
+    response = client.post(f"/media/{media_id}/retry")
+    assert response.status_code == 200
+    assert response.json()["status"] == "created"
+    jobs = db.query(PipelineJob).filter(PipelineJob.media_id == media_id).all()
+    assert [job.status for job in jobs] == [JobStatus.QUEUED]
+
+
+def test_retry_rejects_media_that_has_not_failed(retry_db, tmp_path):
+    factory, db, user = retry_db
+    media_id = _failed_media(db, user, tmp_path, status="processing")
+
+    response = client.post(f"/media/{media_id}/retry")
+    assert response.status_code == 409
+    assert "Only failed jobs" in response.json()["detail"]
+
+
+def test_retry_after_reaped_lease(retry_db, tmp_path):
+    from datetime import timedelta
+    from backend import job_queue
+    from backend.models import JobStatus, PipelineJob, ProcessedMedia, utc_now
+    from backend.worker import Worker
+
+    factory, db, user = retry_db
+    media_id = _failed_media(db, user, tmp_path, status="processing")
+    dead = job_queue.enqueue_job(db, media_id, max_attempts=1)
+    assert job_queue.lease_job(db, "dead-worker", lease_seconds=30).id == dead.id
+    db.query(PipelineJob).update({PipelineJob.lease_expires_at: utc_now() - timedelta(seconds=1)})
+    db.commit()
+
+    ran = []
+    worker = Worker("w", session_factory=factory, run_job=lambda mid, lease_lost: ran.append(mid))
+    assert not worker.run_once()   # nothing to lease, but the dead job is reaped
+    db.expire_all()
+    assert db.get(ProcessedMedia, media_id).status == "failed"
+
+    response = client.post(f"/media/{media_id}/retry")
+    assert response.status_code == 200
+    assert worker.run_once()
+    db.expire_all()
+    assert ran == [media_id]
+    assert db.get(PipelineJob, dead.id).status == JobStatus.FAILED
+    assert [job.status for job in db.query(PipelineJob).filter(PipelineJob.id != dead.id)] == [JobStatus.DONE]
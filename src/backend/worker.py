@@ -0,0 +1,395 @@
+"""
+Pipeline worker processes (aegisai-worker).
+
+Run next to the API, scaled independently of it:
+
+    python -m src.backend.worker --workers 4
+
+Each worker process leases jobs from the `pipeline_job` table
+(`job_queue`), heartbeats while the pipeline runs, and records the result
+on the ProcessedMedia row. SIGTERM / SIGINT stop leasing; the job in
+progress finishes first (a killed worker's job is re-leased once its lease
+expires). A worker that loses a job's lease stops that job at its next
+progress report instead of racing the attempt that took it over.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import threading
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from .db import SessionLocal, engine
+from .job_queue import (
+    DEFAULT_LEASE_SECONDS,
+    complete_job,
+    fail_job,
+    heartbeat,
+    lease_job,
+    reap_expired,
+)
+from .models import CensorSegment, JobStatus, ProcessStatus, ProcessedMedia, utc_now
+from .policies import get_user_policy, policy_spec
+
+logger = logging.getLogger(__name__)
+
+OUTPUTS_DIR = Path(__file__).resolve().parent / "outputs"
+WORK_DIR = Path(__file__).resolve().parent / "work"
+DEFAULT_POLL_SECONDS = 2.0
+# Work dirs of failed jobs nobody retried (and abandoned attempt dirs) are
+# removed after this long; 0 keeps them forever.
+WORK_DIR_TTL_SECONDS = float(os.getenv("AEGIS_WORK_DIR_TTL_HOURS", "72")) * 3600
+SWEEP_INTERVAL_SECONDS = 600.0
+
+
+class LeaseLost(RuntimeError):
+    """The worker no longer holds the job's lease; another attempt owns it."""
+
+
+def run_media_job(
+    media_id: int,
+    session_factory: sessionmaker = SessionLocal,
+    lease_lost: Optional[threading.Event] = None,
+) -> None:
+    """
+    Run the pipeline for one ProcessedMedia row; raises on failure.
+
+    The job runs in a per-media work directory with stage checkpoints, so
+    a retry (queue backoff or `POST /media/{id}/retry`) resumes after the
+    last completed stage. The directory is removed once the job succeeds.
+
+    Once `lease_lost` is set the job raises LeaseLost at its next progress
+    report and leaves the media row alone. An attempt that finds the row
+    still PROCESSING (its predecessor lost the lease and may still be
+    running) gets a fresh work directory instead of sharing that one.
+    """
+    from src.aegisai.pipeline.checkpoint import read_manifest
+    from .services.pipeline_wrapper import policy_version, process_media
+
+    def check_lease() -> None:
+        if lease_lost is not None and lease_lost.is_set():
+            raise LeaseLost(f"Lease lost on media {media_id}; another attempt owns it")
+
+    db = session_factory()
+    try:
+        media = db.query(ProcessedMedia).filter(ProcessedMedia.id == media_id).first()
+        if not media:
+            return
+
+        previous_running = media.status == ProcessStatus.PROCESSING and media.work_dir
+        media.status = ProcessStatus.PROCESSING
+        media.progress = 0
+        media.current_activity = "Starting..."
+        media.error_message = None
+        db.commit()
+
+        def progress_callback(progress: int, activity: str):
+            check_lease()
+            try:
+                media.progress = progress
+                media.current_activity = activity
+
+                timestamp = utc_now().strftime("%H:%M:%S")
+                log_entry = f"[{timestamp}] {activity}"
+                if media.logs:
+                    media.logs = media.logs + "\n" + log_entry
+                else:
+                    media.logs = log_entry
+
+                db.commit()
+            except Exception as e:
+                logger.error(f"Error updating progress: {e}")
+
+        subtitle_path = Path(media.subtitle_path) if media.subtitle_path else None
+
+        # The user's policy at processing time (may have changed since upload).
+        policy = policy_spec(get_user_policy(db, media.user_id))
+        media.policy_version = policy_version(policy)
+        work_dir = WORK_DIR / str(media.id)
+        if previous_running:
+            work_dir = WORK_DIR / f"{media.id}-{uuid.uuid4().hex[:8]}"
+        media.work_dir = str(work_dir)
+        db.commit()
+
+        try:
+            result = process_media(
+                input_path=Path(media.input_path),
+                input_type=media.input_type,
+                output_dir=OUTPUTS_DIR,
+                filter_audio=media.filter_audio,
+                filter_video=media.filter_video,
+                progress_callback=progress_callback,
+                subtitle_path=subtitle_path,
+                policy=policy,
+                work_dir=work_dir,
+            )
+        except Exception:
+            check_lease()   # the row belongs to the attempt that took over
+            # Record what the next attempt can skip.
+            media.stage_manifest = json.dumps(read_manifest(str(work_dir)))
+            db.commit()
+            raise
+
+        check_lease()
+        media.stage_manifest = json.dumps(read_manifest(str(work_dir)))
+        media.work_dir = None
+        shutil.rmtree(work_dir, ignore_errors=True)
+        media.output_path = result["output_path"]
+        media.status = ProcessStatus.DONE
+        media.progress = 100
+        media.current_activity = "Completed"
+
+        for seg in result.get("segments", []):
+            db.add(CensorSegment(
+                media_id=media.id,
+                start_ms=int(seg["start_ms"]),
+                end_ms=int(seg["end_ms"]),
+                action_type=str(seg.get("action_type") or "mute"),
+                reason=str(seg.get("reason") or ""),
+            ))
+
+        db.commit()
+    finally:
+        db.close()
+
+
+def _mark_media(db: Session, media_id: int, status: str, activity: str, error: Optional[str] = None) -> None:
+    media = db.query(ProcessedMedia).filter(ProcessedMedia.id == media_id).first()
+    if media:
+        media.status = status
+        media.current_activity = activity
+        if error is not None:
+            media.error_message = error
+        db.commit()
+
+
+def sweep_work_dirs(db: Session, ttl_seconds: float, work_root: Optional[Path] = None) -> int:
+    """
+    Remove checkpoint directories older than `ttl_seconds`: those of
+    FAILED media (their retry would start over) and directories no media
+    row refers to (attempts abandoned after a lost lease, deleted media).
+    Returns the number of directories removed.
+    """
+    work_root = work_root or WORK_DIR
+    cutoff = utc_now() - timedelta(seconds=ttl_seconds)
+    removed = 0
+
+    stale = (
+        db.query(ProcessedMedia)
+        .filter(
+            ProcessedMedia.status == ProcessStatus.FAILED,
+            ProcessedMedia.work_dir.isnot(None),
+            ProcessedMedia.updated_at < cutoff,
+        )
+        .all()
+    )
+    for media in stale:
+        shutil.rmtree(media.work_dir, ignore_errors=True)
+        media.work_dir = None
+        media.stage_manifest = None
+        removed += 1
+    db.commit()
+
+    if work_root.is_dir():
+        in_use = {
+            os.path.abspath(path)
+            for (path,) in db.query(ProcessedMedia.work_dir).filter(ProcessedMedia.work_dir.isnot(None))
+        }
+        oldest = time.time() - ttl_seconds
+        for entry in work_root.iterdir():
+            if entry.is_dir() and os.path.abspath(entry) not in in_use and entry.stat().st_mtime < oldest:
+                shutil.rmtree(entry, ignore_errors=True)
+                removed += 1
+    return removed
+
+
+class Worker:
+    """
+    One queue consumer. `run(stop)` loops until `stop` is set; `run_once()`
+    processes at most one job (returns False when the queue was empty).
+    """
+
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        session_factory: sessionmaker = SessionLocal,
+        run_job: Callable[..., None] = run_media_job,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        poll_seconds: float = DEFAULT_POLL_SECONDS,
+    ) -> None:
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        self.session_factory = session_factory
+        # Called as run_job(media_id, lease_lost=event); see run_media_job.
+        self.run_job = run_job
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self._next_sweep = 0.0
+
+    def _heartbeat_loop(self, job_id: int, done: threading.Event, lease_lost: threading.Event) -> None:
+        db = self.session_factory()
+        try:
+            while not done.wait(self.lease_seconds / 3):
+                if not heartbeat(db, job_id, self.worker_id, self.lease_seconds):
+                    logger.warning(f"[worker {self.worker_id}] lost lease on job {job_id}, stopping it")
+                    lease_lost.set()
+                    return
+        except Exception as e:
+            # No more renewals: the lease will expire and be re-leased.
+            logger.error(f"[worker {self.worker_id}] heartbeat failed for job {job_id}, stopping it: {e}")
+            lease_lost.set()
+        finally:
+            db.close()
+
+    def run_once(self) -> bool:
+        db = self.session_factory()
+        try:
+            for media_id in reap_expired(db):
+                _mark_media(db, media_id, ProcessStatus.FAILED, "Failed", "Worker stopped responding")
+            if WORK_DIR_TTL_SECONDS > 0 and time.monotonic() >= self._next_sweep:
+                self._next_sweep = time.monotonic() + SWEEP_INTERVAL_SECONDS
+                removed = sweep_work_dirs(db, WORK_DIR_TTL_SECONDS)
+                if removed:
+                    logger.info(f"[worker {self.worker_id}] removed {removed} expired work dirs")
+
+            job = lease_job(db, self.worker_id, self.lease_seconds)
+            if job is None:
+                return False
+            job_id, media_id = job.id, job.media_id
+            logger.info(f"[worker {self.worker_id}] job {job_id} (media {media_id}), attempt {job.attempts}/{job.max_attempts}")
+
+            done = threading.Event()
+            lease_lost = threading.Event()
+            beat = threading.Thread(target=self._heartbeat_loop, args=(job_id, done, lease_lost), daemon=True)
+            beat.start()
+            try:
+                self.run_job(media_id, lease_lost=lease_lost)
+            except Exception as exc:
+                logger.exception(f"[worker {self.worker_id}] job {job_id} failed")
+                done.set()
+                status = fail_job(db, job_id, self.worker_id, str(exc))
+                if status == JobStatus.FAILED:
+                    _mark_media(db, media_id, ProcessStatus.FAILED, "Failed", str(exc))
+                elif status == JobStatus.QUEUED:
+                    _mark_media(db, media_id, ProcessStatus.CREATED, "Queued for retry", str(exc))
+            else:
+                done.set()
+                if not complete_job(db, job_id, self.worker_id):
+                    logger.warning(f"[worker {self.worker_id}] job {job_id} finished after its lease was lost")
+            finally:
+                beat.join()
+            return True
+        finally:
+            db.close()
+
+    def run(self, stop: threading.Event) -> None:
+        logger.info(f"[worker {self.worker_id}] started")
+        while not stop.is_set():
+            try:
+                if not self.run_once():
+                    stop.wait(self.poll_seconds)
+            except Exception as e:
+                # DB hiccup: back off and keep serving.
+                logger.error(f"[worker {self.worker_id}] {e}")
+                stop.wait(self.poll_seconds)
+        logger.info(f"[worker {self.worker_id}] stopped")
+
+
+def start_embedded_workers(count: int) -> Callable[[], None]:
+    """Start `count` worker threads in this process; returns a stop function."""
+    stop = threading.Event()
+    threads: List[threading.Thread] = []
+    for i in range(count):
+        worker = Worker(worker_id=f"{socket.gethostname()}:{os.getpid()}:embedded-{i}")
+        t = threading.Thread(target=worker.run, args=(stop,), name=f"aegis-worker-{i}", daemon=True)
+        t.start()
+        threads.append(t)
+
+    def stop_all() -> None:
+        stop.set()
+        for t in threads:
+            t.join()
+
+    return stop_all
+
+
+def _worker_process(index: int, lease_seconds: float, poll_seconds: float, metrics_port: int = 0) -> None:
+    # Forked children must not reuse the parent's pooled connections.
+    engine.dispose(close=False)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    if metrics_port:
+        from src.aegisai.runtime.metrics import serve_metrics
+        serve_metrics(metrics_port + index)
+        logger.info(f"[worker {index}] metrics on :{metrics_port + index}/metrics")
+
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+
+    # Pay the pipeline imports / Speech channel setup before the first lease.
+    if os.getenv("AEGIS_SPEECH_WARMUP", "1") != "0":
+        from .services.pipeline_wrapper import warm_up_pipeline
+        warm_up_pipeline()
+
+    worker = Worker(
+        worker_id=f"{socket.gethostname()}:{os.getpid()}:{index}",
+        lease_seconds=lease_seconds,
+        poll_seconds=poll_seconds,
+    )
+    worker.run(stop)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="aegisai-worker", description="Run AegisAI pipeline workers.")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("AEGIS_WORKERS", "1")))
+    parser.add_argument("--lease-seconds", type=float, default=DEFAULT_LEASE_SECONDS)
+    parser.add_argument("--poll-seconds", type=float, default=DEFAULT_POLL_SECONDS)
+    parser.add_argument(
+        "--metrics-port", type=int, default=int(os.getenv("AEGIS_METRICS_PORT", "0")),
+        help="Serve Prometheus metrics on this port (+ worker index); 0 = off",
+    )
+    args = parser.parse_args(argv)
+
+    from .db import init_db
+    init_db()
+
+    if args.workers <= 1:
+        _worker_process(0, args.lease_seconds, args.poll_seconds, args.metrics_port)
+        return
+
+    procs = [
+        multiprocessing.Process(
+            target=_worker_process,
+            args=(i, args.lease_seconds, args.poll_seconds, args.metrics_port),
+            name=f"aegisai-worker-{i}",
+        )
+        for i in range(args.workers)
+    ]
+    for p in procs:
+        p.start()
+
+    def forward(signum, _frame):
+        for p in procs:
+            if p.is_alive():
+                os.kill(p.pid, signum)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for p in procs:
+        p.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -190,7 +190,6 @@ def start_backend():
         print("✅ Google credentials configured")
     else:
         print("⚠️  Warning: aegis-key.json not found")
-    
     # Change to script directory and start backend
     os.chdir(SCRIPT_DIR)
     sys.path.insert(0, str(SCRIPT_DIR))
@@ -0,0 +1,41 @@
+import wave
+
+import numpy as np
+
+from src.aegisai.audio.audio_source import WavAudioSource, open_audio_source, read_wav_format
+
+
+def _write_wav(path, samples, rate=16000):
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(samples.tobytes())
+
+
+def test_read_wav_format(tmp_path):
+    path = tmp_path / "a.wav"
+    _write_wav(path, np.zeros(100, dtype=np.int16), rate=8000)
+    fmt = read_wav_format(str(path))
+    assert (fmt.channels, fmt.sample_rate, fmt.bits_per_sample) == (1, 8000, 16)
+    assert fmt.data_size == 200
+
+
+def test_wav_source_chunks_are_zero_copy_windows(tmp_path):
+    path = tmp_path / "a.wav"
+    samples = np.arange(16000 * 2 + 4000, dtype=np.int16)
+    _write_wav(path, samples)
+
+    source = open_audio_source(str(path))
+    assert isinstance(source, WavAudioSource)
+
+    chunks = list(source.iter_chunks(1.0))
+    assert [c.start_ts for c in chunks] == [0.0, 1.0, 2.0]
+    assert [c.duration for c in chunks] == [1.0, 1.0, 0.25]
+    assert all(isinstance(c.pcm, memoryview) for c in chunks)
+
+    joined = np.frombuffer(b"".join(bytes(c.pcm) for c in chunks), dtype=np.int16)
+    assert np.array_equal(joined, samples)
+
+    del chunks
+    source.close()
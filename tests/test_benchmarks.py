@@ -0,0 +1,84 @@
+import os
+
+import pytest
+from google.api_core import exceptions as api_exceptions
+
+from benchmarks.fakes import FakeBackends, FakeConfig
+from benchmarks.fixtures import FixtureSpec, ffmpeg_command, fixture_matrix
+from benchmarks.run import build_cases, compare
+from src.aegisai.audio.speech_to_text import get_speech_backend
+from src.aegisai.vision.label_detection import analyze_labels
+from src.aegisai.vision.safe_search import analyze_safesearch
+
+
+@pytest.fixture
+def frames(tmp_path):
+    paths = []
+    for i in range(40):
+        p = tmp_path / f"frame_{i}.jpg"
+        p.write_bytes(f"frame-{i}".encode())
+        paths.append(str(p))
+    return paths
+
+
+def test_fake_backends_are_deterministic_and_count_requests(frames, monkeypatch):
+    monkeypatch.setenv("AEGIS_TRANSCRIPT_CACHE", "0")
+    cfg = FakeConfig(latency=0.0, flag_rate=0.3, profanity_rate=1.0)
+
+    def run():
+        with FakeBackends(cfg) as fakes:
+            adult = [int(analyze_safesearch(p).adult) for p in frames]
+            labels = analyze_labels(frames[0])
+            speech = get_speech_backend().transcribe_pcm(b"\x01\x02" * 16000)
+            silent = get_speech_backend().transcribe_pcm(bytes(32000))
+        return fakes, adult, labels, speech, silent
+
+    fakes, adult, labels, speech, silent = run()
+    assert run()[1] == adult
+    assert 0 < adult.count(4) < len(frames)
+    assert labels and {"description", "score"} <= set(labels[0])
+    assert len(speech["words"]) == 2 and "damn" in [w["word"] for w in speech["words"]]
+    assert silent == {"transcripts": [], "words": []}
+    assert fakes.stats()["calls"] == {"vision.safe_search": 40, "vision.label_detection": 1, "stt.recognize": 2}
+
+
+def test_failure_injection_raises_service_unavailable(frames):
+    with FakeBackends(FakeConfig(latency=0.0, failure_rate=1.0)) as fakes:
+        with pytest.raises(api_exceptions.ServiceUnavailable):
+            analyze_safesearch(frames[0])
+    assert fakes.stats()["failures"] == {"vision.safe_search": 1}
+
+
+def test_cases_match_media_type_and_baseline_comparison():
+    specs = fixture_matrix([10.0], ["640x360"], ["tone"], ["bars_speech"])
+    assert "anoisesrc" in " ".join(ffmpeg_command(FixtureSpec("audio", "speech", 5.0), "x.wav"))
+
+    cases = build_cases(["AUDIO_FILE_FILTER", "VIDEO_FILE_AUDIO_VIDEO"], specs, FakeConfig(), 2.0)
+    assert [c["case"] for c in cases] == [
+        "AUDIO_FILE_FILTER/audio-tone-10s",
+        "VIDEO_FILE_AUDIO_VIDEO/video-bars_speech-10s-640x360",
+    ]
+
+    base = [{"case": "a", "status": "ok", "wall_seconds": 10.0, "realtime_factor": 2.0, "api_calls": 20}]
+    now = [{"case": "a", "status": "ok", "wall_seconds": 12.0, "realtime_factor": 1.9, "api_calls": 20}]
+    rows = {r["metric"]: r for r in compare(now, base, tolerance=0.1)}
+    assert rows["wall_seconds"]["regressed"] and rows["wall_seconds"]["change"] == pytest.approx(0.2)
+    assert not rows["realtime_factor"]["regressed"] and not rows["api_calls"]["regressed"]
+
+
+def test_micro_scaling_exponent_and_every_benchmark_runs():
+    from benchmarks import micro
+
+    timings = [micro.Timing(n, 1, 1, t, t, t, 0.0) for n, t in ((10, 1e-4), (100, 1e-2), (1000, 1.0))]
+    assert micro.scaling_exponent(timings) == pytest.approx(2.0)
+    assert micro.measure(lambda: sum(range(100)), 100, repeats=3, warmup=0, min_time=0.001).rounds == 3
+
+    try:
+        for bench in micro.BENCHMARKS:
+            result = micro.run_bench(bench, bench.sizes[:2], repeats=1, warmup=0, min_time=0.0)
+            assert [t["n"] for t in result["timings"]] == list(bench.sizes[:2])
+            assert result["exponent"] is not None
+    finally:
+        for path in micro._TEMP_FILES:
+            os.remove(path)
+        micro._TEMP_FILES.clear()
@@ -0,0 +1,156 @@
+import time
+
+import pytest
+from google.api_core import exceptions as api_exceptions
+from google.cloud import speech, vision
+
+from src.aegisai.runtime import cassette as cassette_mod
+from src.aegisai.runtime.cassette import Cassette, CassetteMiss, RecordingClient, ReplayClient
+from src.aegisai.vision.safe_search import Likelihood, analyze_safesearch
+
+
+class _StubVision:
+    def __init__(self):
+        self.calls = 0
+
+    def safe_search_detection(self, image):
+        self.calls += 1
+        time.sleep(0.02)
+        if image.content == b"throttled":
+            raise api_exceptions.ResourceExhausted("quota")
+        annotation = vision.SafeSearchAnnotation(adult=vision.Likelihood.LIKELY, violence=vision.Likelihood.UNLIKELY)
+        return vision.AnnotateImageResponse(safe_search_annotation=annotation)
+
+    def recognize(self, config, audio):
+        self.calls += 1
+        alt = speech.SpeechRecognitionAlternative(transcript="hello there")
+        return speech.RecognizeResponse(results=[speech.SpeechRecognitionResult(alternatives=[alt])])
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    path = str(tmp_path / "run.cassette")
+    stub = _StubVision()
+    rec = RecordingClient(stub, Cassette(path, mode="record"))
+    rec.safe_search_detection(image=vision.Image(content=b"frame-1"))
+    with pytest.raises(api_exceptions.ResourceExhausted):
+        rec.safe_search_detection(image=vision.Image(content=b"throttled"))
+    config = speech.RecognitionConfig(language_code="en-US", sample_rate_hertz=16000)
+    rec.recognize(config=config, audio=speech.RecognitionAudio(content=b"\x01\x02"))
+    assert stub.calls == 3 and rec._cassette.stats()["entries"] == 3
+    rec._cassette.close()
+    return path, config
+
+
+def test_replay_returns_recorded_responses_errors_and_latency(recorded):
+    path, config = recorded
+    replay = ReplayClient(Cassette(path, mode="replay", latency="recorded"))
+
+    start = time.perf_counter()
+    response = replay.safe_search_detection(image=vision.Image(content=b"frame-1"))
+    assert time.perf_counter() - start >= 0.015
+    assert response.safe_search_annotation.adult == vision.Likelihood.LIKELY
+
+    with pytest.raises(api_exceptions.ResourceExhausted):
+        replay.safe_search_detection(image=vision.Image(content=b"throttled"))
+    stt = replay.recognize(config=config, audio=speech.RecognitionAudio(content=b"\x01\x02"))
+    assert stt.results[0].alternatives[0].transcript == "hello there"
+
+    with pytest.raises(CassetteMiss):
+        replay.recognize(config=config, audio=speech.RecognitionAudio(content=b"other"))
+    with pytest.raises(AttributeError):
+        replay.transport
+    assert replay._cassette.stats()["misses"] == 1
+
+
+def test_use_cassette_replays_through_the_vision_wrappers(recorded, tmp_path):
+    path, _ = recorded
+    frame = tmp_path / "frame.jpg"
+    frame.write_bytes(b"frame-1")
+    try:
+        cas = cassette_mod.use_cassette(path, mode="replay", latency="zero")
+        assert analyze_safesearch(str(frame)).adult == Likelihood.LIKELY
+        assert cas.stats()["replayed"] == 1
+    finally:
+        cassette_mod.use_cassette(None)
+
+
+class _StubStreamingSpeech:
+    """Answers every `streaming_recognize` with one final result per request stream."""
+
+    def __init__(self):
+        self.streams = 0
+
+    def streaming_recognize(self, config, requests):
+        self.streams += 1
+        audio = b"".join(r.audio_content for r in requests)
+        seconds = len(audio) / (2 * config.config.sample_rate_hertz)
+        word = speech.WordInfo(word="damn", start_time={"seconds": 0}, end_time={"nanos": 500_000_000})
+        alt = speech.SpeechRecognitionAlternative(transcript="damn", words=[word])
+        result = speech.StreamingRecognitionResult(
+            alternatives=[alt], is_final=True, result_end_time={"seconds": int(seconds)},
+        )
+        time.sleep(0.02)
+        yield speech.StreamingRecognizeResponse(results=[result])
+
+
+def _recognize_stream(feeds):
+    from src.aegisai.audio.speech_to_text import get_speech_backend
+    from src.aegisai.audio.streaming_stt import StreamingRecognizer
+
+    events = []
+    rec = StreamingRecognizer(on_event=events.append, backend=get_speech_backend())
+    for pcm, ts in feeds:
+        rec.feed(pcm, ts)
+    rec.close()
+    return events
+
+
+def test_streaming_recognize_records_and_replays_through_the_recognizer(tmp_path):
+    from src.aegisai.audio.speech_to_text import get_speech_backend, set_speech_client_factory
+
+    path = str(tmp_path / "stream.cassette")
+    feeds = [(b"\1\0" * 16000, 30.0)]
+    stub = _StubStreamingSpeech()
+    recording = Cassette(path, mode="record")
+    try:
+        set_speech_client_factory(lambda: RecordingClient(stub, recording))
+        recorded_events = _recognize_stream(feeds)
+        assert stub.streams == 1 and recording.stats()["entries"] == 1
+        recording.close()
+
+        cas = cassette_mod.use_cassette(path, mode="replay", latency="zero")
+        get_speech_backend().warm_up()   # no channel to wait for
+        replayed_events = _recognize_stream(feeds)
+        assert replayed_events == recorded_events
+        assert replayed_events[0].words == [{"word": "damn", "start": 30.0, "end": 30.5}]
+        assert cas.stats()["replayed"] == 1
+
+        # other audio is a different stream: the session ends with CassetteMiss
+        assert _recognize_stream([(b"\2\0" * 16000, 0.0)]) == []
+        assert cas.stats()["misses"] == 1
+    finally:
+        cassette_mod.use_cassette(None)
+
+
+def test_replayed_stream_keeps_recorded_latency_and_errors(tmp_path):
+    path = str(tmp_path / "stream.cassette")
+    config = speech.StreamingRecognitionConfig(config=speech.RecognitionConfig(sample_rate_hertz=16000))
+    requests = [speech.StreamingRecognizeRequest(audio_content=b"\0\0" * 800)]
+
+    class _Dropped(_StubStreamingSpeech):
+        def streaming_recognize(self, config, requests):
+            yield from super().streaming_recognize(config, requests)
+            raise api_exceptions.ServiceUnavailable("stream reset")
+
+    rec = RecordingClient(_Dropped(), Cassette(path, mode="record"))
+    with pytest.raises(api_exceptions.ServiceUnavailable):
+        list(rec.streaming_recognize(config=config, requests=iter(requests)))
+
+    replay = ReplayClient(Cassette(path, mode="replay", latency="recorded"))
+    start = time.perf_counter()
+    responses = replay.streaming_recognize(config=config, requests=iter(requests))
+    assert next(responses).results[0].alternatives[0].transcript == "damn"
+    assert time.perf_counter() - start >= 0.015
+    with pytest.raises(api_exceptions.ServiceUnavailable):
+        next(responses)
@@ -0,0 +1,159 @@
+import dataclasses
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from src.aegisai.pipeline import file_runner
+from src.aegisai.pipeline.checkpoint import StageCheckpoint, job_key, read_manifest
+from src.aegisai.pipeline.stages import Stage, StageGraph, StageScheduler
+from src.aegisai.pipeline.use_cases import VIDEO_FILE_AUDIO_VIDEO
+from src.aegisai.vision.vision_rules import FrameModerationResult
+
+
+def test_scheduler_resumes_completed_stages(tmp_path):
+    calls = []
+    fail = {"render": True}
+
+    def extract(tmpdir):
+        calls.append("extract")
+        path = os.path.join(tmpdir, "audio.wav")
+        open(path, "w").close()
+        return path
+
+    def analyze(audio_path):
+        calls.append("analyze")
+        return [(1.0, 2.0)]
+
+    def render(intervals):
+        calls.append("render")
+        if fail["render"]:
+            raise RuntimeError("ffmpeg died")
+        return len(intervals)
+
+    graph = StageGraph([
+        Stage("extract", extract, ("tmpdir",), ("audio_path",), "ffmpeg"),
+        Stage("analyze", analyze, ("audio_path",), ("intervals",), "cloud-io"),
+        Stage("render", render, ("intervals",), ("rendered",), "ffmpeg"),
+    ])
+    work = str(tmp_path / "job")
+
+    with pytest.raises(RuntimeError):
+        StageScheduler(checkpoint=StageCheckpoint(work, "k")).run(graph, {"tmpdir": work})
+    assert sorted(read_manifest(work)["stages"]) == ["analyze", "extract"]
+
+    fail["render"] = False
+    calls.clear()
+    run = StageScheduler(checkpoint=StageCheckpoint(work, "k")).run(graph, {"tmpdir": work})
+    assert calls == ["render"]
+    assert run.resumed == ("extract", "analyze")
+    assert run.artifacts["intervals"] == [(1.0, 2.0)]
+
+    # Missing file artifact: the producer is not restored, but nothing left needs it.
+    os.remove(os.path.join(work, "audio.wav"))
+    calls.clear()
+    run = StageScheduler(checkpoint=StageCheckpoint(work, "k")).run(graph, {"tmpdir": work})
+    assert calls == []
+    assert run.resumed == ("analyze", "render")
+
+    # Another job key starts over.
+    calls.clear()
+    StageScheduler(checkpoint=StageCheckpoint(work, "other")).run(graph, {"tmpdir": work})
+    assert calls == ["extract", "analyze", "render"]
+
+
+def test_file_job_retry_skips_stt_and_vision(monkeypatch, tmp_path):
+    calls = []
+    fail = {"mute": True}
+
+    def fake_extract(src, dst):
+        calls.append("extract")
+        open(dst, "w").close()
+
+    def fake_audio(audio_path, output_audio_path, chunk_seconds, subtitle_path, policy):
+        calls.append("stt")
+        return [(1.0, 2.0)]
+
+    def fake_frames(src, out, fps, cb):
+        calls.append("frames")
+        frame = os.path.join(out, "f0.jpg")
+        open(frame, "w").close()
+        return [(frame, 0.0)]
+
+    def fake_moderate(frames, fps, progress_callback=None, policy=None):
+        calls.append("vision")
+        return [(0.0, 1.0)], [FrameModerationResult(timestamp=0.0, safesearch={"adult": 4}, labels={}, block=True)]
+
+    def fake_localize(frames, results, progress_callback=None, policy=None):
+        calls.append("localize")
+        assert results[0].block and results[0].safesearch == {"adult": 4}
+        return [{"timestamp": 0.0, "boxes": [(0.1, 0.1, 0.5, 0.5)], "labels": ["Knife"]}]
+
+    def fake_blur(video_path, intervals, output_video_path):
+        calls.append("blur")
+        open(output_video_path, "w").close()
+
+    def fake_mute(video_path, mute_intervals, output_video_path):
+        calls.append("mute")
+        if fail["mute"]:
+            raise RuntimeError("encoder crashed")
+
+    monkeypatch.setattr(file_runner, "extract_audio_track", fake_extract)
+    monkeypatch.setattr(file_runner, "extract_subtitles_from_video", lambda src, dst: False)
+    monkeypatch.setattr(file_runner, "filter_audio_file", fake_audio)
+    monkeypatch.setattr(file_runner, "sample_frames", fake_frames)
+    monkeypatch.setattr(file_runner, "moderate_frames", fake_moderate)
+    monkeypatch.setattr(file_runner, "localize_frames", fake_localize)
+    monkeypatch.setattr(file_runner, "blur_intervals_in_video", fake_blur)
+    monkeypatch.setattr(file_runner, "mute_intervals_in_video", fake_mute)
+
+    src = tmp_path / "in.mp4"
+    src.write_bytes(b"x")
+    cfg = dataclasses.replace(VIDEO_FILE_AUDIO_VIDEO, work_dir=str(tmp_path / "work"))
+
+    with pytest.raises(RuntimeError):
+        file_runner.run_file_job(cfg, str(src), str(tmp_path / "out.mp4"))
+    assert sorted(calls) == ["blur", "extract", "frames", "localize", "mute", "stt", "vision"]
+
+    fail["mute"] = False
+    calls.clear()
+    result = file_runner.run_file_job(cfg, str(src), str(tmp_path / "out.mp4"))
+    assert calls == ["mute"]
+    assert result["audio_intervals"] == [(1.0, 2.0)]
+    assert result["video_intervals"] == [(0.0, 1.0)]
+    assert set(result["resumed_stages"]) == {
+        "subtitles", "extract_audio", "analyze_audio", "extract_frames", "moderate_frames",
+        "localize_objects", "blur",
+    }
+
+
+def test_load_checks_paths_nested_in_outputs(tmp_path):
+    work = str(tmp_path / "job")
+    stage = Stage("extract_frames", lambda: None, (), ("frames",), "ffmpeg")
+    frames_dir = os.path.join(work, "frames")
+    os.makedirs(frames_dir)
+    frames = [(os.path.join(frames_dir, f"f{i}.jpg"), float(i)) for i in range(3)]
+    for path, _ in frames:
+        open(path, "w").close()
+
+    checkpoint = StageCheckpoint(work, "k")
+    checkpoint.save(stage, {"frames": frames})
+    assert StageCheckpoint(work, "k").load(stage) == {"frames": frames}
+
+    os.remove(frames[1][0])
+    assert StageCheckpoint(work, "k").load(stage) is None
+
+
+def test_job_key_covers_sample_fps_and_subtitle_contents(tmp_path):
+    src = tmp_path / "in.mp4"
+    src.write_bytes(b"x")
+    subs = tmp_path / "in.srt"
+    subs.write_text("1\n00:00:01,000 --> 00:00:02,000\nhello\n")
+    cfg = dataclasses.replace(VIDEO_FILE_AUDIO_VIDEO, subtitle_path=str(subs))
+    key = job_key(cfg, str(src))
+
+    # sample_fps is read with getattr by the file runner
+    assert job_key(SimpleNamespace(sample_fps=1.0), str(src)) != job_key(SimpleNamespace(sample_fps=2.0), str(src))
+
+    subs.write_text("1\n00:00:01,000 --> 00:00:02,000\nhello, edited\n")
+    assert job_key(cfg, str(src)) != key
@@ -0,0 +1,75 @@
+import wave
+
+import numpy as np
+
+from src.aegisai.audio.audio_source import open_audio_source
+from src.aegisai.audio.chunk_planner import ChunkPlanner
+
+SR = 8000
+
+
+def _tone(seconds, amp=0.3):
+    t = np.arange(int(SR * seconds)) / SR
+    return (amp * np.sin(2 * np.pi * 300 * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t)) * 32767 / 1.5)
+
+
+def _write(path, parts):
+    samples = np.concatenate(parts).astype(np.int16)
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SR)
+        w.writeframes(samples.tobytes())
+
+
+def test_planner_cuts_in_pauses_and_skips_leading_silence(tmp_path):
+    path = tmp_path / "speech.wav"
+    silence = lambda s: np.zeros(int(SR * s))
+    # 2 s silence, speech until 9 s, 0.4 s pause, speech until 17 s, pause, speech to 25.5 s
+    _write(path, [silence(2), _tone(7), silence(0.4), _tone(7.6), silence(0.5), _tone(8)])
+
+    planner = ChunkPlanner(target_seconds=8, max_seconds=12, min_seconds=2, search_seconds=3)
+    with open_audio_source(str(path)) as source:
+        chunks = [(c.start_ts, c.start_ts + c.duration) for c in source.iter_planned_chunks(planner)]
+
+    assert chunks[0][0] == 2.0
+    # Each cut falls inside a pause, not inside speech.
+    assert 9.0 <= chunks[0][1] <= 9.4
+    assert 17.0 <= chunks[1][1] <= 17.5
+    assert chunks[-1][1] == 25.5
+    assert all(b - a <= 12 for a, b in chunks)
+
+
+def test_planner_respects_max_length_without_pauses(tmp_path):
+    path = tmp_path / "tone.wav"
+    _write(path, [_tone(30)])
+
+    planner = ChunkPlanner(target_seconds=8, max_seconds=10, min_seconds=2, search_seconds=2)
+    with open_audio_source(str(path)) as source:
+        chunks = list(source.iter_planned_chunks(planner))
+
+    assert all(c.duration <= 10 for c in chunks)
+    assert sum(c.duration for c in chunks) == 30.0
+    assert [c.index for c in chunks] == list(range(len(chunks)))
+
+
+def test_explicit_chunk_seconds_selects_fixed_chunks(tmp_path, monkeypatch):
+    from src.aegisai.audio import filter_file, workers
+
+    path = tmp_path / "tone.wav"
+    _write(path, [_tone(30)])
+    durations = []
+
+    def fake_transcribe(pcm, sample_rate):
+        durations.append(round(len(pcm) / 2 / sample_rate, 3))
+        return {"transcripts": [], "words": []}
+
+    monkeypatch.setattr(workers, "transcribe_pcm", fake_transcribe)
+    monkeypatch.setattr(filter_file, "get_speech_backend", lambda: None)
+
+    filter_file.filter_audio_file(str(path), chunk_seconds=10, use_vad=False)
+    assert sorted(durations) == [10.0, 10.0, 10.0]
+
+    durations.clear()
+    filter_file.filter_audio_file(str(path), use_vad=False)   # planned chunks
+    assert sum(durations) == 30.0 and durations != [10.0, 10.0, 10.0]
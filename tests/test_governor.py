@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from src.aegisai.runtime.governor import CLOUD_IO, FFMPEG_ENCODE, MEMORY_MB, ResourceGovernor
+
+
+def _peak_concurrency(governor, pool, tasks, amount=1):
+    active = peak = 0
+    lock = threading.Lock()
+
+    def task():
+        nonlocal active, peak
+        with governor.acquire(pool, amount):
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+
+    threads = [threading.Thread(target=task) for _ in range(tasks)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return peak
+
+
+def test_pools_bound_concurrency_and_record_waits():
+    governor = ResourceGovernor({CLOUD_IO: 3, MEMORY_MB: 1000})
+    assert _peak_concurrency(governor, CLOUD_IO, 12) == 3
+    # weighted: two 400 MB jobs fit in 1000 MB, a third waits
+    assert _peak_concurrency(governor, MEMORY_MB, 6, amount=400) == 2
+
+    stats = governor.stats()[CLOUD_IO]
+    assert stats.acquired == 12 and stats.in_use == 0
+    assert stats.waited > 0 and stats.max_wait >= 0.015 and stats.mean_wait > 0
+
+    with pytest.raises(ValueError):
+        with governor.acquire("gpu"):
+            pass
+
+
+def test_timeout_reconfigure_and_cross_process_slots(tmp_path):
+    governor = ResourceGovernor({FFMPEG_ENCODE: 1}, lock_dir=str(tmp_path))
+    other = ResourceGovernor({FFMPEG_ENCODE: 1}, lock_dir=str(tmp_path))   # e.g. another worker process
+
+    with governor.acquire(FFMPEG_ENCODE):
+        with pytest.raises(TimeoutError):
+            with governor.acquire(FFMPEG_ENCODE, timeout=0.05):
+                pass
+        # the slot file is held, so a second governor sharing the dir waits too
+        with pytest.raises(TimeoutError):
+            with other.acquire(FFMPEG_ENCODE, timeout=0.1):
+                pass
+    with other.acquire(FFMPEG_ENCODE, timeout=1):
+        pass
+
+    governor.configure({FFMPEG_ENCODE: 0})   # unlimited
+    with governor.acquire(FFMPEG_ENCODE), governor.acquire(FFMPEG_ENCODE, timeout=0.05):
+        assert governor.stats()[FFMPEG_ENCODE].in_use == 2
+
+
+def test_job_reserves_memory_without_reconfiguring_pools():
+    from types import SimpleNamespace
+
+    from src.aegisai.pipeline.file_runner import _job_memory
+    from src.aegisai.runtime.governor import get_governor
+
+    before = {name: s.limit for name, s in get_governor().stats().items()}
+    with _job_memory(SimpleNamespace(memory_mb=1)):
+        assert get_governor().stats()[MEMORY_MB].in_use == 1
+    assert {name: s.limit for name, s in get_governor().stats().items()} == before
+    assert get_governor().stats()[MEMORY_MB].in_use == 0
@@ -0,0 +1,39 @@
+from src.aegisai.audio.intervals import detect_toxic_segments, toxic_word_stream
+
+
+def _words(*items):
+    return [{"word": w, "start": s, "end": e} for w, s, e in items]
+
+
+def test_single_word_padding_is_unchanged():
+    words = _words(("well", 0.0, 0.3), ("shit", 1.0, 1.3), ("then", 2.0, 2.2))
+    assert detect_toxic_segments(words) == [(0.35, 1.95)]
+
+
+def test_multi_word_phrase_is_one_span():
+    words = _words(
+        ("you", 0.0, 0.3),
+        ("son", 0.4, 0.6),
+        ("of", 0.6, 0.7),
+        ("a", 0.7, 0.75),
+        ("gun", 0.8, 1.1),
+        ("piss", 3.0, 3.2),
+        ("off", 3.3, 3.5),
+    )
+    # "son of a gun" is not listed; "piss off" (and "piss") are.
+    [(start, end)] = detect_toxic_segments(words)
+    assert 1.1 < start < 3.0 and end > 3.5
+
+
+def test_phrase_across_calls_with_shared_stream():
+    stream = toxic_word_stream()
+    first = _words(("son", 10.0, 10.2), ("of", 10.2, 10.3), ("a", 10.3, 10.4))
+    second = _words(("bitch", 10.5, 10.8), ("okay", 11.5, 11.8))
+
+    assert detect_toxic_segments(first, stream=stream) == []
+    [(start, end)] = detect_toxic_segments(second, stream=stream)
+    assert start <= 10.0 and 10.8 < end < 11.5
+
+    # Without the shared stream only the last word matches.
+    [(start, _)] = detect_toxic_segments(second)
+    assert start > 10.2
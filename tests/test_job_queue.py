@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.backend import job_queue
+from src.backend.db import Base
+from src.backend.models import JobStatus, PipelineJob, ProcessStatus, ProcessedMedia, User, utc_now
+from src.backend import worker as worker_mod
+from src.backend.worker import LeaseLost, Worker, run_media_job, sweep_work_dirs
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'queue.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    yield factory
+    engine.dispose()
+
+
+def _media(db):
+    user = User(email="a@b.c", hashed_password="x")
+    db.add(user)
+    db.commit()
+    media = ProcessedMedia(user_id=user.id, input_path="in.mp4", input_type="video", file_hash="h")
+    db.add(media)
+    db.commit()
+    return media.id
+
+
+def test_lease_is_exclusive_and_expired_leases_are_retaken(session_factory):
+    db = session_factory()
+    job = job_queue.enqueue_job(db, _media(db), max_attempts=2)
+
+    leased = job_queue.lease_job(db, "w1", lease_seconds=30)
+    assert leased.id == job.id and leased.attempts == 1 and leased.lease_owner == "w1"
+    assert job_queue.lease_job(session_factory(), "w2") is None
+    assert job_queue.heartbeat(db, job.id, "w1")
+    assert not job_queue.heartbeat(db, job.id, "w2")
+
+    # w1 dies: once the lease expires another worker takes over
+    db.query(PipelineJob).update({PipelineJob.lease_expires_at: utc_now() - timedelta(seconds=1)})
+    db.commit()
+    retaken = job_queue.lease_job(session_factory(), "w2")
+    assert retaken.lease_owner == "w2" and retaken.attempts == 2
+    assert not job_queue.complete_job(db, job.id, "w1")
+
+    # expired on its last attempt: not leasable, reaped as failed
+    db.query(PipelineJob).update({PipelineJob.lease_expires_at: utc_now() - timedelta(seconds=1)})
+    db.commit()
+    assert job_queue.lease_job(db, "w3") is None
+    assert job_queue.reap_expired(db) == [job.media_id]
+    db.expire_all()
+    assert db.get(PipelineJob, job.id).status == JobStatus.FAILED
+
+
+def test_worker_retries_with_backoff_then_fails_media(session_factory, monkeypatch):
+    monkeypatch.setattr(job_queue, "RETRY_BACKOFF_SECONDS", 0.0)
+    monkeypatch.setattr(worker_mod, "WORK_DIR_TTL_SECONDS", 0.0)
+    db = session_factory()
+    media_id = _media(db)
+    job = job_queue.enqueue_job(db, media_id, max_attempts=2)
+    calls = []
+
+    def flaky(mid, lease_lost):
+        calls.append(mid)
+        raise RuntimeError("stt down")
+
+    worker = Worker("w", session_factory=session_factory, run_job=flaky, lease_seconds=30)
+    assert worker.run_once()
+    db.expire_all()
+    assert db.get(PipelineJob, job.id).status == JobStatus.QUEUED
+    assert db.get(ProcessedMedia, media_id).status == ProcessStatus.CREATED
+
+    assert worker.run_once()
+    assert not worker.run_once()
+    db.expire_all()
+    assert calls == [media_id, media_id]
+    assert db.get(PipelineJob, job.id).status == JobStatus.FAILED
+    media = db.get(ProcessedMedia, media_id)
+    assert media.status == ProcessStatus.FAILED and media.error_message == "stt down"
+
+    ok = job_queue.enqueue_job(db, media_id)
+    assert Worker("w", session_factory=session_factory, run_job=lambda mid, lease_lost: None).run_once()
+    db.expire_all()
+    assert db.get(PipelineJob, ok.id).status == JobStatus.DONE
+
+
+def _fake_pipeline(monkeypatch, tmp_path, body):
+    from src.backend.services import pipeline_wrapper
+    monkeypatch.setattr(worker_mod, "WORK_DIR", tmp_path / "work")
+    monkeypatch.setattr(worker_mod, "OUTPUTS_DIR", tmp_path / "out")
+    monkeypatch.setattr(pipeline_wrapper, "process_media", body)
+
+
+def test_lost_lease_stops_job_and_leaves_media_row(session_factory, monkeypatch, tmp_path):
+    db = session_factory()
+    media_id = _media(db)
+    lost = threading.Event()
+
+    def pipeline(progress_callback, **kwargs):
+        progress_callback(10, "Transcribing...")
+        lost.set()   # heartbeat found another owner
+        progress_callback(50, "Rendering...")
+        raise AssertionError("job kept running after losing its lease")
+
+    _fake_pipeline(monkeypatch, tmp_path, pipeline)
+    with pytest.raises(LeaseLost):
+        run_media_job(media_id, session_factory=session_factory, lease_lost=lost)
+
+    db.expire_all()
+    media = db.get(ProcessedMedia, media_id)
+    assert media.progress == 10 and media.stage_manifest is None
+
+
+def test_attempt_after_suspected_zombie_gets_fresh_work_dir(session_factory, monkeypatch, tmp_path):
+    db = session_factory()
+    media_id = _media(db)
+    media = db.get(ProcessedMedia, media_id)
+    media.status = ProcessStatus.PROCESSING   # previous attempt lost its lease mid-run
+    media.work_dir = str(tmp_path / "work" / str(media_id))
+    db.commit()
+    seen = []
+
+    def pipeline(work_dir, **kwargs):
+        seen.append(work_dir)
+        return {"output_path": "out.mp4", "segments": []}
+
+    _fake_pipeline(monkeypatch, tmp_path, pipeline)
+    run_media_job(media_id, session_factory=session_factory)
+    assert seen[0].parent == tmp_path / "work" and seen[0].name.startswith(f"{media_id}-")
+
+    # a normal retry (previous attempt ended) resumes in the shared directory
+    db.expire_all()
+    db.get(ProcessedMedia, media_id).status = ProcessStatus.CREATED
+    db.commit()
+    run_media_job(media_id, session_factory=session_factory)
+    assert seen[1] == tmp_path / "work" / str(media_id)
+
+
+def test_sweep_removes_expired_failed_and_abandoned_work_dirs(session_factory, tmp_path):
+    db = session_factory()
+    work = tmp_path / "work"
+    failed_id = _media(db)
+    user_id = db.get(ProcessedMedia, failed_id).user_id
+    queued = ProcessedMedia(user_id=user_id, input_path="in2.mp4", input_type="video", file_hash="h2")
+    db.add(queued)
+    db.commit()
+    queued_id = queued.id
+
+    dirs = {name: work / name for name in (str(failed_id), str(queued_id), f"{failed_id}-abandon", "fresh")}
+    for d in dirs.values():
+        d.mkdir(parents=True)
+        (d / "manifest.json").write_text("{}")
+    old = time.time() - 7200
+    for name in (str(failed_id), str(queued_id), f"{failed_id}-abandon"):
+        os.utime(dirs[name], (old, old))
+
+    failed = db.get(ProcessedMedia, failed_id)
+    failed.status, failed.work_dir, failed.stage_manifest = ProcessStatus.FAILED, str(dirs[str(failed_id)]), "{}"
+    db.get(ProcessedMedia, queued_id).work_dir = str(dirs[str(queued_id)])   # waiting for its retry
+    db.commit()
+    db.query(ProcessedMedia).update({ProcessedMedia.updated_at: utc_now() - timedelta(hours=2)})
+    db.commit()
+
+    assert sweep_work_dirs(db, ttl_seconds=3600, work_root=work) == 2
+    assert sorted(p.name for p in work.iterdir()) == sorted([str(queued_id), "fresh"])
+    db.expire_all()
+    assert db.get(ProcessedMedia, failed_id).work_dir is None
@@ -0,0 +1,51 @@
+import pytest
+
+from src.aegisai.moderation.metrics import MetricsCollector
+from src.aegisai.runtime.metrics import MetricsRegistry
+
+
+def test_histogram_buckets_quantiles_and_exposition():
+    registry = MetricsRegistry()
+    hist = registry.histogram("api_seconds", "Latency", ("api",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        hist.observe(value, api="stt")
+    registry.counter("frames_total", "Frames").inc(3)
+    registry.gauge("depth", "Depth", ("status",)).set_function(lambda: {("queued",): 4})
+
+    counts, total, n = hist.snapshot(api="stt")
+    assert counts == [2, 1, 1] and n == 4 and total == pytest.approx(2.65)
+    assert hist.quantile(0.5, api="stt") == pytest.approx(0.1)
+    assert 0.1 < hist.quantile(0.75, api="stt") <= 1.0
+
+    text = registry.render()
+    assert "# TYPE api_seconds histogram" in text
+    assert 'api_seconds_bucket{api="stt",le="0.1"} 2' in text
+    assert 'api_seconds_bucket{api="stt",le="+Inf"} 4' in text
+    assert 'api_seconds_count{api="stt"} 4' in text
+    assert "frames_total 3" in text
+    assert 'depth{status="queued"} 4' in text
+
+    with pytest.raises(ValueError):
+        hist.observe(1.0)   # missing label
+    with pytest.raises(ValueError):
+        registry.counter("api_seconds", "clash")
+
+
+def test_collector_keeps_its_api_on_the_registry():
+    collector = MetricsCollector()
+    for _ in range(3):
+        with collector.track_operation("moderate") as op:
+            op.api_calls = 2
+            op.cost_usd = 0.01
+    with pytest.raises(RuntimeError):
+        with collector.track_operation("moderate"):
+            raise RuntimeError("boom")
+    collector.increment("cache.hit", 3)
+    collector.increment("cache.miss")
+
+    summary = collector.get_summary()["moderate"]
+    assert summary["count"] == 4 and summary["errors"] == 1
+    assert summary["total_api_calls"] == 6
+    assert summary["total_cost_usd"] == pytest.approx(0.03)
+    assert collector.get_counters() == {"cache.hit": 3, "cache.miss": 1}
+    assert 'aegis_cache_hit_ratio{cache="cache"} 0.75' in collector.registry.render()
@@ -0,0 +1,105 @@
+import subprocess
+import sys
+import wave
+
+import numpy as np
+import pytest
+
+from src.aegisai.audio import pcm_mute
+from src.aegisai.audio.pcm_mute import (
+    apply_mute_intervals,
+    build_gain_envelope,
+    intervals_to_frames,
+    mute_wav_file,
+)
+
+
+def test_intervals_to_frames_sorts_clamps_and_drops_empty():
+    frames = intervals_to_frames([(2.0, 3.0), (0.5, 0.5), (-1.0, 1.0)], 10, total_frames=25)
+    assert frames.tolist() == [[0, 10], [20, 25]]
+
+
+def test_nested_and_overlapping_intervals_are_merged():
+    frames = intervals_to_frames([(0.0, 10.0), (1.0, 2.0), (12.0, 13.0), (12.5, 14.0), (14.0, 15.0)], 1000)
+    assert frames.tolist() == [[0, 10000], [12000, 15000]]
+
+    env, lo, hi = build_gain_envelope(5000, 100, frames, fade_frames=20)
+    assert (lo, hi) == (0, 100) and np.all(env == 0.0)
+
+
+def test_envelope_ramps_around_interval():
+    iv = intervals_to_frames([(1.0, 2.0)], 100)
+    env, lo, hi = build_gain_envelope(0, 300, iv, fade_frames=10)
+    assert (lo, hi) == (90, 210)
+    assert np.all(env[:90] == 1.0)
+    assert np.all(env[100:200] == 0.0)
+    assert np.all(np.diff(env[90:100]) < 0)
+    assert np.all(np.diff(env[200:210]) > 0)
+    assert np.all(env[210:] == 1.0)
+
+
+def test_blockwise_processing_matches_single_pass():
+    rate = 1000
+    rng = np.random.default_rng(0)
+    audio = rng.integers(-20000, 20000, size=(5000, 2), dtype=np.int16)
+    intervals = [(0.995, 1.5), (2.2, 2.3), (4.98, 6.0)]
+
+    whole = apply_mute_intervals(audio.copy(), rate, intervals, fade_ms=20)
+
+    blocks = audio.copy()
+    for start in range(0, len(blocks), 333):
+        apply_mute_intervals(blocks[start:start + 333], rate, intervals, fade_ms=20, start_frame=start)
+
+    assert np.array_equal(whole, blocks)
+    assert np.all(whole[1000:1500] == 0)
+    assert np.all(whole[4980:] == 0)
+
+
+def test_ducking_keeps_scaled_signal():
+    samples = np.full(1000, 10000, dtype=np.int16)
+    apply_mute_intervals(samples, 1000, [(0.2, 0.4)], fade_ms=0, gain=0.25)
+    assert np.all(samples[200:400] == 2500)
+    assert np.all(samples[:200] == 10000)
+
+
+def test_mute_wav_file_roundtrip(tmp_path):
+    rate = 8000
+    src = tmp_path / "in.wav"
+    dst = tmp_path / "out.wav"
+    tone = (np.sin(np.arange(rate * 2) / 5.0) * 12000).astype(np.int16)
+
+    with wave.open(str(src), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(tone.tobytes())
+
+    mute_wav_file(str(src), [(0.5, 1.0)], str(dst), fade_ms=5, block_seconds=0.3)
+
+    with wave.open(str(dst), "rb") as w:
+        assert w.getnframes() == len(tone)
+        out = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+
+    assert np.all(out[4000:8000] == 0)
+    assert np.array_equal(out[:3900], tone[:3900])
+    assert np.array_equal(out[8100:], tone[8100:])
+
+
+def test_dead_encoder_reports_stderr_and_reaps_both_processes(monkeypatch, tmp_path):
+    # Stand-ins for ffmpeg: an endless decoder and an encoder that dies at once.
+    decoder = [sys.executable, "-c", "import sys\nwhile True: sys.stdout.buffer.write(bytes(65536))"]
+    encoder = [sys.executable, "-c", "import sys; sys.stderr.write('bad codec'); sys.exit(3)"]
+    procs = []
+    real_popen = subprocess.Popen
+
+    def fake_popen(cmd, **kwargs):
+        proc = real_popen(decoder if "pipe:1" in cmd else encoder, **kwargs)
+        procs.append(proc)
+        return proc
+
+    monkeypatch.setattr(pcm_mute, "_probe_audio_format", lambda path: (8000, 1))
+    monkeypatch.setattr(pcm_mute.subprocess, "Popen", fake_popen)
+
+    with pytest.raises(RuntimeError, match="code=3.*bad codec"):
+        pcm_mute.mute_audio_file(str(tmp_path / "in.mp3"), [(0.0, 1.0)], str(tmp_path / "out.mp3"))
+    assert len(procs) == 2 and all(p.returncode is not None for p in procs)
@@ -0,0 +1,83 @@
+import random
+import re
+
+from src.aegisai.moderation.bad_words_list import (
+    BAD_WORDS,
+    find_bad_words_in_text,
+    is_bad_word,
+    normalize_text_for_matching,
+)
+from src.aegisai.moderation.matcher import PhraseMatcher, WordStreamMatcher, get_matcher
+
+
+def _legacy(text, blocklist):
+    lowered = normalize_text_for_matching(text)
+    return [w for w in blocklist if re.search(r"\b" + re.escape(w) + r"\b", lowered)]
+
+
+def test_matches_legacy_loop_on_random_text():
+    rng = random.Random(7)
+    blocklist = list(BAD_WORDS)
+    vocab = blocklist + ["the", "a", "you", "of", "son", "up", "hellish", "Fuck!", "sh1t,", "--"]
+
+    for _ in range(300):
+        text = " ".join(rng.choice(vocab) for _ in range(rng.randint(0, 12)))
+        assert find_bad_words_in_text(text, blocklist) == _legacy(text, blocklist)
+
+
+def test_custom_blocklist_order_duplicates_and_unmatchable_terms():
+    blocklist = ["hell", "Hell", "piece-of-shit", "shit", "hell", "a  b", "piece of shit"]
+    text = "What the HELL, you piece of shit!"
+
+    assert find_bad_words_in_text(text, blocklist) == _legacy(text, blocklist)
+    assert find_bad_words_in_text(text, blocklist) == ["hell", "shit", "hell", "piece of shit"]
+
+
+def test_find_all_returns_overlapping_hits_with_positions():
+    matcher = PhraseMatcher(["fuck", "shut the fuck up", "hell"])
+    text = "Shut the FUCK up, hellish hell"
+
+    hits = matcher.find_all(text)
+
+    assert [(h.term, text[h.start:h.end]) for h in hits] == [
+        ("shut the fuck up", "Shut the FUCK up"),
+        ("fuck", "FUCK"),
+        ("hell", "hell"),
+    ]
+    assert (hits[0].token_start, hits[0].token_end) == (0, 4)
+
+
+def test_get_matcher_is_cached_per_blocklist():
+    assert get_matcher(["a", "b"]) is get_matcher(["a", "b"])
+    assert get_matcher(["a", "b"]) is not get_matcher(["b", "a"])
+
+
+def test_repeat_blocklist_object_skips_fingerprint(monkeypatch):
+    from src.aegisai.moderation import matcher as matcher_mod
+
+    calls = []
+    real = matcher_mod.blocklist_fingerprint
+    monkeypatch.setattr(matcher_mod, "blocklist_fingerprint", lambda terms: calls.append(1) or real(terms))
+
+    terms = [f"term{i}" for i in range(1000)] + ["shit"]
+    first = get_matcher(terms)
+    calls.clear()
+    assert find_bad_words_in_text("oh shit", terms) == ["shit"]
+    assert get_matcher(terms) is first and calls == []
+
+    terms.append("darn")   # edited in place: recompiled, not served stale
+    assert find_bad_words_in_text("darn it", terms) == ["darn"]
+    assert find_bad_words_in_text("oh shit", first) == ["shit"]   # prebuilt matcher
+
+
+def test_word_stream_matches_like_is_bad_word_and_resets_on_gaps():
+    stream = WordStreamMatcher(get_matcher(list(BAD_WORDS)))
+    tokens = ["F**k!", "Mother-Fucker", "today", "hello", "cr@p"]
+    words = [{"word": t, "start": float(i), "end": i + 0.5} for i, t in enumerate(tokens)]
+
+    hits = {m.last for m in stream.feed(words) if m.first == m.last}
+    assert hits == {i for i, t in enumerate(tokens) if is_bad_word(t)}
+
+    stream.feed([{"word": "bloody", "start": 10.0, "end": 10.3}])
+    assert stream.feed([{"word": "hell", "start": 20.0, "end": 20.3}])[0].term == "hell"
+    assert is_bad_word("zorp", extra_bad=("zorp",))
@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.aegisai.audio.intervals import detect_toxic_segments
+from src.aegisai.moderation.policy import (
+    PRESETS,
+    PolicySpec,
+    compile_policy,
+    policy_version,
+    preset_spec,
+    resolve_policy,
+    validate_overrides,
+)
+from src.aegisai.moderation.text_rules import analyze_text
+from src.aegisai.vision.safe_search import Likelihood
+from src.aegisai.vision.vision_rules import classify_labels, classify_safesearch
+
+
+def test_compiled_policies_are_cached_by_version():
+    spec = preset_spec("teen", extra_words=["zorp"])
+    same = preset_spec("teen", extra_words=("zorp",))
+
+    assert policy_version(spec) == policy_version(same)
+    assert compile_policy(spec) is compile_policy(same)
+    assert compile_policy(spec).version != compile_policy(PRESETS["teen"]).version
+    assert resolve_policy("teen") is compile_policy(PRESETS["teen"])
+    assert PolicySpec.from_dict(spec.to_dict()) == spec
+
+
+def test_custom_and_allowed_words_drive_text_and_word_matching():
+    policy = compile_policy(preset_spec("default", extra_words=["Blarg Face"], allowed_words=["hell"]))
+
+    result = analyze_text("what the hell, you blarg-face", policy=policy)
+    assert result.bad_words == ["blarg face"]
+    assert not result.block                                   # default: not strict
+    assert analyze_text("blarg face", policy=resolve_policy(
+        preset_spec("broadcaster", extra_words=["blarg face"]))).block
+
+    words = [
+        {"word": "hell", "start": 0.0, "end": 0.3},
+        {"word": "blarg", "start": 1.0, "end": 1.2},
+        {"word": "face", "start": 1.2, "end": 1.5},
+    ]
+    [(start, end)] = detect_toxic_segments(words, policy=policy)
+    assert 0.3 < start < 1.0 and end > 1.5
+
+
+def test_vision_thresholds_follow_policy():
+    ss = SimpleNamespace(
+        adult=Likelihood.POSSIBLE,
+        violence=Likelihood.UNLIKELY,
+        racy=Likelihood.POSSIBLE,
+    )
+    assert not classify_safesearch(ss)["block"]
+    assert classify_safesearch(ss, policy=resolve_policy("child"))["block"]
+
+    labels = [{"description": "Knife", "score": 0.12}]
+    assert not classify_labels(labels)["block"]
+    assert classify_labels(labels, policy=resolve_policy("child"))["block"]
+
+
+def test_overrides_are_validated_and_normalized():
+    assert validate_overrides({"adult_block": 4.0, "label_threshold": 1, "strict_text": True}) == {
+        "adult_block": 4, "label_threshold": 1.0, "strict_text": True,
+    }
+    assert policy_version(preset_spec("teen", **validate_overrides({"adult_block": 4.0}))) == \
+        policy_version(preset_spec("teen", adult_block=4))
+
+    for bad in ({"nope": 1}, {"adult_block": 3.5}, {"adult_block": 9}, {"adult_block": True},
+                {"strict_text": 1}, {"label_threshold": 2.0}, {"extra_words": ["x"]}):
+        with pytest.raises(ValueError):
+            validate_overrides(bad)
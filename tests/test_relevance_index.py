@@ -0,0 +1,71 @@
+import random
+import sys
+from pathlib import Path
+
+from src.aegisai.moderation.bad_words_list import BAD_WORDS
+from src.aegisai.moderation.optimization import (
+    RelevanceIndex,
+    deduplicate_blocklist,
+    get_relevance_index,
+    get_relevant_blocklist,
+)
+
+
+def _legacy_relevant(transcript, blocklist, k=20):
+    lowered = transcript.lower()
+    scored = []
+    for word in blocklist:
+        w = word.lower()
+        score = (10 if w in lowered else 0) + lowered.count(w)
+        if score > 0:
+            scored.append((score, word))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    if not scored:
+        return list(blocklist)[:k]
+    return [word for _, word in scored[:k]]
+
+
+def test_matches_legacy_on_overlapping_terms():
+    rng = random.Random(21)
+    for _ in range(200):
+        blocklist = ["".join(rng.choice("abA ") for _ in range(rng.randint(0, 4))) for _ in range(12)]
+        text = "".join(rng.choice("aAb b-") for _ in range(rng.randint(0, 40)))
+        for k in (1, 3, 20):
+            assert RelevanceIndex(blocklist).top_k(text, k) == _legacy_relevant(text, blocklist, k)
+
+
+def test_matches_legacy_on_evaluation_set():
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+    from optimization_eval import _build_dataset
+
+    deduped = deduplicate_blocklist(list(BAD_WORDS))
+    for case in _build_dataset():
+        assert get_relevant_blocklist(case["text"], deduped, k=20) == _legacy_relevant(case["text"], deduped, k=20)
+
+
+def test_index_is_cached_and_dedupes_once():
+    blocklist = ["Hell", "hell", "shit", "s-h-i-t", "sh1t"]
+    index = get_relevance_index(blocklist, dedupe=True)
+
+    assert index is get_relevance_index(list(blocklist), dedupe=True)
+    assert index.terms == ["Hell", "shit", "sh1t"]
+    assert index.top_k("what the hell", k=2) == ["Hell"]
+    assert index.top_k("clean", k=2) == ["Hell", "shit"]
+
+
+def test_repeat_blocklist_object_skips_fingerprint(monkeypatch):
+    from src.aegisai.moderation import matcher as matcher_mod
+
+    calls = []
+    real = matcher_mod.blocklist_fingerprint
+    monkeypatch.setattr(matcher_mod, "blocklist_fingerprint", lambda terms: calls.append(1) or real(terms))
+
+    blocklist = [f"tenant{i}" for i in range(1000)] + ["shit"]
+    index = get_relevance_index(blocklist)
+    calls.clear()
+    assert get_relevant_blocklist("oh shit", blocklist, k=1) == ["shit"]
+    assert get_relevance_index(blocklist) is index and calls == []
+    assert get_relevance_index(blocklist, dedupe=True) is not index
+
+    blocklist.insert(0, "oh")   # edited in place: rebuilt, not served stale
+    assert get_relevant_blocklist("oh shit", blocklist, k=2) == ["oh", "shit"]
@@ -0,0 +1,122 @@
+import dataclasses
+import shutil
+import subprocess
+
+import pytest
+
+from src.aegisai.pipeline import sharded_runner
+from src.aegisai.pipeline.sharded_runner import (
+    plan_shards,
+    shard_bounds,
+    split_intervals,
+    stitch_intervals,
+)
+from src.aegisai.pipeline.use_cases import VIDEO_FILE_AUDIO_ONLY, VIDEO_FILE_AUDIO_VIDEO
+from src.aegisai.runtime.governor import MEMORY_MB, get_governor
+
+
+def test_plan_shards_snaps_to_keyframes_and_respects_min_length():
+    keyframes = [i * 2.0 for i in range(301)]   # every 2s over 600s
+    assert plan_shards(600.0, keyframes, 3) == [200.0, 400.0]
+    assert plan_shards(600.0, [0.0, 190.0, 430.0], 3) == [190.0, 430.0]
+    # too short for two 120s shards, or no usable keyframes
+    assert plan_shards(200.0, keyframes, 4) == []
+    assert plan_shards(600.0, [0.0], 3) == []
+    # 8 requested, only 5 fit
+    assert len(plan_shards(600.0, keyframes, 8)) == 4
+
+
+def test_stitch_pads_hits_at_cuts_and_split_clips_per_shard():
+    cuts = [100.0]
+    # a word split by the cut: seen as two pieces by the two shards
+    stitched = stitch_intervals([(99.8, 100.0), (100.0, 100.1), (10.0, 11.0), (99.9, 99.95)], cuts)
+    assert stitched == [(10.0, 11.0), (99.5, 100.5)]
+    # a hit ending just before the cut is extended into the next shard
+    assert stitch_intervals([(99.7, 99.9)], cuts) == [(99.5, 100.5)]
+    assert stitch_intervals([(50.0, 60.0)], cuts) == [(50.0, 60.0)]
+
+    bounds = shard_bounds(200.0, cuts)
+    assert bounds == [(0.0, 100.0), (100.0, 200.0)]
+    assert split_intervals(stitched, bounds) == [[(10.0, 11.0), (99.5, 100.0)], [(0.0, 0.5)]]
+
+
+def test_sharded_job_offsets_stitches_and_concats(monkeypatch, tmp_path):
+    src = tmp_path / "in.mp4"
+    src.write_bytes(b"x")
+    out = tmp_path / "out.mp4"
+    local_hits = {
+        "shard_000.mp4": ([(199.8, 200.0)], [(5.0, 6.0)]),
+        "shard_001.mp4": ([(0.0, 0.2)], []),
+        "shard_002.mp4": ([], [(1.0, 2.0)]),
+    }
+    rendered = []
+
+    monkeypatch.setattr(sharded_runner, "probe_duration", lambda p: 600.0)
+    monkeypatch.setattr(sharded_runner, "probe_keyframes", lambda p: [i * 2.0 for i in range(301)])
+    monkeypatch.setattr(sharded_runner, "extract_subtitles_from_video", lambda *a: False)
+
+    def fake_split(input_path, cuts, out_dir):
+        return [f"{out_dir}/shard_{i:03d}.mp4" for i in range(len(cuts) + 1)]
+
+    def fake_analyze(cfg, path, trace_context=None):
+        assert cfg.shards == 1 and cfg.filter_audio and cfg.memory_mb == 0
+        # the parent holds every shard's working set
+        assert get_governor().stats()[MEMORY_MB].in_use == 3 * VIDEO_FILE_AUDIO_VIDEO.memory_mb
+        audio, video = local_hits[path.rsplit("/", 1)[1]]
+        return {"audio_intervals": audio, "video_intervals": video, "stage_timings": {}}
+
+    def fake_render(path, output, audio, video, reencode, trace_context=None):
+        assert reencode
+        rendered.append((path.rsplit("/", 1)[1], audio, video))
+
+    monkeypatch.setattr(sharded_runner, "split_video", fake_split)
+    monkeypatch.setattr(sharded_runner, "analyze_video_file", fake_analyze)
+    monkeypatch.setattr(sharded_runner, "render_video_file", fake_render)
+    monkeypatch.setattr(sharded_runner, "concat_videos", lambda paths, output, work: out.write_bytes(b"ok"))
+
+    result = sharded_runner.run_sharded_file_job(
+        VIDEO_FILE_AUDIO_VIDEO, str(src), str(out), shards=3, executor="thread",
+    )
+
+    assert result["shards"] == [(0.0, 200.0), (200.0, 400.0), (400.0, 600.0)]
+    assert result["audio_intervals"] == [(199.5, 200.5)]
+    assert result["video_intervals"] == [(5.0, 6.0), (401.0, 402.0)]
+    assert sorted(rendered) == [
+        ("shard_000.mp4", [(199.5, 200.0)], [(5.0, 6.0)]),
+        ("shard_001.mp4", [(0.0, 0.5)], []),
+        ("shard_002.mp4", [], [(1.0, 2.0)]),
+    ]
+    assert out.read_bytes() == b"ok"
+    assert get_governor().stats()[MEMORY_MB].in_use == 0
+
+
+def test_process_shards_use_spawned_workers():
+    pool = sharded_runner._make_executor("process", 1)
+    try:
+        assert pool._mp_context.get_start_method() == "spawn"
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.skipif(not (shutil.which("ffmpeg") and shutil.which("ffprobe")), reason="ffmpeg not installed")
+def test_split_render_and_concat_with_real_ffmpeg(tmp_path):
+    src = tmp_path / "in.mp4"
+    out = tmp_path / "out.mp4"
+    subprocess.run([
+        "ffmpeg", "-v", "error", "-y",
+        "-f", "lavfi", "-i", "testsrc=size=160x120:rate=10:duration=6",
+        "-f", "lavfi", "-i", "sine=frequency=440:duration=6",
+        "-c:v", "mpeg4", "-g", "10", "-c:a", "aac", "-shortest", str(src),
+    ], check=True)
+    # subtitles are moderated once in the parent, so no cloud call is made
+    srt = tmp_path / "subs.srt"
+    srt.write_text("1\n00:00:00,500 --> 00:00:01,000\noh fuck\n", encoding="utf-8")
+    cfg = dataclasses.replace(VIDEO_FILE_AUDIO_ONLY, subtitle_path=str(srt))
+
+    result = sharded_runner.run_sharded_file_job(
+        cfg, str(src), str(out), shards=3, min_shard_seconds=2.0, executor="thread",
+    )
+
+    assert len(result["shards"]) == 3
+    assert result["audio_intervals"] == [(0.5, 1.0)]
+    assert abs(sharded_runner.probe_duration(str(out)) - 6.0) < 0.5
@@ -0,0 +1,39 @@
+import time
+
+from src.aegisai.audio.audio_source import AudioChunk
+from src.aegisai.audio.speech_to_text import SpeechBackend, get_speech_backend
+
+
+class _EchoBackend(SpeechBackend):
+    def transcribe_pcm(self, pcm, sample_rate=16000):
+        if bytes(pcm) == b"boom":
+            raise RuntimeError("boom")
+        time.sleep(0.01 * (5 - len(pcm) % 5))  # finish out of order
+        return {"transcripts": [bytes(pcm).decode()], "words": []}
+
+
+def _chunk(i, payload):
+    return AudioChunk(i, float(i), 1.0, memoryview(payload), 16000)
+
+
+def test_config_is_built_once_per_sample_rate():
+    backend = SpeechBackend(phrases=["b", "a"])
+    assert backend.config_for(16000) is backend.config_for(16000)
+    assert list(backend.config_for(16000).speech_contexts[0].phrases) == ["a", "b"]
+    assert backend.config_fingerprint(16000) != backend.config_fingerprint(8000)
+    assert backend.config_fingerprint(16000) != SpeechBackend(phrases=["a"]).config_fingerprint(16000)
+
+
+def test_registry_shares_backend_per_phrase_list():
+    assert get_speech_backend(["x", "y"]) is get_speech_backend(["y", "x"])
+    assert get_speech_backend(["x"]) is not get_speech_backend(["y"])
+
+
+def test_transcribe_many_preserves_order_and_reports_errors():
+    backend = _EchoBackend(phrases=[])
+    chunks = [_chunk(i, p) for i, p in enumerate([b"a", b"bb", b"boom", b"dddd", b"e"])]
+    results = list(backend.transcribe_many(chunks, max_in_flight=3))
+
+    assert [c.index for c, _ in results] == [0, 1, 2, 3, 4]
+    assert isinstance(results[2][1], RuntimeError)
+    assert results[3][1]["transcripts"] == ["dddd"]
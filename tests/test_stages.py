@@ -0,0 +1,140 @@
+import dataclasses
+import os
+import threading
+import time
+
+import pytest
+
+from src.aegisai.pipeline import file_runner
+from src.aegisai.pipeline.stages import Stage, StageGraph, StageScheduler
+from src.aegisai.pipeline.use_cases import VIDEO_FILE_AUDIO_VIDEO
+from src.aegisai.vision.vision_rules import FrameModerationResult
+
+
+def test_ready_stages_overlap_within_resource_limits():
+    active = {"ffmpeg": 0, "cloud-io": 0}
+    peak = dict(active)
+    lock = threading.Lock()
+
+    def work(resource, value):
+        def fn(**_):
+            with lock:
+                active[resource] += 1
+                peak[resource] = max(peak[resource], active[resource])
+            time.sleep(0.05)
+            with lock:
+                active[resource] -= 1
+            return value
+        return fn
+
+    graph = StageGraph([
+        Stage("a", work("ffmpeg", 1), ("src",), ("a",), "ffmpeg"),
+        Stage("b", work("ffmpeg", 2), ("src",), ("b",), "ffmpeg"),
+        Stage("c", work("cloud-io", 3), ("src",), ("c",), "cloud-io"),
+        Stage("sum", lambda a, b, c: a + b + c, ("a", "b", "c"), ("total",)),
+    ])
+    run = StageScheduler(limits={"ffmpeg": 1, "cloud-io": 2}).run(graph, {"src": None})
+
+    assert run.artifacts["total"] == 6
+    assert peak == {"ffmpeg": 1, "cloud-io": 1}
+    assert run.timings["c"].started < run.timings["b"].started   # c did not wait for the ffmpeg slot
+    assert run.timings["sum"].started >= max(run.timings[s].finished for s in "abc")
+
+
+def test_graph_validation_and_errors():
+    with pytest.raises(ValueError, match="never produced"):
+        StageScheduler().run(StageGraph([Stage("x", lambda y: y, ("y",), ("x",))]))
+    with pytest.raises(ValueError, match="Cycle"):
+        StageGraph([
+            Stage("p", lambda q: q, ("q",), ("p",)),
+            Stage("q", lambda p: p, ("p",), ("q",)),
+        ]).validate([])
+
+    def boom():
+        raise KeyError("stage failed")
+
+    with pytest.raises(KeyError):
+        StageScheduler().run(StageGraph([Stage("boom", boom), Stage("ok", lambda: 1, (), ("ok",))]))
+
+
+def _patch_video_stages(monkeypatch, calls, localize_delay=0.0):
+    def fake_localize(frames, results, progress_callback=None, policy=None):
+        time.sleep(localize_delay)
+        calls.append(("localize", [r.block for r in results]))
+        return []
+
+    monkeypatch.setattr(file_runner, "sample_frames", lambda src, out, fps, cb: [(os.path.join(out, "f0.jpg"), 0.0)])
+    monkeypatch.setattr(file_runner, "moderate_frames", lambda frames, fps, progress_callback=None, policy=None: (
+        [(0.0, 1.0)], [FrameModerationResult(timestamp=0.0, safesearch={"adult": 4}, labels={}, block=True)]))
+    monkeypatch.setattr(file_runner, "localize_frames", fake_localize)
+
+
+def test_video_template_overlaps_blur_with_stt(monkeypatch, tmp_path):
+    calls = []
+    stt_done = threading.Event()
+
+    def fake_audio(audio_path, output_audio_path, chunk_seconds, subtitle_path, policy):
+        time.sleep(0.1)
+        calls.append(("stt", subtitle_path))
+        stt_done.set()
+        return [(1.0, 2.0)]
+
+    def fake_blur(video_path, intervals, output_video_path):
+        calls.append(("blur", stt_done.is_set()))
+
+    monkeypatch.setattr(file_runner, "extract_audio_track", lambda src, dst: calls.append(("extract", dst)))
+    monkeypatch.setattr(file_runner, "extract_subtitles_from_video", lambda src, dst: False)
+    monkeypatch.setattr(file_runner, "filter_audio_file", fake_audio)
+    _patch_video_stages(monkeypatch, calls, localize_delay=0.3)
+    monkeypatch.setattr(file_runner, "blur_intervals_in_video", fake_blur)
+    monkeypatch.setattr(file_runner, "mute_intervals_in_video",
+                        lambda video_path, mute_intervals, output_video_path: calls.append(("mute", video_path)))
+
+    src = tmp_path / "in.mp4"
+    src.write_bytes(b"x")
+    result = file_runner.run_file_job(VIDEO_FILE_AUDIO_VIDEO, str(src), str(tmp_path / "out.mp4"))
+
+    assert result["audio_intervals"] == [(1.0, 2.0)]
+    assert result["video_intervals"] == [(0.0, 1.0)]
+    assert ("blur", False) in calls and ("localize", [True]) in calls
+    mutes = [c for c in calls if c[0] == "mute"]
+    assert len(mutes) == 1 and mutes[0][1].endswith("video_blurred.mp4")
+    # Render did not wait for the (metadata-only) object localization.
+    assert calls.index(mutes[0]) < calls.index(("localize", [True]))
+    assert set(result["stage_timings"]) == {
+        "subtitles", "extract_audio", "analyze_audio", "extract_frames", "moderate_frames",
+        "localize_objects", "blur", "render",
+    }
+
+
+def test_stage_limits_from_pipeline_config(monkeypatch, tmp_path):
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def ffmpeg_work(src, dst):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return False
+
+    monkeypatch.setattr(file_runner, "extract_audio_track", ffmpeg_work)
+    monkeypatch.setattr(file_runner, "extract_subtitles_from_video", ffmpeg_work)
+    monkeypatch.setattr(file_runner, "filter_audio_file", lambda **kwargs: [(1.0, 2.0)])
+    _patch_video_stages(monkeypatch, [])
+    monkeypatch.setattr(file_runner, "blur_intervals_in_video", lambda **kwargs: None)
+    monkeypatch.setattr(file_runner, "mute_intervals_in_video", lambda **kwargs: None)
+
+    src = tmp_path / "in.mp4"
+    src.write_bytes(b"x")
+    for limit, expected in ((1, 1), (2, 2)):
+        peak[0] = 0
+        cfg = dataclasses.replace(VIDEO_FILE_AUDIO_VIDEO, subtitle_path=None, extract_subtitles=True,
+                                  stage_limits={"ffmpeg": limit})
+        file_runner.run_file_job(cfg, str(src), str(tmp_path / "out.mp4"))
+        assert peak[0] == expected
+
+    with pytest.raises(ValueError, match="resource class"):
+        dataclasses.replace(VIDEO_FILE_AUDIO_VIDEO, stage_limits={"gpu": 1}).validate()
@@ -0,0 +1,250 @@
+import time
+import wave
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from src.aegisai.audio.filter_stream import AudioStreamFilter
+from src.aegisai.audio.streaming_stt import StreamingRecognizer, TranscriptEvent, _Session
+from src.aegisai.pipeline import use_cases
+from src.aegisai.pipeline.config import DEFAULT_AUDIO_DEADLINE_SECONDS
+from src.aegisai.pipeline.stream_runner import ChunkDescriptor, create_stream_pipeline, run_stream_job
+
+SR = 16000
+
+
+class _FakeClient:
+    def __init__(self):
+        self.requests = []
+
+    def streaming_recognize(self, config, requests):
+        for req in requests:
+            self.requests.append(req)
+        return iter(())
+
+
+class _FakeBackend:
+    def __init__(self):
+        self.clients = []
+
+    def client(self):
+        self.clients.append(_FakeClient())
+        return self.clients[-1]
+
+    def streaming_config(self, sample_rate, interim_results):
+        return None
+
+
+def _write_chunk(path, seconds):
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SR)
+        w.writeframes(np.zeros(int(SR * seconds), dtype=np.int16).tobytes())
+
+
+def test_session_maps_session_time_to_stream_time_across_gaps():
+    session = _Session(_FakeBackend(), SR, True, on_event=lambda e: None)
+    session.feed(b"\0\0" * SR, start_ts=10.0)        # session 0..1  -> stream 10..11
+    session.feed(b"\0\0" * SR, start_ts=20.0)        # session 1..2  -> stream 20..21
+    session.finish()
+    session.join(1)
+
+    assert session.to_abs(0.5) == 10.5
+    assert session.to_abs(1.25) == 20.25
+
+
+def test_recognizer_rotates_sessions():
+    backend = _FakeBackend()
+    rec = StreamingRecognizer(on_event=lambda e: None, backend=backend, rotate_after_seconds=2.0)
+    for i in range(5):
+        rec.feed(b"\0\0" * SR, start_ts=float(i))
+    rec.close()
+
+    assert rec.sessions_started == 3   # 2 s + 2 s + 1 s
+    assert sum(len(c.requests) for c in backend.clients) == 50   # 100 ms frames
+
+
+class _EchoRecognizer:
+    """Emits one final result covering each fed chunk."""
+
+    def __init__(self, on_event):
+        self.on_event = on_event
+
+    def feed(self, pcm, start_ts):
+        end = start_ts + len(pcm) / (2 * SR)
+        self.on_event(TranscriptEvent("hello", True, [], end, 1.0))
+
+    def close(self):
+        pass
+
+
+def test_streaming_filter_releases_chunks_in_order(tmp_path):
+    audio = AudioStreamFilter(mode="streaming", recognizer_factory=_EchoRecognizer, max_wait_seconds=5)
+    for i in range(3):
+        path = tmp_path / f"chunk_{i}.wav"
+        _write_chunk(path, 1.0)
+        audio.submit_chunk(i, str(path), start_ts=float(i), duration=1.0)
+
+    results = []
+    deadline = time.time() + 5
+    while len(results) < 3 and time.time() < deadline:
+        res = audio.get_result_nowait()
+        if res is not None:
+            results.append(res)
+    audio.close()
+
+    assert [r.chunk_id for r in results] == [0, 1, 2]
+    events = []
+    while (evt := audio.get_transcript_nowait()) is not None:
+        events.append(evt)
+    assert [e.end_ts for e in events] == [1.0, 2.0, 3.0]
+
+
+def _drain(audio, n, timeout=5.0):
+    results = []
+    deadline = time.time() + timeout
+    while len(results) < n and time.time() < deadline:
+        res = audio.get_result_nowait()
+        if res is not None:
+            results.append(res)
+        else:
+            time.sleep(0.005)
+    return results
+
+
+def _words_transcriber(pcm, sample_rate):
+    return {
+        "transcripts": ["hello fuck world"],
+        "words": [
+            {"word": "hello", "start": 0.0, "end": 0.3},
+            {"word": "fuck", "start": 0.4, "end": 0.6},
+            {"word": "world", "start": 0.8, "end": 0.9},
+        ],
+    }
+
+
+def test_batch_mode_returns_absolute_word_intervals(tmp_path):
+    path = tmp_path / "chunk.wav"
+    _write_chunk(path, 1.0)
+    audio = AudioStreamFilter(num_workers=2, transcriber=_words_transcriber)
+    audio.submit_chunk(7, str(path), start_ts=30.0, duration=1.0)
+
+    [res] = _drain(audio, 1)
+    audio.close()
+
+    assert res.chunk_id == 7 and not res.timed_out
+    [(start, end)] = res.intervals
+    assert 30.3 < start < 30.4 and 30.6 < end < 30.8
+
+
+def test_deadline_policies_and_late_carry(tmp_path):
+    def transcriber(pcm, sample_rate):
+        if len(pcm) == 2 * SR:   # chunk 0 (1 s) is slow
+            time.sleep(0.3)
+        return _words_transcriber(pcm, sample_rate)
+
+    for policy, expected in (("open", []), ("closed", [(0.0, 1.0)])):
+        audio = AudioStreamFilter(
+            num_workers=2,
+            transcriber=transcriber,
+            deadline_seconds=0.1,
+            deadline_policy=policy,
+        )
+        first_path = tmp_path / f"{policy}_0.wav"
+        _write_chunk(first_path, 1.0)
+        audio.submit_chunk(0, str(first_path), start_ts=0.0, duration=1.0)
+
+        [first] = _drain(audio, 1)
+        assert first.timed_out and first.intervals == expected
+
+        time.sleep(0.4)   # chunk 0's STT answers after its release
+        second_path = tmp_path / f"{policy}_1.wav"
+        _write_chunk(second_path, 0.5)
+        audio.submit_chunk(1, str(second_path), start_ts=1.0, duration=0.5)
+
+        [second] = _drain(audio, 1)
+        audio.close()
+
+        # Chunk 0's late word interval rides along with chunk 1's result.
+        assert not second.timed_out
+        assert (0.35, 0.75) in second.intervals
+        assert any(s >= 1.0 for s, _ in second.intervals)
+
+
+class _ProfaneRecognizer(_EchoRecognizer):
+    def feed(self, pcm, start_ts):
+        end = start_ts + len(pcm) / (2 * SR)
+        words = [
+            {"word": "oh", "start": start_ts + 0.1, "end": start_ts + 0.3},
+            {"word": "fuck", "start": start_ts + 0.4, "end": start_ts + 0.6},
+        ]
+        self.on_event(TranscriptEvent("oh fuck", True, words, end, 1.0))
+
+
+def test_streaming_mode_mutes_final_words(tmp_path):
+    audio = AudioStreamFilter(mode="streaming", recognizer_factory=_ProfaneRecognizer)
+    path = tmp_path / "chunk.wav"
+    _write_chunk(path, 1.0)
+    audio.submit_chunk(0, str(path), start_ts=5.0, duration=1.0)
+
+    [res] = _drain(audio, 1)
+    audio.close()
+
+    [(start, end)] = res.intervals
+    assert 5.3 <= start <= 5.4 and end >= 5.6
+
+
+def test_stream_use_cases_bound_audio_wait_through_create_stream_pipeline(tmp_path):
+    for cfg in (use_cases.AUDIO_STREAM_FILTER, use_cases.VIDEO_STREAM_AUDIO_ONLY,
+                use_cases.VIDEO_STREAM_VIDEO_ONLY, use_cases.VIDEO_STREAM_AUDIO_VIDEO):
+        pipeline = create_stream_pipeline(cfg, str(tmp_path / "out"))
+        assert pipeline.audio_filter.deadline_seconds == DEFAULT_AUDIO_DEADLINE_SECONDS
+        pipeline.close()
+
+    cfg = replace(use_cases.VIDEO_STREAM_AUDIO_VIDEO, audio_deadline_seconds=0.1, audio_deadline_policy="closed")
+    pipeline = create_stream_pipeline(cfg, str(tmp_path / "out"))
+    pipeline.audio_filter.transcriber = lambda pcm, sr: time.sleep(0.5) or _words_transcriber(pcm, sr)
+    path = tmp_path / "slow.wav"
+    _write_chunk(path, 1.0)
+    pipeline.audio_filter.submit_chunk(0, str(path), start_ts=0.0, duration=1.0)
+
+    [res] = _drain(pipeline.audio_filter, 1, timeout=0.4)
+    assert res.timed_out and res.intervals == [(0.0, 1.0)]
+    pipeline.close()
+
+
+def test_run_stream_job_uses_streaming_stt_from_config(tmp_path, monkeypatch):
+    from src.aegisai.audio import streaming_stt
+    from src.aegisai.pipeline import stream_runner
+    from src.aegisai.video import filter_stream as video_stream
+
+    rendered = {}
+
+    def fake_render(video_path, blur_intervals, mute_intervals, output_video_path):
+        rendered[video_path] = mute_intervals
+        open(output_video_path, "wb").close()
+
+    monkeypatch.setattr(streaming_stt, "StreamingRecognizer", _ProfaneRecognizer)
+    monkeypatch.setattr(video_stream, "extract_sampled_frames_from_file", lambda **kw: [])
+    monkeypatch.setattr(stream_runner, "blur_and_mute_intervals_in_video", fake_render)
+
+    cfg = replace(use_cases.VIDEO_STREAM_AUDIO_ONLY, audio_stt_mode="streaming")
+    chunks = []
+    for i in range(2):
+        path = tmp_path / f"chunk_{i}.wav"
+        _write_chunk(path, 1.0)
+        chunks.append(ChunkDescriptor(i, float(i), 1.0, str(path), str(path)))
+    transcripts = []
+    released = run_stream_job(cfg, chunks, str(tmp_path / "out"), on_transcript=transcripts.append)
+
+    assert [c.chunk_id for c in released] == [0, 1]
+    # the live session muted the word inside each chunk (chunk-local times)
+    for desc in chunks:
+        [(start, end)] = rendered[desc.video_path]
+        assert 0.3 <= start <= 0.4 and end >= 0.6
+    assert [t.text for t in transcripts] == ["oh fuck", "oh fuck"]
+
+    with pytest.raises(ValueError):
+        replace(cfg, audio_stt_mode="live").validate()
@@ -0,0 +1,92 @@
+import random
+import re
+
+from src.aegisai.audio.subtitle_parser import (
+    SubtitleStreamParser,
+    iter_subtitle_segments,
+    parse_subtitle_file,
+)
+
+SRT = """1
+00:00:01,000 --> 00:00:02,500
+Hello <i>there</i>
+2
+00:00:03,000 --> 00:00:04,000
+42
+still text
+
+3
+00:00:05,000 --> 00:00:06,000
+last
+"""
+
+VTT = """WEBVTT
+
+NOTE a comment
+
+00:01.000 --> 00:02.000 align:start
+first cue
+01:00:03.000 --> 01:00:04.000
+naïve café
+"""
+
+
+def _legacy_parse(content):
+    ts_pattern = re.compile(r'((?:\d{1,2}:)?\d{1,2}:\d{2}[,.]\d{3})\s-->\s((?:\d{1,2}:)?\d{1,2}:\d{2}[,.]\d{3})')
+    index_pattern = re.compile(r'^\d+$')
+
+    def ts(s):
+        parts = s.replace(',', '.').split(':')
+        if len(parts) == 3:
+            return int(parts[0]) * 3600 + int(parts[1]) * 60 + float(parts[2])
+        return int(parts[0]) * 60 + float(parts[1])
+
+    segments, lines, i = [], content.splitlines(), 0
+    while i < len(lines):
+        match = ts_pattern.search(lines[i].strip())
+        if match:
+            text_lines = []
+            i += 1
+            while i < len(lines):
+                line = lines[i].strip()
+                if not line or ts_pattern.search(line):
+                    break
+                if index_pattern.match(line) and i + 1 < len(lines) and ts_pattern.search(lines[i + 1].strip()):
+                    break
+                text_lines.append(line)
+                i += 1
+            text = re.sub(r'<[^>]+>', '', " ".join(text_lines).strip())
+            segments.append({"start": ts(match.group(1)), "end": ts(match.group(2)), "text": text})
+            continue
+        i += 1
+    return segments
+
+
+def test_parse_file_matches_legacy(tmp_path):
+    for name, content in (("a.srt", SRT), ("a.vtt", VTT), ("crlf.srt", SRT.replace("\n", "\r\n"))):
+        path = tmp_path / name
+        path.write_bytes(content.encode("utf-8"))
+        assert parse_subtitle_file(str(path)) == _legacy_parse(content)
+
+    assert [s["text"] for s in _legacy_parse(SRT)] == ["Hello there", "42 still text", "last"]
+
+
+def test_random_line_soup_matches_legacy():
+    rng = random.Random(3)
+    pool = ["", "7", "00:00:01,000 --> 00:00:02,000", "12:00.500 --> 12:01.000", "word", "<b>x</b>", "  "]
+    for _ in range(300):
+        content = "\n".join(rng.choice(pool) for _ in range(rng.randint(0, 15)))
+        assert list(iter_subtitle_segments(content.splitlines())) == _legacy_parse(content)
+
+
+def test_stream_parser_handles_arbitrary_chunking():
+    data = (VTT + "\r\n" + SRT.replace("\n", "\r\n")).encode("utf-8")
+    expected = _legacy_parse(data.decode("utf-8"))
+
+    for size in (1, 2, 7, 64, len(data)):
+        parser = SubtitleStreamParser()
+        cues = []
+        for i in range(0, len(data), size):
+            cues.extend(parser.feed(data[i:i + size]))
+        cues.extend(parser.close())
+        assert cues == expected
@@ -0,0 +1,53 @@
+import random
+
+from src.aegisai.moderation.bad_words_list import BAD_WORDS
+from src.aegisai.moderation.policy import preset_spec, resolve_policy
+from src.aegisai.moderation.text_rules import analyze_text, analyze_text_stream, analyze_texts
+
+
+def _cues(rng, n):
+    vocab = list(BAD_WORDS) + ["the", "you", "of", "a", "son", "hello", "shut", "up", "-", "Fuck!"]
+    return [
+        {
+            "start": float(i),
+            "end": i + 0.9,
+            "text": " ".join(rng.choice(vocab) for _ in range(rng.randint(0, 6))),
+        }
+        for i in range(n)
+    ]
+
+
+def _per_cue(segments, **kwargs):
+    return [
+        (seg["start"], seg["end"])
+        for seg in segments
+        if analyze_text(seg["text"], **kwargs).block
+    ]
+
+
+def test_batch_matches_per_cue_analysis():
+    segments = _cues(random.Random(11), 400)
+
+    assert analyze_texts(segments, strict=True) == _per_cue(segments, strict=True)
+    assert analyze_texts(segments, strict=False) == _per_cue(segments, strict=False)
+
+    policy = resolve_policy(preset_spec("default", extra_words=["hello"], allowed_words=["hell"]))
+    assert analyze_texts(segments, policy=policy, strict=False) == _per_cue(segments, policy=policy)
+
+
+def test_phrases_do_not_span_cues():
+    segments = [
+        {"start": 0.0, "end": 1.0, "text": "you son of a"},
+        {"start": 1.0, "end": 2.0, "text": "bitch"},
+        {"start": 2.0, "end": 3.0, "text": ""},
+        {"start": 3.0, "end": 4.0, "text": "son of a bitch"},
+    ]
+
+    assert analyze_texts(segments, blocklist=["son of a bitch"]) == [(3.0, 4.0)]
+    assert analyze_texts([]) == []
+
+
+def test_stream_batches_match_single_batch():
+    segments = _cues(random.Random(5), 1000)
+
+    assert list(analyze_text_stream(iter(segments), batch_size=64)) == analyze_texts(segments)
@@ -0,0 +1,56 @@
+import random
+import threading
+
+from src.aegisai.audio.text_buffer import TextBuffer
+from src.aegisai.moderation.text_rules import analyze_text
+
+
+def test_window_stats_match_reanalysing_the_window():
+    rng = random.Random(4)
+    vocab = ["hell", "damn", "shit", "hello", "the", "crap", "you"]
+    buf = TextBuffer(window_seconds=10)
+
+    for step in range(200):
+        ts = step * 0.5 + rng.uniform(-3.0, 0.0)   # up to 3 s late
+        buf.add(ts, " ".join(rng.choice(vocab) for _ in range(3)))
+
+        stats = buf.window_stats()
+        expected = analyze_text(buf.get_text())
+        assert stats.bad_words == expected.bad_words
+        assert stats.severity == expected.severity
+
+        times = [t for t, _ in buf.items]
+        assert times == sorted(times)
+        assert max(times) - min(times) <= 10
+
+
+def test_out_of_order_and_expired_snippets():
+    buf = TextBuffer(window_seconds=5)
+    buf.add(10.0, "ten")
+    buf.add(8.0, "eight shit")
+    buf.add(3.0, "too late")
+
+    assert buf.get_text() == "eight shit ten"
+    assert buf.window_stats().bad_words == ["shit"]
+
+    buf.add(14.0, "fourteen")
+    assert buf.get_text() == "ten fourteen"
+    assert buf.window_stats().count == 0
+
+
+def test_concurrent_adds():
+    buf = TextBuffer(window_seconds=1000)
+
+    def work(offset):
+        for i in range(200):
+            buf.add(offset + i * 4.0, "damn")
+
+    threads = [threading.Thread(target=work, args=(k,)) for k in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert [t for t, _ in buf.items] == sorted(t for t, _ in buf.items)
+    assert len(buf.items) == 800
+    assert buf.window_stats().bad_words == ["damn"]
@@ -0,0 +1,121 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.aegisai.pipeline.stages import Stage, StageGraph, StageScheduler
+from src.aegisai.runtime import tracing
+
+
+@pytest.fixture
+def trace_dir(tmp_path):
+    tracing.enable_tracing(str(tmp_path))
+    yield tmp_path
+    tracing.disable_tracing()
+
+
+def test_disabled_tracing_is_a_no_op():
+    assert not tracing.tracing_enabled()
+    assert tracing.span("x") is tracing.NOOP_SPAN
+    fn = lambda: 1
+    assert tracing.bind(fn) is fn
+    with tracing.span("x") as sp:
+        sp.add("api_calls")
+        tracing.add("bytes", 10)
+
+
+def test_spans_nest_across_stage_and_pool_threads(trace_dir):
+    def analyze(src):
+        def frame(ts):
+            with tracing.span("frame", "video", ts=ts):
+                with tracing.api_call("vision.safe_search", 100):
+                    pass
+        with ThreadPoolExecutor(2) as pool:
+            list(pool.map(tracing.bind(frame), [0.0, 0.5]))
+        return [(0.0, 1.0)]
+
+    graph = StageGraph([Stage("analyze_video", analyze, ("src",), ("intervals",), "cloud-io")])
+    with tracing.span("file_job", "job") as job:
+        StageScheduler().run(graph, {"src": None})
+
+    spans = {s.span_id: s for s in job.trace.spans}
+    by_name = {}
+    for s in spans.values():
+        by_name.setdefault(s.name, []).append(s)
+    stage = by_name["analyze_video"][0]
+    assert stage.parent_id == job.span_id and stage.attrs["resource"] == "cloud-io"
+    assert all(f.parent_id == stage.span_id for f in by_name["frame"])
+    assert all(f.attrs["api_calls"] == 1 and f.attrs["bytes_sent"] == 100 for f in by_name["frame"])
+    assert len(by_name["vision.safe_search"]) == 2
+
+    summary = job.trace.summary()
+    assert summary[("video", "frame")]["api_calls"] == 2
+
+    chrome = json.loads(next(trace_dir.glob("file_job-*.trace.json")).read_text())
+    complete = [e for e in chrome["traceEvents"] if e["ph"] == "X"]
+    assert {e["name"] for e in complete} == {"file_job", "analyze_video", "frame", "vision.safe_search"}
+    assert all(e["dur"] >= 0 for e in complete)
+
+    otlp = json.loads(next(trace_dir.glob("file_job-*.otlp.json")).read_text())
+    otlp_spans = otlp["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert len(otlp_spans) == len(spans)
+    assert {s["traceId"] for s in otlp_spans} == {job.trace.trace_id}
+    root = next(s for s in otlp_spans if s["name"] == "file_job")
+    assert "parentSpanId" not in root and int(root["endTimeUnixNano"]) >= int(root["startTimeUnixNano"])
+
+
+def test_only_jobs_are_written_and_workers_join_their_trace(trace_dir):
+    with tracing.span("split_video", "ffmpeg"):
+        pass   # outside any job: dropped
+    assert list(trace_dir.iterdir()) == []
+
+    def shard(ctx):
+        # a pool thread (or spawned process) starts without the parent's span
+        with tracing.span("analyze_video_file", "job", context=ctx) as part:
+            with tracing.span("frame", "video"):
+                pass
+        return part
+
+    with tracing.span("sharded_job", "job") as job:
+        ctx = tracing.trace_context()
+        with ThreadPoolExecutor(2) as pool:
+            parts = list(pool.map(shard, [ctx, ctx]))
+
+    assert all(p.parent_id == job.span_id and p.trace.trace_id == job.trace.trace_id for p in parts)
+    files = sorted(p.name.split("-")[0] for p in trace_dir.glob("*.otlp.json"))
+    assert files == ["analyze_video_file", "analyze_video_file", "sharded_job"]
+    for path in trace_dir.glob("*.otlp.json"):
+        spans = json.loads(path.read_text())["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert {s["traceId"] for s in spans} == {job.trace.trace_id}
+
+    # a worker process without AEGIS_TRACE_DIR follows the parent's settings
+    tracing.disable_tracing()
+    with tracing.span("render_video_file", "job", context=ctx):
+        pass
+    assert tracing.tracing_enabled()
+    assert len(list(trace_dir.glob("render_video_file-*.otlp.json"))) == 1
+
+
+def test_sharded_job_passes_its_trace_to_shard_workers(trace_dir, monkeypatch, tmp_path):
+    from src.aegisai.pipeline import sharded_runner
+    from src.aegisai.pipeline.use_cases import VIDEO_FILE_AUDIO_VIDEO
+
+    src = tmp_path / "in.mp4"
+    src.write_bytes(b"x")
+    seen = []
+    monkeypatch.setattr(sharded_runner, "probe_duration", lambda p: 600.0)
+    monkeypatch.setattr(sharded_runner, "probe_keyframes", lambda p: [i * 2.0 for i in range(301)])
+    monkeypatch.setattr(sharded_runner, "extract_subtitles_from_video", lambda *a: False)
+    monkeypatch.setattr(sharded_runner, "split_video", lambda src, cuts, out: [f"{out}/s{i}.mp4" for i in range(3)])
+    monkeypatch.setattr(sharded_runner, "concat_videos", lambda paths, output, work: None)
+    monkeypatch.setattr(sharded_runner, "analyze_video_file", lambda cfg, path, trace_context=None: (
+        seen.append(trace_context) or {"audio_intervals": [], "video_intervals": [], "stage_timings": {}}
+    ))
+    monkeypatch.setattr(sharded_runner, "render_video_file", lambda *a, trace_context=None: seen.append(trace_context))
+
+    sharded_runner.run_sharded_file_job(VIDEO_FILE_AUDIO_VIDEO, str(src), str(tmp_path / "out.mp4"), shards=3, executor="thread")
+
+    job = json.loads(next(trace_dir.glob("sharded_job-*.otlp.json")).read_text())
+    root = job["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    root = next(s for s in root if s["name"] == "sharded_job")
+    assert len(seen) == 6 and set(seen) == {(root["traceId"], root["spanId"], str(trace_dir))}
@@ -0,0 +1,74 @@
+from src.aegisai.audio.transcript_cache import TranscriptCache, make_cache_key
+from src.aegisai.moderation.metrics import get_metrics_collector
+
+RESULT = {"transcripts": ["hello"], "words": [{"word": "hello", "start": 0.1, "end": 0.4}]}
+
+
+def test_key_depends_on_audio_and_config():
+    a = make_cache_key(b"\x00\x01" * 10, "cfg-a")
+    assert a == make_cache_key(memoryview(b"\x00\x01" * 10), "cfg-a")
+    assert a != make_cache_key(b"\x00\x01" * 10, "cfg-b")
+    assert a != make_cache_key(b"\x00\x02" * 10, "cfg-a")
+
+
+def test_lru_eviction_and_counters():
+    cache = TranscriptCache(path=None, max_entries=2)
+    before = get_metrics_collector().get_counters()
+
+    cache.put("a", RESULT)
+    cache.put("b", RESULT)
+    assert cache.get("a") == RESULT   # refreshes "a"
+    cache.put("c", RESULT)            # evicts "b"
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+    after = get_metrics_collector().get_counters()
+    assert after["transcript_cache.hit"] - before.get("transcript_cache.hit", 0) == 1
+    assert after["transcript_cache.miss"] - before.get("transcript_cache.miss", 0) == 1
+
+
+def test_persistent_store_survives_new_instance(tmp_path):
+    path = str(tmp_path / "cache" / "transcripts.sqlite3")
+    cache = TranscriptCache(path=path)
+    cache.put("k", RESULT)
+    cache.close()
+
+    reopened = TranscriptCache(path=path)
+    assert reopened.get("k") == RESULT
+    reopened.close()
+
+
+def test_persistent_store_evicts_oldest_rows_beyond_cap(tmp_path):
+    path = str(tmp_path / "transcripts.sqlite3")
+    cache = TranscriptCache(path=path, max_entries=1, max_rows=10)
+    for i in range(25):
+        cache.put(f"k{i}", RESULT)
+    assert cache.stored_rows() <= 10
+
+    # k0 was evicted from both tiers; the newest key is still on disk.
+    assert cache.get("k0") is None
+    cache.put("other", RESULT)       # pushes k24 out of the 1-entry LRU
+    assert cache.get("k24") == RESULT
+    cache.close()
+
+
+def test_store_reads_from_many_threads(tmp_path):
+    import threading
+
+    cache = TranscriptCache(path=str(tmp_path / "t.sqlite3"), max_entries=1)
+    for i in range(20):
+        cache.put(f"k{i}", RESULT)
+    misses = []
+
+    def reader(offset):
+        for i in range(20):
+            if cache.get(f"k{(i + offset) % 20}") != RESULT:
+                misses.append(i)
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    cache.close()
+    assert misses == []
@@ -0,0 +1,69 @@
+import numpy as np
+
+from src.aegisai.audio.audio_source import AudioChunk
+from src.aegisai.audio.vad import EnergyVAD, VadStats, speech_spans
+
+SR = 16000
+
+
+def _pcm(x):
+    return (np.clip(x, -1, 1) * 32767).astype(np.int16).tobytes()
+
+
+def _voice(seconds=3.0):
+    t = np.arange(int(SR * seconds)) / SR
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, 1) ** 2  # ~4 syllables/s
+    harmonics = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 15))
+    return 0.1 * harmonics * envelope
+
+
+def test_energy_vad_rejects_non_speech():
+    rng = np.random.default_rng(0)
+    t = np.arange(SR * 3) / SR
+    vad = EnergyVAD()
+    assert not vad.has_speech(_pcm(np.zeros(SR * 3)), SR)
+    assert not vad.has_speech(_pcm(rng.normal(0, 0.003, SR * 3)), SR)   # room tone
+    assert not vad.has_speech(_pcm(rng.normal(0, 0.2, SR * 3)), SR)     # broadband noise
+    assert not vad.has_speech(_pcm(0.3 * np.sin(2 * np.pi * 440 * t)), SR)  # sustained tone
+
+
+def test_energy_vad_keeps_speech_like_audio():
+    rng = np.random.default_rng(1)
+    t = np.arange(SR * 3) / SR
+    vad = EnergyVAD()
+    assert vad.has_speech(_pcm(_voice() + rng.normal(0, 0.003, SR * 3)), SR)
+    assert vad.has_speech(_pcm(_voice() + 0.1 * np.sin(2 * np.pi * 220 * t)), SR)
+
+
+def test_vad_stats_skip_ratio():
+    stats = VadStats()
+    stats.record(5.0, skipped=True)
+    stats.record(5.0, skipped=False)
+    stats.record(2.0, skipped=True)
+    assert stats.skip_ratio == 2 / 3
+    assert stats.skipped_seconds == 7.0
+
+
+def test_speech_spans_cover_only_the_voiced_part():
+    rng = np.random.default_rng(2)
+    silence = rng.normal(0, 0.003, SR * 10)
+    audio = np.concatenate([silence, _voice(2.0), silence])
+    spans = speech_spans(_pcm(audio), SR)
+    assert len(spans) == 1
+    start, end = spans[0]
+    assert 9.5 <= start <= 10.1 and 11.9 <= end <= 12.5
+    assert speech_spans(_pcm(silence), SR) == []
+
+
+def test_worker_fallback_mutes_speech_spans_not_the_whole_planned_chunk():
+    from src.aegisai.audio.workers import _fallback_intervals
+
+    rng = np.random.default_rng(3)
+    silence = rng.normal(0, 0.003, SR * 20)
+    voiced = AudioChunk(0, 100.0, 42.0, memoryview(_pcm(np.concatenate([silence, _voice(2.0), silence]))), SR)
+    [(start, end)] = _fallback_intervals(voiced, 100.0, 42.0)
+    assert 119.5 <= start and end <= 122.5
+
+    quiet = AudioChunk(1, 142.0, 42.0, memoryview(_pcm(silence)), SR)
+    # no span to narrow it down: fail closed and mute the whole chunk
+    assert _fallback_intervals(quiet, 142.0, 42.0) == [(142.0, 184.0)]